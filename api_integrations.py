@@ -2,123 +2,468 @@
 TCG Scan - API Integrations
 Handles communication with external card databases and price APIs
 """
+import random
+import re
 import requests
+import threading
 import time
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
 import config
+import http_client
 from logger import get_logger, PerformanceLogger
+from scryfall_cache import ScryfallResponseCache, get_scryfall_cache
 
 # Initialize logger for this module
 logger = get_logger('api')
 
+PRIORITY_INTERACTIVE = 0  # Scans and user-facing lookups
+PRIORITY_BACKGROUND = 1  # Imports, price updates and other workers
+
+_priority = threading.local()
+
+
+def current_priority() -> int:
+    """Priority of Scryfall calls made by the current thread"""
+    return getattr(_priority, 'value', PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """Mark Scryfall calls made by the current thread as background work (interactive calls go first)"""
+    previous = current_priority()
+    _priority.value = PRIORITY_BACKGROUND
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or an HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class RateLimiter:
-    """Simple rate limiter for API calls"""
-    def __init__(self, calls_per_second: int):
+    """
+    Token-bucket rate limiter, safe to share between threads.
+    
+    Up to burst calls go through at once, then calls_per_second. Waiting
+    background threads (see background_priority) let interactive ones go first.
+    throttle() pauses every caller, e.g. after a 429 response.
+    """
+    def __init__(self, calls_per_second: float, burst: int = 1):
         self.calls_per_second = calls_per_second
-        self.last_call = 0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 0}
+        self._cond = threading.Condition()
+        self._stats = {'calls': 0, 'waited_calls': 0, 'wait_seconds': 0.0, 'throttled': 0,
+                       'background_calls': 0}
         
-    def wait(self):
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.calls_per_second)
+        self._updated = now
+        
+    def wait(self, priority: int = None):
         """Wait if necessary to respect rate limit"""
-        now = time.time()
-        time_since_last = now - self.last_call
-        min_interval = 1.0 / self.calls_per_second
+        if priority is None:
+            priority = current_priority()
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    ready_at = max(self._paused_until, now + max(0.0, 1 - self._tokens) / self.calls_per_second)
+                    yield_to_interactive = priority != PRIORITY_INTERACTIVE and self._waiting[PRIORITY_INTERACTIVE]
+                    if ready_at <= now and not yield_to_interactive:
+                        self._tokens -= 1
+                        break
+                    # Background callers behind interactive ones sleep until notified
+                    self._cond.wait(None if yield_to_interactive else ready_at - now)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+            
+            waited = time.monotonic() - started
+            self._stats['calls'] += 1
+            if priority != PRIORITY_INTERACTIVE:
+                self._stats['background_calls'] += 1
+            if waited > 0.001:
+                self._stats['waited_calls'] += 1
+                self._stats['wait_seconds'] += waited
+    
+    def throttle(self, seconds: float):
+        """Pause all callers for seconds (the server asked us to slow down)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._stats['throttled'] += 1
+            self._cond.notify_all()
+    
+    def get_stats(self) -> Dict:
+        """Call, wait and throttle counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+            stats['waiting'] = sum(self._waiting.values())
+            stats['paused_seconds'] = round(max(0.0, self._paused_until - time.monotonic()), 3)
+            stats['calls_per_second'] = self.calls_per_second
+            stats['burst'] = self.burst
+            return stats
+
+
+# Every Scryfall client in the process shares one request budget
+_limiter_instance = None
+_limiter_lock = threading.Lock()
+
+
+def get_scryfall_rate_limiter() -> RateLimiter:
+    """Get or create the process-wide Scryfall RateLimiter instance."""
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = RateLimiter(config.SCRYFALL_RATE_LIMIT, burst=config.SCRYFALL_RATE_BURST)
+    return _limiter_instance
+
+_SCRYFALL_ID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+
+
+def collection_identifier(card_id: Optional[str], set_code: str = None,
+                          collector_number: str = None) -> Optional[Dict]:
+    """/cards/collection identifier of a stored card: its Scryfall id, else set + collector number"""
+    if card_id and _SCRYFALL_ID.match(card_id):
+        return {'id': card_id.lower()}
+    if set_code and collector_number:
+        return {'set': set_code.lower(), 'collector_number': collector_number}
+    return None
+
+
+def identifier_key(identifier: Dict) -> tuple:
+    """Hashable key of a collection identifier (matches the cards Scryfall returns for it)"""
+    if 'id' in identifier:
+        return ('id', identifier['id'])
+    return ('set', identifier.get('set', '').lower(), identifier.get('collector_number'))
+
+
+class _Flight:
+    """One in-flight call and its outcome"""
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one
+    execution and all receive its result (or its exception).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats = {'calls': 0, 'executed': 0, 'coalesced': 0}
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the identical call already running"""
+        with self._lock:
+            self._stats['calls'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats['executed'] += 1
+            else:
+                self._stats['coalesced'] += 1
         
-        if time_since_last < min_interval:
-            time.sleep(min_interval - time_since_last)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
         
-        self.last_call = time.time()
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+    
+    def get_stats(self) -> Dict:
+        """Call counters; coalesced calls are requests (and rate limit slots) saved"""
+        with self._lock:
+            return {
+                **self._stats,
+                'in_flight': len(self._flights),
+                'coalesced_rate': round(self._stats['coalesced'] / self._stats['calls'], 3)
+                if self._stats['calls'] else 0.0,
+            }
+
+
+# Every Scryfall client in the process coalesces into the same flights
+_single_flight_instance = None
+_single_flight_lock = threading.Lock()
+
+
+def get_scryfall_single_flight() -> SingleFlight:
+    """Get or create the process-wide Scryfall SingleFlight instance."""
+    global _single_flight_instance
+    if _single_flight_instance is None:
+        with _single_flight_lock:
+            if _single_flight_instance is None:
+                _single_flight_instance = SingleFlight()
+    return _single_flight_instance
+
 
 class ScryfallAPI:
     """Scryfall API client for Magic: The Gathering cards"""
     
-    def __init__(self):
+    def __init__(self, cache: ScryfallResponseCache = None):
         self.base_url = config.SCRYFALL_API_BASE
-        self.rate_limiter = RateLimiter(config.SCRYFALL_RATE_LIMIT)
+        self.rate_limiter = get_scryfall_rate_limiter()
+        self.cache = cache or get_scryfall_cache()
+        self.single_flight = get_scryfall_single_flight()
         logger.debug("ScryfallAPI initialized")
+    
+    def _get(self, url: str, endpoint: str = 'api', **kwargs) -> requests.Response:
+        """Rate-limited GET through the shared HTTP session (see _send)"""
+        return self._send(http_client.get, url, endpoint, **kwargs)
+    
+    def _post(self, url: str, endpoint: str = 'api', **kwargs) -> requests.Response:
+        """Rate-limited POST through the shared HTTP session (see _send)"""
+        return self._send(http_client.post, url, endpoint, **kwargs)
+    
+    def _send(self, send: Callable, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Rate-limited request. A 429 response pauses every Scryfall caller for
+        the Retry-After delay (or an exponential backoff), with jitter, then
+        retries.
+        """
+        for attempt in range(config.SCRYFALL_MAX_RETRIES + 1):
+            self.rate_limiter.wait()
+            response = send(url, endpoint=endpoint, **kwargs)
+            if response.status_code != 429 or attempt == config.SCRYFALL_MAX_RETRIES:
+                return response
+            
+            delay = retry_after_seconds(response.headers.get('Retry-After'))
+            if delay is None:
+                delay = config.SCRYFALL_BACKOFF_BASE * 2 ** attempt
+            delay = min(delay, config.SCRYFALL_BACKOFF_MAX) * random.uniform(1, 1 + config.SCRYFALL_BACKOFF_JITTER)
+            logger.warning(f"Scryfall: Rate limited (429) | url={url} | retry_in={delay:.2f}s | attempt={attempt + 1}")
+            self.rate_limiter.throttle(delay)
         
-    def search_card_by_name(self, name: str) -> Optional[Dict]:
-        """Search for a card by exact or fuzzy name"""
-        logger.debug(f"Scryfall: Searching card by name | name={name}")
-        self.rate_limiter.wait()
+    def _get_card_json(self, url: str, params: Dict = None, fresh_prices: bool = False) -> Optional[Dict]:
+        """
+        Card lookup through the response cache (see scryfall_cache): the card
+        JSON, or None when Scryfall has no such card or the request failed.
+        fresh_prices applies the price TTL instead of the metadata TTL; an entry
+        older than the price TTL is served without its prices.
+        Identical concurrent lookups share one request (see SingleFlight).
+        """
+        key = self.cache.key(url, params)
+        return self.single_flight.do((key, fresh_prices),
+                                     lambda: self._fetch_card_json(key, url, params, fresh_prices))
+    
+    def _fetch_card_json(self, key: str, url: str, params: Dict, fresh_prices: bool) -> Optional[Dict]:
+        """Cache lookup, then conditional or plain request (see _get_card_json)"""
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry, fresh_prices):
+            self.cache.record_hit(entry)
+            if self.cache.prices_expired(entry):
+                # Served under the metadata TTL: old prices must not pass for current ones
+                return {k: v for k, v in entry.data.items() if k != 'prices'}
+            return entry.data
+        
+        response = self._get(url, params=params, headers=entry.validators() if entry else None, endpoint='api')
+        if response.status_code == 304 and entry is not None:
+            self.cache.renew(entry)
+            return entry.data
         
+        self.cache.record_miss()
+        if response.status_code == 200:
+            data = response.json()
+            self.cache.put(key, 200, data, response.headers, fresh_prices=fresh_prices)
+            return data
+        if response.status_code == 404:
+            self.cache.put(key, 404, None)
+        logger.debug(f"Scryfall: No card | url={url} | params={params} | status={response.status_code}")
+        return None
+    
+    def search_card_by_name(self, name: str, fresh_prices: bool = False) -> Optional[Dict]:
+        """Search for a card by exact or fuzzy name (fresh_prices: the caller needs current prices)"""
+        logger.debug(f"Scryfall: Searching card by name | name={name}")
         try:
-            response = requests.get(
-                f"{self.base_url}/cards/named",
-                params={'fuzzy': name},
-                timeout=10
-            )
+            data = self._get_card_json(f"{self.base_url}/cards/named", params={'fuzzy': name},
+                                       fresh_prices=fresh_prices)
             
-            if response.status_code == 200:
+            if data is not None:
                 logger.debug(f"Scryfall: Card found | name={name}")
-                return self._parse_card_data(response.json())
-            logger.debug(f"Scryfall: Card not found | name={name} | status={response.status_code}")
+                return self._parse_card_data(data)
+            logger.debug(f"Scryfall: Card not found | name={name}")
             return None
         except Exception as e:
             logger.error(f"Scryfall API error: {e}", exc_info=True)
             return None
     
-    def get_card_by_set_and_number(self, set_code: str, collector_number: str) -> Optional[Dict]:
-        """Get specific card by set and collector number"""
+    def get_card_by_set_and_number(self, set_code: str, collector_number: str,
+                                   fresh_prices: bool = False) -> Optional[Dict]:
+        """Get specific card by set and collector number (fresh_prices: the caller needs current prices)"""
         logger.debug(f"Scryfall: Getting card | set={set_code} | number={collector_number}")
-        self.rate_limiter.wait()
-        
         try:
-            response = requests.get(
-                f"{self.base_url}/cards/{set_code}/{collector_number}",
-                timeout=10
-            )
+            data = self._get_card_json(f"{self.base_url}/cards/{set_code}/{collector_number}",
+                                       fresh_prices=fresh_prices)
             
-            if response.status_code == 200:
+            if data is not None:
                 logger.debug(f"Scryfall: Card retrieved | set={set_code} | number={collector_number}")
-                return self._parse_card_data(response.json())
+                return self._parse_card_data(data)
             return None
         except Exception as e:
             logger.error(f"Scryfall API error: {e}", exc_info=True)
             return None
     
     def search_cards(self, query: str, page: int = 1) -> List[Dict]:
-        """Search cards with Scryfall query syntax - returns all pages"""
+        """Search cards with Scryfall query syntax - returns all pages (from page on)"""
         logger.debug(f"Scryfall: Searching cards | query={query}")
         
         all_cards = []
-        has_more = True
-        current_page = 1
+        for result in self.iter_search_cards(query, page=page):
+            all_cards.extend(result['cards'])
         
-        while has_more:
-            self.rate_limiter.wait()
-            
+        logger.info(f"Scryfall: Found {len(all_cards)} total cards for query={query}")
+        return all_cards
+    
+    def iter_search_cards(self, query: str, page: int = 1, next_page: str = None) -> Iterator[Dict]:
+        """
+        Search cards page by page, yielding each page as soon as it arrives:
+        {'page': n, 'cards': [parsed cards], 'has_more': bool, 'next_page': url, 'total_cards': int}
+        
+        Resume an interrupted search with page=last['page'] + 1 or next_page=last['next_page'].
+        """
+        for data in self.iter_search_pages(query, page=page, next_page=next_page):
             try:
-                response = requests.get(
-                    f"{self.base_url}/cards/search",
-                    params={'q': query, 'page': current_page},
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    cards = [self._parse_card_data(card) for card in data.get('data', [])]
-                    all_cards.extend(cards)
-                    has_more = data.get('has_more', False)
-                    current_page += 1
-                    logger.debug(f"Scryfall: Page {current_page - 1} fetched | cards_so_far={len(all_cards)}")
-                else:
-                    has_more = False
+                cards = [self._parse_card_data(card) for card in data.get('data', [])]
             except Exception as e:
                 logger.error(f"Scryfall API error: {e}", exc_info=True)
-                has_more = False
+                return
+            yield {
+                'page': data['page'],
+                'cards': cards,
+                'has_more': data.get('has_more', False),
+                'next_page': data.get('next_page'),
+                'total_cards': data.get('total_cards'),
+            }
+    
+    def iter_search_pages(self, query: str, page: int = 1, next_page: str = None) -> Iterator[Dict]:
+        """
+        Search cards page by page, yielding raw result pages (see fetch_search_page)
+        with their page number added under 'page'.
         
-        logger.info(f"Scryfall: Found {len(all_cards)} total cards for query={query}")
-        return all_cards
+        Stops after the last page, or early when a page can't be fetched; a last
+        yielded page with has_more=True means the search is incomplete.
+        """
+        while True:
+            data = self.fetch_search_page(query, page, next_page=next_page)
+            if data is None:
+                return
+            data['page'] = page
+            logger.debug(f"Scryfall: Page {page} fetched | query={query} | cards={len(data.get('data', []))}")
+            yield data
+            if not data.get('has_more'):
+                return
+            page += 1
+            next_page = data.get('next_page')
+    
+    def fetch_search_page(self, query: str, page: int = 1, next_page: str = None) -> Optional[Dict]:
+        """
+        Fetch one page of search results, unparsed:
+        {'data': [raw card objects], 'has_more': bool, 'next_page': url, 'total_cards': int, ...}.
+        next_page (the URL from the previous page) takes precedence over query/page.
+        Returns None when the query has no (more) results or the request fails.
+        """
+        try:
+            if next_page:
+                response = self._get(next_page, endpoint='search')
+            else:
+                response = self._get(
+                    f"{self.base_url}/cards/search",
+                    params={'q': query, 'page': page},
+                    endpoint='search'
+                )
+            
+            if response.status_code == 200:
+                return response.json()
+            logger.debug(f"Scryfall: No search page | query={query} | page={page} | status={response.status_code}")
+            return None
+        except Exception as e:
+            logger.error(f"Scryfall API error: {e}", exc_info=True)
+            return None
+    
+    def iter_card_collection(self, identifiers: List[Dict]) -> Iterator[Dict]:
+        """
+        Look up many cards with POST /cards/collection, SCRYFALL_COLLECTION_BATCH_SIZE
+        identifiers (see collection_identifier) per request. Yields one
+        fetch_card_collection result per batch.
+        """
+        batch_size = config.SCRYFALL_COLLECTION_BATCH_SIZE
+        for start in range(0, len(identifiers), batch_size):
+            yield self.fetch_card_collection(identifiers[start:start + batch_size])
+    
+    def fetch_card_collection(self, batch: List[Dict]) -> Dict:
+        """
+        One POST /cards/collection request (at most SCRYFALL_COLLECTION_BATCH_SIZE identifiers):
+        {'found': [(identifier, parsed card)], 'not_found': [identifiers], 'failed': [identifiers]}
+        ('failed': the whole batch when its request failed).
+        """
+        result = {'found': [], 'not_found': [], 'failed': []}
+        try:
+            response = self._post(f"{self.base_url}/cards/collection", json={'identifiers': batch},
+                                  endpoint='search')
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            data = response.json()
+            by_key = {identifier_key(identifier): identifier for identifier in batch}
+            for card in data.get('data', []):
+                identifier = by_key.get(('id', card.get('id'))) or by_key.get(
+                    ('set', (card.get('set') or '').lower(), card.get('collector_number')))
+                if identifier is not None:
+                    result['found'].append((identifier, self._parse_card_data(card)))
+            result['not_found'] = data.get('not_found', [])
+        except Exception as e:
+            logger.error(f"Scryfall collection lookup failed | cards={len(batch)} | error={e}")
+            result['failed'] = batch
+        logger.debug(f"Scryfall: Collection batch | found={len(result['found'])} | "
+                     f"not_found={len(result['not_found'])} | failed={len(result['failed'])}")
+        return result
     
     def get_set_card_count(self, set_code: str) -> int:
         """Get the total number of cards in a set"""
         logger.debug(f"Scryfall: Getting set card count | set={set_code}")
-        self.rate_limiter.wait()
-        
         try:
-            response = requests.get(
+            response = self._get(
                 f"{self.base_url}/sets/{set_code}",
-                timeout=10
+                endpoint='api'
             )
             
             if response.status_code == 200:
@@ -135,12 +480,10 @@ class ScryfallAPI:
     def get_all_sets(self) -> List[Dict]:
         """Get all Magic: The Gathering sets"""
         logger.debug("Scryfall: Getting all sets")
-        self.rate_limiter.wait()
-        
         try:
-            response = requests.get(
+            response = self._get(
                 f"{self.base_url}/sets",
-                timeout=30
+                endpoint='search'
             )
             
             if response.status_code == 200:
@@ -154,6 +497,28 @@ class ScryfallAPI:
             logger.error(f"Scryfall API error: {e}", exc_info=True)
             return []
     
+    def get_bulk_data_uri(self, bulk_type: str = None) -> Optional[str]:
+        """Download URI of a Scryfall bulk data file (e.g. 'default_cards')"""
+        bulk_type = bulk_type or config.SCRYFALL_BULK_DATA_TYPE
+        logger.debug(f"Scryfall: Getting bulk data info | type={bulk_type}")
+        try:
+            response = self._get(
+                f"{self.base_url}/bulk-data",
+                endpoint='search'
+            )
+            
+            if response.status_code == 200:
+                for item in response.json().get('data', []):
+                    if item.get('type') == bulk_type:
+                        logger.info(f"Scryfall: Bulk data {bulk_type} | size={item.get('size')} | "
+                                    f"updated_at={item.get('updated_at')}")
+                        return item.get('download_uri')
+                logger.warning(f"Scryfall: Unknown bulk data type {bulk_type}")
+            return None
+        except Exception as e:
+            logger.error(f"Scryfall API error: {e}", exc_info=True)
+            return None
+    
     def _parse_card_data(self, data: Dict) -> Dict:
         """Parse Scryfall card data to our format"""
         # Handle double-faced cards
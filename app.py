@@ -2,21 +2,33 @@
 TCG Scan - Main Flask Application
 REST API and WebSocket server for the TCG Scan system
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
+import io
 import os
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from pathlib import Path
 import threading
 import time
 
 import config
 from database import init_db, get_db, Card, ScannedCard, Collection, SortingConfig, PriceHistory
 from card_recognition import CardRecognitionEngine, download_and_hash_card_image
+from recognition_cache import get_recognition_cache
+from local_catalog import get_local_catalog
 from sorting_engine import SortingEngine
 from price_tracker import PriceTracker
-from api_integrations import CardAPIManager
+from api_integrations import CardAPIManager, background_priority, get_scryfall_rate_limiter, get_scryfall_single_flight
+from hash_index import get_hash_index, record_card_hash
+from hash_pipeline import HashPipeline
+from bulk_import import BulkImporter, download_bulk_data
+from card_writer import CardWriter
+from catalog_sync import resync_catalog
+from import_pipeline import ImportPipeline
+from image_store import get_image_store, image_variant_url
+from scryfall_cache import get_scryfall_cache
 from logger import get_logger, log_api_call, PerformanceLogger
 
 # Initialize logger for this module
@@ -34,13 +46,17 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode=config.SOCKETIO_AS
 
 # Initialize components
 logger.info("Initializing application components...")
-recognition_engine = CardRecognitionEngine()
+recognition_engine = CardRecognitionEngine(result_cache=get_recognition_cache())
 sorting_engine = SortingEngine()
 price_tracker = PriceTracker()
 api_manager = CardAPIManager()
 
 # Initialize database
 init_db()
+
+# Load perceptual hashes once; writers below keep the index up to date
+get_hash_index().load()
+get_local_catalog().load()
 logger.info("Application initialization complete")
 
 # ============================================================================
@@ -79,7 +95,8 @@ class PriceUpdateScheduler:
         while self.running:
             try:
                 logger.info("Starting scheduled price update...")
-                stats = price_tracker.update_all_prices()
+                with background_priority():
+                    stats = price_tracker.update_all_prices()
                 self.last_update = datetime.now(datetime.UTC) if hasattr(datetime, 'UTC') else datetime.utcnow()
                 
                 # Notify connected clients
@@ -109,11 +126,12 @@ class PriceUpdateScheduler:
 
 
 class HashDownloadWorker:
-    """Background worker to download and compute image hashes for cards"""
+    """Background worker to download and compute image hashes for cards (see hash_pipeline)"""
     
     def __init__(self):
         self.running = False
         self.thread = None
+        self.pipeline = None
         self.progress = {'total': 0, 'processed': 0, 'current_card': None}
         self.last_run = None
         logger.info("HashDownloadWorker initialized")
@@ -126,86 +144,57 @@ class HashDownloadWorker:
         
         self.running = True
         self.progress = {'total': 0, 'processed': 0, 'current_card': None, 'set_code': set_code}
+        self.pipeline = HashPipeline(on_progress=self._on_progress)
         self.thread = threading.Thread(target=self._run, args=(set_code,), daemon=True)
         self.thread.start()
         logger.info(f"Hash download worker started | set_code={set_code}")
         return True
     
     def stop(self):
-        """Stop the background thread"""
+        """Stop the background thread (hashes downloaded so far are committed)"""
         self.running = False
+        if self.pipeline:
+            self.pipeline.stop()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info("Hash download worker stopped")
     
+    def _on_progress(self, stats: dict):
+        self.progress.update(stats)
+        socketio.emit('hash_download_progress', stats)
+    
     def _run(self, set_code: str = None):
         """Background thread to download hashes"""
-        db = get_db()
         try:
-            # Get cards without hash
-            query = db.query(Card).filter(Card.image_hash == None)
-            if set_code:
-                query = query.filter(Card.set_code == set_code.lower())
-            
-            cards = query.all()
-            self.progress['total'] = len(cards)
-            
-            logger.info(f"Hash download: Processing {len(cards)} cards without hash")
+            total = self.pipeline.count_pending(set_code)
+            self.progress['total'] = total
+            logger.info(f"Hash download: Processing {total} cards without hash")
             
             # Emit start event
             socketio.emit('hash_download_started', {
-                'total': len(cards),
+                'total': total,
                 'set_code': set_code
             })
             
-            for idx, card in enumerate(cards):
-                if not self.running:
-                    logger.info("Hash download stopped by user")
-                    break
-                
-                try:
-                    # Download and hash image
-                    card_data = {'image_url': card.image_url}
-                    image_hash = download_and_hash_card_image(card_data)
-                    
-                    if image_hash:
-                        card.image_hash = image_hash
-                        db.commit()
-                    
-                    self.progress['processed'] = idx + 1
-                    self.progress['current_card'] = card.name
-                    
-                    # Emit progress every 10 cards
-                    if (idx + 1) % 10 == 0 or idx == len(cards) - 1:
-                        socketio.emit('hash_download_progress', {
-                            'processed': idx + 1,
-                            'total': len(cards),
-                            'percent': round((idx + 1) / len(cards) * 100, 1),
-                            'current_card': card.name
-                        })
-                        logger.debug(f"Hash download progress: {idx + 1}/{len(cards)}")
-                    
-                    # Rate limit: ~100ms delay between downloads
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"Error hashing card {card.name}: {e}")
-                    continue
+            stats = self.pipeline.run(set_code)
+            self.progress.update(stats)
             
             self.last_run = datetime.now()
-            logger.info(f"Hash download complete | processed={self.progress['processed']}/{self.progress['total']}")
+            logger.info(f"Hash download complete | processed={stats['processed']}/{stats['total']}")
             
             # Emit completion
             socketio.emit('hash_download_complete', {
-                'processed': self.progress['processed'],
-                'total': self.progress['total']
+                'processed': stats['processed'],
+                'total': stats['total'],
+                'hashed': stats['hashed'],
+                'failed': stats['failed'],
+                'rate': stats['rate']
             })
             
         except Exception as e:
             logger.error(f"Hash download error: {e}", exc_info=True)
             socketio.emit('hash_download_error', {'error': str(e)})
         finally:
-            db.close()
             self.running = False
     
     def get_status(self):
@@ -218,97 +207,96 @@ class HashDownloadWorker:
 
 
 class FullImportWorker:
-    """Background worker to import ALL cards from Scryfall"""
+    """
+    Background worker to import ALL cards from Scryfall.
+
+    mode='sets' searches every set through the API; mode='bulk' streams one
+    Scryfall bulk data file (a local path, or downloaded once) - see bulk_import.
+    """
+    
+    MODES = ('sets', 'bulk')
     
     def __init__(self):
         self.running = False
         self.thread = None
+        self.importer = None
         self.progress = {'total_sets': 0, 'processed_sets': 0, 'current_set': None, 'total_cards': 0}
         self.stop_event = threading.Event()
         logger.info("FullImportWorker initialized")
         
-    def start(self):
+    def start(self, mode: str = 'sets', bulk_path: str = None):
         """Start full import in background"""
         if self.running:
             return False
             
         self.running = True
         self.stop_event.clear()
-        self.progress = {'total_sets': 0, 'processed_sets': 0, 'current_set': None, 'total_cards': 0}
-        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.progress = {'mode': mode, 'total_sets': 0, 'processed_sets': 0, 'current_set': None, 'total_cards': 0,
+                         'updated_cards': 0}
+        if mode == 'bulk':
+            self.importer = BulkImporter(on_progress=self._on_progress)
+            self.thread = threading.Thread(target=self._run_bulk, args=(bulk_path,), daemon=True)
+        else:
+            self.importer = ImportPipeline(api=api_manager.scryfall, on_progress=self._on_progress)
+            self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
+        logger.info(f"Full import started | mode={mode} | bulk_path={bulk_path}")
         return True
         
     def stop(self):
         """Stop the background thread"""
         self.running = False
         self.stop_event.set()
+        if self.importer:
+            self.importer.stop()
         if self.thread:
             self.thread.join(timeout=5)
+    
+    def _on_progress(self, stats: dict):
+        self.progress.update(stats)
+        self.progress['total_cards'] = stats['inserted']
+        self.progress['updated_cards'] = stats['updated']
+        socketio.emit('full_import_progress', self.progress)
+    
+    def _run_bulk(self, bulk_path: str = None):
+        """Import from a Scryfall bulk data file (downloaded first unless a path is given or offline)"""
+        try:
+            if bulk_path:
+                path = Path(bulk_path)
+            elif config.OFFLINE_MODE:
+                path = config.SCRYFALL_BULK_DATA_PATH
+            else:
+                self.progress['current_set'] = 'Downloading bulk data...'
+                socketio.emit('full_import_progress', self.progress)
+                with background_priority():
+                    path = download_bulk_data(api=api_manager.scryfall, stop_event=self.stop_event)
+            if not path.is_file():
+                raise FileNotFoundError(f"Bulk data file not found: {path}")
+            
+            if not self.stop_event.is_set():
+                stats = self.importer.run(path)
+                self.progress.update(stats)
+                self.progress['total_cards'] = stats['inserted']
+                self.progress['updated_cards'] = stats['updated']
+            
+            logger.info("Full import complete")
+            socketio.emit('full_import_complete', self.progress)
+            
+        except Exception as e:
+            logger.error(f"Full import failed: {e}", exc_info=True)
+            socketio.emit('full_import_error', {'error': str(e)})
+        finally:
+            self.running = False
             
     def _run(self):
-        """Main import loop"""
-        db = None
+        """Import set by set through the Scryfall search API (see import_pipeline)"""
         try:
             logger.info("Starting full import...")
-            sets = api_manager.get_all_sets()
-            self.progress['total_sets'] = len(sets)
-            
-            db = get_db()
+            stats = self.importer.run()
+            self.progress.update(stats)
+            self.progress['total_cards'] = stats['inserted']
+            self.progress['updated_cards'] = stats['updated']
             
-            for idx, set_data in enumerate(sets):
-                if self.stop_event.is_set():
-                    break
-                    
-                set_code = set_data.get('code')
-                set_name = set_data.get('name')
-                self.progress['current_set'] = f"{set_name} ({set_code.upper()})"
-                self.progress['processed_sets'] = idx + 1
-                
-                # Emit progress
-                socketio.emit('full_import_progress', self.progress)
-                
-                # Import set logic
-                try:
-                    # Skip if set is empty or digital only? No, keep all.
-                    # Use existing bulk import logic but simplified
-                    cards_data = api_manager.scryfall.search_cards(f'set:{set_code}')
-                    
-                    batch_count = 0
-                    for card_data in cards_data:
-                        if self.stop_event.is_set():
-                            break
-                            
-                        # Check if exists
-                        # Optimization: Check existence in memory if possible, or just try/except integrity error
-                        # But checking one by one is slow. 
-                        # Better: Get all card_ids for this set from DB first
-                        
-                        existing = db.query(Card.card_id).filter(Card.card_id == card_data['id']).first()
-                        if existing:
-                            continue
-                            
-                        # Clean data
-                        card_data.pop('price_usd', None)
-                        card_data.pop('price_usd_foil', None)
-                        card_data.pop('price_eur', None)
-                        card_data.pop('price_eur_foil', None)
-                        card_data.pop('scryfall_id', None)
-                        card_data.pop('id', None)
-                        
-                        card = Card(**card_data)
-                        db.add(card)
-                        self.progress['total_cards'] += 1
-                        batch_count += 1
-                        
-                    db.commit()
-                    logger.info(f"Imported set {set_code} | new_cards={batch_count}")
-                    
-                except Exception as e:
-                    logger.error(f"Error importing set {set_code}: {e}")
-                    db.rollback()
-                    continue
-                    
             logger.info("Full import complete")
             socketio.emit('full_import_complete', self.progress)
             
@@ -316,15 +304,17 @@ class FullImportWorker:
             logger.error(f"Full import failed: {e}", exc_info=True)
             socketio.emit('full_import_error', {'error': str(e)})
         finally:
-            if db:
-                db.close()
             self.running = False
             
     def get_status(self):
-        return {
+        status = {
             'running': self.running,
             'progress': self.progress
         }
+        if isinstance(self.importer, ImportPipeline):
+            # Live per-stage throughput (fetch / parse / write) of the set-by-set import
+            status['stages'] = self.importer.stage_stats()
+        return status
 
 
 # Initialize workers
@@ -421,8 +411,10 @@ def upload_scan():
                 db.add(scanned_card)
                 db.commit()
                 
-                # Save price history if available
-                if card_info.get('price_eur'):
+                # Save price history if available (prices of a local catalog hit
+                # are already in PriceHistory, see local_catalog.latest_prices)
+                record_prices = not card_info.get('price_recorded_at')
+                if record_prices and card_info.get('price_eur'):
                     try:
                         price_record = PriceHistory(
                             card_id=card_db_id,
@@ -436,7 +428,7 @@ def upload_scan():
                     except (ValueError, TypeError) as e:
                         logger.warning(f"Could not save EUR price: {e}")
                 
-                if card_info.get('price_usd'):
+                if record_prices and card_info.get('price_usd'):
                     try:
                         price_record = PriceHistory(
                             card_id=card_db_id,
@@ -486,49 +478,62 @@ def batch_scan():
     logger.info(f"Batch scan: Processing {len(files)} files | tcg={tcg}")
     
     results = []
+    saved = []  # (original filename, saved path)
     
     for file in files:
         if file and allowed_file(file.filename):
             try:
-                # Save file
                 filename = secure_filename(file.filename)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f"{timestamp}_{filename}"
                 filepath = os.path.join(config.UPLOAD_FOLDER, filename)
                 file.save(filepath)
-                
-                # Recognize
-                with PerformanceLogger(f"batch_recognize_{file.filename}"):
-                    result = recognition_engine.recognize_card(filepath, tcg)
-                
+                saved.append((file.filename, filepath))
+            except Exception as e:
+                logger.error(f"Batch scan error for {file.filename}: {e}", exc_info=True)
+                results.append({'error': str(e), 'filename': file.filename})
+    
+    # Recognize in the process pool; results arrive in completion order
+    with PerformanceLogger(f"batch_recognize_{len(saved)}_files"):
+        for result in recognition_engine.batch_recognize_parallel([path for _, path in saved]):
+            original_name, filepath = saved[result['index']]
+            result['filename'] = original_name
+            
+            try:
                 if result['success']:
                     # Save to database
                     db = get_db()
                     try:
-                        scanned_card = ScannedCard(
-                            card_id=result['card']['id'],
-                            confidence_score=result['confidence'],
-                            image_path=filepath
-                        )
-                        db.add(scanned_card)
-                        db.commit()
-                        result['scanned_id'] = scanned_card.id
-                        logger.debug(f"Batch scan: Card saved | card={result['card']['name']} | scanned_id={scanned_card.id}")
+                        card_info = result.get('card', {})
+                        scryfall_id = card_info.get('id') or card_info.get('card_id')
+                        card_db_id = db.query(Card.id).filter(Card.card_id == scryfall_id).scalar()
+                        if card_db_id:
+                            scanned_card = ScannedCard(
+                                card_id=card_db_id,
+                                confidence_score=result['confidence'],
+                                image_path=filepath
+                            )
+                            db.add(scanned_card)
+                            db.commit()
+                            result['scanned_id'] = scanned_card.id
+                            result['card']['db_id'] = card_db_id
+                            logger.debug(f"Batch scan: Card saved | card={card_info.get('name')} | scanned_id={scanned_card.id}")
+                        else:
+                            logger.warning(f"Batch scan: Card not in catalog, scan not saved | card={card_info.get('name')}")
                     finally:
                         db.close()
-                
-                results.append(result)
-                
-                # Emit progress
-                socketio.emit('batch_progress', {
-                    'current': len(results),
-                    'total': len(files),
-                    'latest': result
-                })
-                
             except Exception as e:
-                logger.error(f"Batch scan error for {file.filename}: {e}", exc_info=True)
-                results.append({'error': str(e), 'filename': file.filename})
+                logger.error(f"Batch scan save error for {original_name}: {e}", exc_info=True)
+                result['error'] = str(e)
+            
+            results.append(result)
+            
+            # Emit progress
+            socketio.emit('batch_progress', {
+                'current': len(results),
+                'total': len(files),
+                'latest': result
+            })
     
     success_count = sum(1 for r in results if r.get('success'))
     logger.info(f"Batch scan completed | total={len(results)} | success={success_count}")
@@ -618,8 +623,6 @@ def import_card_from_api():
         
         # Download and hash image
         image_hash = download_and_hash_card_image(card_data)
-        if image_hash:
-            card_data['image_hash'] = image_hash
         
         # Save to database
         db = get_db()
@@ -657,6 +660,8 @@ def import_card_from_api():
             
             card = Card(**card_data)
             db.add(card)
+            if image_hash:
+                record_card_hash(db, card, image_hash)
             db.commit()  # Commit to get card.id
             logger.info(f"New card saved to database | card_id={card.id} | name={card.name}")
             
@@ -739,75 +744,48 @@ def bulk_import_cards():
         
         logger.info(f"Bulk import: Set {set_code} has {total_cards} cards")
         
-        # Search for all cards in set
-        if tcg == 'mtg':
-            with PerformanceLogger(f"bulk_api_search_{set_code}"):
-                cards_data = api_manager.scryfall.search_cards(f'set:{set_code}')
-        else:
+        if tcg != 'mtg':
             logger.warning(f"Bulk import: Unsupported TCG | tcg={tcg}")
             return jsonify({'error': 'Bulk import only supported for MTG currently'}), 400
         
         db = get_db()
-        imported = 0
-        skipped = 0
-        total = len(cards_data)
-        batch_size = 50  # Commit every 50 cards for safety
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'conflicts': 0}
+        inserted_ids = []
+        total = 0
         
         try:
-            for idx, card_data in enumerate(cards_data):
-                # Check if exists
-                existing = db.query(Card).filter(Card.card_id == card_data['card_id']).first()
-                
-                if existing:
-                    skipped += 1
-                    # Emit progress for skipped cards too
+            # Write each result page as it arrives (one existence query + set-level
+            # insert/upsert statements per page) while the next page is fetched
+            with PerformanceLogger(f"bulk_api_search_{set_code}"), background_priority():
+                for result in api_manager.scryfall.iter_search_cards(f'set:{set_code}'):
+                    writer = CardWriter(db)
+                    for key, count in writer.write(result['cards']).items():
+                        counts[key] += count
+                    db.commit()
+                    inserted_ids.extend(writer.inserted_ids)
+                    total += len(result['cards'])
+                    
                     socketio.emit('import_progress', {
-                        'imported': imported,
-                        'skipped': skipped,
-                        'total': total,
-                        'current_card': card_data.get('name', 'Unknown')
+                        'imported': counts['inserted'],
+                        'updated': counts['updated'],
+                        'skipped': counts['unchanged'] + counts['skipped'],
+                        'total': total_cards,
+                        'current_card': None
                     })
-                    continue
-                
-                # Skip image hash download for speed (can be done later in background)
-                # This makes bulk import ~10x faster
-                if not skip_hash:
-                    image_hash = download_and_hash_card_image(card_data)
+            imported = counts['inserted']
+            skipped = counts['unchanged'] + counts['skipped']
+            
+            # Skip image hash download for speed (can be done later in background)
+            # This makes bulk import ~10x faster
+            if not skip_hash and inserted_ids:
+                for card in db.query(Card).filter(Card.card_id.in_(inserted_ids)):
+                    image_hash = download_and_hash_card_image({'card_id': card.card_id, 'image_url': card.image_url})
                     if image_hash:
-                        card_data['image_hash'] = image_hash
-                
-                # Save card name before removing price fields
-                card_name = card_data.get('name', 'Unknown')
-                
-                # Remove price fields that are not columns in Card model
-                card_data.pop('price_usd', None)
-                card_data.pop('price_usd_foil', None)
-                card_data.pop('price_eur', None)
-                card_data.pop('price_eur_foil', None)
-                # Remove duplicate/invalid ID fields (card_id is the correct one)
-                card_data.pop('scryfall_id', None)
-                card_data.pop('id', None)
-                
-                card = Card(**card_data)
-                db.add(card)
-                imported += 1
-                
-                # Commit in batches for safety
-                if imported % batch_size == 0:
-                    db.commit()
-                    logger.debug(f"Batch commit | imported={imported}")
-                
-                # Emit progress with total
-                socketio.emit('import_progress', {
-                    'imported': imported,
-                    'skipped': skipped,
-                    'total': total,
-                    'current_card': card_name
-                })
+                        record_card_hash(db, card, image_hash)
+                db.commit()
             
-            # Final commit
-            db.commit()
-            logger.info(f"Bulk import completed | set={set_code} | imported={imported} | skipped={skipped}")
+            logger.info(f"Bulk import completed | set={set_code} | imported={imported} | "
+                        f"updated={counts['updated']} | skipped={skipped} | conflicts={counts['conflicts']}")
             
             # Start background hash download if cards were imported
             if imported > 0:
@@ -817,7 +795,9 @@ def bulk_import_cards():
             return jsonify({
                 'message': f'Bulk import completed for set {set_code.upper()}. Hash download started in background.',
                 'imported': imported,
+                'updated': counts['updated'],
                 'skipped': skipped,
+                'conflicts': counts['conflicts'],
                 'total': total,
                 'hash_download_started': imported > 0
             })
@@ -831,11 +811,19 @@ def bulk_import_cards():
 
 @app.route('/api/cards/import-all', methods=['POST'])
 def start_full_import():
-    """Start importing all cards from Scryfall"""
+    """Start importing all cards from Scryfall (JSON body: mode 'sets' | 'bulk', optional bulk file path)"""
     if full_import_worker.running:
         return jsonify({'error': 'Full import already running'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'sets')
+    bulk_path = data.get('path')
+    if mode not in FullImportWorker.MODES:
+        return jsonify({'error': f'Unknown import mode: {mode}'}), 400
+    if bulk_path and not Path(bulk_path).is_file():
+        return jsonify({'error': f'Bulk data file not found: {bulk_path}'}), 400
         
-    full_import_worker.start()
+    full_import_worker.start(mode, bulk_path)
     return jsonify({'message': 'Full import started', 'status': full_import_worker.get_status()})
 
 @app.route('/api/cards/import-all/stop', methods=['POST'])
@@ -849,6 +837,23 @@ def get_full_import_status():
     """Get full import status"""
     return jsonify(full_import_worker.get_status())
 
+@app.route('/api/cards/resync', methods=['POST'])
+def resync_cards():
+    """Refresh stored MTG cards and prices from Scryfall in /cards/collection batches (optional set_code, max_cards)"""
+    data = request.get_json(silent=True) or {}
+    set_code = data.get('set_code')
+    max_cards = data.get('max_cards')
+    
+    logger.info(f"Catalog re-sync request | set={set_code} | max_cards={max_cards}")
+    
+    try:
+        with PerformanceLogger("catalog_resync"):
+            stats = resync_catalog(set_code, max_cards, api_manager=api_manager)
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Catalog re-sync error: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================================
 # COLLECTION MANAGEMENT ENDPOINTS
 # ============================================================================
@@ -1128,7 +1133,7 @@ def update_prices():
     logger.info(f"Price update request | tcg={tcg} | max_cards={max_cards}")
     
     try:
-        with PerformanceLogger("price_update"):
+        with PerformanceLogger("price_update"), background_priority():
             stats = price_tracker.update_all_prices(tcg, max_cards)
         logger.info(f"Price update complete | stats={stats}")
         return jsonify(stats)
@@ -1183,6 +1188,99 @@ def stop_scheduler():
     price_scheduler.stop()
     return jsonify({'message': 'Scheduler stopped', 'status': price_scheduler.get_status()})
 
+# ============================================================================
+# SCRYFALL API ENDPOINTS
+# ============================================================================
+
+@app.route('/api/scryfall/rate-limit/stats', methods=['GET'])
+def get_scryfall_rate_limit_stats():
+    """Get shared Scryfall rate limiter counters (calls, waits, 429 pauses)"""
+    return jsonify(get_scryfall_rate_limiter().get_stats())
+
+@app.route('/api/scryfall/coalescing/stats', methods=['GET'])
+def get_scryfall_coalescing_stats():
+    """Get request coalescing counters (coalesced calls = Scryfall requests saved)"""
+    return jsonify(get_scryfall_single_flight().get_stats())
+
+@app.route('/api/scryfall/cache/stats', methods=['GET'])
+def get_scryfall_cache_stats():
+    """Get Scryfall response cache counters (hit rate, bytes saved, entries)"""
+    return jsonify(get_scryfall_cache().get_stats())
+
+@app.route('/api/scryfall/cache/entries', methods=['GET'])
+def get_scryfall_cache_entries():
+    """List cached Scryfall responses, newest first (optional ?prefix= and ?limit=)"""
+    prefix = request.args.get('prefix')
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({'entries': get_scryfall_cache().entries(prefix=prefix, limit=limit)})
+
+@app.route('/api/scryfall/cache/purge', methods=['POST'])
+def purge_scryfall_cache():
+    """Drop cached Scryfall responses (all, by key prefix, and/or only expired ones)"""
+    data = request.get_json(silent=True) or {}
+    cache = get_scryfall_cache()
+    purged = cache.purge(prefix=data.get('prefix'), expired_only=bool(data.get('expired_only')))
+    return jsonify({'message': 'Scryfall cache purged', 'purged': purged, 'stats': cache.get_stats()})
+
+# ============================================================================
+# RECOGNITION CACHE ENDPOINTS
+# ============================================================================
+
+@app.route('/api/recognition/cache/stats', methods=['GET'])
+def get_recognition_cache_stats():
+    """Get recognition result cache hit/miss counters"""
+    return jsonify(get_recognition_cache().get_stats())
+
+@app.route('/api/recognition/cache/clear', methods=['POST'])
+def clear_recognition_cache():
+    """Drop all cached recognition results"""
+    cache = get_recognition_cache()
+    cache.clear()
+    return jsonify({'message': 'Recognition cache cleared', 'stats': cache.get_stats()})
+
+# ============================================================================
+# CARD IMAGE ENDPOINTS
+# ============================================================================
+
+@app.route('/api/images/<card_id>', methods=['GET'])
+def get_card_image(card_id):
+    """Serve a card image (Scryfall id) from the local image store, downloading it on a miss"""
+    variant = request.args.get('variant', 'normal')
+    store = get_image_store()
+    if not store.valid_key(card_id, variant):
+        return jsonify({'error': 'Invalid card id or image variant'}), 400
+    
+    path = store.get_path(card_id, variant)
+    if path is None:
+        db = get_db()
+        try:
+            card = db.query(Card.image_url).filter(Card.card_id == card_id).first()
+        finally:
+            db.close()
+        if not card or not card.image_url:
+            return jsonify({'error': 'Card not found'}), 404
+        data = store.fetch(card_id, variant, image_variant_url(card.image_url, variant))
+        if data is None:
+            return jsonify({'error': 'Image not available'}), 502
+        path = store.get_path(card_id, variant)
+        if path is None:  # Could not be stored; serve the downloaded bytes
+            mimetype = 'image/png' if variant == 'png' else 'image/jpeg'
+            path = io.BytesIO(data)
+            response = send_file(path, mimetype=mimetype, max_age=config.IMAGE_CACHE_MAX_AGE)
+            response.cache_control.public = True
+            return response
+    
+    # Images of a printing never change: let browsers keep them
+    response = send_file(path, max_age=config.IMAGE_CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/api/images/stats', methods=['GET'])
+def get_image_store_stats():
+    """Get local image store usage and hit/miss counters"""
+    return jsonify(get_image_store().get_stats())
+
 # ============================================================================
 # HASH DOWNLOAD ENDPOINTS
 # ============================================================================
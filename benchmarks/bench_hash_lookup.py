@@ -0,0 +1,152 @@
+"""
+TCG Scan - Hash Lookup Benchmark
+Compares perceptual-hash lookup strategies on synthetic 256-bit hashes:
+
+- legacy:     Python loop with imagehash.hex_to_hash (the original find_matching_card)
+- index:      vectorized XOR + popcount over the in-memory HashIndex
+- mih:        banded multi-index hashing in SQLite + full-distance verification
+
+Queries are stored hashes with a few random bits flipped (within
+IMAGE_HASH_THRESHOLD), so every strategy should find the source card.
+Uniform random hashes are the best case for band selectivity: real card
+hashes are correlated and produce larger candidate sets.
+
+Usage:
+    python benchmarks/bench_hash_lookup.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import imagehash
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import config
+from database import Base, Card
+from hash_index import HashIndex, backfill_hash_bands, find_band_candidates, mih_query
+
+
+def random_hashes(rng, count):
+    """Generate `count` random 64-char hex hashes"""
+    words = rng.integers(0, 2 ** 63, size=(count, 4), dtype=np.int64).astype(np.uint64)
+    words ^= rng.integers(0, 2, size=(count, 4), dtype=np.int64).astype(np.uint64) << np.uint64(63)
+    return [''.join(f'{int(w):016x}' for w in row) for row in words]
+
+
+def perturb(rng, image_hash, max_flips):
+    """Flip up to max_flips random bits of a hex hash"""
+    value = int(image_hash, 16)
+    for bit in rng.choice(256, size=rng.integers(0, max_flips + 1), replace=False):
+        value ^= 1 << int(bit)
+    return f'{value:064x}'
+
+
+def legacy_lookup(rows, query_hash):
+    """The original per-card Python loop"""
+    query = imagehash.hex_to_hash(query_hash)
+    best_id, best_distance = None, None
+    for card_id, card_hash in rows:
+        distance = query - imagehash.hex_to_hash(card_hash)
+        if distance <= config.IMAGE_HASH_THRESHOLD and (best_distance is None or distance < best_distance):
+            best_id, best_distance = card_id, distance
+    return best_id
+
+
+def build_database(path, hashes, batch=20000):
+    """Create a SQLite catalog with the given hashes and backfill their bands"""
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(0, len(hashes), batch):
+            conn.execute(insert(Card.__table__), [
+                {'tcg': 'mtg', 'card_id': f'synthetic-{i}', 'name': f'Card {i}', 'image_hash': h}
+                for i, h in enumerate(hashes[start:start + batch], start=start)
+            ])
+    session = sessionmaker(bind=engine)()
+    backfill_hash_bands(session, batch_size=batch)
+    return engine, session
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(size, queries, legacy_max, seed):
+    rng = np.random.default_rng(seed)
+    hashes = random_hashes(rng, size)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print(f"\n=== {size:,} cards ===")
+        start = time.perf_counter()
+        engine, session = build_database(os.path.join(tmpdir, 'bench.db'), hashes)
+        print(f"setup (insert + band backfill): {time.perf_counter() - start:.1f}s")
+
+        index = HashIndex()
+        _, load_ms = timed(index.load, session)
+        print(f"index load: {load_ms:.0f} ms")
+
+        sources = rng.integers(0, size, size=queries)
+        samples = [(int(i) + 1, perturb(rng, hashes[i], config.IMAGE_HASH_THRESHOLD)) for i in sources]
+
+        latencies = {'index': [], 'mih': [], 'legacy': []}
+        candidate_sizes = []
+        hits = {'index': 0, 'mih': 0, 'legacy': 0}
+
+        for expected_id, query_hash in samples:
+            result, ms = timed(index.query, query_hash, 1, config.IMAGE_HASH_THRESHOLD)
+            latencies['index'].append(ms)
+            hits['index'] += bool(result) and result[0][0] == expected_id
+
+            result, ms = timed(mih_query, session, query_hash, 1, config.IMAGE_HASH_THRESHOLD)
+            latencies['mih'].append(ms)
+            hits['mih'] += bool(result) and result[0][0] == expected_id
+            candidate_sizes.append(len(find_band_candidates(session, query_hash)))
+
+        legacy_rows = None
+        if size <= legacy_max:
+            legacy_rows = session.query(Card.id, Card.image_hash).all()
+            for expected_id, query_hash in samples[:max(1, queries // 10)]:
+                result, ms = timed(legacy_lookup, legacy_rows, query_hash)
+                latencies['legacy'].append(ms)
+                hits['legacy'] += result == expected_id
+
+        print(f"{'strategy':<8} {'mean ms':>10} {'p95 ms':>10} {'candidates':>12} {'recall':>8}")
+        for name in ('legacy', 'index', 'mih'):
+            values = latencies[name]
+            if not values:
+                print(f"{name:<8} {'skipped':>10}")
+                continue
+            p95 = sorted(values)[int(0.95 * (len(values) - 1))]
+            if name == 'mih':
+                candidates = f"{statistics.mean(candidate_sizes):.1f}"
+            else:
+                candidates = f"{size:,}"
+            print(f"{name:<8} {statistics.mean(values):>10.3f} {p95:>10.3f} "
+                  f"{candidates:>12} {hits[name] / len(values):>8.0%}")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark perceptual-hash lookup strategies')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=200, help='Queries per size')
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help='Largest catalog to run the slow legacy loop on')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"bands={config.HASH_MIH_BANDS} threshold={config.IMAGE_HASH_THRESHOLD}")
+    for size in args.sizes:
+        run(size, args.queries, args.legacy_max, args.seed)
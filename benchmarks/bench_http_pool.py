@@ -0,0 +1,118 @@
+"""
+TCG Scan - HTTP Connection Pool Benchmark
+Per-call latency of small JSON GETs against a local HTTPS stand-in for
+api.scryfall.com (self-signed certificate, made with the openssl CLI):
+
+- requests.get:  module-level call, a new TCP + TLS handshake every time
+- pooled:        http_client.create_http_session(), keep-alive connections
+
+Both are measured sequentially and with --threads concurrent callers.
+
+Usage:
+    python benchmarks/bench_http_pool.py --calls 300 --threads 4
+"""
+import argparse
+import json
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+
+from http_client import create_http_session
+
+_BODY = json.dumps({
+    'object': 'card', 'id': '00000000-0000-4000-8000-000000000000', 'name': 'Llanowar Elves',
+    'set': 'm19', 'collector_number': '314', 'prices': {'usd': '0.25'},
+}).encode()
+
+
+class _CardHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(_BODY)))
+        self.end_headers()
+        self.wfile.write(_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_cert(directory: Path):
+    """Certificate + key for 127.0.0.1"""
+    cert, key = directory / 'cert.pem', directory / 'key.pem'
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-keyout', str(key), '-out', str(cert), '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1'],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def start_server(cert: Path, key: Path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CardHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'https://127.0.0.1:{server.server_address[1]}/cards/m19/314'
+
+
+def measure(get, url, calls, threads, verify):
+    """Per-call latencies (ms) of calls GETs spread over threads callers"""
+    def one(_):
+        started = time.perf_counter()
+        response = get(url, timeout=10, verify=verify)
+        response.content
+        assert response.status_code == 200
+        return (time.perf_counter() - started) * 1000
+
+    get(url, timeout=10, verify=verify).content  # Warm-up
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(one, range(calls)))
+    return latencies, time.perf_counter() - started
+
+
+def report(name, latencies, wall):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {name:<14} mean {statistics.mean(latencies):7.2f} ms   p50 {statistics.median(latencies):7.2f} ms   "
+          f"p95 {p95:7.2f} ms   {len(latencies) / wall:8.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed_cert(Path(tmp))
+        server, url = start_server(cert, key)
+        try:
+            for threads in (1, args.threads):
+                print(f"{args.calls} calls, {threads} thread(s):")
+                report('requests.get', *measure(requests.get, url, args.calls, threads, str(cert)))
+                session = create_http_session(max(threads, 1))
+                report('pooled', *measure(session.get, url, args.calls, threads, str(cert)))
+                session.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
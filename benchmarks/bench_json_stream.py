@@ -0,0 +1,111 @@
+"""
+TCG Scan - JSON Stream Memory Benchmark
+Peak RSS of reading a large synthetic card dump:
+
+- json.load:    the whole document materialized, as response.json() did
+- json_stream:  JsonStreamReader, one record at a time
+
+Each reader runs in its own child process so its peak RSS is measured in
+isolation (resource.getrusage, Unix only).
+
+Usage:
+    python benchmarks/bench_json_stream.py --size-mb 500
+    python benchmarks/bench_json_stream.py --size-mb 500 --layout mtgjson
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _card(i):
+    """Scryfall-sized card object (~2 KB serialized)"""
+    return {
+        'object': 'card', 'id': f'{i:08d}-0000-4000-8000-000000000000', 'name': f'Card Name {i}',
+        'lang': 'en', 'set': f's{i % 800:03d}', 'set_name': f'Set {i % 800}', 'collector_number': str(i),
+        'rarity': 'common', 'type_line': 'Creature — Elf Druid', 'mana_cost': '{1}{G}', 'colors': ['G'],
+        'oracle_text': 'Flying. When this creature enters, draw a card. ' * 8,
+        'image_uris': {size: f'https://cards.scryfall.io/{size}/front/{i}.jpg' for size in
+                       ('small', 'normal', 'large', 'png', 'art_crop', 'border_crop')},
+        'prices': {'usd': '0.25', 'usd_foil': '1.00', 'eur': '0.20', 'eur_foil': None},
+        'legalities': {fmt: 'legal' for fmt in ('standard', 'pioneer', 'modern', 'legacy', 'vintage',
+                                                'commander', 'pauper', 'brawl', 'historic')},
+    }
+
+
+def write_dump(path: Path, size_mb: int, layout: str) -> int:
+    """Write a dump of about size_mb megabytes record by record; returns the record count"""
+    target = size_mb * 1024 * 1024
+    count = 0
+    with path.open('w', encoding='utf-8') as f:
+        f.write('{"meta": {"version": "bench"}, "data": {' if layout == 'mtgjson' else '[')
+        while f.tell() < target:
+            record = json.dumps(_card(count), ensure_ascii=False)
+            separator = ',\n' if count else '\n'
+            f.write(f'{separator}"Card Name {count}": {record}' if layout == 'mtgjson' else separator + record)
+            count += 1
+        f.write('\n}}' if layout == 'mtgjson' else '\n]')
+    return count
+
+
+def child(mode: str, path: str, layout: str):
+    """Read the dump in this process and print records, seconds and peak RSS as JSON"""
+    started = time.perf_counter()
+    count = 0
+    if mode == 'json.load':
+        with open(path, encoding='utf-8') as f:
+            document = json.load(f)
+        records = document['data'].values() if layout == 'mtgjson' else document
+        for _ in records:
+            count += 1
+    else:
+        from json_stream import JsonStreamReader
+        with JsonStreamReader(path) as reader:
+            records = reader.iter_items('data') if layout == 'mtgjson' else reader.iter_array()
+            for _ in records:
+                count += 1
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'records': count, 'seconds': time.perf_counter() - started, 'peak_mb': peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=500)
+    parser.add_argument('--layout', choices=('scryfall', 'mtgjson'), default='scryfall')
+    parser.add_argument('--file', help='Existing dump to read instead of a synthetic one')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.file, args.layout)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.file) if args.file else Path(tmp) / 'dump.json'
+        if not args.file:
+            started = time.perf_counter()
+            count = write_dump(path, args.size_mb, args.layout)
+            print(f"dump: {path.stat().st_size / 1024 ** 2:.0f} MB, {count} records "
+                  f"({time.perf_counter() - started:.0f} s to write)")
+
+        for mode in ('json_stream', 'json.load'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--file', str(path), '--layout', args.layout],
+                capture_output=True, text=True,
+            )
+            if output.returncode != 0:
+                print(f"{mode:12s} failed: {output.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{mode:12s} {result['records']:>9d} records  {result['seconds']:7.1f} s  "
+                  f"peak RSS {result['peak_mb']:8.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+TCG Scan - Local Catalog Benchmark
+Times exact card lookups on a synthetic catalog:
+
+- sql:      one indexed SELECT per (set, number) lookup (fresh session, like the app)
+- catalog:  LocalCatalog.lookup_set_number / lookup_name (in-memory dictionaries)
+
+The Scryfall path this replaces costs a network round trip plus the
+RateLimiter interval (>= 100 ms per lookup).
+
+Usage:
+    python benchmarks/bench_local_catalog.py --cards 50000
+"""
+import argparse
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, Card
+from local_catalog import LocalCatalog
+
+
+def build_catalog(count, seed):
+    """In-memory SQLite cards table with `count` printings over ~count/250 sets"""
+    rng = random.Random(seed)
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    pairs = []
+    sets = max(1, count // 250)
+    for i in range(count):
+        set_code = f's{i % sets:03d}'
+        number = str(i // sets + 1)
+        pairs.append((set_code, number))
+        db.add(Card(tcg='mtg', card_id=f'card-{i}', name=f'Card Name {i}',
+                    set_code=set_code, collector_number=number))
+    db.commit()
+    db.close()
+    rng.shuffle(pairs)
+    return Session, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    Session, pairs = build_catalog(args.cards, args.seed)
+    queries = [pairs[i % len(pairs)] for i in range(args.lookups)]
+
+    catalog = LocalCatalog()
+    db = Session()
+    started = time.perf_counter()
+    catalog.load(db)
+    db.close()
+    print(f"catalog load: {(time.perf_counter() - started) * 1000:.0f} ms for {args.cards} printings")
+
+    def sql():
+        for set_code, number in queries:
+            db = Session()
+            db.query(Card).filter(Card.set_code == set_code, Card.collector_number == number).first()
+            db.close()
+
+    def local_set_number():
+        for set_code, number in queries:
+            catalog.lookup_set_number(set_code, number.zfill(4))
+
+    def local_name():
+        for i in range(len(queries)):
+            catalog.lookup_name(f'card name {i}')
+
+    for label, fn in (('sql', sql), ('catalog set+number', local_set_number), ('catalog name', local_name)):
+        seconds = timeit.timeit(fn, number=1)
+        print(f"{label:20s} {seconds / len(queries) * 1e6:8.1f} us/lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+TCG Scan - OCR Backend Benchmark
+Measures per-scan OCR latency of the recognition engine with each OCR backend:
+
+- pytesseract:  one tesseract process per call (traineddata reloaded every time)
+- tesserocr:    in-process Tesseract handles kept alive per thread
+
+A "scan" runs the OCR stages of recognize_card on a synthetic card:
+name OCR, set info from the cropped card and set info from the original photo.
+
+Usage:
+    python benchmarks/bench_ocr_backends.py --scans 10
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+import card_recognition
+from card_recognition import CardRecognitionEngine, OCRBackend, create_ocr_backend
+
+
+class CountingBackend(OCRBackend):
+    """Wraps a backend and counts OCR calls"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.calls = 0
+
+    def image_to_string(self, image, psm=6, whitelist=None):
+        self.calls += 1
+        return self.backend.image_to_string(image, psm=psm, whitelist=whitelist)
+
+
+def synthetic_card(width=630, height=880):
+    """Render a card-like image with a title and a set info line"""
+    card = np.full((height, width, 3), 235, dtype=np.uint8)
+    cv2.rectangle(card, (0, 0), (width - 1, height - 1), (20, 20, 20), 24)
+    cv2.putText(card, 'Lightning Bolt', (40, 75), cv2.FONT_HERSHEY_DUPLEX, 1.2, (0, 0, 0), 2)
+    cv2.putText(card, 'U 0167', (20, height - 38), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    cv2.putText(card, 'FIN - EN', (20, height - 18), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return card
+
+
+def run_scan(engine, card):
+    name_region = engine.extract_card_name_region(card)
+    engine.extract_text_ocr(name_region)
+    engine.extract_set_info_from_full_image(card)
+    engine.extract_set_info_from_original(card)
+
+
+def run(backend_name, scans):
+    backend = create_ocr_backend(backend_name)
+    if backend is None or backend.name != backend_name:
+        print(f"{backend_name:<12} {'not installed':>12}")
+        return
+
+    counting = CountingBackend(backend)
+    engine = CardRecognitionEngine(ocr_backend=counting)
+    card = synthetic_card()
+
+    run_scan(engine, card)  # Warm-up (tesserocr loads traineddata here)
+    counting.calls = 0
+
+    latencies = []
+    for _ in range(scans):
+        start = time.perf_counter()
+        run_scan(engine, card)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    calls = counting.calls / scans
+    mean = statistics.mean(latencies)
+    print(f"{backend_name:<12} {mean:>12.1f} {max(latencies):>10.1f} {calls:>10.1f} {mean / calls:>10.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark OCR backends')
+    parser.add_argument('--scans', type=int, default=10, help='Scans per backend')
+    parser.add_argument('--backends', nargs='+', default=['pytesseract', 'tesserocr'])
+    args = parser.parse_args()
+
+    if not card_recognition.TESSERACT_AVAILABLE:
+        sys.exit("No OCR engine installed (need the tesseract executable or tesserocr)")
+
+    print(f"{'backend':<12} {'scan ms':>12} {'max ms':>10} {'calls':>10} {'ms/call':>10}")
+    for name in args.backends:
+        run(name, args.scans)
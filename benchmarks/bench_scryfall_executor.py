@@ -0,0 +1,82 @@
+"""
+TCG Scan - Scryfall Executor Client Benchmark
+Wall time of fetching whole sets through cards/search, against the Scryfall
+stand-in (scryfall_standin.py) answering every request after --latency ms:
+
+- sync:     ScryfallAPI.search_cards, one page after the other
+- executor: ScryfallExecutorAPI.search_cards, page 1 then the rest concurrently on the thread pool
+
+Each is run for one set and for --sets sets (sync: in turn, executor: one
+event loop with every set in flight). Both go through a RateLimiter of
+--rate requests per second (Scryfall asks for 10; 0 = unlimited).
+
+Usage:
+    python benchmarks/bench_scryfall_executor.py --cards 1500 --sets 4 --latency 150 --rate 10
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+config.SCRYFALL_CACHE_PATH = None  # Measure the network path, not the response cache
+
+from api_integrations import RateLimiter, ScryfallAPI
+from scryfall_executor import ScryfallExecutorAPI
+from scryfall_standin import SEARCH_PAGE_SIZE, ScryfallCorpus, ScryfallStandIn
+
+
+def make_api(base_url: str, rate: float) -> ScryfallAPI:
+    api = ScryfallAPI()
+    api.base_url = base_url
+    api.rate_limiter = RateLimiter(rate or 1e6, burst=config.SCRYFALL_RATE_BURST if rate else 1000)
+    return api
+
+
+def run_sync(api: ScryfallAPI, set_codes):
+    return sum(len(api.search_cards(f'set:{code}')) for code in set_codes)
+
+
+def run_executor(api: ScryfallAPI, set_codes):
+    async def fetch_all():
+        client = ScryfallExecutorAPI(api)
+        results = await asyncio.gather(*(client.search_cards(f'set:{code}') for code in set_codes))
+        return sum(len(cards) for cards in results)
+    return asyncio.run(fetch_all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=1500, help='cards per set')
+    parser.add_argument('--sets', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=150, help='server delay per request (ms)')
+    parser.add_argument('--rate', type=float, default=10, help='requests per second (0 = unlimited)')
+    args = parser.parse_args()
+
+    server = ScryfallStandIn(ScryfallCorpus.synthetic(sets=args.sets, cards_per_set=args.cards),
+                             latency=args.latency / 1000)
+    base_url = server.start()
+    pages = -(-args.cards // SEARCH_PAGE_SIZE)
+    print(f"{args.cards} cards ({pages} pages) per set, {args.latency:.0f} ms latency, "
+          f"rate {f'{args.rate:g}/s' if args.rate else 'unlimited'}")
+    try:
+        for set_codes in (['s00'], list(server.corpus.sets)):
+            timings = {}
+            for name, run in (('sync', run_sync), ('executor', run_executor)):
+                api = make_api(base_url, args.rate)
+                started = time.perf_counter()
+                fetched = run(api, set_codes)
+                timings[name] = time.perf_counter() - started
+                assert fetched == args.cards * len(set_codes)
+            print(f"  {len(set_codes)} set(s): sync {timings['sync']:6.2f} s   executor {timings['executor']:6.2f} s   "
+                  f"speedup {timings['sync'] / timings['executor']:4.1f}x")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+TCG Scan - Offline Scryfall Workload Benchmark
+Runs the network-bound workers end to end against the Scryfall stand-in
+(scryfall_standin.py) with a synthetic corpus, in a throwaway database and
+image store, so they can be measured in CI without network access:
+
+- import:  ImportPipeline over every set (cards/search pages -> cards table)
+- prices:  PriceTracker.update_all_prices (/cards/collection batches -> PriceHistory)
+- hashes:  HashPipeline (image downloads -> perceptual hashes)
+
+For each: wall time, throughput and the requests the stand-in answered
+(including injected 429s and errors).
+
+Usage:
+    python benchmarks/bench_scryfall_workloads.py --sets 3 --cards 500 --latency 50 --rate 10
+    python benchmarks/bench_scryfall_workloads.py --rate-limit-rate 0.05 --error-rate 0.01
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+def configure(tmp: Path, base_url: str, rate: float):
+    """Point the app at the stand-in, a scratch database and image store (before the modules load)"""
+    config.SCRYFALL_API_BASE = base_url
+    config.SCRYFALL_CACHE_PATH = None  # Measure the network path, not the response cache
+    config.DATABASE_PATH = tmp / 'bench.db'
+    config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{config.DATABASE_PATH}'
+    config.IMAGE_STORE_PATH = tmp / 'images'
+    if rate:
+        config.SCRYFALL_RATE_LIMIT = rate
+    else:
+        config.SCRYFALL_RATE_LIMIT, config.SCRYFALL_RATE_BURST = 1e6, 1000
+
+
+def measure(name: str, server, run, unit: str, count):
+    """Run one workload and print its wall time and the stand-in's request counters"""
+    server.reset_stats()
+    started = time.perf_counter()
+    result = run()
+    wall = time.perf_counter() - started
+    stats = server.get_stats()
+    done = count(result)
+    print(f"  {name:<7} {wall:7.2f} s   {done:6d} {unit:<6} {done / wall if wall else 0:8.1f}/s   "
+          f"requests {stats['requests']:5d}   429 {stats['rate_limited']:4d}   errors {stats['errors']:4d}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sets', type=int, default=3)
+    parser.add_argument('--cards', type=int, default=500, help='cards per set')
+    parser.add_argument('--latency', type=float, default=50, help='stand-in delay per request (ms)')
+    parser.add_argument('--rate', type=float, default=10, help='client requests per second (0 = unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction answered with 429')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from scryfall_standin import ScryfallCorpus, ScryfallStandIn
+
+    server = ScryfallStandIn(ScryfallCorpus.synthetic(sets=args.sets, cards_per_set=args.cards, seed=args.seed),
+                             latency=args.latency / 1000, error_rate=args.error_rate,
+                             rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp, server:
+        configure(Path(tmp), server.base_url, args.rate)
+
+        # Imported after configure(): the database engine is created from config on import
+        from database import init_db
+        from hash_pipeline import HashPipeline
+        from import_pipeline import ImportPipeline
+        from price_tracker import PriceTracker
+
+        init_db()
+        print(f"{args.sets} sets x {args.cards} cards, {args.latency:.0f} ms latency, "
+              f"rate {f'{args.rate:g}/s' if args.rate else 'unlimited'}, "
+              f"error rate {args.error_rate:g}, 429 rate {args.rate_limit_rate:g}")
+        measure('import', server, lambda: ImportPipeline().run(), 'cards',
+                lambda stats: stats['inserted'] + stats['updated'])
+        measure('prices', server, lambda: PriceTracker().update_all_prices('mtg'), 'prices',
+                lambda stats: stats['updated'])
+        measure('hashes', server, lambda: HashPipeline().run(), 'images',
+                lambda stats: stats['hashed'])
+
+
+if __name__ == '__main__':
+    main()
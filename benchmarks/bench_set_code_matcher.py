@@ -0,0 +1,85 @@
+"""
+TCG Scan - Set Code Matcher Benchmark
+Compares set code lookup in OCR text:
+
+- loop-regex:   re.search per known set (the original extract_set_info_from_full_image loop)
+- loop-substr:  `code in text` per known set (the original extract_set_info_from_original loop)
+- matcher:      SetCodeMatcher.find_all, precompiled lookahead alternations
+
+Usage:
+    python benchmarks/bench_set_code_matcher.py --sets 800
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from card_recognition import SetCodeMatcher, _get_fallback_sets
+
+# Typical OCR outputs of the set info region (mostly noise, some real hits)
+SAMPLE_TEXTS = [
+    'U 0168 WOE · EN',
+    'R 0053 BLB - EN JOHN AVON',
+    '168/276 C',
+    'LI ~ ,. ILLUS',
+    'TM & © 2024 WIZARDS OF THE COAST',
+    'M 0231 FIN · EN',
+    '|| ]] 0O0',
+    'WAR OF THE SPARK',
+]
+
+
+def known_sets(count, seed):
+    """Fallback sets padded with random 3-4 char codes up to `count`"""
+    rng = random.Random(seed)
+    codes = set(_get_fallback_sets())
+    alphabet = string.ascii_uppercase + string.digits
+    while len(codes) < count:
+        codes.add(''.join(rng.choice(alphabet) for _ in range(rng.choice((3, 3, 3, 4)))))
+    return codes
+
+
+def loop_regex(codes, text):
+    return [code for code in codes if re.search(rf'\b{code}\b|{code}\s*[·\-]', text)]
+
+
+def loop_substr(codes, text):
+    return [code for code in codes if code in text]
+
+
+def matcher_hits(matcher, text):
+    return [hit.code for hit in matcher.find_all(text)]
+
+
+def bench(label, fn, number):
+    seconds = timeit.timeit(fn, number=number)
+    per_text = seconds / (number * len(SAMPLE_TEXTS)) * 1e6
+    print(f"{label:<12} {per_text:>12.1f}")
+    return per_text
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark set code lookup in OCR text')
+    parser.add_argument('--sets', type=int, default=800, help='Number of known set codes')
+    parser.add_argument('--number', type=int, default=200, help='Repetitions over the sample texts')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    codes = known_sets(args.sets, args.seed)
+    build = timeit.timeit(lambda: SetCodeMatcher(codes), number=10) / 10 * 1000
+    matcher = SetCodeMatcher(codes)
+
+    for text in SAMPLE_TEXTS:
+        assert set(matcher_hits(matcher, text)) == set(loop_substr(codes, text)), text
+
+    print(f"known sets={len(codes)} | matcher build={build:.2f} ms")
+    print(f"{'strategy':<12} {'us/text':>12}")
+    regex = bench('loop-regex', lambda: [loop_regex(codes, t) for t in SAMPLE_TEXTS], max(1, args.number // 10))
+    substr = bench('loop-substr', lambda: [loop_substr(codes, t) for t in SAMPLE_TEXTS], args.number)
+    compiled = bench('matcher', lambda: [matcher_hits(matcher, t) for t in SAMPLE_TEXTS], args.number)
+    print(f"speedup vs loop-regex: {regex / compiled:.0f}x | vs loop-substr: {substr / compiled:.1f}x")
@@ -0,0 +1,193 @@
+"""
+TCG Scan - Scryfall Bulk Data Import
+Imports the whole card catalog from one Scryfall bulk data file
+("default_cards", ~100k printings) instead of a paginated search per set.
+
+The file is a single JSON array of card objects, read with json_stream
+(a fixed buffer and one decoded card at a time). Each card is mapped with
+ScryfallAPI._parse_card_data like the API paths and written through
+card_writer.CardWriter, one commit per BULK_IMPORT_BATCH_SIZE cards: new
+cards are inserted, stored cards updated only when their content changed.
+
+The file comes from a local path (works offline) or from one download of
+the current bulk file to config.SCRYFALL_BULK_DATA_PATH.
+"""
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import config
+import http_client
+from api_integrations import ScryfallAPI
+from card_writer import CardWriter, card_row
+from database import get_db
+from json_stream import JsonStreamReader
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('bulk_import')
+
+
+def download_bulk_data(dest: Path = None, bulk_type: str = None, api: ScryfallAPI = None,
+                       stop_event: threading.Event = None) -> Path:
+    """
+    Download the current Scryfall bulk data file to dest (atomically replaced).
+
+    Raises:
+        RuntimeError: if the download URI can't be resolved or the download fails
+    """
+    dest = Path(dest or config.SCRYFALL_BULK_DATA_PATH)
+    uri = (api or ScryfallAPI()).get_bulk_data_uri(bulk_type)
+    if not uri:
+        raise RuntimeError(f"No Scryfall bulk data available for {bulk_type or config.SCRYFALL_BULK_DATA_TYPE}")
+
+    logger.info(f"Downloading bulk data | uri={uri} | dest={dest}")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with http_client.get(uri, endpoint='bulk', stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Bulk data download failed: HTTP {response.status_code}")
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    if stop_event is not None and stop_event.is_set():
+                        raise RuntimeError("Bulk data download stopped")
+                    f.write(chunk)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    logger.info(f"Bulk data downloaded | bytes={dest.stat().st_size}")
+    return dest
+
+
+class BulkImporter:
+    """
+    Streams a Scryfall bulk data file into the cards table.
+
+    Usage:
+        stats = BulkImporter(on_progress=print).run('default-cards.json')
+    """
+
+    def __init__(self, batch_size: int = None, session_factory: Callable = None,
+                 api: ScryfallAPI = None, on_progress: Callable[[Dict], None] = None,
+                 progress_interval: float = 1.0):
+        self.batch_size = batch_size or config.BULK_IMPORT_BATCH_SIZE
+        self.session_factory = session_factory or get_db
+        self.api = api or ScryfallAPI()
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._stop = threading.Event()
+        self.stats = self._new_stats(0)
+
+    @staticmethod
+    def _new_stats(total_bytes: int) -> Dict:
+        return {
+            'total_bytes': total_bytes, 'bytes_read': 0, 'percent': 0.0,
+            'records': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'conflicts': 0, 'failed': 0,
+            'rate': 0.0, 'eta_seconds': None, 'current_set': None, 'elapsed': 0.0,
+        }
+
+    def stop(self):
+        """Ask the import to stop after the current batch"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def _to_row(self, record: Dict) -> Optional[Dict]:
+        """Map one Scryfall card object to a cards table row (None if unusable)"""
+        if not isinstance(record, dict) or not record.get('id') or not record.get('name'):
+            return None
+        return card_row(self.api._parse_card_data(record))
+
+    def run(self, path: Path) -> Dict:
+        """
+        Import every card of a bulk data file.
+
+        Returns:
+            Final stats: records, inserted, updated, unchanged, skipped, conflicts, failed, rate (cards/s), elapsed
+        """
+        path = Path(path)
+        self._stop.clear()
+        self.stats = self._new_stats(path.stat().st_size)
+        logger.info(f"Bulk import started | file={path} | bytes={self.stats['total_bytes']}")
+
+        started = time.monotonic()
+        last_report = 0.0
+        batch: List[Dict] = []
+        reader = JsonStreamReader(path)
+        db = self.session_factory()
+        try:
+            for record in reader.iter_array():
+                self.stats['records'] += 1
+                try:
+                    row = self._to_row(record)
+                except Exception as e:
+                    logger.debug(f"Unparseable bulk record: {e}")
+                    row = None
+                if row is None:
+                    self.stats['failed'] += 1
+                    continue
+                batch.append(row)
+
+                if len(batch) >= self.batch_size:
+                    self._flush(db, batch)
+                    self.stats['bytes_read'] = reader.bytes_read
+                    self.stats['current_set'] = row.get('set_name')
+                    batch = []
+                    now = time.monotonic()
+                    if now - last_report >= self.progress_interval:
+                        last_report = now
+                        self._report(started)
+                    if self.stopped:
+                        break
+
+            if batch:
+                self._flush(db, batch)
+            if not self.stopped:
+                self.stats['bytes_read'] = self.stats['total_bytes']
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            reader.close()
+
+        self._report(started)
+        logger.info(f"Bulk import finished | records={self.stats['records']} | inserted={self.stats['inserted']} | "
+                    f"updated={self.stats['updated']} | unchanged={self.stats['unchanged']} | "
+                    f"stopped={self.stopped} | rate={self.stats['rate']} cards/s")
+        return self.stats
+
+    def _flush(self, db, batch: List[Dict]):
+        """Write one batch in a single transaction"""
+        counts = CardWriter(db).write(batch)
+        db.commit()
+        for key, count in counts.items():
+            self.stats[key] += count
+
+    def _report(self, started: float):
+        elapsed = time.monotonic() - started
+        done, total = self.stats['bytes_read'], self.stats['total_bytes']
+        rate = self.stats['records'] / elapsed if elapsed > 0 else 0.0
+        byte_rate = done / elapsed if elapsed > 0 else 0.0
+        self.stats.update({
+            'elapsed': round(elapsed, 1),
+            'rate': round(rate, 1),
+            'percent': round(done / total * 100, 1) if total else 100.0,
+            'eta_seconds': round((total - done) / byte_rate) if byte_rate > 0 else None,
+        })
+        if self.on_progress:
+            try:
+                self.on_progress(dict(self.stats))
+            except Exception as e:
+                logger.warning(f"Bulk import progress callback failed: {e}")
@@ -7,11 +7,23 @@ import cv2
 import numpy as np
 from PIL import Image
 import imagehash
-import requests
 import os
-from typing import Optional, Tuple, List, Dict
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import (ProcessPoolExecutor, FIRST_COMPLETED, CancelledError,
+                                TimeoutError as FuturesTimeoutError, wait as futures_wait)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple, List, Dict, Iterator, NamedTuple, Iterable
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 import config
 from database import Card, get_db
+from hash_index import get_hash_index, mih_query
+from ocr_scheduler import OCRBudget, OCRVariantScheduler, get_ocr_scheduler
+from recognition_cache import RecognitionCache, file_digest
+from local_catalog import LocalCatalog, get_local_catalog, normalize_collector_number
 from logger import get_logger, PerformanceLogger
 import re
 
@@ -59,9 +71,153 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     print("[OCR] pytesseract not installed - OCR disabled")
 
+# The tesseract executable driven by pytesseract
+PYTESSERACT_AVAILABLE = TESSERACT_AVAILABLE
+
+# Try to import tesserocr (Tesseract C-API bindings) for in-process OCR
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+    TESSERACT_AVAILABLE = True
+    print(f"[OCR] tesserocr available (Tesseract {tesserocr.tesseract_version().splitlines()[0]})")
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 # Initialize logger for this module
 logger = get_logger('recognition')
 
+
+# ============================================================================
+# OCR BACKENDS
+# ============================================================================
+
+class OCRBackend(ABC):
+    """Interface of the OCR engines used by CardRecognitionEngine"""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def image_to_string(self, image, psm: int = 6, whitelist: str = None) -> str:
+        """
+        Run OCR on an image.
+        
+        Args:
+            image: PIL image or numpy array (grayscale or RGB)
+            psm: Tesseract page segmentation mode
+            whitelist: Optional set of allowed characters
+        """
+
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract executable once per call (reloads traineddata every time)"""
+    
+    name = 'pytesseract'
+    
+    def __init__(self, lang: str = 'eng'):
+        self.lang = lang
+    
+    def image_to_string(self, image, psm: int = 6, whitelist: str = None) -> str:
+        ocr_config = f'--oem 3 --psm {psm} -l {self.lang}'
+        if whitelist:
+            ocr_config += f' -c tessedit_char_whitelist={whitelist}'
+        return pytesseract.image_to_string(image, config=ocr_config)
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    In-process Tesseract through the C-API bindings.
+    Each thread keeps one initialized handle per PSM alive, so the
+    traineddata is loaded once instead of on every call.
+    """
+    
+    name = 'tesserocr'
+    
+    def __init__(self, lang: str = 'eng', tessdata_path: str = None):
+        self.lang = lang
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+    
+    def _get_api(self, psm: int):
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        
+        api = apis.get(psm)
+        if api is None:
+            kwargs = {'lang': self.lang, 'psm': psm, 'oem': tesserocr.OEM.DEFAULT}
+            if self.tessdata_path:
+                kwargs['path'] = self.tessdata_path
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            apis[psm] = api
+            logger.debug(f"Tesseract handle initialized | psm={psm} | thread={threading.current_thread().name}")
+        return api
+    
+    def image_to_string(self, image, psm: int = 6, whitelist: str = None) -> str:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        
+        api = self._get_api(psm)
+        # Handles are reused: always reset the whitelist left by the previous call
+        api.SetVariable('tessedit_char_whitelist', whitelist or '')
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+# OCR calls kept in the scan budget for the card name (PSM 6 + PSM 7)
+NAME_OCR_CALLS = 2
+
+# Characters allowed when reading the set info line ("U 0167 / FIN · EN")
+SET_INFO_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789·.- '
+
+_ocr_backend_instance: Optional[OCRBackend] = None
+_ocr_backend_lock = threading.Lock()
+
+
+def create_ocr_backend(name: str = None) -> Optional[OCRBackend]:
+    """
+    Build an OCR backend by name ('auto', 'tesserocr' or 'pytesseract').
+    'auto' prefers tesserocr. When the requested engine is not installed (or
+    fails to start) the other one is used instead.
+    Returns None when no OCR engine is usable.
+    """
+    name = name or config.OCR_BACKEND
+    order = ['pytesseract', 'tesserocr'] if name == 'pytesseract' else ['tesserocr', 'pytesseract']
+    
+    for candidate in order:
+        if candidate == 'tesserocr' and TESSEROCR_AVAILABLE:
+            try:
+                backend = TesserocrBackend(lang=config.OCR_LANGUAGE, tessdata_path=config.OCR_TESSDATA_PATH)
+            except Exception as e:
+                logger.warning(f"Could not initialize tesserocr backend: {e}")
+                continue
+        elif candidate == 'pytesseract' and PYTESSERACT_AVAILABLE:
+            backend = PytesseractBackend(lang=config.OCR_LANGUAGE)
+        else:
+            continue
+        
+        if name not in ('auto', candidate):
+            logger.warning(f"OCR backend '{name}' not available - falling back to {candidate}")
+        return backend
+    return None
+
+
+def get_ocr_backend() -> Optional[OCRBackend]:
+    """
+    Get or create the process-wide OCR backend.
+    OCR is disabled (TESSERACT_AVAILABLE = False) when no backend could be created.
+    """
+    global _ocr_backend_instance, TESSERACT_AVAILABLE
+    if _ocr_backend_instance is None:
+        with _ocr_backend_lock:
+            if _ocr_backend_instance is None:
+                _ocr_backend_instance = create_ocr_backend()
+                if _ocr_backend_instance:
+                    logger.info(f"OCR backend: {_ocr_backend_instance.name}")
+                elif TESSERACT_AVAILABLE:
+                    logger.warning("No OCR backend could be started - OCR disabled")
+                    TESSERACT_AVAILABLE = False
+    return _ocr_backend_instance
+
 # Cache for known set codes loaded from database
 _known_sets_cache = None
 _known_sets_cache_time = None
@@ -96,6 +252,7 @@ def load_known_sets_from_db():
         # Update cache
         _known_sets_cache = sets_from_db
         _known_sets_cache_time = current_time
+        _rebuild_set_code_matcher(sets_from_db)
         
         return sets_from_db
     except Exception as e:
@@ -122,8 +279,166 @@ def refresh_known_sets_cache():
     global _known_sets_cache, _known_sets_cache_time
     _known_sets_cache = None
     _known_sets_cache_time = None
+    _set_numbers_cache.clear()
     logger.info("Known sets cache cleared - will reload on next scan")
 
+class SetCodeHit(NamedTuple):
+    """A known set code found in OCR text"""
+    code: str
+    start: int
+    end: int
+    bounded: bool  # Word boundaries on both sides
+    separated: bool  # Followed by a separator ("WOE · EN", "WOE-EN")
+
+
+class SetCodeMatcher:
+    """
+    Finds every known set code in a text in one regex pass.
+    
+    The codes are compiled into a single lookahead alternation factored as a
+    prefix trie ("W(?:AR|HO|O(?:E|T))"), so the regex engine walks the trie
+    at each position instead of trying every code. Codes that are prefixes
+    of a longer hit ("MH3" in "MH3C") are reported too.
+    """
+    
+    _SEPARATOR_AFTER = re.compile(r'\s*[·\-]')
+    _SEPARATOR_LANG_AFTER = re.compile(r'\s*[·\-]\s*[A-Z]{2}')
+    _NUMBER_BEFORE = re.compile(r'\d{2,4}\s*$')
+    
+    def __init__(self, codes: Iterable[str]):
+        self.codes = frozenset(code.upper() for code in codes if code)
+        self._lengths = sorted({len(code) for code in self.codes}, reverse=True)
+        self._pattern = re.compile(f'(?=({_trie_regex(self.codes)}))') if self.codes else None
+    
+    def find_all(self, text: str) -> List[SetCodeHit]:
+        """All set code occurrences in an upper-case text, leftmost (then longest) first"""
+        if self._pattern is None:
+            return []
+        
+        hits = []
+        for match in self._pattern.finditer(text):
+            start = match.start(1)
+            longest = match.group(1)
+            for length in self._lengths:
+                if length > len(longest):
+                    continue
+                code = longest[:length]
+                if length < len(longest) and code not in self.codes:
+                    continue
+                end = start + length
+                bounded = ((start == 0 or not _is_word_char(text[start - 1]))
+                           and (end == len(text) or not _is_word_char(text[end])))
+                separated = self._SEPARATOR_AFTER.match(text, end) is not None
+                hits.append(SetCodeHit(code, start, end, bounded, separated))
+        return hits
+    
+    @classmethod
+    def has_context(cls, text: str, hit: SetCodeHit) -> bool:
+        """Separator + language after the hit, or a collector number right before it"""
+        if cls._SEPARATOR_LANG_AFTER.match(text, hit.end):
+            return True
+        at_word_end = hit.end == len(text) or not _is_word_char(text[hit.end])
+        return at_word_end and cls._NUMBER_BEFORE.search(text, max(0, hit.start - 12), hit.start) is not None
+
+
+def _trie_regex(codes: Iterable[str]) -> str:
+    """Regex alternation of the codes factored as a prefix trie (longest match first)"""
+    trie: Dict = {}
+    for code in codes:
+        node = trie
+        for char in code:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of a code
+    
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A shorter code ends here: the rest is optional (greedy, so longest wins)
+            return f'(?:{pattern})?'
+        return pattern
+    
+    return build(trie)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+_set_code_matcher: Optional[SetCodeMatcher] = None
+
+def _rebuild_set_code_matcher(codes: Iterable[str]):
+    """Rebuild the shared matcher unless it already covers exactly these codes"""
+    global _set_code_matcher
+    codes = frozenset(code.upper() for code in codes if code)
+    if _set_code_matcher is not None and _set_code_matcher.codes == codes:
+        return
+    _set_code_matcher = SetCodeMatcher(codes)
+    logger.debug(f"Set code matcher built | codes={len(codes)}")
+
+def get_set_code_matcher(known_sets: Iterable[str] = None) -> SetCodeMatcher:
+    """
+    Matcher for the known (upper-case) set codes, built when
+    load_known_sets_from_db refreshes its cache.
+    """
+    if known_sets is None:
+        known_sets = load_known_sets_from_db()
+    if _set_code_matcher is None or _set_code_matcher.codes != known_sets:
+        _rebuild_set_code_matcher(known_sets)
+    return _set_code_matcher
+
+# Cache of collector numbers per set code: set_code -> (load time, numbers or None)
+_set_numbers_cache: Dict[str, Tuple[float, Optional[set]]] = {}
+
+def load_set_collector_numbers(set_code: str) -> Optional[set]:
+    """
+    Collector numbers of a set in the local catalog, without leading zeros.
+    Returns None when the catalog has no cards of that set.
+    """
+    key = set_code.lower()
+    cached = _set_numbers_cache.get(key)
+    if cached and time.time() - cached[0] < SETS_CACHE_TTL:
+        return cached[1]
+    
+    try:
+        db = get_db()
+        try:
+            rows = db.query(Card.collector_number).filter(
+                func.lower(Card.set_code) == key,
+                Card.collector_number != None
+            ).all()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Could not load collector numbers for set {set_code}: {e}")
+        return None
+    
+    numbers = {normalize_collector_number(number) for (number,) in rows if number} or None
+    _set_numbers_cache[key] = (time.time(), numbers)
+    return numbers
+
+def is_valid_set_number_pair(set_code: str, collector_number: str) -> bool:
+    """
+    Check an OCR'd (set_code, collector_number) pair against the local catalog.
+    Sets without local cards can't be disproved and are accepted (the
+    Scryfall lookup verifies them).
+    """
+    numbers = load_set_collector_numbers(set_code)
+    if numbers is None:
+        return True
+    return normalize_collector_number(collector_number) in numbers
+
+def printing_in_text(text: str, set_code: str, collector_number: str) -> bool:
+    """Whether OCR'd set line text shows both the set code and the collector number (leading zeros optional)"""
+    if not text or not set_code or not collector_number:
+        return False
+    text = text.lower()
+    number = normalize_collector_number(collector_number)
+    return bool(re.search(rf'(?<![a-z0-9]){re.escape(set_code.lower())}(?![a-z0-9])', text)
+                and re.search(rf'(?<![0-9])0*{re.escape(number)}(?![0-9a-z])', text))
+
 # Ambiguous set codes that are also common English words or OCR errors
 # These require additional context (number nearby, separator like · or -) to be valid
 AMBIGUOUS_SET_CODES = {
@@ -146,11 +461,13 @@ AMBIGUOUS_SET_CODES = {
     'ROE',  # Rise of the Eldrazi - but also a word
 }
 
-def is_valid_set_code_in_context(set_code: str, text: str, collector_number: str = None) -> bool:
+def is_valid_set_code_in_context(set_code: str, text: str, collector_number: str = None,
+                                 hit: SetCodeHit = None) -> bool:
     """
     Validate if a set code is valid in the given context.
     Ambiguous set codes require additional context like a collector number nearby
     or a separator character (· or -).
+    With a SetCodeHit the context is checked at its offsets, without rescanning the text.
     """
     set_upper = set_code.upper()
     
@@ -163,6 +480,12 @@ def is_valid_set_code_in_context(set_code: str, text: str, collector_number: str
     if collector_number:
         return True
     
+    if hit is not None:
+        if SetCodeMatcher.has_context(text, hit):
+            return True
+        logger.debug(f"Rejecting ambiguous set code '{set_upper}' - no supporting context")
+        return False
+    
     # 2. Set code appears with separator (e.g., "ATH · EN", "ARC - EN")
     separator_pattern = rf'{set_upper}\s*[·\-]\s*[A-Z]{{2}}'
     if re.search(separator_pattern, text):
@@ -177,11 +500,120 @@ def is_valid_set_code_in_context(set_code: str, text: str, collector_number: str
     logger.debug(f"Rejecting ambiguous set code '{set_upper}' - no supporting context")
     return False
 
+def _largest_card_polygon(contours, img_area: float) -> Optional[np.ndarray]:
+    """Largest contour that looks like a card: 4-8 vertices, card aspect ratio, 5-95% of the image"""
+    card_contour = None
+    max_area = 0
+    
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        # Card should be at least 5% of image and at most 95%
+        if area > img_area * 0.05 and area < img_area * 0.95:
+            peri = cv2.arcLength(contour, True)
+            approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
+            
+            # Accept polygons with 4-8 vertices (cards may have rounded corners)
+            if len(approx) >= 4 and len(approx) <= 8 and area > max_area:
+                # Check aspect ratio is card-like (between 0.5 and 0.9)
+                x, y, w, h = cv2.boundingRect(approx)
+                aspect = w / h if h > 0 else 0
+                if 0.5 < aspect < 0.9 or 0.5 < (1/aspect) < 0.9:
+                    max_area = area
+                    card_contour = approx
+    
+    return card_contour
+
+def order_card_corners(points: np.ndarray) -> np.ndarray:
+    """
+    Order 4 corners as top-left, top-right, bottom-right, bottom-left of the card.
+    A landscape card is ordered as if rotated 90 degrees counterclockwise,
+    so the warp always produces a portrait card.
+    """
+    points = points.reshape(4, 2).astype(np.float32)
+    center = points.mean(axis=0)
+    angles = np.arctan2(points[:, 1] - center[1], points[:, 0] - center[0])
+    points = points[np.argsort(angles)]  # Clockwise on screen, starting top-left-ish
+    start = int(np.argmin(points.sum(axis=1)))
+    tl, tr, br, bl = np.roll(points, -start, axis=0)
+    
+    if np.linalg.norm(tr - tl) > np.linalg.norm(bl - tl):
+        tl, tr, br, bl = tr, br, bl, tl
+    return np.array([tl, tr, br, bl], dtype=np.float32)
+
+def _card_quad(contour: np.ndarray) -> np.ndarray:
+    """Reduce a 4-8 point card contour (rounded corners) to 4 corners"""
+    points = contour.reshape(-1, 2).astype(np.float32)
+    if len(points) == 4:
+        return points
+    
+    hull = cv2.convexHull(points)
+    peri = cv2.arcLength(hull, True)
+    for epsilon in (0.02, 0.04, 0.06):
+        approx = cv2.approxPolyDP(hull, epsilon * peri, True)
+        if len(approx) == 4:
+            return approx.reshape(4, 2)
+    return cv2.boxPoints(cv2.minAreaRect(points))
+
+def warp_card(img: np.ndarray, contour: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Perspective-warp the card outlined by contour to config.CARD_WARP_SIZE.
+    Returns None when the outline is degenerate.
+    """
+    width, height = config.CARD_WARP_SIZE
+    corners = order_card_corners(_card_quad(contour))
+    
+    # Reject self-intersecting or collapsed quads
+    if cv2.contourArea(corners) < 0.25 * cv2.contourArea(contour.astype(np.float32)) or \
+            not cv2.isContourConvex(corners.reshape(-1, 1, 2)):
+        return None
+    
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(img, matrix, (width, height), flags=cv2.INTER_LINEAR)
+
+# How each scan was cropped, for this process
+_crop_method_counts = {'warp': 0, 'bounding_rect': 0, 'center_crop': 0}
+_crop_method_lock = threading.Lock()
+
+def record_crop_method(method: str):
+    with _crop_method_lock:
+        _crop_method_counts[method] = _crop_method_counts.get(method, 0) + 1
+
+def get_crop_method_stats() -> Dict[str, int]:
+    """Counts of crop methods used since the process started"""
+    with _crop_method_lock:
+        return dict(_crop_method_counts)
+
+def enhance_contrast(region: np.ndarray, card_width: int) -> np.ndarray:
+    """
+    CLAHE on an OCR region (BGR or grayscale).
+    Tiles keep the size they had when CLAHE ran on the whole card (8 across
+    its width), so a region is enhanced the same way as before.
+    """
+    h, w = region.shape[:2]
+    if h == 0 or w == 0:
+        return region
+    
+    tile = max(1, card_width // 8)
+    grid = (max(1, round(w / tile)), max(1, round(h / tile)))
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=grid)
+    
+    if region.ndim == 2:
+        return clahe.apply(region)
+    lab = cv2.cvtColor(region, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    return cv2.cvtColor(cv2.merge([clahe.apply(l), a, b]), cv2.COLOR_LAB2BGR)
+
 class CardRecognitionEngine:
     """Main card recognition engine using OCR and API search"""
     
-    def __init__(self):
+    def __init__(self, ocr_backend: OCRBackend = None, variant_scheduler: OCRVariantScheduler = None,
+                 result_cache: RecognitionCache = None, catalog: LocalCatalog = None):
         self.hash_threshold = config.RECOGNITION_CONFIDENCE_THRESHOLD
+        self.ocr = ocr_backend or get_ocr_backend()
+        self.variant_scheduler = variant_scheduler or get_ocr_scheduler()
+        self.result_cache = result_cache  # None = no result caching
+        self.catalog = catalog or get_local_catalog()
         # Import API integrations
         from api_integrations import ScryfallAPI
         self.scryfall_api = ScryfallAPI()
@@ -201,12 +633,16 @@ class CardRecognitionEngine:
         """
         Preprocess scanned card image
         - Auto-rotate if needed
-        - Crop to card boundaries
-        - Enhance contrast
+        - Crop to card boundaries (perspective warp to the canonical card raster when possible)
         
         Returns:
             Tuple of (processed_image, pil_image, original_image)
         """
+        processed_img, pil_img, original_img, _ = self._preprocess(image_path)
+        return processed_img, pil_img, original_img
+    
+    def _preprocess(self, image_path: str) -> Tuple[np.ndarray, Image.Image, np.ndarray, str]:
+        """preprocess_image, also returning the crop method ('warp', 'bounding_rect' or 'center_crop')"""
         logger.debug(f"Preprocessing image: {image_path}")
         
         # Load image
@@ -220,66 +656,23 @@ class CardRecognitionEngine:
         
         logger.debug(f"Original image size: {img.shape}")
         
-        # Convert to grayscale for processing
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Try multiple edge detection strategies
-        card_contour = None
-        max_area = 0
-        img_area = img.shape[0] * img.shape[1]
-        
-        # Strategy 1: Standard Canny edge detection
-        edges = cv2.Canny(blurred, 30, 100)
-        kernel = np.ones((3, 3), np.uint8)
-        edges = cv2.dilate(edges, kernel, iterations=2)
-        
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        logger.debug(f"Found {len(contours)} contours with standard edge detection")
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            # Card should be at least 5% of image and at most 95%
-            if area > img_area * 0.05 and area < img_area * 0.95:
-                peri = cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
-                
-                # Accept polygons with 4-8 vertices (cards may have rounded corners)
-                if len(approx) >= 4 and len(approx) <= 8 and area > max_area:
-                    # Check aspect ratio is card-like (between 0.5 and 0.9)
-                    x, y, w, h = cv2.boundingRect(approx)
-                    aspect = w / h if h > 0 else 0
-                    if 0.5 < aspect < 0.9 or 0.5 < (1/aspect) < 0.9:
-                        max_area = area
-                        card_contour = approx
+        card_contour = self.detect_card_contour(img)
         
-        # Strategy 2: If no card found, try adaptive threshold
-        if card_contour is None:
-            adaptive = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-            contours2, _ = cv2.findContours(adaptive, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            logger.debug(f"Trying adaptive threshold: {len(contours2)} contours")
-            
-            for contour in contours2:
-                area = cv2.contourArea(contour)
-                if area > img_area * 0.05 and area < img_area * 0.95:
-                    peri = cv2.arcLength(contour, True)
-                    approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
-                    if len(approx) >= 4 and len(approx) <= 8 and area > max_area:
-                        x, y, w, h = cv2.boundingRect(approx)
-                        aspect = w / h if h > 0 else 0
-                        if 0.5 < aspect < 0.9 or 0.5 < (1/aspect) < 0.9:
-                            max_area = area
-                            card_contour = approx
-        
-        # Crop to card if found, otherwise try center crop
+        # Warp the card to the canonical raster if found, otherwise try center crop
+        cropped = None
         if card_contour is not None:
-            # Get bounding rectangle
-            x, y, w, h = cv2.boundingRect(card_contour)
-            cropped = img[y:y+h, x:x+w]
-            logger.info(f"Card detected: x={x}, y={y}, w={w}, h={h}")
+            cropped = warp_card(img, card_contour)
+            if cropped is not None:
+                crop_method = 'warp'
+                logger.info(f"Card detected and warped | corners={card_contour.reshape(-1, 2).tolist()}")
+            else:
+                # Degenerate quad - get bounding rectangle
+                x, y, w, h = cv2.boundingRect(card_contour)
+                cropped = img[y:y+h, x:x+w]
+                crop_method = 'bounding_rect'
+                logger.info(f"Card detected: x={x}, y={y}, w={w}, h={h}")
         else:
+            crop_method = 'center_crop'
             # No card detected - use smarter center crop
             # The card should be roughly in the center of the camera frame
             # MTG card aspect ratio is ~0.716 (63:88)
@@ -310,13 +703,8 @@ class CardRecognitionEngine:
                 cropped = img[margin_y:h-margin_y, margin_x:w-margin_x]
                 logger.warning(f"No card contour detected, using center crop (landscape)")
         
-        # Enhance contrast
-        lab = cv2.cvtColor(cropped, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        enhanced = cv2.merge([l, a, b])
-        enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+        # Contrast is enhanced later, only on the regions that are OCR'd
+        enhanced = cropped
         
         # Auto-rotate if the cropped card is in landscape orientation
         # MTG cards should be portrait (taller than wide)
@@ -330,7 +718,51 @@ class CardRecognitionEngine:
         # Convert to PIL Image for hashing
         pil_img = Image.fromarray(cv2.cvtColor(enhanced, cv2.COLOR_BGR2RGB))
         
-        return enhanced, pil_img, original_img
+        record_crop_method(crop_method)
+        return enhanced, pil_img, original_img, crop_method
+    
+    def detect_card_contour(self, img: np.ndarray, max_dim: int = None) -> Optional[np.ndarray]:
+        """
+        Find the card outline in a photo.
+        
+        Detection runs on a pyramid level whose longest side is at most
+        max_dim (default: config.CARD_DETECTION_MAX_DIM, 0 = full resolution)
+        and the polygon is mapped back to full-resolution coordinates.
+        
+        Returns:
+            Polygon of 4-8 points (full resolution), or None if no card was found
+        """
+        max_dim = config.CARD_DETECTION_MAX_DIM if max_dim is None else max_dim
+        
+        # Convert to grayscale for processing, then downscale
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        while max_dim and max(gray.shape[:2]) > max_dim:
+            gray = cv2.pyrDown(gray)
+        scale = np.array([img.shape[1] / gray.shape[1], img.shape[0] / gray.shape[0]])
+        logger.debug(f"Card detection at {gray.shape[1]}x{gray.shape[0]} | scale={scale[0]:.2f}")
+        
+        # Apply Gaussian blur to reduce noise
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        # Strategy 1: Standard Canny edge detection
+        edges = cv2.Canny(blurred, 30, 100)
+        kernel = np.ones((3, 3), np.uint8)
+        edges = cv2.dilate(edges, kernel, iterations=2)
+        
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        logger.debug(f"Found {len(contours)} contours with standard edge detection")
+        card_contour = _largest_card_polygon(contours, gray.shape[0] * gray.shape[1])
+        
+        # Strategy 2: If no card found, try adaptive threshold
+        if card_contour is None:
+            adaptive = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+            contours, _ = cv2.findContours(adaptive, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            logger.debug(f"Trying adaptive threshold: {len(contours)} contours")
+            card_contour = _largest_card_polygon(contours, gray.shape[0] * gray.shape[1])
+        
+        if card_contour is None:
+            return None
+        return np.round(card_contour * scale).astype(np.int32)
     
     def extract_card_name_region(self, image: np.ndarray) -> np.ndarray:
         """
@@ -365,7 +797,7 @@ class CardRecognitionEngine:
             left_margin = int(w * 0.05)
             right_cut = int(w * 0.70)
         
-        name_region = image[top_margin:bottom_cut, left_margin:right_cut]
+        name_region = enhance_contrast(image[top_margin:bottom_cut, left_margin:right_cut], w)
         
         logger.debug(f"Name region extracted | size={name_region.shape[1]}x{name_region.shape[0]}")
         
@@ -391,7 +823,99 @@ class CardRecognitionEngine:
         
         return gray
     
-    def extract_set_info_from_full_image(self, image: np.ndarray) -> Dict[str, str]:
+    def _ocr(self, image, psm: int, budget: OCRBudget, whitelist: str = None) -> str:
+        """Run one OCR call through the backend, charging it to the scan budget"""
+        budget.spend()
+        return self.ocr.image_to_string(image, psm=psm, whitelist=whitelist)
+    
+    def _set_line_confirmer(self, image: np.ndarray, canonical: bool, budget: OCRBudget):
+        """
+        confirm(set_code, collector_number) for RecognitionCache.get_similar:
+        whether the set info corner shows that printing. The corner is read
+        with one OCR call, on first use, and shared by every candidate.
+        """
+        h, w = image.shape[:2]
+        # Tight strip on a warped card, the wider fallback region otherwise
+        top, right = (int(h * 0.93), int(w * 0.35)) if canonical else (int(h * 0.90), int(w * 0.40))
+        text = None
+        
+        def confirm(set_code: str, collector_number: str) -> bool:
+            nonlocal text
+            if text is None:
+                text = ''
+                region = enhance_contrast(image[top:h, int(w * 0.02):right], w)
+                if region.shape[0] < 10 or region.shape[1] < 10 or not budget.can_spend(reserve=NAME_OCR_CALLS):
+                    return False
+                gray = cv2.resize(cv2.cvtColor(region, cv2.COLOR_BGR2GRAY), None, fx=3.0, fy=3.0,
+                                  interpolation=cv2.INTER_CUBIC)
+                try:
+                    text = self._ocr(gray, 6, budget).lower()
+                except Exception as e:
+                    logger.debug(f"Set line OCR failed: {e}")
+            return printing_in_text(text, set_code, collector_number)
+        
+        return confirm
+    
+    def _scan_set_info_variants(self, stage: str, variants: List[Tuple[str, int]], prepare,
+                                parse, budget: OCRBudget) -> Dict[str, str]:
+        """
+        Run set info OCR variants in scheduler order until a (set_code,
+        collector_number) pair parses and validates against the local catalog.
+        
+        Args:
+            stage: Scheduler stage name (variant stats are kept per stage)
+            variants: (image_key, psm) pairs
+            prepare: image_key -> image to OCR (or None to skip), called once per key
+            parse: (text, result) -> fields filled in result by this text
+            budget: Per-scan OCR budget (NAME_OCR_CALLS are kept for the name OCR)
+        """
+        result = {'set_code': None, 'collector_number': None}
+        by_name = {f'{key}/psm{psm}': (key, psm) for key, psm in variants}
+        images = {}
+        attempted = []
+        contributors = {}  # field -> variant that produced it
+        
+        for name in self.variant_scheduler.order(stage, list(by_name)):
+            if not budget.can_spend(reserve=NAME_OCR_CALLS):
+                logger.info(f"OCR budget exhausted during {stage} set info | calls={budget.calls}")
+                break
+            
+            key, psm = by_name[name]
+            if key not in images:
+                images[key] = prepare(key)
+            if images[key] is None:
+                continue
+            
+            attempted.append(name)
+            try:
+                text = self._ocr(images[key], psm, budget).strip().upper()
+            except Exception as e:
+                logger.debug(f"OCR attempt failed ({stage}, {name}): {e}")
+                continue
+            
+            if not text or len(text) < 3:
+                continue
+            logger.debug(f"Set OCR ({stage}, {name}): '{text[:60]}'")
+            
+            for field in parse(text, result):
+                contributors[field] = name
+            
+            if result['set_code'] and result['collector_number']:
+                if is_valid_set_number_pair(result['set_code'], result['collector_number']):
+                    logger.info(f"Set info found ({stage}, {name}): set={result['set_code']}, number={result['collector_number']}")
+                    self.variant_scheduler.record(stage, attempted, contributors.values())
+                    return result
+                
+                # Numbers are misread far more often than known set codes
+                logger.debug(f"Set info not in catalog, discarding number: set={result['set_code']}, number={result['collector_number']}")
+                result['collector_number'] = None
+                contributors.pop('collector_number', None)
+        
+        self.variant_scheduler.record(stage, attempted)
+        return result
+    
+    def extract_set_info_from_full_image(self, image: np.ndarray, budget: OCRBudget = None,
+                                         canonical: bool = False) -> Dict[str, str]:
         """
         Extract set code and collector number from the bottom-left corner of the card.
         
@@ -403,11 +927,17 @@ class CardRecognitionEngine:
         We scan a small region and look for patterns like:
         - 2-4 digit numbers (collector number)
         - Known 3-letter set codes near the number
+        
+        Variants (region x binarization x PSM) are tried in scheduler order and
+        the scan stops at the first pair validated against the catalog.
+        With canonical=True (card warped to CARD_WARP_SIZE) the set info is at a
+        fixed position, so only the tight strip is read.
         """
         if not TESSERACT_AVAILABLE:
             logger.warning("Tesseract not available for set info extraction")
             return {'set_code': None, 'collector_number': None}
         
+        budget = budget or OCRBudget()
         h, w = image.shape[:2]
         
         # Save debug image
@@ -416,8 +946,7 @@ class CardRecognitionEngine:
         
         # Load known set codes from database (with cache)
         known_sets = load_known_sets_from_db()
-        
-        best_result = {'set_code': None, 'collector_number': None}
+        set_matcher = get_set_code_matcher(known_sets)
         
         # CORRECTED COORDINATES for MTG card set info
         # The set info is in the BOTTOM-LEFT corner:
@@ -430,119 +959,109 @@ class CardRecognitionEngine:
         set_left = int(w * 0.02)
         set_right = int(w * 0.35)
         
-        bottom_strip = image[set_top:set_bottom, set_left:set_right]
+        bottom_strip = enhance_contrast(image[set_top:set_bottom, set_left:set_right], w)
         logger.debug(f"Set info: scanning bottom-left corner | y={set_top}-{set_bottom}, x={set_left}-{set_right} | size={bottom_strip.shape[1]}x{bottom_strip.shape[0]}")
         cv2.imwrite(os.path.join(debug_dir, 'set_info_strip.png'), bottom_strip)
         
         # Secondary region: slightly larger area for fallback
         region_top = int(h * 0.90)
         region_right = int(w * 0.40)
-        bottom_region = image[region_top:set_bottom, set_left:region_right]
+        bottom_region = enhance_contrast(image[region_top:set_bottom, set_left:region_right], w)
         cv2.imwrite(os.path.join(debug_dir, 'set_info_region.png'), bottom_region)
         
-        # Try both regions
-        regions_to_try = [
-            ('strip', bottom_strip),
-            ('region', bottom_region),
-        ]
+        regions = {'strip': bottom_strip}
+        if not canonical:
+            regions['region'] = bottom_region
+        binarizations = ['gray', 'inverted', 'thresh_light', 'thresh_dark', 'adaptive']
+        gray_cache = {}
         
-        for region_name, region in regions_to_try:
+        def prepare(key):
+            region_name, img_name = key.split(':')
+            region = regions[region_name]
             if region.shape[0] < 10 or region.shape[1] < 10:
-                continue
-                
-            # Convert to grayscale
-            gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+                return None
             
-            # Apply threshold to handle both light and dark text
-            _, thresh_light = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
-            _, thresh_dark = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
+            if region_name not in gray_cache:
+                gray_cache[region_name] = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+            gray = gray_cache[region_name]
             
-            # Also try adaptive threshold
-            adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            # Handle both light and dark text
+            if img_name == 'gray':
+                img = gray
+            elif img_name == 'inverted':
+                img = cv2.bitwise_not(gray)
+            elif img_name == 'thresh_light':
+                _, img = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+            elif img_name == 'thresh_dark':
+                _, img = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
+            else:
+                img = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
                                             cv2.THRESH_BINARY, 11, 2)
             
-            images_to_try = [
-                ('gray', gray),
-                ('inverted', cv2.bitwise_not(gray)),
-                ('thresh_light', thresh_light),
-                ('thresh_dark', thresh_dark),
-                ('adaptive', adaptive),
-            ]
+            # Scale up for better OCR (small text needs enlargement)
+            return cv2.resize(img, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
+        
+        def parse(text, result):
+            filled = []
             
-            for img_name, img in images_to_try:
-                # Scale up for better OCR (small text needs enlargement)
-                scale = 3.0
-                scaled = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
-                
-                # Try OCR with different configs
-                for psm in [7, 6, 13]:  # 7=single line, 6=block, 13=raw line
-                    try:
-                        pil_img = Image.fromarray(scaled)
-                        config = f'--oem 3 --psm {psm}'
-                        text = pytesseract.image_to_string(pil_img, config=config)
-                        text = text.strip().upper()
-                        
-                        if not text or len(text) < 3:
-                            continue
-                        
-                        logger.debug(f"Set OCR ({region_name}, {img_name}, PSM {psm}): '{text}'")
-                        
-                        # Pattern 1: Look for "NUMBER SET" format like "168 WOE" or "0168 WOE"
-                        # Require at least 2 digits to avoid false positives
-                        combined_pattern = r'0?(\d{2,4})\s*[/·\-]?\s*([A-Z]{3})'
-                        match = re.search(combined_pattern, text)
-                        if match:
-                            num = match.group(1).lstrip('0') or '0'
-                            potential_set = match.group(2)
-                            if potential_set in known_sets and 1 <= int(num) <= 999:
-                                best_result['collector_number'] = num
-                                best_result['set_code'] = potential_set.lower()
-                                logger.info(f"Found combined pattern: {num} {potential_set}")
-                                return best_result
-                        
-                        # Pattern 2: Look for set code like "WOE · EN" or "WOE - EN" or just "WOE"
-                        for set_code in known_sets:
-                            # Look for set code with word boundary or separator
-                            set_pattern = rf'\b{set_code}\b|{set_code}\s*[·\-]'
-                            if re.search(set_pattern, text):
-                                if not best_result['set_code']:
-                                    # Validate ambiguous set codes require context
-                                    if is_valid_set_code_in_context(set_code, text, best_result.get('collector_number')):
-                                        best_result['set_code'] = set_code.lower()
-                                        logger.info(f"Found set code: {set_code}")
-                                    else:
-                                        logger.debug(f"Skipping ambiguous set code: {set_code}")
-                        
-                        # Pattern 3: Look for collector number patterns
-                        # Require at least 2 digits to avoid false positives from single digits
-                        num_patterns = [
-                            r'[UCRMLS]\s*0?(\d{2,4})\b',     # U 167, C 234, R 089 (rarity + number)
-                            r'\b0?(\d{2,4})\b',              # 167, 0167, 68 (2-4 digits)
-                            r'(\d{2,4})\s*/\s*\d+',          # 167/264 format
-                        ]
-                        
-                        for pattern in num_patterns:
-                            match = re.search(pattern, text)
-                            if match and not best_result['collector_number']:
-                                num = match.group(1).lstrip('0') or '0'
-                                if 1 <= int(num) <= 999:
-                                    best_result['collector_number'] = num
-                                    logger.info(f"Found collector number: {num}")
-                                    break
-                        
-                        # If we found both, return immediately
-                        if best_result['set_code'] and best_result['collector_number']:
-                            logger.info(f"Set info found: set={best_result['set_code']}, number={best_result['collector_number']}")
-                            return best_result
-                            
-                    except Exception as e:
-                        logger.debug(f"OCR attempt failed ({region_name}, {img_name}, PSM {psm}): {e}")
+            # Pattern 1: Look for "NUMBER SET" format like "168 WOE" or "0168 WOE"
+            # Require at least 2 digits to avoid false positives
+            match = re.search(r'0?(\d{2,4})\s*[/·\-]?\s*([A-Z]{3})', text)
+            if match:
+                num = match.group(1).lstrip('0') or '0'
+                potential_set = match.group(2)
+                if (potential_set in known_sets and 1 <= int(num) <= 999
+                        and is_valid_set_number_pair(potential_set, num)):
+                    result['collector_number'] = num
+                    result['set_code'] = potential_set.lower()
+                    logger.info(f"Found combined pattern: {num} {potential_set}")
+                    return ['set_code', 'collector_number']
+            
+            # Pattern 2: Look for set code like "WOE · EN" or "WOE - EN" or just "WOE"
+            if not result['set_code']:
+                for hit in set_matcher.find_all(text):
+                    # Set code with word boundary or separator
+                    if not (hit.bounded or hit.separated):
                         continue
+                    # Validate ambiguous set codes require context
+                    if is_valid_set_code_in_context(hit.code, text, result.get('collector_number'), hit=hit):
+                        result['set_code'] = hit.code.lower()
+                        filled.append('set_code')
+                        logger.info(f"Found set code: {hit.code}")
+                        break
+                    logger.debug(f"Skipping ambiguous set code: {hit.code}")
+            
+            # Pattern 3: Look for collector number patterns
+            # Require at least 2 digits to avoid false positives from single digits
+            if not result['collector_number']:
+                num_patterns = [
+                    r'[UCRMLS]\s*0?(\d{2,4})\b',     # U 167, C 234, R 089 (rarity + number)
+                    r'\b0?(\d{2,4})\b',              # 167, 0167, 68 (2-4 digits)
+                    r'(\d{2,4})\s*/\s*\d+',          # 167/264 format
+                ]
+                for pattern in num_patterns:
+                    match = re.search(pattern, text)
+                    if match:
+                        num = match.group(1).lstrip('0') or '0'
+                        if 1 <= int(num) <= 999:
+                            result['collector_number'] = num
+                            filled.append('collector_number')
+                            logger.info(f"Found collector number: {num}")
+                            break
+            
+            return filled
+        
+        variants = [(f'{region_name}:{img_name}', psm)
+                    for region_name in regions
+                    for img_name in binarizations
+                    for psm in [7, 6, 13]]  # 7=single line, 6=block, 13=raw line
+        stage = 'warped' if canonical else 'full_image'
+        best_result = self._scan_set_info_variants(stage, variants, prepare, parse, budget)
         
         logger.info(f"Set info extraction result: set={best_result.get('set_code')}, number={best_result.get('collector_number')}")
         return best_result
     
-    def extract_set_info_from_original(self, original_image: np.ndarray) -> Dict[str, str]:
+    def extract_set_info_from_original(self, original_image: np.ndarray, budget: OCRBudget = None) -> Dict[str, str]:
         """
         Extract set code and collector number from the ORIGINAL photo.
         
@@ -556,109 +1075,80 @@ class CardRecognitionEngine:
             logger.warning("Tesseract not available for set info extraction from original")
             return {'set_code': None, 'collector_number': None}
         
+        budget = budget or OCRBudget()
         h, w = original_image.shape[:2]
         logger.debug(f"Extracting set info from original image: {w}x{h}")
         
-        # Save debug image
-        debug_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'debug')
-        os.makedirs(debug_dir, exist_ok=True)
-        
         # Load known set codes from database (with cache)
-        known_sets = load_known_sets_from_db()
-        
-        best_result = {'set_code': None, 'collector_number': None}
+        set_matcher = get_set_code_matcher()
         
         # For portrait photos (phone camera), the card is centered
         # Set info appears at roughly 70-76% of image height, 15-45% width
         # We scan multiple vertical strips to find it
         
-        y_ranges = [
-            (0.70, 0.76),  # Primary - where we found BLB in the test
-            (0.68, 0.74),  # Slightly higher
-            (0.72, 0.78),  # Slightly lower
-            (0.65, 0.72),  # Even higher (for closer shots)
-            (0.75, 0.82),  # Even lower (for further shots)
-        ]
+        y_ranges = {
+            'y70-76': (0.70, 0.76),  # Primary - where we found BLB in the test
+            'y68-74': (0.68, 0.74),  # Slightly higher
+            'y72-78': (0.72, 0.78),  # Slightly lower
+            'y65-72': (0.65, 0.72),  # Even higher (for closer shots)
+            'y75-82': (0.75, 0.82),  # Even lower (for further shots)
+        }
         
         x_start = int(w * 0.12)  # Left side where set info appears
         x_end = int(w * 0.50)    # Don't go too far right
         
-        for y_start_pct, y_end_pct in y_ranges:
-            y1 = int(h * y_start_pct)
-            y2 = int(h * y_end_pct)
-            
-            region = original_image[y1:y2, x_start:x_end]
-            
+        def prepare(key):
+            y_start_pct, y_end_pct = y_ranges[key]
+            region = original_image[int(h * y_start_pct):int(h * y_end_pct), x_start:x_end]
             if region.shape[0] < 20 or region.shape[1] < 50:
-                continue
+                return None
             
             # Convert and preprocess
             gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
             inverted = cv2.bitwise_not(gray)
             
             # Scale up for better OCR
-            scaled = cv2.resize(inverted, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+            return cv2.resize(inverted, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+        
+        def parse(text, result):
+            filled = []
             
-            # Try OCR
-            for psm in [6, 7]:
-                try:
-                    text = pytesseract.image_to_string(scaled, config=f'--oem 3 --psm {psm}')
-                    text = text.strip().upper()
-                    
-                    if not text or len(text) < 3:
-                        continue
-                    
-                    logger.debug(f"Original set OCR (y={y_start_pct:.0%}-{y_end_pct:.0%}, PSM {psm}): '{text[:60]}'")
-                    
-                    # Look for collector number pattern: R 0053, U 0167, etc.
-                    # Only set if we haven't found one yet!
-                    if not best_result['collector_number']:
-                        num_match = re.search(r'[RCUMLS]\s*0?(\d{2,4})\b', text)
-                        if num_match:
-                            num = num_match.group(1).lstrip('0') or '0'
-                            if 1 <= int(num) <= 999:
-                                best_result['collector_number'] = num
-                                logger.info(f"Found collector number from original: {num}")
-                        
-                        # Also try plain number pattern
-                        if not best_result['collector_number']:
-                            num_match = re.search(r'\b0?(\d{2,4})\b', text)
-                            if num_match:
-                                num = num_match.group(1).lstrip('0') or '0'
-                                if 1 <= int(num) <= 999:
-                                    best_result['collector_number'] = num
-                                    logger.info(f"Found collector number from original (plain): {num}")
-                                logger.info(f"Found collector number from original (plain): {num}")
-                    
-                    # Look for set code - only if we haven't found one yet
-                    if not best_result['set_code']:
-                        for set_code in known_sets:
-                            if set_code in text:
-                                # Validate ambiguous set codes require context
-                                if is_valid_set_code_in_context(set_code, text, best_result.get('collector_number')):
-                                    best_result['set_code'] = set_code.lower()
-                                    logger.info(f"Found set code from original: {set_code}")
-                                    break
-                                else:
-                                    logger.debug(f"Skipping ambiguous set code from original: {set_code}")
-                    
-                    # If we found both, save debug and return
-                    if best_result['set_code'] and best_result['collector_number']:
-                        cv2.imwrite(os.path.join(debug_dir, 'set_info_from_original.png'), region)
-                        logger.info(f"Set info from original: set={best_result['set_code']}, number={best_result['collector_number']}")
-                        return best_result
-                        
-                except Exception as e:
-                    logger.debug(f"OCR failed for original region: {e}")
-                    continue
+            # Look for collector number pattern: R 0053, U 0167, etc.
+            # Only set if we haven't found one yet!
+            if not result['collector_number']:
+                for pattern in (r'[RCUMLS]\s*0?(\d{2,4})\b', r'\b0?(\d{2,4})\b'):
+                    num_match = re.search(pattern, text)
+                    if num_match:
+                        num = num_match.group(1).lstrip('0') or '0'
+                        if 1 <= int(num) <= 999:
+                            result['collector_number'] = num
+                            filled.append('collector_number')
+                            logger.info(f"Found collector number from original: {num}")
+                            break
+            
+            # Look for set code - only if we haven't found one yet
+            if not result['set_code']:
+                for hit in set_matcher.find_all(text):
+                    # Validate ambiguous set codes require context
+                    if is_valid_set_code_in_context(hit.code, text, result.get('collector_number'), hit=hit):
+                        result['set_code'] = hit.code.lower()
+                        filled.append('set_code')
+                        logger.info(f"Found set code from original: {hit.code}")
+                        break
+                    logger.debug(f"Skipping ambiguous set code from original: {hit.code}")
+            
+            return filled
+        
+        variants = [(key, psm) for key in y_ranges for psm in [6, 7]]
+        best_result = self._scan_set_info_variants('original', variants, prepare, parse, budget)
         
-        # Save debug if we found partial info
         if best_result['set_code'] or best_result['collector_number']:
-            logger.info(f"Partial set info from original: set={best_result.get('set_code')}, number={best_result.get('collector_number')}")
+            logger.info(f"Set info from original: set={best_result.get('set_code')}, number={best_result.get('collector_number')}")
         
         return best_result
     
-    def extract_set_info_ocr(self, image_normal: np.ndarray, image_inverted: np.ndarray) -> Dict[str, str]:
+    def extract_set_info_ocr(self, image_normal: np.ndarray, image_inverted: np.ndarray,
+                             budget: OCRBudget = None) -> Dict[str, str]:
         """
         Extract set code and collector number from the set info region.
         Tries both normal and inverted versions to handle light-on-dark text.
@@ -673,6 +1163,8 @@ class CardRecognitionEngine:
             logger.warning("Tesseract not available for set info extraction")
             return {'set_code': None, 'collector_number': None}
         
+        budget = budget or OCRBudget()
+        
         # PSM modes to try:
         # 6 = Assume a single uniform block of text (good for 2 lines)
         # 4 = Assume a single column of text of variable sizes
@@ -688,12 +1180,13 @@ class CardRecognitionEngine:
         
         for img_name, img in images_to_try:
             for psm in psm_modes:
+                if not budget.can_spend(reserve=NAME_OCR_CALLS):
+                    break
                 try:
                     pil_img = Image.fromarray(img)
                     
                     # Allow all alphanumeric + common separators
-                    config = f'--oem 3 --psm {psm} -l eng -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789·.- '
-                    text = pytesseract.image_to_string(pil_img, config=config)
+                    text = self._ocr(pil_img, psm, budget, whitelist=SET_INFO_WHITELIST)
                     text = text.strip()
                     
                     if text:
@@ -745,30 +1238,31 @@ class CardRecognitionEngine:
         logger.info(f"Set info parsed: set={best_result.get('set_code')}, number={best_result.get('collector_number')}")
         return best_result
     
-    def extract_text_ocr(self, image: np.ndarray) -> str:
+    def extract_text_ocr(self, image: np.ndarray, budget: OCRBudget = None) -> str:
         """Extract text from image using Tesseract OCR"""
         if not TESSERACT_AVAILABLE:
             logger.warning("Tesseract not available")
             return ""
         
+        budget = budget or OCRBudget()
+        
         try:
-            # Convert to PIL for pytesseract
             pil_img = Image.fromarray(image)
             
             # Use simpler config - let Tesseract do its thing
             # PSM 6 = block (works better for card names based on testing)
             # PSM 7 = single line
-            configs = [
-                r'--oem 3 --psm 6 -l eng',   # Block of text, English (best for card names)
-                r'--oem 3 --psm 7 -l eng',   # Single line, English
-            ]
+            psm_modes = [6, 7]
             
             best_text = ""
             best_score = 0
             
-            for config in configs:
+            for psm in psm_modes:
+                if not budget.can_spend():
+                    logger.info(f"OCR budget exhausted before name OCR (PSM {psm})")
+                    break
                 try:
-                    text = pytesseract.image_to_string(pil_img, config=config)
+                    text = self._ocr(pil_img, psm, budget)
                     
                     # Clean up the text
                     text = text.strip()
@@ -788,7 +1282,7 @@ class CardRecognitionEngine:
                                 best_score = score
                                 best_text = text
                 except Exception as e:
-                    logger.warning(f"OCR config failed: {config} - {e}")
+                    logger.warning(f"OCR failed with PSM {psm} - {e}")
                     continue
             
             logger.info(f"OCR extracted text: '{best_text}'")
@@ -797,10 +1291,54 @@ class CardRecognitionEngine:
             logger.error(f"OCR error: {e}")
             return ""
     
+    def resolve_card_name(self, card_name: str) -> Optional[Dict]:
+        """
+        Resolve a card name against the local catalog, falling back to Scryfall
+        on a miss (never in config.OFFLINE_MODE).
+        The card data is tagged with '_resolution': 'local' or 'remote'.
+        """
+        self.catalog.refresh_if_stale()
+        card_data = self.catalog.lookup_name(card_name)
+        if card_data:
+            logger.debug(f"Resolved locally: '{card_name}' -> {card_data.get('name')}")
+            card_data['_resolution'] = 'local'
+            return card_data
+        
+        if config.OFFLINE_MODE:
+            logger.debug(f"Offline mode - '{card_name}' not in local catalog")
+            return None
+        
+        card_data = self.scryfall_api.search_card_by_name(card_name)
+        if card_data:
+            card_data['_resolution'] = 'remote'
+        return card_data
+    
+    def resolve_set_number(self, set_code: str, collector_number: str) -> Optional[Dict]:
+        """
+        Resolve an exact (set code, collector number) pair against the local
+        catalog, falling back to Scryfall on a miss (never in config.OFFLINE_MODE).
+        The card data is tagged with '_resolution': 'local' or 'remote'.
+        """
+        self.catalog.refresh_if_stale()
+        card_data = self.catalog.lookup_set_number(set_code, collector_number)
+        if card_data:
+            card_data['_resolution'] = 'local'
+            return card_data
+        
+        if config.OFFLINE_MODE:
+            logger.debug(f"Offline mode - {set_code} #{collector_number} not in local catalog")
+            return None
+        
+        card_data = self.scryfall_api.get_card_by_set_and_number(set_code, collector_number)
+        if card_data:
+            card_data['_resolution'] = 'remote'
+        return card_data
+    
     def search_card_by_name(self, card_name: str, use_fuzzy: bool = True) -> Optional[Dict]:
         """
-        Search for a Magic: The Gathering card by name using Scryfall API.
-        Now includes fuzzy matching to correct OCR errors before API search.
+        Search for a Magic: The Gathering card by name (local catalog first,
+        then Scryfall API).
+        Now includes fuzzy matching to correct OCR errors before the search.
         
         Args:
             card_name: The card name from OCR (may contain errors)
@@ -829,12 +1367,12 @@ class CardRecognitionEngine:
             except Exception as e:
                 logger.warning(f"Fuzzy matching failed: {e}")
         
-        # Step 2: Search via Scryfall API with the (possibly corrected) name
+        # Step 2: Resolve the (possibly corrected) name
         try:
-            result = self.scryfall_api.search_card_by_name(corrected_name)
+            result = self.resolve_card_name(corrected_name)
             
             if result:
-                logger.info(f"Found card via API: {result.get('name')}")
+                logger.info(f"Found card ({result.get('_resolution')}): {result.get('name')}")
                 # Add fuzzy matching metadata
                 result['_fuzzy_corrected'] = corrected_name != card_name
                 result['_original_ocr'] = card_name
@@ -844,9 +1382,9 @@ class CardRecognitionEngine:
             # If corrected name didn't work and it was different, try original
             if corrected_name != card_name:
                 logger.debug(f"Corrected name failed, trying original: '{card_name}'")
-                result = self.scryfall_api.search_card_by_name(card_name)
+                result = self.resolve_card_name(card_name)
                 if result:
-                    logger.info(f"Found card via API (original): {result.get('name')}")
+                    logger.info(f"Found card ({result.get('_resolution')}, original): {result.get('name')}")
                     return result
             
         except Exception as e:
@@ -874,8 +1412,8 @@ class CardRecognitionEngine:
                 if matched_name:
                     result['corrected_name'] = matched_name
                     
-                    # Try API search with corrected name
-                    card_data = self.scryfall_api.search_card_by_name(matched_name)
+                    # Try search with corrected name
+                    card_data = self.resolve_card_name(matched_name)
                     if card_data:
                         result['card'] = card_data
                         result['card']['_fuzzy_confidence'] = confidence
@@ -888,10 +1426,10 @@ class CardRecognitionEngine:
             except Exception as e:
                 logger.warning(f"Fuzzy search failed: {e}")
         
-        # Fallback to direct API search
+        # Fallback to direct search
         if not result['card']:
             try:
-                card_data = self.scryfall_api.search_card_by_name(card_name)
+                card_data = self.resolve_card_name(card_name)
                 if card_data:
                     result['card'] = card_data
             except Exception as e:
@@ -965,6 +1503,7 @@ class CardRecognitionEngine:
                             'card': card_data,
                             'confidence': confidence,
                             'method': method,
+                            'resolution': card_data.get('_resolution'),
                             'extracted_name': extracted_name,
                             'corrected_name': corrected_name if fuzzy_corrected else None,
                             'message': f"Card recognized via OCR: {card_data.get('name')}"
@@ -975,13 +1514,14 @@ class CardRecognitionEngine:
                         suggestions = self.fuzzy_matcher.get_suggestions(extracted_name, max_results=5)
                         for suggested_name, edit_dist in suggestions:
                             if suggested_name != corrected_name:
-                                card_data = self.scryfall_api.search_card_by_name(suggested_name)
+                                card_data = self.resolve_card_name(suggested_name)
                                 if card_data:
                                     return {
                                         'success': True,
                                         'card': card_data,
                                         'confidence': max(0.60, 1.0 - edit_dist/len(extracted_name)),
                                         'method': 'ocr_suggestion',
+                                        'resolution': card_data.get('_resolution'),
                                         'extracted_name': extracted_name,
                                         'corrected_name': suggested_name,
                                         'message': f"Card recognized via suggestion: {card_data.get('name')}"
@@ -1000,6 +1540,7 @@ class CardRecognitionEngine:
                                         'card': card_data,
                                         'confidence': 0.65,
                                         'method': 'ocr_partial',
+                                        'resolution': card_data.get('_resolution'),
                                         'extracted_name': extracted_name,
                                         'message': f"Card recognized via partial OCR: {card_data.get('name')}"
                                     }
@@ -1042,42 +1583,40 @@ class CardRecognitionEngine:
         
         try:
             with PerformanceLogger("find_matching_card"):
-                # Query MTG cards from database
-                query = db.query(Card).filter(Card.tcg == 'mtg')
-                
-                cards = query.all()
-                logger.debug(f"Comparing against {len(cards)} cards in database")
+                max_distance = config.IMAGE_HASH_THRESHOLD
                 
-                best_match = None
-                best_score = 0
+                # Several candidates: an indexed id may belong to a card deleted since
+                top_k = config.HASH_MATCH_CANDIDATES
+                if config.HASH_LOOKUP_MODE == 'mih':
+                    # Banded lookup: only cards sharing an exact band are compared
+                    candidates = mih_query(db, image_hash, top_k=top_k, max_distance=max_distance)
+                else:
+                    # Vectorized Hamming search over the in-memory hash index
+                    index = get_hash_index()
+                    if not index.loaded:
+                        index.load(db)
+                    candidates = index.query(image_hash, top_k=top_k, max_distance=max_distance)
+                    logger.debug(f"Compared against {len(index)} indexed hashes")
                 
-                # Compare hashes
-                query_hash = imagehash.hex_to_hash(image_hash)
+                # Convert distance to confidence score (0-1)
+                # Lower distance = higher confidence
+                candidates = [(card_db_id, 1.0 - (distance / max_distance)) for card_db_id, distance in candidates]
+                candidates = [(card_db_id, confidence) for card_db_id, confidence in candidates
+                              if confidence > 0 and confidence >= config.RECOGNITION_CONFIDENCE_THRESHOLD]
                 
-                for card in cards:
-                    if not card.image_hash:
-                        continue
+                if candidates:
+                    # Eager-load prices so to_dict() works after the session closes
+                    cards = {card.id: card for card in db.query(Card).options(
+                        selectinload(Card.price_history)
+                    ).filter(Card.id.in_([card_db_id for card_db_id, _ in candidates]))}
                     
-                    try:
-                        card_hash = imagehash.hex_to_hash(card.image_hash)
-                        # Calculate Hamming distance
-                        distance = query_hash - card_hash
-                        
-                        # Convert distance to confidence score (0-1)
-                        # Lower distance = higher confidence
-                        max_distance = config.IMAGE_HASH_THRESHOLD
-                        if distance <= max_distance:
-                            confidence = 1.0 - (distance / max_distance)
-                            if confidence > best_score:
-                                best_score = confidence
-                                best_match = card
-                    except Exception as e:
-                        logger.warning(f"Error comparing hash for card {card.name}: {e}")
-                        continue
-                
-                if best_match and best_score >= config.RECOGNITION_CONFIDENCE_THRESHOLD:
-                    logger.info(f"Card matched: {best_match.name} | confidence={best_score:.2%}")
-                    return (best_match, best_score)
+                    # Closest candidate that still exists
+                    for card_db_id, confidence in candidates:
+                        best_match = cards.get(card_db_id)
+                        if best_match:
+                            logger.info(f"Card matched: {best_match.name} | confidence={confidence:.2%}")
+                            return (best_match, confidence)
+                        logger.debug(f"Hash candidate no longer in the database | id={card_db_id}")
                 
                 logger.debug("No matching card found above confidence threshold")
                 return None
@@ -1085,13 +1624,51 @@ class CardRecognitionEngine:
         finally:
             db.close()
     
-    def recognize_card(self, image_path: str) -> Dict:
+    def recognize_card(self, image_path: str, ocr_budget: OCRBudget = None) -> Dict:
         """
         Main recognition pipeline for Magic: The Gathering cards:
         1. Try OCR for set code + collector number (most accurate)
         2. Try OCR for card name + API search
         3. Hash matching against local database
+        
+        OCR calls are capped by ocr_budget (default: config.OCR_CALL_BUDGET)
+        and the number spent is reported as 'ocr_calls' in the result.
+        The result also reports how the card was cropped ('crop_method'),
+        the crop method counts of this process ('crop_stats') and whether the
+        card was resolved from the local catalog or Scryfall ('resolution').
+        
+        With a result_cache, a repeated upload (same bytes) or a near-identical
+        photo (perceptual hash of the preprocessed card, confirmed by one OCR call
+        on the set line showing the cached set code + collector number) returns
+        the stored result with method 'cache'.
         """
+        digest = None
+        if self.result_cache is not None:
+            digest = file_digest(image_path)
+            cached = self.result_cache.get(digest)
+            if cached is not None:
+                cached['ocr_calls'] = 0
+                logger.info(f"Recognition served from cache | match=sha256 | card={cached['card'].get('name')}")
+                return cached
+        
+        budget = ocr_budget or OCRBudget()
+        scan_info = {}
+        result = self._recognize_card(image_path, budget, scan_info)
+        result['ocr_calls'] = budget.calls
+        if result.get('card') and 'resolution' not in result:
+            result['resolution'] = result['card'].get('_resolution', 'remote')
+        result['crop_method'] = scan_info.get('crop_method')
+        result['crop_stats'] = get_crop_method_stats()
+        
+        if self.result_cache is not None:
+            self.result_cache.put(digest, scan_info.get('image_hash'), result)
+        if budget.calls:
+            self.variant_scheduler.record_scan(budget.calls)
+        logger.info(f"Recognition finished | success={result['success']} | ocr_calls={budget.calls}")
+        return result
+    
+    def _recognize_card(self, image_path: str, budget: OCRBudget, scan_info: Dict) -> Dict:
+        """Recognition pipeline of recognize_card (OCR calls are charged to budget)"""
         logger.info(f"Starting card recognition | path={image_path}")
         extracted_name = None  # Track extracted name for error feedback
         set_info = None  # Track set info for better matching
@@ -1099,7 +1676,13 @@ class CardRecognitionEngine:
         try:
             with PerformanceLogger("recognize_card"):
                 # Preprocess image - now also returns original for set info extraction
-                processed_img, pil_img, original_img = self.preprocess_image(image_path)
+                processed_img, pil_img, original_img, crop_method = self._preprocess(image_path)
+                scan_info['crop_method'] = crop_method
+                warped = crop_method == 'warp'
+                
+                # Perceptual hash of the preprocessed card (cache key and Method 3)
+                img_hash = self.compute_image_hash(pil_img)
+                scan_info['image_hash'] = img_hash
                 
                 # Save debug images
                 debug_dir = os.path.join(os.path.dirname(image_path), 'debug')
@@ -1116,6 +1699,15 @@ class CardRecognitionEngine:
                 
                 # Method 1: Try OCR + API search
                 if TESSERACT_AVAILABLE:
+                    # A near-identical photo was already recognized: confirm its printing
+                    # with one OCR call on the set line instead of the full OCR pipeline
+                    if self.result_cache is not None:
+                        cached = self.result_cache.get_similar(
+                            img_hash, self._set_line_confirmer(processed_img, warped, budget))
+                        if cached is not None:
+                            logger.info(f"Recognition served from cache | match=phash | card={cached['card'].get('name')}")
+                            return cached
+                    
                     logger.info("OCR available - trying text recognition...")
                     
                     # ===== STEP 1: Extract SET CODE and COLLECTOR NUMBER =====
@@ -1123,14 +1715,15 @@ class CardRecognitionEngine:
                     logger.info("=== STEP 1: Trying SET CODE + COLLECTOR NUMBER extraction ===")
                     try:
                         # First try from processed/cropped card image
-                        set_info = self.extract_set_info_from_full_image(processed_img)
+                        set_info = self.extract_set_info_from_full_image(processed_img, budget=budget, canonical=warped)
                         logger.info(f"Set info from processed: set_code={set_info.get('set_code')}, collector_number={set_info.get('collector_number')}")
                         
                         # If not found in processed image, try the ORIGINAL photo
-                        # (the crop might have cut off the set info border)
-                        if not (set_info.get('set_code') and set_info.get('collector_number')):
+                        # (the crop might have cut off the set info border).
+                        # A warped card always includes the border.
+                        if not warped and not (set_info.get('set_code') and set_info.get('collector_number')):
                             logger.info("Set info incomplete in processed image, trying original photo...")
-                            set_info_original = self.extract_set_info_from_original(original_img)
+                            set_info_original = self.extract_set_info_from_original(original_img, budget=budget)
                             
                             # IMPORTANT: If original has BOTH set_code AND collector_number, use both together
                             # because they are found from the same image and are consistent with each other.
@@ -1152,8 +1745,8 @@ class CardRecognitionEngine:
                         if set_info.get('set_code') and set_info.get('collector_number'):
                             logger.info(f"Trying precise search: set={set_info['set_code']}, number={set_info['collector_number']}")
                             
-                            # Use Scryfall API to get exact card
-                            card_data = self.scryfall_api.get_card_by_set_and_number(
+                            # Local catalog first, Scryfall API on a miss
+                            card_data = self.resolve_set_number(
                                 set_info['set_code'], 
                                 set_info['collector_number']
                             )
@@ -1196,7 +1789,7 @@ class CardRecognitionEngine:
                     cv2.imwrite(debug_name, name_region)
                     logger.info(f"Saved name region: {debug_name} | shape={name_region.shape}")
                     
-                    extracted_name = self.extract_text_ocr(name_region)
+                    extracted_name = self.extract_text_ocr(name_region, budget=budget)
                     logger.info(f"OCR extracted text: '{extracted_name}'")
                     
                     if extracted_name and len(extracted_name) >= 3:
@@ -1250,7 +1843,6 @@ class CardRecognitionEngine:
                 
                 # Method 3: Hash matching against local database
                 logger.debug("Trying hash matching...")
-                img_hash = self.compute_image_hash(pil_img)
                 match = self.find_matching_card(img_hash)
                 
                 if match:
@@ -1261,6 +1853,7 @@ class CardRecognitionEngine:
                         'card': card.to_dict(),
                         'confidence': confidence,
                         'method': 'hash',
+                        'resolution': 'local',
                         'image_hash': img_hash,
                         'message': f'Card recognized: {card.name}'
                     }
@@ -1277,7 +1870,7 @@ class CardRecognitionEngine:
                     'success': False,
                     'card': None,
                     'confidence': 0.0,
-                    'image_hash': img_hash if 'img_hash' in dir() else None,
+                    'image_hash': img_hash,
                     'extracted_name': extracted_name,
                     'message': msg
                 }
@@ -1307,25 +1900,266 @@ class CardRecognitionEngine:
             result = self.recognize_card(image_path)
             results.append(result)
         return results
+    
+    def batch_recognize_parallel(self, image_paths: List[str], workers: int = None,
+                                 timeout: float = None, max_in_flight: int = None) -> Iterator[Dict]:
+        """
+        Recognize multiple cards in a process pool.
+        Results are yielded in completion order, each with its input 'index'.
+        See iter_batch_recognize for the parameters.
+        """
+        return iter_batch_recognize(image_paths, workers=workers, timeout=timeout,
+                                    max_in_flight=max_in_flight)
+
+# ============================================================================
+# PARALLEL BATCH RECOGNITION
+# ============================================================================
+
+# Engine owned by a pool worker process, built once by _init_batch_worker
+_worker_engine: Optional[CardRecognitionEngine] = None
+
+def _init_batch_worker():
+    """Process pool initializer: build this worker's engine exactly once"""
+    global _worker_engine
+    
+    # Each worker is single-threaded; don't let OpenCV/Tesseract oversubscribe cores
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    cv2.setNumThreads(1)
+    
+    # Drop SQLite connections inherited from the parent process
+    from database import engine as db_engine
+    db_engine.dispose(close=False)
+    
+    _worker_engine = CardRecognitionEngine()
+    load_known_sets_from_db()
+    _worker_engine.catalog.refresh_if_stale()
+    logger.info(f"Batch worker ready | pid={os.getpid()}")
+
+def _recognize_in_worker(image_path: str) -> Dict:
+    """Pool task: recognize one image with the worker's engine"""
+    return _worker_engine.recognize_card(image_path)
+
+def _new_batch_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker)
+
+# Long-lived pools by worker count, so workers (and their engines) survive across batches
+_batch_pools: Dict[int, ProcessPoolExecutor] = {}
+# Per worker count: one slot per worker, shared by every batch using that pool, so
+# an item is only submitted when a worker is free and its timeout runs from its start
+_batch_slots: Dict[int, threading.Semaphore] = {}
+_batch_pools_lock = threading.Lock()
+
+def _get_batch_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared pool for a worker count, creating it on first use"""
+    with _batch_pools_lock:
+        executor = _batch_pools.get(workers)
+        if executor is None:
+            executor = _batch_pools[workers] = _new_batch_pool(workers)
+        return executor
+
+def _get_batch_slots(workers: int) -> threading.Semaphore:
+    with _batch_pools_lock:
+        slots = _batch_slots.get(workers)
+        if slots is None:
+            slots = _batch_slots[workers] = threading.Semaphore(workers)
+        return slots
+
+def _kill_pool(executor: ProcessPoolExecutor):
+    """
+    Shut a pool down and terminate its worker processes, including one stuck
+    on a task (shutdown alone would leave it running until the task returns).
+    Items other batches had running in the pool fail with BrokenProcessPool
+    and are re-run in isolation there.
+    """
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+def _discard_batch_pool(executor: ProcessPoolExecutor):
+    """Kill a shared pool and forget it, so the next batch gets a new one"""
+    with _batch_pools_lock:
+        for workers, shared in list(_batch_pools.items()):
+            if shared is executor:
+                del _batch_pools[workers]
+    _kill_pool(executor)
+
+def _submit_batch_item(executor: ProcessPoolExecutor, workers: int, image_path: str):
+    """Submit one item, moving to a fresh shared pool if this one was shut down or broken meanwhile"""
+    try:
+        return executor, executor.submit(_recognize_in_worker, image_path)
+    except (RuntimeError, BrokenProcessPool):
+        _discard_batch_pool(executor)
+        executor = _get_batch_pool(workers)
+        return executor, executor.submit(_recognize_in_worker, image_path)
+
+def shutdown_batch_pools(wait: bool = True):
+    """Shut down every shared batch pool (app shutdown, tests)"""
+    with _batch_pools_lock:
+        executors = list(_batch_pools.values())
+        _batch_pools.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+def _batch_error_result(index: int, image_path: str, error: str) -> Dict:
+    return {
+        'success': False,
+        'card': None,
+        'confidence': 0.0,
+        'error': error,
+        'message': f'Recognition error: {error}',
+        'index': index,
+        'image_path': image_path
+    }
+
+def _recognize_isolated(index: int, image_path: str, timeout: Optional[float]) -> Dict:
+    """
+    Re-run an item in its own single-worker pool.
+    Used for items that were in flight when a worker crashed, so that only
+    the item that actually kills its worker is reported as failed.
+    """
+    executor = _new_batch_pool(1)
+    try:
+        result = executor.submit(_recognize_in_worker, image_path).result(timeout=timeout)
+        return {**result, 'index': index, 'image_path': image_path}
+    except FuturesTimeoutError:
+        logger.warning(f"Batch item timed out | index={index} | path={image_path}")
+        return _batch_error_result(index, image_path, f'Timed out after {timeout}s')
+    except BrokenProcessPool:
+        logger.error(f"Batch worker crashed | index={index} | path={image_path}")
+        return _batch_error_result(index, image_path, 'Worker process crashed')
+    except Exception as e:
+        return _batch_error_result(index, image_path, str(e))
+    finally:
+        _kill_pool(executor)
+
+def iter_batch_recognize(image_paths: List[str], workers: int = None, timeout: float = None,
+                         max_in_flight: int = None) -> Iterator[Dict]:
+    """
+    Recognize images in a process pool, yielding results as they complete.
+    The pool is shared across calls and only rebuilt after a crash or a timeout
+    (the stuck worker is terminated). Concurrent batches share its workers.
+    
+    Args:
+        image_paths: Images to recognize
+        workers: Worker processes (default: config.BATCH_RECOGNITION_WORKERS or CPU count)
+        timeout: Per-item timeout in seconds (default: config.BATCH_RECOGNITION_TIMEOUT)
+        max_in_flight: Items submitted to the pool at once (default: one per worker)
+        
+    Yields:
+        recognize_card result dicts with 'index' and 'image_path' attached.
+        A timed-out or crashed item yields a failed result; other items are unaffected.
+    """
+    workers = workers or config.BATCH_RECOGNITION_WORKERS or os.cpu_count() or 1
+    timeout = config.BATCH_RECOGNITION_TIMEOUT if timeout is None else timeout
+    max_in_flight = max(1, max_in_flight or workers)
+    
+    pending = deque(enumerate(image_paths))
+    suspects = deque()  # Items in flight when a worker crashed
+    in_flight = {}  # future -> (index, image_path, deadline); each holds one pool slot
+    slots = _get_batch_slots(workers)
+    
+    def release(futures) -> List[Tuple[int, str, Optional[float]]]:
+        """Take futures out of in_flight and give their pool slots back"""
+        items = [in_flight.pop(future) for future in list(futures)]
+        for _ in items:
+            slots.release()
+        return items
+    
+    logger.info(f"Parallel batch recognition | images={len(pending)} | workers={workers} | timeout={timeout}")
+    executor = _get_batch_pool(workers)
+    
+    try:
+        while pending or in_flight or suspects:
+            # Crash isolation: once the pool drained, re-run suspects one by one
+            if suspects and not in_flight:
+                index, image_path = suspects.popleft()
+                yield _recognize_isolated(index, image_path, timeout)
+                continue
+            
+            # Keep at most max_in_flight items in the pool, and only submit to a
+            # free worker (other batches share the slots), so the deadline set here
+            # is when the item starts rather than when it was queued
+            while pending and len(in_flight) < max_in_flight and not suspects:
+                if not slots.acquire(blocking=not in_flight):
+                    break
+                index, image_path = pending.popleft()
+                try:
+                    executor, future = _submit_batch_item(executor, workers, image_path)
+                except Exception:
+                    slots.release()
+                    raise
+                deadline = time.monotonic() + timeout if timeout else None
+                in_flight[future] = (index, image_path, deadline)
+            
+            deadlines = [deadline for _, _, deadline in in_flight.values() if deadline]
+            wait_time = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = futures_wait(list(in_flight), timeout=wait_time, return_when=FIRST_COMPLETED)
+            
+            pool_broken = False
+            for future in done:
+                (index, image_path, _), = release([future])
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    suspects.append((index, image_path))
+                    pool_broken = True
+                    continue
+                except CancelledError:
+                    # Another batch recycled the shared pool before this item started
+                    pending.appendleft((index, image_path))
+                    continue
+                except Exception as e:
+                    logger.error(f"Batch item failed | index={index} | error={e}")
+                    yield _batch_error_result(index, image_path, str(e))
+                    continue
+                yield {**result, 'index': index, 'image_path': image_path}
+            
+            if pool_broken:
+                # A dead worker breaks every pending future of the pool
+                logger.warning(f"Batch worker crashed, isolating {len(in_flight) + 1} in-flight items")
+                suspects.extend((index, image_path) for index, image_path, _ in release(in_flight))
+                _discard_batch_pool(executor)
+                executor = _get_batch_pool(workers)
+                continue
+            
+            now = time.monotonic()
+            expired = [future for future, (_, _, deadline) in in_flight.items()
+                       if deadline and now >= deadline]
+            if expired:
+                for index, image_path, _ in release(expired):
+                    logger.warning(f"Batch item timed out | index={index} | path={image_path}")
+                    yield _batch_error_result(index, image_path, f'Timed out after {timeout}s')
+                
+                # The stuck worker can't be cancelled: kill the pool and restart
+                # the other in-flight items from scratch
+                for index, image_path, _ in release(in_flight):
+                    pending.appendleft((index, image_path))
+                _discard_batch_pool(executor)
+                executor = _get_batch_pool(workers)
+    finally:
+        # Cancel what this batch left queued (e.g. the client went away); the pool stays up
+        for future in in_flight:
+            future.cancel()
+        release(in_flight)
 
 def download_and_hash_card_image(card_data: Dict) -> Optional[str]:
     """
     Download card image from URL and compute its hash
-    Used when populating the database with card data
+    Used when populating the database with card data.
+    Reads through the local image store (same image variant as the hash backfill).
     """
-    from io import BytesIO
+    from hash_pipeline import hash_image_bytes
+    from image_store import get_image_store, image_variant_url
     
     image_url = card_data.get('image_url')
     if not image_url:
         return None
     
-    try:
-        response = requests.get(image_url, timeout=10)
-        if response.status_code == 200:
-            img = Image.open(BytesIO(response.content))
-            ahash = imagehash.average_hash(img, hash_size=16)
-            return str(ahash)
-    except Exception as e:
-        logger.error(f"Error downloading/hashing image: {e}")
-    
-    return None
+    scryfall_id = card_data.get('scryfall_id') or card_data.get('card_id')
+    data = get_image_store().fetch(scryfall_id, config.HASH_IMAGE_VARIANT, image_variant_url(image_url))
+    if data is None:
+        logger.error(f"Error downloading image: {image_url}")
+        return None
+    return hash_image_bytes(data)
@@ -0,0 +1,174 @@
+"""
+TCG Scan - Card Import Writer
+Writes batches of parsed card data (ScryfallAPI._parse_card_data output) to
+the cards table with set-level statements instead of one query per card.
+
+For each chunk of cards:
+  1. one SELECT loads the stored content hashes of the chunk's card_ids, and
+     the rows holding the same (set_code, collector_number, language) printings
+  2. rows are classified against the stored content hash of the API fields:
+     new, changed or unchanged (unchanged rows are not written at all).
+     A row whose printing is stored under another card_id is a conflict: it
+     is reported and not written
+  3. new rows go through one executemany INSERT ... ON CONFLICT(card_id) DO NOTHING
+     RETURNING card_id (rows it drops are not reported as inserted),
+     changed rows through INSERT ... ON CONFLICT(card_id) DO UPDATE
+
+Locally computed columns (image_hash, created_at) are never overwritten.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.sqlite import insert
+
+import config
+from database import Card
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('card_writer')
+
+# Columns filled from the card API, in content-hash order
+CARD_CONTENT_FIELDS = (
+    'tcg', 'name', 'set_code', 'set_name', 'collector_number', 'rarity', 'card_type', 'colors',
+    'mana_cost', 'image_url', 'oracle_text', 'flavor_text', 'artist', 'is_foil', 'language',
+)
+
+
+def card_row(card_data: Dict) -> Optional[Dict]:
+    """cards table row (plain dict) from parsed card data, or None without a card id / name"""
+    card_id = card_data.get('card_id') or card_data.get('id')
+    if not card_id or not card_data.get('name'):
+        return None
+    row = {field: card_data.get(field) for field in CARD_CONTENT_FIELDS}
+    row['card_id'] = card_id
+    return row
+
+
+def printing_key(row: Dict) -> Optional[Tuple[str, str, str]]:
+    """(set_code, collector_number, language) of a row, or None if the unique index doesn't apply"""
+    key = (row.get('set_code'), row.get('collector_number'), row.get('language'))
+    return None if None in key else key
+
+
+def content_hash(row: Dict) -> str:
+    """Digest of a row's API fields, used to detect changed cards"""
+    values = [row[field] for field in CARD_CONTENT_FIELDS]
+    return hashlib.sha1(json.dumps(values, default=str).encode('utf-8')).hexdigest()
+
+
+class CardWriter:
+    """
+    Chunked card upsert on one session. The caller commits.
+
+    Usage:
+        writer = CardWriter(db)
+        counts = writer.write(api_manager.scryfall.search_cards('set:woe'))
+        db.commit()
+    """
+
+    def __init__(self, db, chunk_size: int = None):
+        self.db = db
+        self.chunk_size = chunk_size or config.CARD_WRITE_CHUNK_SIZE
+        self.inserted_ids: List[str] = []  # card_ids of rows this writer actually inserted, in order
+        self.conflicts: List[Tuple[str, str]] = []  # (card_id, card_id already holding the printing)
+
+    @staticmethod
+    def _new_counts() -> Dict[str, int]:
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'conflicts': 0}
+
+    def write(self, cards: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Insert new cards and update changed ones.
+
+        Returns:
+            Counts: inserted, updated, unchanged, skipped (no id/name),
+            conflicts (printing stored under another card_id, see self.conflicts)
+        """
+        counts = self._new_counts()
+        rows: Dict[str, Dict] = {}
+        for card_data in cards:
+            row = card_row(card_data)
+            if row is None:
+                counts['skipped'] += 1
+                continue
+            rows[row['card_id']] = row  # Last duplicate wins
+
+        chunk = []
+        for row in rows.values():
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk, counts)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk, counts)
+        return counts
+
+    def _load_stored(self, rows: List[Dict]) -> Tuple[Dict[str, Optional[str]], Dict[Tuple, str]]:
+        """
+        One SELECT for a chunk: stored content hash by card_id, and the card_id
+        holding each of the chunk's printings.
+        """
+        card_ids = [row['card_id'] for row in rows]
+        keys = {key for key in map(printing_key, rows) if key}
+        condition = Card.card_id.in_(card_ids)
+        if keys:
+            condition = or_(condition, and_(
+                Card.set_code.in_({key[0] for key in keys}),
+                Card.collector_number.in_({key[1] for key in keys})
+            ))
+
+        hashes, owners = {}, {}
+        columns = (Card.card_id, Card.content_hash, Card.set_code, Card.collector_number, Card.language)
+        for card_id, digest, set_code, collector_number, language in self.db.execute(select(*columns).where(condition)):
+            hashes[card_id] = digest
+            owners[(set_code, collector_number, language)] = card_id
+        hashes = {card_id: hashes[card_id] for card_id in card_ids if card_id in hashes}
+        return hashes, owners
+
+    def _write_chunk(self, rows: List[Dict], counts: Dict[str, int]):
+        stored, owners = self._load_stored(rows)
+
+        new_rows, changed_rows = [], []
+        for row in rows:
+            row['content_hash'] = content_hash(row)
+            key = printing_key(row)
+            owner = owners.get(key) if key else None
+            if owner is not None and owner != row['card_id']:
+                self.conflicts.append((row['card_id'], owner))
+                counts['conflicts'] += 1
+                logger.warning(f"Card skipped, printing stored under another id | card_id={row['card_id']} | "
+                               f"printing={key} | stored_card_id={owner}")
+                continue
+            if key:
+                owners[key] = row['card_id']  # Later rows of the chunk can't take this printing
+
+            if row['card_id'] not in stored:
+                new_rows.append(row)
+            elif stored[row['card_id']] != row['content_hash']:
+                changed_rows.append(row)
+            else:
+                counts['unchanged'] += 1
+
+        connection = self.db.connection()
+        if new_rows:
+            statement = insert(Card.__table__).on_conflict_do_nothing(index_elements=['card_id'])
+            inserted = {card_id for (card_id,) in connection.execute(
+                statement.returning(Card.__table__.c.card_id), new_rows
+            )}
+            counts['inserted'] += len(inserted)
+            counts['skipped'] += len(new_rows) - len(inserted)  # card_id inserted concurrently
+            self.inserted_ids.extend(row['card_id'] for row in new_rows if row['card_id'] in inserted)
+        if changed_rows:
+            statement = insert(Card.__table__)
+            updates = {field: statement.excluded[field] for field in CARD_CONTENT_FIELDS + ('content_hash',)}
+            updates['updated_at'] = datetime.utcnow()
+            connection.execute(
+                statement.on_conflict_do_update(index_elements=['card_id'], set_=updates), changed_rows
+            )
+            counts['updated'] += len(changed_rows)
+
+        logger.debug(f"Card chunk written | rows={len(rows)} | new={len(new_rows)} | changed={len(changed_rows)}")
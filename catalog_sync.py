@@ -0,0 +1,86 @@
+"""
+TCG Scan - Catalog Re-sync
+Refreshes the stored MTG catalog from Scryfall with batched /cards/collection
+lookups (SCRYFALL_COLLECTION_BATCH_SIZE cards per request) instead of one
+request per card or a full set re-import.
+
+For each batch, changed card metadata is rewritten through CardWriter
+(unchanged rows are not touched) and the current prices are appended to
+PriceHistory with one insert, then the batch is committed.
+"""
+from typing import Callable, Dict, Optional
+
+from api_integrations import CardAPIManager, background_priority, collection_identifier, identifier_key
+from card_writer import CardWriter
+from database import Card, get_db
+from logger import get_logger
+from price_tracker import write_price_history
+
+# Initialize logger for this module
+logger = get_logger('catalog_sync')
+
+
+def resync_catalog(set_code: Optional[str] = None, max_cards: Optional[int] = None,
+                   api_manager: CardAPIManager = None, session_factory: Callable = None) -> Dict[str, int]:
+    """
+    Re-fetch stored MTG cards (all, or one set) and write back what changed.
+
+    Returns:
+        Counts: total, requests, updated, unchanged, not_found, failed (no identifier
+        or failed request), prices (PriceHistory rows written)
+    """
+    api_manager = api_manager or CardAPIManager()
+    db = (session_factory or get_db)()
+    stats = {'total': 0, 'requests': 0, 'updated': 0, 'unchanged': 0, 'not_found': 0,
+             'failed': 0, 'prices': 0}
+
+    try:
+        query = db.query(Card.id, Card.card_id, Card.set_code, Card.collector_number,
+                         Card.language).filter(Card.tcg == 'mtg')
+        if set_code:
+            query = query.filter(Card.set_code.ilike(set_code))
+        query = query.order_by(Card.id)
+        cards = query.limit(max_cards).all() if max_cards else query.all()
+        stats['total'] = len(cards)
+        logger.info(f"Catalog re-sync started | set={set_code} | cards={len(cards)}")
+
+        pending = {}  # identifier key -> (identifier, [stored cards])
+        for card in cards:
+            identifier = collection_identifier(card.card_id, card.set_code, card.collector_number)
+            if identifier is None:
+                stats['failed'] += 1
+                continue
+            pending.setdefault(identifier_key(identifier), (identifier, []))[1].append(card)
+
+        identifiers = [identifier for identifier, _ in pending.values()]
+        with background_priority():
+            for batch in api_manager.scryfall.iter_card_collection(identifiers):
+                stats['requests'] += 1
+                rows, prices = [], []
+                for identifier, card_data in batch['found']:
+                    price = api_manager.get_card_price(card_data)
+                    for card in pending[identifier_key(identifier)][1]:
+                        # Keep the stored row's identity: cards found by set + number
+                        # come back under Scryfall's id and default language
+                        rows.append({**card_data, 'card_id': card.card_id, 'language': card.language})
+                        if price is not None:
+                            prices.append((card.id, price))
+
+                counts = CardWriter(db).write(rows)
+                stats['updated'] += counts['updated']
+                stats['unchanged'] += counts['unchanged']
+                stats['prices'] += write_price_history(db, prices)
+                db.commit()
+
+                for key, identifiers in (('not_found', batch['not_found']), ('failed', batch['failed'])):
+                    for identifier in identifiers:
+                        entry = pending.get(identifier_key(identifier))
+                        stats[key] += len(entry[1]) if entry else 1
+
+        logger.info(f"Catalog re-sync complete | stats={stats}")
+        return stats
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -20,6 +20,48 @@ MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 # Card recognition settings
 RECOGNITION_CONFIDENCE_THRESHOLD = 0.75
 IMAGE_HASH_THRESHOLD = 10  # Hamming distance for perceptual hash matching
+HASH_LOOKUP_MODE = 'index'  # 'index' = in-memory vectorized scan, 'mih' = banded lookup in SQLite
+HASH_MATCH_CANDIDATES = 5  # Closest hashes checked, so a card deleted since indexing falls through to the next
+HASH_MIH_BANDS = 16  # 256-bit hash split in 16 bands of 16 bits: exact recall up to distance 15
+
+# Card detection runs on a downscaled pyramid level (longest side in pixels, 0 = full resolution)
+CARD_DETECTION_MAX_DIM = 1024
+CARD_WARP_SIZE = (630, 880)  # Canonical card raster (width, height) the detected card is warped to
+
+# OCR engine: 'auto' = in-process tesserocr when installed, else pytesseract
+OCR_BACKEND = 'auto'  # 'auto', 'tesserocr' or 'pytesseract'
+OCR_LANGUAGE = 'eng'
+OCR_TESSDATA_PATH = None  # tessdata directory for tesserocr (None = TESSDATA_PREFIX / built-in default)
+
+# OCR variant scheduling for set info extraction
+OCR_CALL_BUDGET = 24  # Max OCR calls per scan (0 = unlimited)
+OCR_VARIANT_STATS_PATH = BASE_DIR / 'data' / 'ocr_variant_stats.json'
+OCR_VARIANT_STATS_SAVE_INTERVAL = 60  # Seconds between stats file writes
+
+# Local catalog: resolve card names from the cards table before calling Scryfall
+OFFLINE_MODE = False  # True = never call Scryfall during recognition (local catalog only)
+LOCAL_CATALOG_CHECK_INTERVAL = 30  # Seconds between checks for cards table changes
+
+# Recognition result cache (repeated uploads / near-identical auto-scan frames)
+RECOGNITION_CACHE_MAX_ENTRIES = 500
+RECOGNITION_CACHE_TTL = 3600  # Seconds (0 = no expiry)
+RECOGNITION_CACHE_PHASH_DISTANCE = 6  # Max Hamming distance for a perceptual-hash hit (set line OCR must show the same set + number)
+RECOGNITION_CACHE_SQLITE_PATH = None  # e.g. BASE_DIR / 'data' / 'recognition_cache.db' to persist entries
+
+# Parallel batch recognition (process pool)
+BATCH_RECOGNITION_WORKERS = None  # None = one worker per CPU core
+BATCH_RECOGNITION_TIMEOUT = 120  # Seconds per image (from when it starts) before its pool is killed and recycled
+
+# Image hash backfill (HashDownloadWorker)
+HASH_DOWNLOAD_WORKERS = 8  # Concurrent image downloads
+HASH_DOWNLOAD_BATCH_SIZE = 200  # Hashes per DB commit
+HASH_DOWNLOAD_TIMEOUT = 10  # Seconds per image request
+HASH_IMAGE_VARIANT = 'small'  # Scryfall image size used for hashing (146x204 is plenty for a 16x16 hash)
+
+# Local card image store (shared by hashing and /api/images)
+IMAGE_STORE_PATH = BASE_DIR / 'data' / 'images'
+IMAGE_STORE_MAX_BYTES = 2 * 1024 ** 3  # LRU eviction above this size (0 = unbounded)
+IMAGE_CACHE_MAX_AGE = 30 * 24 * 3600  # Cache-Control max-age of served images (seconds)
 
 # Supported TCG - Magic: The Gathering only
 SUPPORTED_TCGS = {
@@ -34,7 +76,46 @@ SUPPORTED_TCGS = {
 
 # API Configuration - Scryfall only
 SCRYFALL_API_BASE = 'https://api.scryfall.com'
-SCRYFALL_RATE_LIMIT = 10  # requests per second
+SCRYFALL_RATE_LIMIT = 10  # requests per second (shared by every Scryfall client in the process)
+SCRYFALL_RATE_BURST = 5  # requests allowed back to back before the rate limit applies
+SCRYFALL_MAX_RETRIES = 3  # retries of a request answered with 429 Too Many Requests
+SCRYFALL_BACKOFF_BASE = 1.0  # seconds to pause after a 429 without Retry-After, doubled per retry
+SCRYFALL_BACKOFF_MAX = 60.0  # longest pause after a 429 (seconds)
+SCRYFALL_BACKOFF_JITTER = 0.25  # pauses are stretched by up to this fraction so clients don't retry in step
+SCRYFALL_COLLECTION_BATCH_SIZE = 75  # Card identifiers per POST /cards/collection (Scryfall's maximum)
+
+# Scryfall response cache (card lookups by name / set + number, see scryfall_cache.py)
+SCRYFALL_CACHE_PATH = BASE_DIR / 'data' / 'scryfall_cache.db'  # None = no caching
+SCRYFALL_CACHE_METADATA_TTL = 30 * 24 * 3600  # Seconds a cached card serves callers that need card data only
+SCRYFALL_CACHE_PRICE_TTL = 12 * 3600  # Seconds a cached card serves price lookups (Scryfall updates prices daily)
+SCRYFALL_CACHE_NEGATIVE_TTL = 24 * 3600  # Seconds a 404 (unknown name / number) is remembered
+SCRYFALL_CACHE_HIT_FLUSH_SIZE = 100  # Entries with pending hit counts before they are written to SQLite
+SCRYFALL_CACHE_PURGE_INTERVAL = 3600  # Seconds between automatic purges of expired entries (run on put)
+
+# Scryfall bulk data import (one file with every printing instead of a search per set)
+SCRYFALL_BULK_DATA_TYPE = 'default_cards'  # Every printing, English or the only printed language
+SCRYFALL_BULK_DATA_PATH = BASE_DIR / 'data' / 'scryfall' / 'default-cards.json'
+BULK_IMPORT_BATCH_SIZE = 2000  # Cards per INSERT batch / commit
+CARD_WRITE_CHUNK_SIZE = 500  # Cards per existence SELECT / upsert statement (SQLite variable limit safe)
+JSON_STREAM_BUFFER_SIZE = 1024 * 1024  # Bytes read per refill when streaming large JSON dumps
+BULK_DOWNLOAD_TIMEOUT = 60  # Seconds without data before the bulk download is aborted
+
+# Full import pipeline (set-by-set mode: fetch, parse and DB writes overlap)
+IMPORT_FETCH_WORKERS = 2  # Threads paging set searches (they share the Scryfall rate limiter)
+IMPORT_WRITE_BATCH_SIZE = 1000  # Cards per CardWriter call / commit
+IMPORT_QUEUE_DEPTH = 8  # Result pages buffered between two stages (bounds memory)
+IMPORT_DRAIN_TIMEOUT = 35  # Seconds to wait for the fetch stages to finish after a failure (> search read timeout)
+
+# HTTP client (one keep-alive session for Scryfall API, image and bulk data calls)
+HTTP_POOL_SIZE = 16  # Keep-alive connections per host (>= HASH_DOWNLOAD_WORKERS + IMPORT_FETCH_WORKERS)
+HTTP_USER_AGENT = 'TCGScan/1.0'  # Scryfall asks clients to identify themselves
+HTTP_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+HTTP_TIMEOUTS = {  # Read timeout (seconds without data) per endpoint kind
+    'api': 10,  # Single card / set lookups
+    'search': 30,  # Search result pages, set and bulk data lists
+    'image': HASH_DOWNLOAD_TIMEOUT,
+    'bulk': BULK_DOWNLOAD_TIMEOUT,
+}
 
 # Price tracking
 PRICE_UPDATE_INTERVAL = 3600  # 1 hour in seconds
@@ -2,7 +2,7 @@
 TCG Scan - Database Models
 """
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import config
@@ -30,6 +30,7 @@ class Card(Base):
     mana_cost = Column(String(50))
     image_url = Column(String(500))
     image_hash = Column(String(64))  # Perceptual hash for recognition
+    content_hash = Column(String(40))  # Digest of the API fields, set by card_writer.CardWriter
     oracle_text = Column(Text)
     flavor_text = Column(Text)
     artist = Column(String(200))
@@ -42,6 +43,11 @@ class Card(Base):
     scanned_instances = relationship('ScannedCard', back_populates='card')
     price_history = relationship('PriceHistory', back_populates='card')
     
+    __table_args__ = (
+        # One printing per set/number/language (Scryfall prints each language separately)
+        Index('ix_cards_set_number', 'set_code', 'collector_number', 'language', unique=True),
+    )
+    
     def to_dict(self):
         # Get latest price from price_history
         price_eur = None
@@ -177,6 +183,19 @@ class PriceHistory(Base):
             'recorded_at': self.recorded_at.isoformat()
         }
 
+class CardHashBand(Base):
+    """Image hash bands for multi-index hashing (one row per card per band)"""
+    __tablename__ = 'card_hash_bands'
+    
+    id = Column(Integer, primary_key=True)
+    card_id = Column(Integer, ForeignKey('cards.id'), nullable=False, index=True)
+    band = Column(Integer, nullable=False)  # Band number (0 = most significant bits)
+    value = Column(Integer, nullable=False)  # Band bits as an unsigned integer
+    
+    __table_args__ = (
+        Index('ix_card_hash_bands_band_value', 'band', 'value'),
+    )
+
 class SortingConfig(Base):
     """Saved sorting configurations"""
     __tablename__ = 'sorting_configs'
@@ -212,11 +231,43 @@ def init_db():
     logger.info("Initializing database...")
     try:
         Base.metadata.create_all(engine)
+        create_missing_columns()
+        create_missing_indexes()
         logger.info(f"Database initialized successfully at {config.DATABASE_PATH}")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}", exc_info=True)
         raise
 
+def create_missing_columns():
+    """
+    Add nullable columns added to existing tables after they were created
+    (create_all never alters an existing table).
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def create_missing_indexes():
+    """
+    Create indexes added to existing tables after they were created
+    (create_all only creates the indexes of new tables).
+    """
+    for index in Card.__table__.indexes:
+        try:
+            index.create(engine, checkfirst=True)
+        except Exception as e:
+            # e.g. duplicate (set, number, language) rows in an old database
+            logger.warning(f"Could not create index {index.name}: {e}")
+
 def get_db():
     """Get database session"""
     logger.debug("Creating new database session")
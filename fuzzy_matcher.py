@@ -12,6 +12,7 @@ import requests
 
 from symspellpy import SymSpell, Verbosity, editdistance
 
+from json_stream import JsonStreamReader
 from logger import get_logger
 
 logger = get_logger('fuzzy_matcher')
@@ -90,18 +91,29 @@ class FuzzyCardMatcher:
             logger.error(f"Failed to download {url}: {e}")
             raise
     
+    def _stream_json(self, url: str) -> JsonStreamReader:
+        """Open a streaming reader over a large JSON download (never held in memory as a whole)."""
+        logger.info(f"Downloading (streamed): {url}")
+        response = requests.get(url, timeout=60, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception as e:
+            response.close()
+            logger.error(f"Failed to download {url}: {e}")
+            raise
+        return JsonStreamReader(response)
+    
     def _load_card_dictionary(self, file_path: str):
         """Load or download the card dictionary."""
         path = Path(file_path)
         
         if not path.is_file():
             logger.info(f"Card dictionary not found, downloading from MTGJSON...")
+            tmp_path = path.with_suffix(".tmp")
             try:
-                all_cards_json = self._download_json(URL_ALL_CARDS)
-                
-                # Extract card names and write to file
-                with path.open("w", encoding="utf-8") as f:
-                    for card_name, card_data in all_cards_json.get("data", {}).items():
+                # Extract card names record by record and write to file
+                with self._stream_json(URL_ALL_CARDS) as reader, tmp_path.open("w", encoding="utf-8") as f:
+                    for card_name, card_data in reader.iter_items("data"):
                         # Clean up card name (remove // for split cards)
                         clean_name = card_name
                         if " // " in card_name:
@@ -109,10 +121,12 @@ class FuzzyCardMatcher:
                         
                         # Write in SymSpell format: word$frequency
                         f.write(f"{clean_name}$1\n")
+                tmp_path.replace(path)
                 
                 logger.info(f"Card dictionary saved to {path}")
             except Exception as e:
                 logger.error(f"Failed to create card dictionary: {e}")
+                tmp_path.unlink(missing_ok=True)
                 # Create empty dictionary as fallback
                 path.touch()
         
@@ -0,0 +1,397 @@
+"""
+TCG Scan - Perceptual Hash Index
+Process-wide in-memory index of card image hashes.
+Hashes are packed into a contiguous uint64 matrix so that the Hamming distance
+to every card is computed with one vectorized XOR + popcount.
+
+Also implements multi-index hashing (MIH) on SQLite: each hash is split into
+bands stored in the card_hash_bands table, and only cards sharing at least one
+exact band with the query are compared.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+import config
+from database import Card, CardHashBand, get_db
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('hash_index')
+
+HASH_BITS = 256  # average_hash with hash_size=16
+HASH_WORDS = HASH_BITS // 64
+HASH_HEX_LENGTH = HASH_BITS // 4
+
+# Byte popcount table, used when numpy has no bitwise_count (numpy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hash_to_words(image_hash: str) -> Optional[np.ndarray]:
+    """Pack a 64-char hex hash into HASH_WORDS uint64 words, or None if invalid"""
+    if not image_hash or len(image_hash) != HASH_HEX_LENGTH:
+        return None
+    try:
+        return np.array(
+            [int(image_hash[i:i + 16], 16) for i in range(0, HASH_HEX_LENGTH, 16)],
+            dtype=np.uint64
+        )
+    except ValueError:
+        return None
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a (N, HASH_WORDS) uint64 matrix"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape[0], -1)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int32)
+
+
+class HashIndex:
+    """
+    Vectorized Hamming-distance index over Card.image_hash.
+
+    Rows are stored in preallocated arrays that grow geometrically, so
+    incremental adds from the import/hash writers are amortized O(1).
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hashes = np.zeros((0, HASH_WORDS), dtype=np.uint64)
+        self._card_ids = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}  # card DB id -> row
+        self._size = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self, db=None) -> int:
+        """
+        (Re)build the index from the cards table.
+        Only the id and image_hash columns are fetched.
+
+        Returns:
+            Number of indexed cards
+        """
+        own_session = db is None
+        if own_session:
+            db = get_db()
+
+        try:
+            rows = db.query(Card.id, Card.image_hash).filter(
+                Card.tcg == 'mtg',
+                Card.image_hash != None
+            ).all()
+        finally:
+            if own_session:
+                db.close()
+
+        card_ids = []
+        words = []
+        for card_id, image_hash in rows:
+            packed = hash_to_words(image_hash)
+            if packed is None:
+                logger.warning(f"Skipping invalid image hash | card_id={card_id}")
+                continue
+            card_ids.append(card_id)
+            words.append(packed)
+
+        capacity = max(self.INITIAL_CAPACITY, len(card_ids))
+        hashes = np.zeros((capacity, HASH_WORDS), dtype=np.uint64)
+        ids = np.zeros(capacity, dtype=np.int64)
+        if card_ids:
+            hashes[:len(card_ids)] = np.vstack(words)
+            ids[:len(card_ids)] = card_ids
+
+        with self._lock:
+            self._hashes = hashes
+            self._card_ids = ids
+            self._rows = {card_id: row for row, card_id in enumerate(card_ids)}
+            self._size = len(card_ids)
+            self.loaded = True
+
+        logger.info(f"Hash index loaded | cards={self._size}")
+        return self._size
+
+    def add(self, card_id: int, image_hash: str, tcg: str = 'mtg') -> bool:
+        """
+        Add or replace the hash of a single card.
+        Returns False if the hash is invalid or the card is not indexed (same filter as load()).
+        """
+        if tcg != 'mtg':
+            return False
+        packed = hash_to_words(image_hash)
+        if packed is None:
+            return False
+
+        with self._lock:
+            row = self._rows.get(card_id)
+            if row is None:
+                if self._size == len(self._card_ids):
+                    self._grow()
+                row = self._size
+                self._rows[card_id] = row
+                self._card_ids[row] = card_id
+                self._size += 1
+            self._hashes[row] = packed
+        return True
+
+    def _grow(self):
+        """Double the row capacity (caller holds the lock)"""
+        capacity = max(self.INITIAL_CAPACITY, len(self._card_ids) * 2)
+        hashes = np.zeros((capacity, HASH_WORDS), dtype=np.uint64)
+        ids = np.zeros(capacity, dtype=np.int64)
+        hashes[:self._size] = self._hashes[:self._size]
+        ids[:self._size] = self._card_ids[:self._size]
+        self._hashes = hashes
+        self._card_ids = ids
+
+    def query(self, image_hash: str, top_k: int = 5,
+              max_distance: int = None) -> List[Tuple[int, int]]:
+        """
+        Find the closest cards to a hash.
+
+        Args:
+            image_hash: 64-char hex hash of the scanned card
+            top_k: Maximum number of candidates to return
+            max_distance: Optional Hamming distance cut-off (inclusive)
+
+        Returns:
+            List of (card DB id, hamming distance), closest first
+        """
+        packed = hash_to_words(image_hash)
+        if packed is None or top_k <= 0:
+            return []
+
+        with self._lock:
+            if self._size == 0:
+                return []
+            distances = popcount_rows(self._hashes[:self._size] ^ packed)
+            card_ids = self._card_ids[:self._size].copy()
+
+        if max_distance is not None:
+            within = np.flatnonzero(distances <= max_distance)
+        else:
+            within = np.arange(len(distances))
+        if len(within) == 0:
+            return []
+
+        if len(within) > top_k:
+            nearest = np.argpartition(distances[within], top_k - 1)[:top_k]
+            within = within[nearest]
+        order = within[np.argsort(distances[within], kind='stable')]
+
+        return [(int(card_ids[row]), int(distances[row])) for row in order]
+
+
+# ============================================================================
+# MULTI-INDEX HASHING (banded lookup in SQLite)
+# ============================================================================
+
+def split_hash_bands(image_hash: str, bands: int = None) -> Optional[List[int]]:
+    """
+    Split a 256-bit hex hash into equal bands of bits.
+
+    By the pigeonhole principle two hashes at Hamming distance < bands
+    share at least one identical band.
+    """
+    bands = bands or config.HASH_MIH_BANDS
+    if HASH_BITS % bands or (HASH_BITS // bands) % 4:
+        raise ValueError(f"Cannot split {HASH_BITS}-bit hash into {bands} hex-aligned bands")
+    if not image_hash or len(image_hash) != HASH_HEX_LENGTH:
+        return None
+
+    width = HASH_HEX_LENGTH // bands
+    try:
+        return [int(image_hash[i:i + width], 16) for i in range(0, HASH_HEX_LENGTH, width)]
+    except ValueError:
+        return None
+
+
+def sync_card_bands(db, card_id: int, image_hash: Optional[str]):
+    """Replace the stored bands of a card (the caller commits)"""
+    db.query(CardHashBand).filter(CardHashBand.card_id == card_id).delete(synchronize_session=False)
+
+    bands = split_hash_bands(image_hash) if image_hash else None
+    if bands:
+        db.bulk_insert_mappings(CardHashBand, [
+            {'card_id': card_id, 'band': band, 'value': value}
+            for band, value in enumerate(bands)
+        ])
+
+
+# Session.info key of the hashes waiting for a commit before entering the in-memory index
+_PENDING_HASHES_KEY = 'hash_index_pending'
+
+
+def record_card_hash(db, card: Card, image_hash: str):
+    """
+    Store a freshly computed image hash for a card.
+    Keeps the hash bands in sync; the caller commits. The in-memory index is
+    only updated once that commit succeeds, so a rollback leaves it untouched.
+    """
+    card.image_hash = image_hash
+    if card.id is None:
+        db.flush()  # Assign the primary key for new cards
+    sync_card_bands(db, card.id, image_hash)
+    db.info.setdefault(_PENDING_HASHES_KEY, {})[card.id] = (image_hash, card.tcg)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending_hashes(session):
+    """Publish the hashes recorded in a session once its transaction is committed"""
+    pending = session.info.pop(_PENDING_HASHES_KEY, None)
+    if not pending:
+        return
+    index = get_hash_index()
+    for card_id, (image_hash, tcg) in pending.items():
+        index.add(card_id, image_hash, tcg)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_hashes(session):
+    """Drop hashes recorded in a transaction that was rolled back"""
+    session.info.pop(_PENDING_HASHES_KEY, None)
+
+
+def find_band_candidates(db, image_hash: str) -> List[Tuple[int, str]]:
+    """Return (card DB id, image_hash) of every card sharing at least one band"""
+    bands = split_hash_bands(image_hash)
+    if not bands:
+        return []
+
+    band_filter = or_(*[
+        and_(CardHashBand.band == band, CardHashBand.value == value)
+        for band, value in enumerate(bands)
+    ])
+    return db.query(Card.id, Card.image_hash).join(
+        CardHashBand, CardHashBand.card_id == Card.id
+    ).filter(band_filter, Card.tcg == 'mtg').distinct().all()
+
+
+def mih_query(db, image_hash: str, top_k: int = 5,
+              max_distance: int = None) -> List[Tuple[int, int]]:
+    """
+    Multi-index hashing lookup: fetch band candidates from SQLite and verify
+    them with the full Hamming distance.
+
+    Returns:
+        List of (card DB id, hamming distance), closest first
+    """
+    packed = hash_to_words(image_hash)
+    if packed is None or top_k <= 0:
+        return []
+
+    candidates = []
+    words = []
+    for card_id, candidate_hash in find_band_candidates(db, image_hash):
+        candidate_words = hash_to_words(candidate_hash)
+        if candidate_words is not None:
+            candidates.append(card_id)
+            words.append(candidate_words)
+    if not candidates:
+        return []
+
+    distances = popcount_rows(np.vstack(words) ^ packed)
+    order = np.argsort(distances, kind='stable')
+    results = [(candidates[row], int(distances[row])) for row in order]
+    if max_distance is not None:
+        results = [(card_id, dist) for card_id, dist in results if dist <= max_distance]
+    return results[:top_k]
+
+
+def backfill_hash_bands(db=None, rebuild: bool = False, batch_size: int = 1000) -> int:
+    """
+    Compute bands for existing cards that have an image hash but no bands.
+
+    Args:
+        db: Optional session (a new one is opened otherwise)
+        rebuild: Drop all stored bands first (e.g. after changing HASH_MIH_BANDS)
+        batch_size: Cards per commit
+
+    Returns:
+        Number of cards backfilled
+    """
+    own_session = db is None
+    if own_session:
+        db = get_db()
+
+    try:
+        if rebuild:
+            deleted = db.query(CardHashBand).delete(synchronize_session=False)
+            db.commit()
+            logger.info(f"Hash bands cleared for rebuild | rows={deleted}")
+
+        has_bands = db.query(CardHashBand.id).filter(CardHashBand.card_id == Card.id).exists()
+        last_id = 0
+        backfilled = 0
+
+        while True:
+            rows = db.query(Card.id, Card.image_hash).filter(
+                Card.id > last_id,
+                Card.image_hash != None,
+                ~has_bands
+            ).order_by(Card.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            mappings = []
+            for card_id, image_hash in rows:
+                bands = split_hash_bands(image_hash)
+                if not bands:
+                    continue
+                mappings.extend(
+                    {'card_id': card_id, 'band': band, 'value': value}
+                    for band, value in enumerate(bands)
+                )
+                backfilled += 1
+
+            db.bulk_insert_mappings(CardHashBand, mappings)
+            db.commit()
+            last_id = rows[-1][0]
+            logger.debug(f"Hash band backfill progress | cards={backfilled} | last_id={last_id}")
+
+        logger.info(f"Hash band backfill complete | cards={backfilled}")
+        return backfilled
+    finally:
+        if own_session:
+            db.close()
+
+
+# Singleton instance shared by the recognition engine and the hash writers
+_index_instance: Optional[HashIndex] = None
+_index_instance_lock = threading.Lock()
+
+
+def get_hash_index() -> HashIndex:
+    """Get or create the process-wide HashIndex instance."""
+    global _index_instance
+    if _index_instance is None:
+        with _index_instance_lock:
+            if _index_instance is None:
+                _index_instance = HashIndex()
+    return _index_instance
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='TCG Scan hash index maintenance')
+    parser.add_argument('command', choices=['backfill-bands'], help='Maintenance command to run')
+    parser.add_argument('--rebuild', action='store_true', help='Drop and recompute all bands')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Cards per commit')
+    args = parser.parse_args()
+
+    from database import init_db
+    init_db()
+
+    if args.command == 'backfill-bands':
+        count = backfill_hash_bands(rebuild=args.rebuild, batch_size=args.batch_size)
+        print(f"Backfilled hash bands for {count} cards")
@@ -0,0 +1,261 @@
+"""
+TCG Scan - Image Hash Backfill Pipeline
+Downloads card images and stores their perceptual hash for every card
+without one.
+
+Stages (bounded queues between them):
+  feeder    - pages cards without a hash by primary key (keyset pagination)
+  download  - pool of threads over the shared keep-alive HTTP session, reading
+              through the local image store (image_store.py)
+  hash      - decodes the image and computes the 16x16 average hash
+  writer    - the calling thread; commits every HASH_DOWNLOAD_BATCH_SIZE rows
+
+Hashes are committed in batches, so a stopped or crashed run loses at most
+one batch and the next run resumes with the cards still missing a hash.
+With rehash=True every card is hashed again; images already in the image
+store are not downloaded again, so only decoding and hashing remain.
+"""
+import queue
+import threading
+import time
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+import imagehash
+import requests
+from PIL import Image
+
+import config
+from database import Card, get_db
+from hash_index import record_card_hash
+from http_client import get_http_session
+from image_store import ImageStore, get_image_store, image_variant_url
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('hash_pipeline')
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+def hash_image_bytes(data: bytes) -> Optional[str]:
+    """Average hash (hash_size=16) of an encoded image, or None if it can't be decoded"""
+    try:
+        with Image.open(BytesIO(data)) as img:
+            return str(imagehash.average_hash(img, hash_size=16))
+    except Exception as e:
+        logger.debug(f"Could not decode image: {e}")
+        return None
+
+
+class HashPipeline:
+    """
+    Concurrent, resumable image-hash backfill.
+
+    Usage:
+        stats = HashPipeline(on_progress=print).run(set_code='woe')
+    """
+
+    def __init__(self, workers: int = None, batch_size: int = None, variant: str = None,
+                 session_factory: Callable = None, http_session: requests.Session = None,
+                 image_store: ImageStore = None,
+                 on_progress: Callable[[Dict], None] = None, progress_interval: float = 1.0):
+        self.workers = workers or config.HASH_DOWNLOAD_WORKERS
+        self.batch_size = batch_size or config.HASH_DOWNLOAD_BATCH_SIZE
+        self.variant = variant or config.HASH_IMAGE_VARIANT
+        self.session_factory = session_factory or get_db
+        self.http = http_session or get_http_session()
+        self.image_store = image_store or get_image_store()
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._stop = threading.Event()
+        self.stats = self._new_stats(0)
+
+    @staticmethod
+    def _new_stats(total: int) -> Dict:
+        return {
+            'total': total, 'processed': 0, 'hashed': 0, 'failed': 0,
+            'percent': 0.0, 'rate': 0.0, 'eta_seconds': None,
+            'current_card': None, 'elapsed': 0.0,
+        }
+
+    def stop(self):
+        """Ask the pipeline to stop; queued work is drained and the last batch committed"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def _pending_query(self, db, set_code: Optional[str], rehash: bool = False):
+        query = db.query(Card.id, Card.card_id, Card.name, Card.image_url).filter(Card.image_url != None)
+        if not rehash:
+            query = query.filter(Card.image_hash == None)
+        if set_code:
+            query = query.filter(Card.set_code == set_code.lower())
+        return query
+
+    def count_pending(self, set_code: str = None, rehash: bool = False) -> int:
+        db = self.session_factory()
+        try:
+            return self._pending_query(db, set_code, rehash).count()
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _feed(self, set_code: Optional[str], rehash: bool, out: queue.Queue):
+        """Keyset-page the cards without a hash into the download queue"""
+        db = self.session_factory()
+        last_id = 0
+        try:
+            while not self.stopped:
+                page = self._pending_query(db, set_code, rehash).filter(
+                    Card.id > last_id
+                ).order_by(Card.id).limit(self.batch_size).all()
+                if not page:
+                    break
+                for card_id, scryfall_id, name, image_url in page:
+                    if self.stopped:
+                        break
+                    out.put((card_id, scryfall_id, name, image_variant_url(image_url, self.variant)))
+                last_id = page[-1][0]
+        except Exception as e:
+            logger.error(f"Hash pipeline feeder failed: {e}", exc_info=True)
+        finally:
+            db.close()
+            for _ in range(self.workers):
+                out.put(_DONE)
+
+    def _download(self, inbox: queue.Queue, out: queue.Queue):
+        """Fetch image bytes (image store first) over the shared keep-alive session"""
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                out.put(_DONE)
+                return
+            card_id, scryfall_id, name, url = item
+            data = self.image_store.fetch(scryfall_id, self.variant, url, session=self.http)
+            if data is None:
+                logger.debug(f"Image download failed | card={name}")
+            out.put((card_id, name, data))
+
+    def _hash(self, inbox: queue.Queue, out: queue.Queue):
+        """Decode and hash downloaded images"""
+        remaining = self.workers
+        while remaining:
+            item = inbox.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            card_id, name, data = item
+            out.put((card_id, name, hash_image_bytes(data) if data else None))
+        out.put(_DONE)
+
+    def _write(self, db, batch: List[Tuple[int, str]]):
+        """Store one batch of hashes (bands and in-memory index included) in a single commit"""
+        hashes = dict(batch)
+        cards = db.query(Card).filter(Card.id.in_(hashes)).all()
+        for card in cards:
+            record_card_hash(db, card, hashes[card.id])
+        db.commit()
+
+    # ------------------------------------------------------------------
+
+    def run(self, set_code: str = None, rehash: bool = False) -> Dict:
+        """
+        Hash every card without an image hash (optionally only one set).
+        rehash=True hashes every card again, e.g. after a hash algorithm change.
+
+        Returns:
+            Final stats: total, processed, hashed, failed, rate (cards/s), elapsed
+        """
+        self._stop.clear()
+        self.stats = self._new_stats(self.count_pending(set_code, rehash))
+        total = self.stats['total']
+        logger.info(f"Hash pipeline started | pending={total} | workers={self.workers} | variant={self.variant}")
+
+        depth = self.workers * 4
+        urls: queue.Queue = queue.Queue(maxsize=depth)
+        images: queue.Queue = queue.Queue(maxsize=depth)
+        hashes: queue.Queue = queue.Queue(maxsize=depth)
+
+        threads = [threading.Thread(target=self._feed, args=(set_code, rehash, urls), daemon=True,
+                                    name='hash-feeder'),
+                   threading.Thread(target=self._hash, args=(images, hashes), daemon=True,
+                                    name='hash-decoder')]
+        threads += [threading.Thread(target=self._download, args=(urls, images), daemon=True,
+                                     name=f'hash-download-{i}') for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        started = time.monotonic()
+        last_report = 0.0
+        batch: List[Tuple[int, str]] = []
+        db = self.session_factory()
+        try:
+            while True:
+                item = hashes.get()
+                if item is _DONE:
+                    break
+                card_id, name, image_hash = item
+                self.stats['processed'] += 1
+                self.stats['current_card'] = name
+                if image_hash:
+                    batch.append((card_id, image_hash))
+                else:
+                    self.stats['failed'] += 1
+
+                if len(batch) >= self.batch_size:
+                    self._write(db, batch)
+                    self.stats['hashed'] += len(batch)
+                    batch = []
+
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    last_report = now
+                    self._report(started)
+
+            if batch:
+                self._write(db, batch)
+                self.stats['hashed'] += len(batch)
+        except Exception:
+            db.rollback()
+            self.stop()
+            self._drain(hashes)
+            raise
+        finally:
+            db.close()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        self._report(started)
+        logger.info(f"Hash pipeline finished | hashed={self.stats['hashed']} | failed={self.stats['failed']} | "
+                    f"stopped={self.stopped} | rate={self.stats['rate']} cards/s")
+        return self.stats
+
+    @staticmethod
+    def _drain(inbox: queue.Queue):
+        """Consume a stage's output until its end marker so upstream threads can exit"""
+        try:
+            while inbox.get(timeout=config.HASH_DOWNLOAD_TIMEOUT + 5) is not _DONE:
+                pass
+        except queue.Empty:
+            pass
+
+    def _report(self, started: float):
+        elapsed = time.monotonic() - started
+        processed, total = self.stats['processed'], self.stats['total']
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        self.stats.update({
+            'elapsed': round(elapsed, 1),
+            'rate': round(rate, 1),
+            'percent': round(processed / total * 100, 1) if total else 100.0,
+            'eta_seconds': round((total - processed) / rate) if rate > 0 else None,
+        })
+        if self.on_progress:
+            try:
+                self.on_progress(dict(self.stats))
+            except Exception as e:
+                logger.warning(f"Hash pipeline progress callback failed: {e}")
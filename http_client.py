@@ -0,0 +1,85 @@
+"""
+TCG Scan - HTTP Client
+One keep-alive requests.Session shared by the Scryfall API client, card
+image downloads and the bulk data download, instead of module-level
+requests.get (a new TCP + TLS handshake per call).
+
+The session keeps up to HTTP_POOL_SIZE connections per host, asks for gzip
+responses and sends the User-Agent / Accept headers Scryfall expects.
+Timeouts are per endpoint kind (see config.HTTP_TIMEOUTS).
+
+Tests and benchmarks can point every caller at a stand-in with
+set_http_session().
+"""
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('http')
+
+
+def create_http_session(pool_size: int = None) -> requests.Session:
+    """HTTP session whose connection pool keeps pool_size keep-alive connections per host"""
+    pool_size = pool_size or config.HTTP_POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': config.HTTP_USER_AGENT,
+        'Accept': 'application/json;q=0.9,*/*;q=0.8',
+        'Accept-Encoding': 'gzip, deflate',
+    })
+    return session
+
+
+def timeout_for(endpoint: str) -> Tuple[float, float]:
+    """(connect, read) timeout of an endpoint kind: 'api', 'search', 'image' or 'bulk'"""
+    return config.HTTP_CONNECT_TIMEOUT, config.HTTP_TIMEOUTS.get(endpoint, config.HTTP_TIMEOUTS['api'])
+
+
+# Singleton session shared by every caller in the process
+_session_instance: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Get or create the process-wide HTTP session."""
+    global _session_instance
+    if _session_instance is None:
+        with _session_lock:
+            if _session_instance is None:
+                _session_instance = create_http_session()
+                logger.debug(f"HTTP session created | pool_size={config.HTTP_POOL_SIZE}")
+    return _session_instance
+
+
+def set_http_session(session: Optional[requests.Session]) -> Optional[requests.Session]:
+    """
+    Replace the shared session (None: a fresh default one is created on next use).
+    Returns the previous session so callers can restore it.
+    """
+    global _session_instance
+    with _session_lock:
+        previous, _session_instance = _session_instance, session
+    return previous
+
+
+def get(url: str, endpoint: str = 'api', session: requests.Session = None, **kwargs) -> requests.Response:
+    """GET through the shared session (or session), with the endpoint's timeout unless one is given"""
+    if kwargs.get('timeout') is None:
+        kwargs['timeout'] = timeout_for(endpoint)
+    return (session or get_http_session()).get(url, **kwargs)
+
+
+def post(url: str, endpoint: str = 'api', session: requests.Session = None, **kwargs) -> requests.Response:
+    """POST through the shared session (or session), with the endpoint's timeout unless one is given"""
+    if kwargs.get('timeout') is None:
+        kwargs['timeout'] = timeout_for(endpoint)
+    return (session or get_http_session()).post(url, **kwargs)
@@ -0,0 +1,221 @@
+"""
+TCG Scan - Card Image Store
+Local on-disk cache of card images, keyed by Scryfall card id + size variant,
+shared by the hashing code and the web UI.
+
+Files live in sharded directories (ab/cd/abcd...-small.jpg) so no directory
+grows to the whole catalog. Writes are atomic (temp file + os.replace) and the
+store is kept under config.IMAGE_STORE_MAX_BYTES by evicting the least
+recently used files (recency survives restarts through the file mtime).
+"""
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+import config
+import http_client
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('image_store')
+
+SCRYFALL_IMAGE_VARIANTS = ('small', 'normal', 'large', 'png', 'art_crop', 'border_crop')
+
+_CARD_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]*$')
+
+
+def image_variant_url(image_url: str, variant: str = None) -> str:
+    """
+    Point a Scryfall image URL at another size variant
+    (".../normal/front/..." -> ".../small/front/..."). Other URLs are returned unchanged.
+    """
+    variant = variant or config.HASH_IMAGE_VARIANT
+    if not image_url or 'scryfall' not in image_url:
+        return image_url
+    for current in SCRYFALL_IMAGE_VARIANTS:
+        marker = f'/{current}/'
+        if marker in image_url:
+            return image_url.replace(marker, f'/{variant}/', 1)
+    return image_url
+
+
+class ImageStore:
+    """Size-bounded LRU cache of card images on disk"""
+
+    def __init__(self, root: Path = None, max_bytes: int = None):
+        self.root = Path(root or config.IMAGE_STORE_PATH)
+        self.max_bytes = config.IMAGE_STORE_MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.RLock()
+        self._files: OrderedDict = OrderedDict()  # path -> size, least recently used first
+        self._total_bytes = 0
+        self._scanned = False
+        self._stats = {'hits': 0, 'misses': 0, 'downloads': 0, 'download_errors': 0, 'evictions': 0}
+
+    @staticmethod
+    def valid_key(card_id: str, variant: str) -> bool:
+        return bool(card_id and _CARD_ID.match(card_id)) and variant in SCRYFALL_IMAGE_VARIANTS
+
+    def path_for(self, card_id: str, variant: str) -> Path:
+        """Sharded file path of an image (the key must be valid)"""
+        if not self.valid_key(card_id, variant):
+            raise ValueError(f"Invalid image key: {card_id!r} / {variant!r}")
+        extension = 'png' if variant == 'png' else 'jpg'
+        return self.root / card_id[:2] / card_id[2:4] / f'{card_id}-{variant}.{extension}'
+
+    def _scan(self):
+        """Index the files already on disk, oldest mtime first (caller holds the lock)"""
+        if self._scanned:
+            return
+        entries = []
+        if self.root.exists():
+            for path in self.root.glob('*/*/*'):
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        entries.sort(key=lambda entry: entry[0])
+        self._files = OrderedDict((path, size) for _, path, size in entries)
+        self._total_bytes = sum(self._files.values())
+        self._scanned = True
+        logger.info(f"Image store indexed | files={len(self._files)} | bytes={self._total_bytes}")
+
+    def get_path(self, card_id: str, variant: str) -> Optional[Path]:
+        """Path of a cached image (marking it recently used), or None if not cached"""
+        if not self.valid_key(card_id, variant):
+            return None
+        path = self.path_for(card_id, variant)
+        with self._lock:
+            self._scan()
+            if path not in self._files:
+                self._stats['misses'] += 1
+                return None
+            if not path.exists():
+                self._total_bytes -= self._files.pop(path)
+                self._stats['misses'] += 1
+                return None
+            self._files.move_to_end(path)
+            self._stats['hits'] += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def get(self, card_id: str, variant: str) -> Optional[bytes]:
+        """Cached image bytes, or None"""
+        path = self.get_path(card_id, variant)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, card_id: str, variant: str, data: bytes) -> Path:
+        """Atomically store an image and evict least recently used files over the size limit"""
+        path = self.path_for(card_id, variant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._scan()
+            self._total_bytes += len(data) - self._files.pop(path, 0)
+            self._files[path] = len(data)
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path):
+        """Drop least recently used files until under max_bytes (caller holds the lock)"""
+        if not self.max_bytes:
+            return
+        while self._total_bytes > self.max_bytes and len(self._files) > 1:
+            path, size = next(iter(self._files.items()))
+            if path == keep:
+                self._files.move_to_end(path)
+                continue
+            del self._files[path]
+            self._total_bytes -= size
+            self._stats['evictions'] += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def fetch(self, card_id: str, variant: str, url: str,
+              session: requests.Session = None, timeout: float = None) -> Optional[bytes]:
+        """
+        Read-through lookup: cached bytes, or download from url and store them.
+        Images without a valid key are downloaded without caching.
+        """
+        data = self.get(card_id, variant)
+        if data is not None:
+            return data
+        if not url:
+            return None
+
+        try:
+            response = http_client.get(url, endpoint='image', session=session, timeout=timeout)
+        except requests.RequestException as e:
+            logger.debug(f"Image download failed | url={url} | error={e}")
+            self._count('download_errors')
+            return None
+        if response.status_code != 200:
+            logger.debug(f"Image download failed | url={url} | status={response.status_code}")
+            self._count('download_errors')
+            return None
+
+        self._count('downloads')
+        if self.valid_key(card_id, variant):
+            try:
+                self.put(card_id, variant, response.content)
+            except OSError as e:
+                logger.warning(f"Could not store image {card_id}/{variant}: {e}")
+        return response.content
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._scan()
+            return {
+                **self._stats,
+                'files': len(self._files),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Singleton instance shared by hashing and the web app
+_store_instance: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """Get or create the process-wide ImageStore instance."""
+    global _store_instance
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = ImageStore()
+    return _store_instance
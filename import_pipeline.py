@@ -0,0 +1,294 @@
+"""
+TCG Scan - Full Import Pipeline
+Imports every set through the Scryfall search API with network fetches,
+parsing and database writes overlapping instead of running in turn.
+
+Stages (bounded queues between them, so at most IMPORT_QUEUE_DEPTH result
+pages wait between two stages and memory stays bounded):
+  sets   - enumerates the sets to import (one get_all_sets request)
+  fetch  - IMPORT_FETCH_WORKERS threads paging set searches with
+           ScryfallAPI.iter_search_pages; requests go through the shared
+           Scryfall rate limiter at background priority
+  parse  - maps raw card objects with ScryfallAPI._parse_card_data
+  write  - the calling thread; CardWriter + one commit per IMPORT_WRITE_BATCH_SIZE cards
+
+Each stage keeps its own counters (items, busy seconds, throughput, queue
+depth); see stage_stats().
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import config
+from api_integrations import ScryfallAPI, background_priority
+from card_writer import CardWriter
+from database import get_db
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('import_pipeline')
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+class StageCounter:
+    """Thread-safe throughput counters of one pipeline stage"""
+
+    def __init__(self, unit: str, workers: int = 1):
+        self.unit = unit
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.extra: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float, errors: int = 0, **extra: int):
+        with self._lock:
+            self.items += items
+            self.errors += errors
+            self.busy_seconds += seconds
+            for key, value in extra.items():
+                self.extra[key] = self.extra.get(key, 0) + value
+
+    def snapshot(self, elapsed: float, inbox: queue.Queue = None) -> Dict:
+        with self._lock:
+            return {
+                'unit': self.unit,
+                'items': self.items,
+                'errors': self.errors,
+                'busy_seconds': round(self.busy_seconds, 2),
+                'rate': round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+                'utilization': round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed > 0 else 0.0,
+                'queued': inbox.qsize() if inbox is not None else 0,
+                **self.extra,
+            }
+
+
+class ImportPipeline:
+    """
+    Set-by-set catalog import with overlapping stages.
+
+    Usage:
+        stats = ImportPipeline(on_progress=print).run()
+    """
+
+    def __init__(self, api: ScryfallAPI = None, fetch_workers: int = None, batch_size: int = None,
+                 queue_depth: int = None, session_factory: Callable = None,
+                 on_progress: Callable[[Dict], None] = None, progress_interval: float = 1.0):
+        self.api = api or ScryfallAPI()
+        self.fetch_workers = fetch_workers or config.IMPORT_FETCH_WORKERS
+        self.batch_size = batch_size or config.IMPORT_WRITE_BATCH_SIZE
+        self.queue_depth = queue_depth or config.IMPORT_QUEUE_DEPTH
+        self.session_factory = session_factory or get_db
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._stop = threading.Event()
+        self._started = None
+        self._queues: Dict[str, queue.Queue] = {}
+        self._stages = self._new_stages()
+        self.stats = self._new_stats()
+
+    def _new_stages(self) -> Dict[str, StageCounter]:
+        return {
+            'sets': StageCounter('sets'),
+            'fetch': StageCounter('pages', workers=self.fetch_workers),
+            'parse': StageCounter('cards'),
+            'write': StageCounter('cards'),
+        }
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {
+            'total_sets': 0, 'processed_sets': 0, 'current_set': None,
+            'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'conflicts': 0,
+            'elapsed': 0.0, 'stages': {},
+        }
+
+    def stop(self):
+        """Ask the pipeline to stop; cards already fetched are still written"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def stage_stats(self) -> Dict[str, Dict]:
+        """Live per-stage counters; 'queued' is the depth of the queue feeding the stage"""
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        inboxes = {'fetch': 'sets', 'parse': 'pages', 'write': 'cards'}
+        return {name: counter.snapshot(elapsed, self._queues.get(inboxes.get(name)))
+                for name, counter in self._stages.items()}
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _enumerate(self, set_codes: Optional[Sequence[str]], out: queue.Queue):
+        """Queue every set to import (sets without cards are skipped)"""
+        with background_priority():
+            try:
+                started = time.monotonic()
+                if set_codes:
+                    sets = [{'code': code, 'name': code.upper()} for code in set_codes]
+                else:
+                    sets = [s for s in self.api.get_all_sets() if s.get('card_count', 1) > 0]
+                self.stats['total_sets'] = len(sets)
+                self._stages['sets'].record(len(sets), time.monotonic() - started)
+                for set_data in sets:
+                    if self.stopped:
+                        break
+                    out.put((set_data['code'], set_data.get('name') or set_data['code']))
+            except Exception as e:
+                logger.error(f"Import pipeline set enumeration failed: {e}", exc_info=True)
+            finally:
+                for _ in range(self.fetch_workers):
+                    out.put(_DONE)
+
+    def _fetch(self, inbox: queue.Queue, out: queue.Queue):
+        """Page through one set search at a time; the last page of a set is flagged"""
+        with background_priority():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    out.put(_DONE)
+                    return
+                set_code, set_name = item
+                if self.stopped:
+                    continue  # Drain the sets still queued without requesting them
+                finished = False
+                started = time.monotonic()
+                for data in self.api.iter_search_pages(f'set:{set_code}'):
+                    cards = data.get('data', [])
+                    finished = not data.get('has_more')
+                    self._stages['fetch'].record(1, time.monotonic() - started, cards=len(cards))
+                    out.put((set_code, set_name, cards, finished))
+                    if finished or self.stopped:
+                        break
+                    started = time.monotonic()
+                if not finished and not self.stopped:
+                    # The search ended on a failed page: count it and close the set
+                    self._stages['fetch'].record(1, time.monotonic() - started, errors=1)
+                    out.put((set_code, set_name, [], True))
+
+    def _parse(self, inbox: queue.Queue, out: queue.Queue):
+        """Map raw Scryfall card objects to card data"""
+        remaining = self.fetch_workers
+        while remaining:
+            item = inbox.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            set_code, set_name, raw_cards, last_page = item
+            started = time.monotonic()
+            cards, errors = [], 0
+            for raw in raw_cards:
+                try:
+                    cards.append(self.api._parse_card_data(raw))
+                except Exception as e:
+                    logger.debug(f"Unparseable card in set {set_code}: {e}")
+                    errors += 1
+            self._stages['parse'].record(len(cards), time.monotonic() - started, errors=errors)
+            out.put((set_code, set_name, cards, last_page))
+        out.put(_DONE)
+
+    def _write(self, db, batch: List[Dict]):
+        """Write one batch of cards in a single transaction (a failed batch is logged and skipped)"""
+        started = time.monotonic()
+        try:
+            counts = CardWriter(db).write(batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Import pipeline batch failed | cards={len(batch)} | error={e}")
+            self._stages['write'].record(0, time.monotonic() - started, errors=len(batch), batches=1)
+            return
+        self._stages['write'].record(len(batch), time.monotonic() - started, batches=1)
+        for key, count in counts.items():
+            self.stats[key] += count
+
+    # ------------------------------------------------------------------
+
+    def run(self, set_codes: Sequence[str] = None) -> Dict:
+        """
+        Import every set (or only set_codes).
+
+        Returns:
+            Final stats: total_sets, processed_sets, inserted, updated, unchanged, skipped, conflicts,
+            elapsed and per-stage counters
+        """
+        self._stop.clear()
+        self._stages = self._new_stages()
+        self.stats = self._new_stats()
+        self._started = time.monotonic()
+        self._queues = {name: queue.Queue(maxsize=self.queue_depth) for name in ('sets', 'pages', 'cards')}
+        sets_q, pages_q, cards_q = self._queues['sets'], self._queues['pages'], self._queues['cards']
+        logger.info(f"Import pipeline started | fetch_workers={self.fetch_workers} | batch_size={self.batch_size}")
+
+        threads = [threading.Thread(target=self._enumerate, args=(set_codes, sets_q), daemon=True,
+                                    name='import-sets'),
+                   threading.Thread(target=self._parse, args=(pages_q, cards_q), daemon=True,
+                                    name='import-parse')]
+        threads += [threading.Thread(target=self._fetch, args=(sets_q, pages_q), daemon=True,
+                                     name=f'import-fetch-{i}') for i in range(self.fetch_workers)]
+        for thread in threads:
+            thread.start()
+
+        last_report = 0.0
+        batch: List[Dict] = []
+        db = self.session_factory()
+        try:
+            while True:
+                item = cards_q.get()
+                if item is _DONE:
+                    break
+                set_code, set_name, cards, last_page = item
+                self.stats['current_set'] = f"{set_name} ({set_code.upper()})"
+                batch.extend(cards)
+                if len(batch) >= self.batch_size:
+                    self._write(db, batch)
+                    batch = []
+                if last_page:
+                    self.stats['processed_sets'] += 1
+
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    last_report = now
+                    self._report()
+
+            if batch:
+                self._write(db, batch)
+        except Exception:
+            db.rollback()
+            self.stop()
+            self._drain(cards_q)
+            raise
+        finally:
+            db.close()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        self._report()
+        logger.info(f"Import pipeline finished | sets={self.stats['processed_sets']}/{self.stats['total_sets']} | "
+                    f"inserted={self.stats['inserted']} | updated={self.stats['updated']} | "
+                    f"stopped={self.stopped} | elapsed={self.stats['elapsed']}s")
+        return self.stats
+
+    @staticmethod
+    def _drain(inbox: queue.Queue):
+        """Consume a stage's output until its end marker so upstream threads can exit"""
+        try:
+            while inbox.get(timeout=config.IMPORT_DRAIN_TIMEOUT) is not _DONE:
+                pass
+        except queue.Empty:
+            pass
+
+    def _report(self):
+        self.stats['elapsed'] = round(time.monotonic() - self._started, 1)
+        self.stats['stages'] = self.stage_stats()
+        if self.on_progress:
+            try:
+                self.on_progress(dict(self.stats))
+            except Exception as e:
+                logger.warning(f"Import pipeline progress callback failed: {e}")
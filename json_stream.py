@@ -0,0 +1,231 @@
+"""
+TCG Scan - Streaming JSON Reader
+Reads large JSON dumps (Scryfall bulk data, MTGJSON files) one record at a
+time instead of materializing the whole document with json.load() or
+response.json().
+
+Supported layouts:
+  [{...}, {...}, ...]               iter_array()  - Scryfall bulk data
+  {"meta": {...}, "data": {...}}    iter_items()  - MTGJSON (key -> record)
+
+Sources are a path (.gz files are decompressed), a binary or text file
+object, or a requests.Response opened with stream=True. Input is read in
+chunks of JSON_STREAM_BUFFER_SIZE and decoded incrementally, so the buffer
+holds one chunk plus the record being decoded whatever the dump size.
+Records themselves are decoded by the C json decoder (raw_decode).
+"""
+import codecs
+import gzip
+import json
+import re
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import config
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('json_stream')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_MAX_SCALAR_TAIL = 32  # Longest partial number/literal treated as cut by the buffer end
+
+
+class JsonStreamReader:
+    """
+    Incremental reader over one JSON document.
+
+    Usage:
+        with JsonStreamReader('default-cards.json') as reader:
+            for card in reader.iter_array():
+                print(card['name'], reader.bytes_read, reader.total_bytes)
+    """
+
+    def __init__(self, source: Union[str, Path, object], buffer_size: int = None):
+        self.buffer_size = buffer_size or config.JSON_STREAM_BUFFER_SIZE
+        self.bytes_read = 0  # Bytes consumed from the source (compressed bytes for .gz files)
+        self.total_bytes: Optional[int] = None  # Source size when known (file size / Content-Length)
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._closers = []
+        self._chunks = self._open(source)
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    def _open(self, source) -> Iterator:
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            raw = open(path, 'rb')
+            self._closers.append(raw.close)
+            self.total_bytes = path.stat().st_size
+            stream = gzip.GzipFile(fileobj=raw) if path.suffix == '.gz' else raw
+            return self._read_file(stream, raw)
+        if hasattr(source, 'iter_content'):
+            return self._read_response(source)
+        if hasattr(source, 'read'):
+            return self._read_file(source, None)
+        raise TypeError(f"Unsupported JSON source: {type(source).__name__}")
+
+    def _read_file(self, stream, raw) -> Iterator:
+        while True:
+            chunk = stream.read(self.buffer_size)
+            if not chunk:
+                return
+            self.bytes_read = raw.tell() if raw is not None else self.bytes_read + len(chunk)
+            yield chunk
+
+    def _read_response(self, response) -> Iterator[bytes]:
+        """Chunks of a streamed HTTP response (bytes_read counts bytes off the wire)"""
+        self._closers.append(response.close)
+        length = response.headers.get('Content-Length')
+        self.total_bytes = int(length) if length and length.isdigit() else None
+        raw = getattr(response, 'raw', None)
+        for chunk in response.iter_content(chunk_size=self.buffer_size):
+            position = getattr(raw, 'tell', lambda: None)()
+            self.bytes_read = position if isinstance(position, int) else self.bytes_read + len(chunk)
+            yield chunk
+
+    def close(self):
+        for close in self._closers:
+            try:
+                close()
+            except Exception as e:
+                logger.debug(f"Could not close JSON source: {e}")
+        self._closers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Buffer
+    # ------------------------------------------------------------------
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping the consumed prefix; False once the input is exhausted"""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            text = self._text.decode(b'', final=True)
+        else:
+            text = self._text.decode(chunk) if isinstance(chunk, bytes) else chunk
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self) -> Optional[str]:
+        """Next non-whitespace character (not consumed), or None at end of input"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r}, found {found!r} at byte {self.bytes_read}")
+        self._pos += 1
+
+    def _value(self, followers: str):
+        """Decode the next value; the character after it must be one of followers"""
+        while True:
+            self._peek()
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            after = _WHITESPACE.match(self._buffer, end).end()
+            if after < len(self._buffer) and self._buffer[after] in followers:
+                self._pos = end
+                return value
+            # Nothing valid after the value yet: either a scalar cut by the buffer end
+            # (e.g. "-1.5e|3") or malformed input
+            if len(self._buffer) - after > _MAX_SCALAR_TAIL or not self._fill():
+                raise ValueError(f"Expected one of {followers!r} after value at byte {self.bytes_read}")
+
+    # ------------------------------------------------------------------
+    # Iteration
+    # ------------------------------------------------------------------
+
+    def iter_array(self) -> Iterator:
+        """Elements of the top-level JSON array, one at a time"""
+        yield from self._elements()
+
+    def iter_items(self, key: Optional[str] = 'data') -> Iterator[Tuple[Union[str, int], object]]:
+        """
+        (key, value) pairs of the object stored under a top-level key
+        (MTGJSON "data"), or of the top-level object itself with key=None.
+        An array under the key yields (index, element) pairs.
+        """
+        if key is None:
+            yield from self._members()
+            return
+
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            name = self._value(':')
+            self._expect(':')
+            if name == key:
+                if self._peek() == '[':
+                    yield from enumerate(self._elements())
+                else:
+                    yield from self._members()
+                return
+            self._value(',}')  # Other top-level members (e.g. "meta") are small: decode and drop
+            if self._peek() == '}':
+                return
+            self._expect(',')
+
+    def _elements(self) -> Iterator:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value(',]')
+            if self._peek() == ']':
+                self._pos += 1
+                return
+            self._expect(',')
+
+    def _members(self) -> Iterator[Tuple[str, object]]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            name = self._value(':')
+            self._expect(':')
+            yield name, self._value(',}')
+            if self._peek() == '}':
+                self._pos += 1
+                return
+            self._expect(',')
+
+
+def iter_array(source, buffer_size: int = None) -> Iterator:
+    """Stream the elements of a top-level JSON array (see JsonStreamReader)"""
+    with JsonStreamReader(source, buffer_size) as reader:
+        yield from reader.iter_array()
+
+
+def iter_items(source, key: Optional[str] = 'data', buffer_size: int = None) -> Iterator[Tuple[str, object]]:
+    """Stream the (key, value) pairs of an MTGJSON-style {"data": {...}} object (see JsonStreamReader)"""
+    with JsonStreamReader(source, buffer_size) as reader:
+        yield from reader.iter_items(key)
@@ -0,0 +1,332 @@
+"""
+TCG Scan - Local Card Catalog
+Process-wide in-memory index of the cards table, used to resolve recognized
+card names and (set code, collector number) pairs without a Scryfall round trip.
+
+Names are indexed under a normalized key (accents, case and punctuation
+removed). Split and double-faced cards ("Fire // Ice") are also reachable by
+each face name. Collector numbers are compared without leading zeros and
+case-insensitively ("0053" == "53", "12A" == "12a"). Scryfall is only
+consulted on a miss, and never when config.OFFLINE_MODE is set.
+
+Local hits carry the card's latest stored prices (PriceHistory), with the
+time they were recorded in 'price_recorded_at'.
+"""
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+
+import config
+from database import Card, PriceHistory, get_db
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('local_catalog')
+
+_SET_FILTER = re.compile(r'^(?P<name>.+?)\s+set:(?P<set>[a-z0-9]+)\s*$', re.IGNORECASE)
+_NUMBER_BASE = re.compile(r'^(\d+)(.*)$')
+
+# Marks an ambiguous (set, numeric part) entry: several printings share the number
+_AMBIGUOUS = object()
+
+
+class CatalogRecord(NamedTuple):
+    """Columns of a Card row needed to answer a lookup (long text fields are left out)"""
+    id: int
+    card_id: str
+    name: str
+    set_code: Optional[str]
+    set_name: Optional[str]
+    collector_number: Optional[str]
+    rarity: Optional[str]
+    card_type: Optional[str]
+    colors: Optional[str]
+    mana_cost: Optional[str]
+    image_url: Optional[str]
+    artist: Optional[str]
+    language: Optional[str]
+
+    def to_card_data(self, prices: Dict = None) -> Dict:
+        """
+        Card data dict in the format of ScryfallAPI._parse_card_data.
+        prices: price_usd / price_eur / price_recorded_at from PriceHistory (see latest_prices)
+        """
+        return {
+            'tcg': 'mtg',
+            'id': self.card_id,
+            'card_id': self.card_id,
+            'scryfall_id': self.card_id,
+            'db_id': self.id,
+            'name': self.name,
+            'set_code': self.set_code,
+            'set_name': self.set_name,
+            'collector_number': self.collector_number,
+            'rarity': self.rarity,
+            'card_type': self.card_type,
+            'colors': self.colors or '',
+            'mana_cost': self.mana_cost or '',
+            'image_url': self.image_url,
+            'artist': self.artist,
+            'language': self.language or 'en',
+            'price_usd': None,
+            'price_eur': None,
+            **(prices or {}),
+        }
+
+
+_RECORD_COLUMNS = [getattr(Card, field) for field in CatalogRecord._fields]
+
+
+def latest_prices(db, card_id: int) -> Dict:
+    """
+    Latest stored USD and EUR price of a card: price_usd, price_eur and
+    price_recorded_at (ISO time of the newest of them; absent without prices).
+    Local hits carry these instead of a Scryfall round trip; the prices are
+    already in PriceHistory and must not be recorded again as new ones.
+    """
+    prices = {}
+    recorded = []
+    for currency, field in (('USD', 'price_usd'), ('EUR', 'price_eur')):
+        row = db.query(PriceHistory.price, PriceHistory.recorded_at).filter(
+            PriceHistory.card_id == card_id, PriceHistory.currency == currency
+        ).order_by(PriceHistory.recorded_at.desc()).first()
+        if row is not None:
+            prices[field] = row.price
+            recorded.append(row.recorded_at)
+    if recorded:
+        prices['price_recorded_at'] = max(recorded).isoformat()
+    return prices
+
+
+def normalize_card_name(name: str) -> str:
+    """
+    Normalized lookup key of a card name:
+    "Jötun Grunt" -> "jotun grunt", "Urza's Saga" -> "urzas saga"
+    """
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"['’`]", '', name.lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def normalize_collector_number(number: str) -> str:
+    """Normalized collector number: "0053" -> "53", " 12A " -> "12a", "000" -> "0" """
+    number = (number or '').strip().lower()
+    return re.sub(r'^0+(?=\d)', '', number)
+
+
+def card_name_aliases(name: str) -> Tuple[str, ...]:
+    """Normalized face names of a split/double-faced card ("Fire // Ice" -> "fire", "ice")"""
+    if '//' not in name:
+        return ()
+    return tuple(key for key in (normalize_card_name(face) for face in name.split('//')) if key)
+
+
+def _preferred(current: Optional[CatalogRecord], candidate: CatalogRecord) -> CatalogRecord:
+    """Printing returned for a bare name: English with an image, most recently imported"""
+    if current is None:
+        return candidate
+
+    def rank(record):
+        return (record.language in (None, 'en'), bool(record.image_url), record.id)
+
+    return candidate if rank(candidate) > rank(current) else current
+
+
+class LocalCatalog:
+    """
+    In-memory name and (set, collector number) index over the cards table.
+
+    The index is rebuilt when the table changes (row count or last update),
+    checked at most every config.LOCAL_CATALOG_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self, session_factory: Callable = None):
+        self.session_factory = session_factory  # None = database.get_db
+        self._lock = threading.RLock()
+        self._names: Dict[str, CatalogRecord] = {}
+        self._aliases: Dict[str, CatalogRecord] = {}
+        self._names_in_set: Dict[Tuple[str, str], CatalogRecord] = {}
+        self._set_numbers: Dict[Tuple[str, str], CatalogRecord] = {}
+        self._set_number_bases: Dict[Tuple[str, str], object] = {}
+        self._signature = None
+        self._last_check = 0.0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _table_signature(self, db) -> Tuple:
+        return db.query(func.count(Card.id), func.max(Card.id), func.max(Card.updated_at)).filter(
+            Card.tcg == 'mtg'
+        ).one()
+
+    def load(self, db=None) -> int:
+        """
+        (Re)build the index from the cards table.
+
+        Returns:
+            Number of distinct indexed names
+        """
+        own_session = db is None
+        if own_session:
+            db = (self.session_factory or get_db)()
+
+        try:
+            signature = self._table_signature(db)
+            rows = db.query(*_RECORD_COLUMNS).filter(Card.tcg == 'mtg').all()
+        finally:
+            if own_session:
+                db.close()
+
+        names: Dict[str, CatalogRecord] = {}
+        aliases: Dict[str, CatalogRecord] = {}
+        names_in_set: Dict[Tuple[str, str], CatalogRecord] = {}
+        set_numbers: Dict[Tuple[str, str], CatalogRecord] = {}
+        for row in rows:
+            record = CatalogRecord(*row)
+            if record.set_code and record.collector_number:
+                number_key = (record.set_code.lower(), normalize_collector_number(record.collector_number))
+                set_numbers[number_key] = _preferred(set_numbers.get(number_key), record)
+            key = normalize_card_name(record.name)
+            if not key:
+                continue
+            names[key] = _preferred(names.get(key), record)
+            if record.set_code:
+                set_key = (key, record.set_code.lower())
+                names_in_set[set_key] = _preferred(names_in_set.get(set_key), record)
+            for alias in card_name_aliases(record.name):
+                aliases[alias] = _preferred(aliases.get(alias), record)
+                if record.set_code:
+                    set_key = (alias, record.set_code.lower())
+                    names_in_set.setdefault(set_key, record)
+
+        # Numeric part -> printing, for OCR'd numbers missing their letter suffix
+        set_number_bases: Dict[Tuple[str, str], object] = {}
+        for (set_code, number), record in set_numbers.items():
+            match = _NUMBER_BASE.match(number)
+            if match and match.group(2):
+                base_key = (set_code, match.group(1))
+                set_number_bases[base_key] = _AMBIGUOUS if base_key in set_number_bases else record
+
+        with self._lock:
+            self._names = names
+            self._aliases = aliases
+            self._names_in_set = names_in_set
+            self._set_numbers = set_numbers
+            self._set_number_bases = set_number_bases
+            self._signature = tuple(signature)
+            self._last_check = time.monotonic()
+            self.loaded = True
+
+        logger.info(f"Local catalog loaded | printings={len(rows)} | names={len(names)} | aliases={len(aliases)}")
+        return len(names)
+
+    def refresh_if_stale(self):
+        """Load on first use, then rebuild if the cards table changed since the last load"""
+        now = time.monotonic()
+        if self.loaded and now - self._last_check < config.LOCAL_CATALOG_CHECK_INTERVAL:
+            return
+
+        with self._lock:
+            if self.loaded and now - self._last_check < config.LOCAL_CATALOG_CHECK_INTERVAL:
+                return
+            self._last_check = now
+            try:
+                if self.loaded:
+                    db = (self.session_factory or get_db)()
+                    try:
+                        if tuple(self._table_signature(db)) == self._signature:
+                            return
+                    finally:
+                        db.close()
+                self.load()
+            except Exception as e:
+                logger.warning(f"Could not refresh local catalog: {e}")
+
+    def _card_data(self, record: CatalogRecord) -> Dict:
+        """Card data of a hit, with the card's latest stored prices"""
+        prices = None
+        db = (self.session_factory or get_db)()
+        try:
+            prices = latest_prices(db, record.id)
+        except Exception as e:
+            logger.warning(f"Could not load stored prices | card_id={record.id} | error={e}")
+        finally:
+            db.close()
+        return record.to_card_data(prices)
+
+    def lookup_name(self, query: str) -> Optional[Dict]:
+        """
+        Resolve a card name (optionally "name set:xyz") to card data.
+        Exact names win over split/DFC face aliases.
+
+        Returns:
+            Card data dict, or None if the name is not in the catalog
+        """
+        if not query:
+            return None
+
+        set_code = None
+        match = _SET_FILTER.match(query)
+        if match:
+            query, set_code = match.group('name'), match.group('set').lower()
+
+        key = normalize_card_name(query)
+        with self._lock:
+            if set_code:
+                record = self._names_in_set.get((key, set_code))
+            else:
+                record = self._names.get(key) or self._aliases.get(key)
+
+        return self._card_data(record) if record else None
+
+    def lookup_set_number(self, set_code: str, collector_number: str) -> Optional[Dict]:
+        """
+        Resolve an exact (set code, collector number) pair to card data.
+
+        A letter suffix the catalog doesn't know is dropped ("53a" -> "53"),
+        and a bare number matches the only suffixed printing sharing it
+        ("53" -> "53a" if there is no "53b" and no plain "53").
+
+        Returns:
+            Card data dict, or None if the pair is not in the catalog
+        """
+        if not set_code or not collector_number:
+            return None
+
+        set_code = set_code.lower()
+        number = normalize_collector_number(collector_number)
+        match = _NUMBER_BASE.match(number)
+        with self._lock:
+            record = self._set_numbers.get((set_code, number))
+            if record is None and match:
+                if match.group(2):
+                    record = self._set_numbers.get((set_code, match.group(1)))
+                else:
+                    record = self._set_number_bases.get((set_code, number))
+                    if record is _AMBIGUOUS:
+                        record = None
+
+        return self._card_data(record) if record else None
+
+
+# Singleton instance shared by the recognition engines of this process
+_catalog_instance: Optional[LocalCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_local_catalog() -> LocalCatalog:
+    """Get or create the process-wide LocalCatalog instance."""
+    global _catalog_instance
+    if _catalog_instance is None:
+        with _catalog_lock:
+            if _catalog_instance is None:
+                _catalog_instance = LocalCatalog()
+    return _catalog_instance
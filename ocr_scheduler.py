@@ -0,0 +1,177 @@
+"""
+TCG Scan - OCR Variant Scheduler
+Set info extraction tries many OCR variants (region x binarization x PSM).
+The scheduler orders them by their historical success rate, learned online
+and persisted to disk, so the extraction can stop at the first validated
+parse. OCRBudget caps the number of OCR calls spent on a single scan.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import config
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('ocr_scheduler')
+
+
+class OCRBudget:
+    """Counts the OCR calls of one scan and enforces an upper limit"""
+
+    def __init__(self, limit: Optional[int] = None):
+        # None = config.OCR_CALL_BUDGET, 0 = unlimited
+        self.limit = config.OCR_CALL_BUDGET if limit is None else limit
+        self.calls = 0
+
+    def can_spend(self, reserve: int = 0) -> bool:
+        """True if one more call fits while keeping `reserve` calls for later stages"""
+        return not self.limit or self.calls + 1 + reserve <= self.limit
+
+    def spend(self):
+        self.calls += 1
+
+
+class OCRVariantScheduler:
+    """
+    Orders OCR variants by success rate, per extraction stage.
+
+    The rate is Laplace-smoothed ((successes + 1) / (attempts + 2)) so unseen
+    variants keep their default position, and counts are halved once they
+    exceed MAX_ATTEMPTS so the order keeps adapting to new photos.
+    """
+
+    MAX_ATTEMPTS = 500
+
+    def __init__(self, stats_path: Path = None):
+        self._stats_path = stats_path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, List[float]]] = {}  # stage -> variant -> [successes, attempts]
+        self._pending: Dict[str, Dict[str, List[float]]] = {}  # Deltas not saved yet
+        self._scans = 0
+        self._ocr_calls = 0
+        self._pending_scans = 0
+        self._pending_ocr_calls = 0
+        self._last_save = time.monotonic()
+        self._stats = self._read_file().get('variants', {})
+
+    @property
+    def stats_path(self) -> Path:
+        return Path(self._stats_path or config.OCR_VARIANT_STATS_PATH)
+
+    def _read_file(self) -> Dict:
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._scans = data.get('scans', 0)
+            self._ocr_calls = data.get('ocr_calls', 0)
+            return data
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read OCR variant stats: {e}")
+            return {}
+
+    def order(self, stage: str, variants: List[str]) -> List[str]:
+        """Return the variants sorted by success rate (ties keep the given order)"""
+        with self._lock:
+            stats = self._stats.get(stage, {})
+
+            def rate(variant):
+                successes, attempts = stats.get(variant, (0, 0))
+                return (successes + 1) / (attempts + 2)
+
+            return sorted(variants, key=rate, reverse=True)
+
+    def record(self, stage: str, attempted: Iterable[str], succeeded: Iterable[str] = ()):
+        """Update the counts after a stage: every attempted variant, and those that produced the result"""
+        succeeded = set(succeeded)
+        with self._lock:
+            for variant in attempted:
+                hit = 1 if variant in succeeded else 0
+                for table in (self._stats, self._pending):
+                    counts = table.setdefault(stage, {}).setdefault(variant, [0, 0])
+                    counts[0] += hit
+                    counts[1] += 1
+                counts = self._stats[stage][variant]
+                if counts[1] > self.MAX_ATTEMPTS:
+                    counts[0] /= 2
+                    counts[1] /= 2
+
+    def record_scan(self, ocr_calls: int):
+        """Track OCR calls per scan and persist the stats periodically"""
+        with self._lock:
+            self._scans += 1
+            self._ocr_calls += ocr_calls
+            self._pending_scans += 1
+            self._pending_ocr_calls += ocr_calls
+            due = time.monotonic() - self._last_save >= config.OCR_VARIANT_STATS_SAVE_INTERVAL
+        if due:
+            self.save()
+
+    @property
+    def average_ocr_calls(self) -> float:
+        return self._ocr_calls / self._scans if self._scans else 0.0
+
+    def save(self):
+        """
+        Merge the unsaved deltas into the stats file.
+        Merging (rather than overwriting) keeps the counts of other worker
+        processes sharing the same file.
+        """
+        with self._lock:
+            if not self._pending and not self._pending_scans:
+                return
+            pending, self._pending = self._pending, {}
+            pending_scans, self._pending_scans = self._pending_scans, 0
+            pending_calls, self._pending_ocr_calls = self._pending_ocr_calls, 0
+            self._last_save = time.monotonic()
+
+            data = self._read_file()
+            variants = data.get('variants', {})
+            for stage, stage_deltas in pending.items():
+                stage_stats = variants.setdefault(stage, {})
+                for variant, (successes, attempts) in stage_deltas.items():
+                    counts = stage_stats.setdefault(variant, [0, 0])
+                    counts[0] += successes
+                    counts[1] += attempts
+                    if counts[1] > self.MAX_ATTEMPTS:
+                        counts[0] /= 2
+                        counts[1] /= 2
+
+            self._stats = variants
+            self._scans = data.get('scans', 0) + pending_scans
+            self._ocr_calls = data.get('ocr_calls', 0) + pending_calls
+            data = {'variants': variants, 'scans': self._scans, 'ocr_calls': self._ocr_calls}
+
+            try:
+                self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.stats_path.with_suffix(f'.{os.getpid()}.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=1)
+                os.replace(tmp_path, self.stats_path)
+            except OSError as e:
+                logger.warning(f"Could not save OCR variant stats: {e}")
+                return
+
+        logger.info(f"OCR variant stats saved | scans={self._scans} | avg_ocr_calls={self.average_ocr_calls:.1f}")
+
+
+# Singleton instance shared by the recognition engines of this process
+_scheduler_instance: Optional[OCRVariantScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_ocr_scheduler() -> OCRVariantScheduler:
+    """Get or create the process-wide OCRVariantScheduler instance."""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        with _scheduler_lock:
+            if _scheduler_instance is None:
+                _scheduler_instance = OCRVariantScheduler()
+                atexit.register(_scheduler_instance.save)
+    return _scheduler_instance
@@ -4,14 +4,39 @@ Handles real-time price tracking and historical data
 """
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert
 from database import Card, PriceHistory, get_db
-from api_integrations import CardAPIManager
+from api_integrations import CardAPIManager, collection_identifier, identifier_key
 import config
 from logger import get_logger
 
 # Initialize logger for this module
 logger = get_logger('price')
 
+
+def latest_price_times(db, card_ids: List[int], chunk_size: int = 500) -> Dict[int, datetime]:
+    """Time of the latest PriceHistory row of each card (cards without one are left out)"""
+    latest = {}
+    for start in range(0, len(card_ids), chunk_size):
+        rows = db.query(PriceHistory.card_id, func.max(PriceHistory.recorded_at)).filter(
+            PriceHistory.card_id.in_(card_ids[start:start + chunk_size])
+        ).group_by(PriceHistory.card_id).all()
+        latest.update(rows)
+    return latest
+
+
+def write_price_history(db, prices: List[Tuple[int, float]], source: str = 'api', currency: str = 'USD') -> int:
+    """Insert one PriceHistory row per (card primary key, price) in a single statement (the caller commits)"""
+    if not prices:
+        return 0
+    recorded_at = datetime.utcnow()
+    db.execute(insert(PriceHistory), [
+        {'card_id': card_id, 'price': price, 'price_source': source, 'currency': currency,
+         'recorded_at': recorded_at}
+        for card_id, price in prices
+    ])
+    return len(prices)
+
 class PriceTracker:
     """Manages price tracking and updates"""
     
@@ -25,12 +50,16 @@ class PriceTracker:
         Returns the new price or None if update failed
         """
         logger.debug(f"Updating price for card | id={card.id} | name={card.name}")
+        if not card.set_code or not card.collector_number:
+            # The set/number endpoint can't find it; don't spend a rate-limited request
+            logger.debug(f"No set/collector number for card: {card.name}")
+            return None
         db = get_db()
         
         try:
             # Fetch current price from Scryfall API
             card_data = self.api_manager.scryfall.get_card_by_set_and_number(
-                card.set_code, card.collector_number
+                card.set_code, card.collector_number, fresh_prices=True
             )
             
             if not card_data:
@@ -64,16 +93,20 @@ class PriceTracker:
         finally:
             db.close()
     
-    def update_all_prices(self, max_cards: int = None) -> Dict[str, int]:
+    def update_all_prices(self, tcg: str = 'mtg', max_cards: int = None) -> Dict[str, int]:
         """
-        Update prices for all MTG cards
+        Update prices for all MTG cards whose price is due, looking them up
+        SCRYFALL_COLLECTION_BATCH_SIZE at a time with /cards/collection and
+        writing each batch's PriceHistory rows with one insert.
         Returns statistics about the update
         """
-        logger.info(f"Starting bulk price update | max_cards={max_cards}")
+        tcg = tcg or 'mtg'
+        logger.info(f"Starting bulk price update | tcg={tcg} | max_cards={max_cards}")
         db = get_db()
         
         try:
-            query = db.query(Card).filter(Card.tcg == 'mtg')
+            query = db.query(Card.id, Card.card_id, Card.set_code, Card.collector_number).filter(
+                Card.tcg == tcg)
             
             if max_cards:
                 cards = query.limit(max_cards).all()
@@ -84,21 +117,46 @@ class PriceTracker:
                 'total': len(cards),
                 'updated': 0,
                 'failed': 0,
-                'skipped': 0
+                'skipped': 0,
+                'requests': 0
             }
             
+            if tcg != 'mtg':
+                # Prices come from Scryfall, which only knows MTG cards
+                stats['skipped'] = len(cards)
+                return stats
+            
             logger.info(f"Processing {stats['total']} cards for price update")
             
+            # Check if we need to update (based on last update time)
+            last_updates = latest_price_times(db, [card.id for card in cards])
+            pending = {}  # identifier key -> (identifier, [card primary keys])
             for card in cards:
-                # Check if we need to update (based on last update time)
-                if self._should_update_price(card):
-                    price = self.update_card_price(card)
-                    if price is not None:
-                        stats['updated'] += 1
-                    else:
-                        stats['failed'] += 1
-                else:
+                if not self._is_price_due(last_updates.get(card.id)):
                     stats['skipped'] += 1
+                    continue
+                identifier = collection_identifier(card.card_id, card.set_code, card.collector_number)
+                if identifier is None:
+                    stats['failed'] += 1
+                    continue
+                pending.setdefault(identifier_key(identifier), (identifier, []))[1].append(card.id)
+            
+            identifiers = [identifier for identifier, _ in pending.values()]
+            for batch in self.api_manager.scryfall.iter_card_collection(identifiers):
+                stats['requests'] += 1
+                prices = []
+                for identifier, card_data in batch['found']:
+                    price = self.api_manager.get_card_price(card_data)
+                    for card_pk in pending[identifier_key(identifier)][1]:
+                        if price is not None:
+                            prices.append((card_pk, price))
+                        else:
+                            stats['failed'] += 1
+                stats['updated'] += write_price_history(db, prices)
+                db.commit()
+                for identifier in batch['not_found'] + batch['failed']:
+                    entry = pending.get(identifier_key(identifier))
+                    stats['failed'] += len(entry[1]) if entry else 1
             
             logger.info(f"Bulk price update complete | stats={stats}")
             return stats
@@ -106,6 +164,13 @@ class PriceTracker:
         finally:
             db.close()
     
+    @staticmethod
+    def _is_price_due(last_update: Optional[datetime]) -> bool:
+        """Whether a price last recorded at last_update (None: never) should be refreshed"""
+        if last_update is None:
+            return True
+        return datetime.utcnow() - last_update >= timedelta(seconds=config.PRICE_UPDATE_INTERVAL)
+    
     def _should_update_price(self, card: Card) -> bool:
         """Check if card price should be updated based on last update time"""
         if not card.price_history:
@@ -115,10 +180,7 @@ class PriceTracker:
                             key=lambda p: p.recorded_at, 
                             reverse=True)[0]
         
-        time_since_update = datetime.utcnow() - latest_price.recorded_at
-        update_interval = timedelta(seconds=config.PRICE_UPDATE_INTERVAL)
-        
-        return time_since_update >= update_interval
+        return self._is_price_due(latest_price.recorded_at)
     
     def get_card_price_history(self, card_id: int, days: int = 30) -> List[Dict]:
         """Get price history for a card over the last N days"""
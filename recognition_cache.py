@@ -0,0 +1,270 @@
+"""
+TCG Scan - Recognition Result Cache
+Caches final recognize_card results so re-uploaded photos and near-identical
+auto-scan frames skip the OCR + Scryfall pipeline.
+
+Entries are keyed on the SHA-256 of the uploaded bytes, with a secondary
+lookup on the perceptual hash of the preprocessed card (Hamming distance).
+A perceptual-hash hit must also be confirmed as the same printing (set code +
+collector number), since reprints share the same art across sets.
+The in-memory store has a TTL and LRU eviction; entries can optionally be
+written through to a SQLite file so they survive restarts. The file is held
+to the same TTL and max_entries (oldest entries are dropped first).
+"""
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+import config
+from hash_index import hash_to_words, popcount_rows
+from local_catalog import normalize_collector_number
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('recognition_cache')
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it can't be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _result_printing(result: Dict) -> Tuple[str, str]:
+    """(set code, collector number) of a recognition result, normalized for comparison"""
+    card = result.get('card') or {}
+    set_code = result.get('set_code') or card.get('set_code') or card.get('set') or ''
+    number = result.get('collector_number') or card.get('collector_number') or ''
+    return set_code.lower(), normalize_collector_number(number)
+
+
+class RecognitionCache:
+    """
+    TTL + LRU cache of recognition results.
+
+    Only successful results are stored: a failed recognition may be caused
+    by a transient Scryfall error and should be retried.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None,
+                 phash_distance: int = None, sqlite_path: str = None):
+        self.max_entries = max_entries or config.RECOGNITION_CACHE_MAX_ENTRIES
+        self.ttl = config.RECOGNITION_CACHE_TTL if ttl is None else ttl
+        self.phash_distance = (config.RECOGNITION_CACHE_PHASH_DISTANCE
+                               if phash_distance is None else phash_distance)
+        self.sqlite_path = sqlite_path if sqlite_path is not None else config.RECOGNITION_CACHE_SQLITE_PATH
+
+        self._lock = threading.RLock()
+        self._entries: OrderedDict = OrderedDict()  # digest -> (created, image_hash, result)
+        self._stats = {
+            'hits_sha256': 0,
+            'hits_phash': 0,
+            'hits_sqlite': 0,
+            'sha256_misses': 0,
+            'phash_misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+        self._db = None
+        if self.sqlite_path:
+            self._db = sqlite3.connect(str(self.sqlite_path), check_same_thread=False)
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS recognition_cache (
+                    digest TEXT PRIMARY KEY,
+                    image_hash TEXT,
+                    created REAL NOT NULL,
+                    result TEXT NOT NULL
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS ix_recognition_cache_created '
+                             'ON recognition_cache (created)')
+            self._trim_sqlite()
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def _hit(self, result: Dict, match: str) -> Dict:
+        hit = copy.deepcopy(result)
+        hit['cached_method'] = hit.get('method')
+        hit['method'] = 'cache'
+        hit['cache_match'] = match
+        return hit
+
+    def get(self, digest: Optional[str]) -> Optional[Dict]:
+        """Look up a result by the SHA-256 of the uploaded bytes"""
+        if not digest:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if self._expired(entry[0]):
+                    del self._entries[digest]
+                    self._stats['expirations'] += 1
+                else:
+                    self._entries.move_to_end(digest)
+                    self._stats['hits_sha256'] += 1
+                    return self._hit(entry[2], 'sha256')
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT created, image_hash, result FROM recognition_cache WHERE digest = ?',
+                    (digest,)
+                ).fetchone()
+                if row and not self._expired(row[0]):
+                    result = json.loads(row[2])
+                    self._store(digest, row[1], result, row[0])
+                    self._stats['hits_sqlite'] += 1
+                    return self._hit(result, 'sha256')
+
+            self._stats['sha256_misses'] += 1
+            return None
+
+    def get_similar(self, image_hash: Optional[str],
+                    confirm: Callable[[str, str], bool]) -> Optional[Dict]:
+        """
+        Look up a result by perceptual hash of the preprocessed card.
+        Entries within phash_distance are tried closest first; one is only
+        returned once confirm(set_code, collector_number) accepts its printing
+        (reprints share the same art across sets). confirm runs without the lock.
+        """
+        query = hash_to_words(image_hash) if image_hash else None
+        if query is None:
+            return None
+
+        with self._lock:
+            self._purge_expired()
+            candidates = [(digest, hash_to_words(entry[1]))
+                          for digest, entry in self._entries.items() if entry[1]]
+            candidates = [(digest, words) for digest, words in candidates if words is not None]
+            nearby = []
+            if candidates:
+                distances = popcount_rows(np.vstack([words for _, words in candidates]) ^ query)
+                for row in np.argsort(distances, kind='stable'):
+                    if distances[row] > self.phash_distance:
+                        break
+                    digest = candidates[row][0]
+                    nearby.append((digest, _result_printing(self._entries[digest][2])))
+
+        verdicts = {}  # printing -> confirm() answer
+        for digest, printing in nearby:
+            if printing not in verdicts:
+                verdicts[printing] = confirm(*printing)
+            if verdicts[printing]:
+                with self._lock:
+                    entry = self._entries.get(digest)
+                    if entry is None:  # Evicted meanwhile
+                        continue
+                    self._entries.move_to_end(digest)
+                    self._stats['hits_phash'] += 1
+                    return self._hit(entry[2], 'phash')
+
+        with self._lock:
+            self._stats['phash_misses'] += 1
+        return None
+
+    def put(self, digest: Optional[str], image_hash: Optional[str], result: Dict):
+        """Store a successful recognition result"""
+        if not digest or not result.get('success') or result.get('method') == 'cache':
+            return
+
+        result = copy.deepcopy(result)
+        created = time.time()
+        with self._lock:
+            self._store(digest, image_hash, result, created)
+            self._stats['stores'] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO recognition_cache (digest, image_hash, created, result) '
+                        'VALUES (?, ?, ?, ?)',
+                        (digest, image_hash, created, json.dumps(result, default=str))
+                    )
+                    self._trim_sqlite()
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"Could not write recognition cache entry: {e}")
+
+    def _store(self, digest: str, image_hash: Optional[str], result: Dict, created: float):
+        """Insert in memory and evict least recently used entries (caller holds the lock)"""
+        self._entries[digest] = (created, image_hash, result)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _trim_sqlite(self):
+        """Delete expired rows and keep the newest max_entries (caller holds the lock and commits)"""
+        if self.ttl:
+            self._db.execute('DELETE FROM recognition_cache WHERE created < ?', (time.time() - self.ttl,))
+        self._db.execute(
+            'DELETE FROM recognition_cache WHERE digest NOT IN '
+            '(SELECT digest FROM recognition_cache ORDER BY created DESC LIMIT ?)',
+            (self.max_entries,)
+        )
+
+    def _purge_expired(self):
+        if not self.ttl:
+            return
+        expired = [digest for digest, entry in self._entries.items() if self._expired(entry[0])]
+        for digest in expired:
+            del self._entries[digest]
+        self._stats['expirations'] += len(expired)
+
+    def clear(self):
+        """Drop every entry (memory and SQLite)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM recognition_cache')
+                self._db.commit()
+        logger.info("Recognition cache cleared")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            hits = self._stats['hits_sha256'] + self._stats['hits_phash'] + self._stats['hits_sqlite']
+            # Every lookup starts with the SHA-256 stage
+            lookups = self._stats['hits_sha256'] + self._stats['hits_sqlite'] + self._stats['sha256_misses']
+            return {
+                **self._stats,
+                'hits': hits,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'sqlite': bool(self._db),
+            }
+
+
+# Singleton instance used by the web app
+_cache_instance: Optional[RecognitionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_recognition_cache() -> RecognitionCache:
+    """Get or create the process-wide RecognitionCache instance."""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = RecognitionCache()
+    return _cache_instance
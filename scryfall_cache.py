@@ -0,0 +1,333 @@
+"""
+TCG Scan - Scryfall Response Cache
+Read-through cache of Scryfall card lookups (cards/named, cards/{set}/{number})
+in a local SQLite file, so repeated lookups from scans, imports and price
+updates skip the network and the rate limiter.
+
+Card metadata almost never changes, prices change daily, so an entry has two
+lifetimes: SCRYFALL_CACHE_METADATA_TTL for callers that only need card data
+and SCRYFALL_CACHE_PRICE_TTL for callers that need current prices. A 404
+(e.g. an OCR name that matches nothing) is cached for SCRYFALL_CACHE_NEGATIVE_TTL.
+Entries stored by a price lookup are purged once older than the price TTL.
+An entry older than the price TTL is served without its prices, so callers
+that record prices never store weeks-old ones as current. Expired entries
+are purged from the file every SCRYFALL_CACHE_PURGE_INTERVAL seconds (on put).
+
+Per-entry hit counters are kept in memory and written in batches of
+SCRYFALL_CACHE_HIT_FLUSH_SIZE (and by get_stats / entries / purge / close).
+
+Expired entries that came with an ETag / Last-Modified header are revalidated
+with a conditional request; a 304 answer renews the entry without a body.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+import config
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('scryfall_cache')
+
+_KEY_PREFIX = r"key LIKE ? ESCAPE '\'"
+# An entry expires after its own TTL (arguments: see ScryfallResponseCache._expiry_cutoffs)
+_EXPIRED = '(fetched_at < CASE WHEN status = 404 THEN ? WHEN prices THEN ? ELSE ? END)'
+
+
+def _like_prefix(prefix: str) -> str:
+    """LIKE pattern matching keys that start with prefix"""
+    return prefix.replace('\\', '\\\\').replace('%', r'\%').replace('_', r'\_') + '%'
+
+
+class CachedResponse(NamedTuple):
+    """One cached lookup: a 200 with its JSON body, or a 404 (data is None)"""
+    key: str
+    status: int
+    data: Optional[Dict]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    size: int
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ScryfallResponseCache:
+    """
+    SQLite-backed Scryfall response cache.
+
+    An empty path (config.SCRYFALL_CACHE_PATH = None) disables caching;
+    ':memory:' keeps entries for the life of the process.
+    """
+
+    def __init__(self, path: str = None, metadata_ttl: float = None, price_ttl: float = None,
+                 negative_ttl: float = None):
+        self.path = path if path is not None else config.SCRYFALL_CACHE_PATH
+        self.metadata_ttl = config.SCRYFALL_CACHE_METADATA_TTL if metadata_ttl is None else metadata_ttl
+        self.price_ttl = config.SCRYFALL_CACHE_PRICE_TTL if price_ttl is None else price_ttl
+        self.negative_ttl = config.SCRYFALL_CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+
+        self._lock = threading.Lock()
+        self._pending_hits: Dict[str, int] = {}  # key -> hits not written to SQLite yet
+        self._last_purge = time.time()
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'bytes_saved': 0,
+        }
+
+        self._db = None
+        if self.path:
+            if str(self.path) != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            # Writes are small and frequent (stores, renewals, hit batches): no fsync per commit
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS scryfall_responses (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    body TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    prices INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = {row[1] for row in self._db.execute('PRAGMA table_info(scryfall_responses)')}
+            if 'prices' not in columns:  # Cache file written before entries recorded their lookup kind
+                self._db.execute('ALTER TABLE scryfall_responses ADD COLUMN prices INTEGER NOT NULL DEFAULT 0')
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def key(url: str, params: Dict = None) -> str:
+        """Cache key of a request: the URL with its query parameters in a stable order"""
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Stored entry for key, fresh or not (None when never cached)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                'SELECT key, status, body, etag, last_modified, fetched_at, size '
+                'FROM scryfall_responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            data = json.loads(row[2]) if row[2] else None
+        except ValueError:
+            return None
+        return CachedResponse(row[0], row[1], data, row[3], row[4], row[5], row[6])
+
+    def is_fresh(self, entry: CachedResponse, fresh_prices: bool = False) -> bool:
+        """Whether entry can be served without asking Scryfall"""
+        if entry.status == 404:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.price_ttl if fresh_prices else self.metadata_ttl
+        return time.time() - entry.fetched_at <= ttl
+
+    def prices_expired(self, entry: CachedResponse) -> bool:
+        """Whether entry's card data is too old to pass its prices off as current"""
+        return entry.status == 200 and time.time() - entry.fetched_at > self.price_ttl
+
+    def record_hit(self, entry: CachedResponse):
+        """Count a lookup served from entry (the per-entry counter is written in batches)"""
+        with self._lock:
+            self._stats['negative_hits' if entry.status == 404 else 'hits'] += 1
+            self._stats['bytes_saved'] += entry.size
+            self._pending_hits[entry.key] = self._pending_hits.get(entry.key, 0) + 1
+            if len(self._pending_hits) >= config.SCRYFALL_CACHE_HIT_FLUSH_SIZE:
+                self._flush_hits()
+
+    def _flush_hits(self):
+        """Write the pending per-entry hit counters in one statement (caller holds the lock)"""
+        if not self._pending_hits or not self.enabled:
+            return
+        try:
+            self._db.executemany('UPDATE scryfall_responses SET hits = hits + ? WHERE key = ?',
+                                 [(hits, key) for key, hits in self._pending_hits.items()])
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write Scryfall cache hit counters: {e}")
+        self._pending_hits.clear()
+
+    def flush(self):
+        """Write pending hit counters now"""
+        with self._lock:
+            self._flush_hits()
+
+    def close(self):
+        """Write pending hit counters and close the SQLite file"""
+        with self._lock:
+            self._flush_hits()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def record_miss(self):
+        if self.enabled:
+            with self._lock:
+                self._stats['misses'] += 1
+
+    def renew(self, entry: CachedResponse):
+        """Scryfall answered 304 Not Modified: the entry is fresh again"""
+        with self._lock:
+            self._stats['revalidated'] += 1
+            self._stats['bytes_saved'] += entry.size
+            self._db.execute('UPDATE scryfall_responses SET fetched_at = ? WHERE key = ?',
+                             (time.time(), entry.key))
+            self._db.commit()
+
+    def put(self, key: str, status: int, data: Optional[Dict], headers=None, fresh_prices: bool = False):
+        """Store a 200 (with its JSON body) or a 404 answer (fresh_prices: fetched by a price lookup)"""
+        if not self.enabled or status not in (200, 404):
+            return
+        headers = headers or {}
+        body = json.dumps(data) if data is not None else None
+        size = len(body.encode('utf-8')) if body else 0
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        with self._lock:
+            try:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO scryfall_responses '
+                    '(key, status, body, etag, last_modified, fetched_at, size, prices) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, status, body,
+                     etag if isinstance(etag, str) else None,
+                     last_modified if isinstance(last_modified, str) else None,
+                     time.time(), size, int(fresh_prices))
+                )
+                self._db.commit()
+                self._stats['stores'] += 1
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Could not write Scryfall cache entry: {e}")
+            if time.time() - self._last_purge >= config.SCRYFALL_CACHE_PURGE_INTERVAL:
+                self._purge_expired()
+
+    def entries(self, prefix: str = None, limit: int = 100) -> List[Dict]:
+        """Most recently fetched entries (optionally only keys starting with prefix), without bodies"""
+        if not self.enabled:
+            return []
+        query = 'SELECT key, status, etag, fetched_at, size, hits FROM scryfall_responses'
+        args = []
+        if prefix:
+            query += ' WHERE ' + _KEY_PREFIX
+            args.append(_like_prefix(prefix))
+        query += ' ORDER BY fetched_at DESC LIMIT ?'
+        args.append(limit)
+        with self._lock:
+            self._flush_hits()
+            rows = self._db.execute(query, args).fetchall()
+        now = time.time()
+        return [{'key': r[0], 'status': r[1], 'etag': r[2], 'age_seconds': round(now - r[3], 1),
+                 'size': r[4], 'hits': r[5]} for r in rows]
+
+    def purge(self, prefix: str = None, expired_only: bool = False) -> int:
+        """
+        Drop entries (all, those whose key starts with prefix, and/or only expired ones); returns the count.
+        An entry expires after its own TTL: negative, price (stored by a price lookup) or metadata.
+        """
+        if not self.enabled:
+            return 0
+        clauses, args = [], []
+        if prefix:
+            clauses.append(_KEY_PREFIX)
+            args.append(_like_prefix(prefix))
+        if expired_only:
+            clauses.append(_EXPIRED)
+            args += self._expiry_cutoffs()
+        query = 'DELETE FROM scryfall_responses'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        with self._lock:
+            self._flush_hits()
+            count = self._db.execute(query, args).rowcount
+            self._db.commit()
+            if expired_only and not prefix:
+                self._last_purge = time.time()
+        logger.info(f"Scryfall cache purged | entries={count} | prefix={prefix} | expired_only={expired_only}")
+        return count
+
+    def _expiry_cutoffs(self) -> List[float]:
+        """fetched_at limits of the _EXPIRED clause: negative, price and metadata entries"""
+        now = time.time()
+        return [now - self.negative_ttl, now - self.price_ttl, now - self.metadata_ttl]
+
+    def _purge_expired(self):
+        """Scheduled purge of expired entries (caller holds the lock)"""
+        self._last_purge = time.time()
+        try:
+            count = self._db.execute('DELETE FROM scryfall_responses WHERE ' + _EXPIRED,
+                                     self._expiry_cutoffs()).rowcount
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not purge expired Scryfall cache entries: {e}")
+            return
+        if count:
+            logger.debug(f"Scryfall cache expired entries purged | entries={count}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._flush_hits()
+            stats = dict(self._stats)
+            if self.enabled:
+                entries, size = self._db.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scryfall_responses').fetchone()
+            else:
+                entries, size = 0, 0
+        # Revalidations still cost a request (but not the body)
+        served = stats['hits'] + stats['negative_hits']
+        lookups = served + stats['revalidated'] + stats['misses']
+        return {
+            **stats,
+            'hit_rate': round(served / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+            'metadata_ttl': self.metadata_ttl,
+            'price_ttl': self.price_ttl,
+            'negative_ttl': self.negative_ttl,
+            'enabled': self.enabled,
+        }
+
+
+# Singleton instance shared by every ScryfallAPI client
+_cache_instance: Optional[ScryfallResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_scryfall_cache() -> ScryfallResponseCache:
+    """Get or create the process-wide ScryfallResponseCache instance."""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = ScryfallResponseCache()
+                atexit.register(_cache_instance.flush)
+    return _cache_instance
@@ -0,0 +1,171 @@
+"""
+TCG Scan - Scryfall Executor Client
+Awaitable wrapper around the blocking ScryfallAPI: each call runs on one
+shared thread pool of HTTP_POOL_SIZE threads (one per pooled connection) and
+the event loop only awaits it. There is no asyncio I/O; the concurrency comes
+from the pool threads.
+
+Requests still go through ScryfallAPI, so they share the process-wide rate
+limiter, response cache, request coalescing and keep-alive HTTP session.
+Calls keep the priority of the thread that runs the loop, so a loop started
+under background_priority() yields to scans.
+
+The import, price and hash workers don't use it (they run on their own
+threads); it serves code that already has an event loop, and the
+bench_scryfall_executor.py benchmark.
+
+Usage:
+    async def fetch():
+        api = ScryfallExecutorAPI()
+        return await api.search_cards('set:woe')
+
+    with background_priority():
+        cards = asyncio.run(fetch())
+"""
+import asyncio
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import config
+from api_integrations import PRIORITY_BACKGROUND, ScryfallAPI, background_priority, current_priority
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('scryfall_executor')
+
+
+# Thread pool shared by every ScryfallExecutorAPI in the process
+_executor_instance: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_scryfall_executor() -> ThreadPoolExecutor:
+    """Get or create the process-wide thread pool running async Scryfall calls."""
+    global _executor_instance
+    if _executor_instance is None:
+        with _executor_lock:
+            if _executor_instance is None:
+                _executor_instance = ThreadPoolExecutor(max_workers=config.HTTP_POOL_SIZE,
+                                                        thread_name_prefix='scryfall-async')
+    return _executor_instance
+
+
+class ScryfallExecutorAPI:
+    """
+    Awaitable ScryfallAPI running each call on a thread pool. Wraps a sync
+    client (a new one by default), so tests and benchmarks can point both at
+    the same stand-in server.
+    """
+
+    def __init__(self, api: ScryfallAPI = None, executor: ThreadPoolExecutor = None):
+        self.api = api or ScryfallAPI()
+        self.executor = executor or get_scryfall_executor()
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking ScryfallAPI call on the pool, at the caller's priority"""
+        priority = current_priority()
+
+        def call():
+            if priority == PRIORITY_BACKGROUND:
+                with background_priority():
+                    return fn(*args, **kwargs)
+            return fn(*args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def search_card_by_name(self, name: str, fresh_prices: bool = False) -> Optional[Dict]:
+        """See ScryfallAPI.search_card_by_name"""
+        return await self._run(self.api.search_card_by_name, name, fresh_prices=fresh_prices)
+
+    async def get_card_by_set_and_number(self, set_code: str, collector_number: str,
+                                         fresh_prices: bool = False) -> Optional[Dict]:
+        """See ScryfallAPI.get_card_by_set_and_number"""
+        return await self._run(self.api.get_card_by_set_and_number, set_code, collector_number,
+                               fresh_prices=fresh_prices)
+
+    async def fetch_search_page(self, query: str, page: int = 1, next_page: str = None) -> Optional[Dict]:
+        """See ScryfallAPI.fetch_search_page"""
+        return await self._run(self.api.fetch_search_page, query, page, next_page=next_page)
+
+    async def iter_search_pages(self, query: str, page: int = 1, next_page: str = None) -> AsyncIterator[Dict]:
+        """Raw result pages one after the other, following next_page (see ScryfallAPI.iter_search_pages)"""
+        while True:
+            data = await self.fetch_search_page(query, page, next_page=next_page)
+            if data is None:
+                return
+            data['page'] = page
+            yield data
+            if not data.get('has_more'):
+                return
+            page += 1
+            next_page = data.get('next_page')
+
+    async def search_pages(self, query: str) -> List[Dict]:
+        """
+        Every raw result page of a search. Page 1 gives the page size and
+        total_cards; the remaining pages are then requested concurrently by
+        page number. Stops at the first page that can't be fetched.
+        """
+        first = await self.fetch_search_page(query, 1)
+        if first is None:
+            return []
+        first['page'] = 1
+        pages = [first]
+        page_size = len(first.get('data', []))
+        if not first.get('has_more') or not page_size:
+            return pages
+
+        last_page = math.ceil((first.get('total_cards') or 0) / page_size)
+        numbers = list(range(2, last_page + 1))
+        results = await asyncio.gather(*(self.fetch_search_page(query, number) for number in numbers))
+        for number, data in zip(numbers, results):
+            if data is None:
+                logger.warning(f"Scryfall: Search page failed, results incomplete | query={query} | page={number}")
+                return pages
+            data['page'] = number
+            pages.append(data)
+
+        # total_cards was an estimate: follow next_page for anything past it
+        if pages[-1].get('has_more'):
+            async for data in self.iter_search_pages(query, pages[-1]['page'] + 1,
+                                                     next_page=pages[-1].get('next_page')):
+                pages.append(data)
+        return pages
+
+    async def search_cards(self, query: str) -> List[Dict]:
+        """Parsed cards of every result page, pages fetched concurrently (see search_pages)"""
+        cards = [self.api._parse_card_data(card)
+                 for data in await self.search_pages(query) for card in data.get('data', [])]
+        logger.info(f"Scryfall: Found {len(cards)} total cards for query={query}")
+        return cards
+
+    async def iter_card_collection(self, identifiers: List[Dict]) -> AsyncIterator[Dict]:
+        """
+        Collection lookups (see ScryfallAPI.fetch_card_collection) with every
+        batch requested at once; results are yielded in batch order.
+        """
+        batch_size = config.SCRYFALL_COLLECTION_BATCH_SIZE
+        pending = [
+            asyncio.ensure_future(self._run(self.api.fetch_card_collection, identifiers[start:start + batch_size]))
+            for start in range(0, len(identifiers), batch_size)
+        ]
+        try:
+            for future in pending:
+                yield await future
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def get_set_card_count(self, set_code: str) -> int:
+        """See ScryfallAPI.get_set_card_count"""
+        return await self._run(self.api.get_set_card_count, set_code)
+
+    async def get_all_sets(self) -> List[Dict]:
+        """See ScryfallAPI.get_all_sets"""
+        return await self._run(self.api.get_all_sets)
+
+    async def get_bulk_data_uri(self, bulk_type: str = None) -> Optional[str]:
+        """See ScryfallAPI.get_bulk_data_uri"""
+        return await self._run(self.api.get_bulk_data_uri, bulk_type)
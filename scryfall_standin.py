@@ -0,0 +1,420 @@
+"""
+TCG Scan - Scryfall Stand-in Server
+Local HTTP server answering the Scryfall endpoints ScryfallAPI uses, from a
+fixture corpus, so import, price and hash-worker benchmarks and tests run
+reproducibly without network access or Scryfall's rate limits:
+
+  GET  /cards/named?exact=|fuzzy=     GET  /cards/search?q=&page=
+  GET  /cards/{set}/{number}[/{lang}] POST /cards/collection
+  GET  /sets, /sets/{code}            GET  /bulk-data, /bulk/default-cards.json
+  GET  /images/scryfall/{size}/{face}/.../{id}.jpg (generated JPEGs)
+
+Card image URLs in the corpus (https://cards.scryfall.io/...) are rewritten
+to the stand-in's own /images/scryfall/... path. Card responses carry an
+ETag and answer If-None-Match with 304, like the real API.
+
+Every request can be delayed (latency), answered with 500 (error_rate) or
+with 429 + Retry-After (rate_limit_rate); injected faults come from a seeded
+random generator, so a run is repeatable.
+
+Usage:
+    with ScryfallStandIn(ScryfallCorpus.synthetic(sets=2), latency=0.05) as server:
+        config.SCRYFALL_API_BASE = server.base_url
+        ...
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from PIL import Image, ImageDraw
+
+from logger import get_logger
+
+# Initialize logger for this module
+logger = get_logger('scryfall_standin')
+
+DEFAULT_CORPUS_PATH = Path(__file__).parent / 'tests' / 'fixtures' / 'scryfall_corpus.json'
+SCRYFALL_IMAGE_HOST = 'https://cards.scryfall.io/'
+SEARCH_PAGE_SIZE = 175  # Cards per search page, as on Scryfall
+COLLECTION_MAX_IDENTIFIERS = 75
+IMAGE_SIZES = {'small': (146, 204), 'normal': (488, 680), 'large': (672, 936), 'png': (745, 1040)}
+
+
+class ScryfallCorpus:
+    """Card and set objects in Scryfall's JSON format, indexed for the stand-in's lookups"""
+
+    def __init__(self, cards: List[Dict], sets: List[Dict] = None):
+        self.cards = cards
+        self.by_id = {card['id']: card for card in cards}
+        self.by_print: Dict[Tuple[str, str, str], Dict] = {}
+        for card in cards:
+            self.by_print[(card['set'], card['collector_number'], card.get('lang', 'en'))] = card
+
+        known = {s['code']: dict(s) for s in sets or []}
+        for card in cards:
+            known.setdefault(card['set'], {'object': 'set', 'code': card['set'],
+                                           'name': card.get('set_name', card['set'].upper())})
+        for code, set_data in known.items():
+            set_data['card_count'] = sum(1 for card in cards if card['set'] == code)
+        self.sets = known
+
+    @classmethod
+    def load(cls, path: Path = None) -> 'ScryfallCorpus':
+        """Corpus from a JSON file: {'sets': [...], 'cards': [...]} or a bulk data array of cards"""
+        with open(path or DEFAULT_CORPUS_PATH, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return cls(data)
+        return cls(data['cards'], data.get('sets'))
+
+    @classmethod
+    def synthetic(cls, sets: int = 4, cards_per_set: int = 300, seed: int = 0) -> 'ScryfallCorpus':
+        """Generated corpus of any size (set codes s00, s01, ...), the same for the same arguments"""
+        rng = random.Random(seed)
+        cards = []
+        for s in range(sets):
+            code = f's{s:02d}'
+            for n in range(1, cards_per_set + 1):
+                card_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                cards.append({
+                    'object': 'card', 'id': card_id, 'name': f'Synthetic {code.upper()} {n}', 'lang': 'en',
+                    'layout': 'normal', 'set': code, 'set_name': f'Synthetic Set {s}', 'collector_number': str(n),
+                    'rarity': rng.choice(('common', 'uncommon', 'rare', 'mythic')),
+                    'type_line': 'Creature — Construct', 'colors': [rng.choice('WUBRG')],
+                    'mana_cost': '{2}', 'oracle_text': '', 'artist': 'Stand-in',
+                    'image_uris': {size: f'{SCRYFALL_IMAGE_HOST}{size}/front/{card_id[0]}/{card_id[1]}/{card_id}.jpg'
+                                   for size in ('small', 'normal', 'large')},
+                    'prices': {'usd': f'{rng.uniform(0.05, 50):.2f}', 'usd_foil': None, 'eur': None},
+                })
+        return cls(cards)
+
+    def named(self, name: str, fuzzy: bool = False) -> Optional[Dict]:
+        """Card by exact name (case-insensitive); fuzzy also accepts a unique partial match"""
+        name = name.strip().lower()
+        english = [card for card in self.cards if card.get('lang', 'en') == 'en']
+        for card in english:
+            if card['name'].lower() == name or card['name'].lower().split(' // ')[0] == name:
+                return card
+        if fuzzy:
+            matches = {card['name']: card for card in english if name in card['name'].lower()}
+            if len(matches) == 1:
+                return next(iter(matches.values()))
+        return None
+
+    def search(self, query: str) -> List[Dict]:
+        """Cards matching every term of a query: set:/s:/e:<code>, lang:<code>, or words of the name"""
+        lang = 'en'
+        filters = []
+        for term in query.lower().split():
+            key, _, value = term.partition(':')
+            if value and key in ('set', 's', 'e', 'edition'):
+                filters.append(lambda card, value=value: card['set'] == value)
+            elif value and key in ('lang', 'language'):
+                lang = value
+            else:
+                filters.append(lambda card, term=term: term in card['name'].lower())
+        return [card for card in self.cards
+                if (lang == 'any' or card.get('lang', 'en') == lang) and all(f(card) for f in filters)]
+
+    def find_identifier(self, identifier: Dict) -> Optional[Dict]:
+        """Card for one /cards/collection identifier (id, set + collector_number, or name [+ set])"""
+        if 'id' in identifier:
+            return self.by_id.get(identifier['id'])
+        if 'collector_number' in identifier:
+            return self.by_print.get((str(identifier.get('set', '')).lower(), identifier['collector_number'], 'en'))
+        if 'name' in identifier:
+            card = self.named(identifier['name'])
+            if card and (not identifier.get('set') or card['set'] == identifier['set'].lower()):
+                return card
+        return None
+
+
+def _error(status: int, code: str, details: str) -> Dict:
+    return {'object': 'error', 'code': code, 'status': status, 'details': details}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+    server: '_StandInHTTPServer'
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str):
+        standin = self.server.standin
+        self._finished = False
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)) if method == 'POST' else b''
+        self._endpoint = endpoint = standin.endpoint_name(method, url.path)
+        standin.request_started(endpoint)
+        try:
+            if standin.latency:
+                time.sleep(standin.latency)
+            fault = standin.draw_fault()
+            if fault == 429:
+                self._send(429, _error(429, 'rate_limited', 'Too many requests'),
+                           {'Retry-After': str(standin.retry_after)})
+            elif fault == 500:
+                self._send(500, _error(500, 'server_error', 'Injected error'))
+            elif endpoint == 'image':
+                self._send_image(url.path)
+            else:
+                status, payload = standin.route(method, url.path, parse_qs(url.query), body)
+                self._send(status, payload)
+        except Exception as e:
+            logger.error(f"Stand-in request failed | path={self.path} | error={e}", exc_info=True)
+            self._send(500, _error(500, 'server_error', str(e)))
+        finally:
+            if not self._finished:  # Failed before a response could be written
+                standin.request_finished(endpoint, None)
+
+    def _send(self, status: int, payload, headers: Dict = None):
+        data = json.dumps(payload).replace(SCRYFALL_IMAGE_HOST, f'{self.server.standin.base_url}/images/scryfall/')
+        data = data.encode('utf-8')
+        headers = dict(headers or {})
+        if status == 200 and self.command == 'GET':
+            etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, data = 304, b''
+        self._write(status, 'application/json', data, headers)
+
+    def _send_image(self, path: str):
+        match = re.match(r'^/images/scryfall/([a-z]+)/(front|back)/.*?([0-9a-f-]{36})\.jpg$', path)
+        if not match:
+            self._send(404, _error(404, 'not_found', 'No such image'))
+            return
+        self._write(200, 'image/jpeg', self.server.standin.image(match.group(3), match.group(1), match.group(2)))
+
+    def _write(self, status: int, content_type: str, data: bytes, headers: Dict = None):
+        # Settle the stats before the client can read the response, so a caller
+        # that checks them right after its request returns sees this one
+        if not self._finished:
+            self._finished = True
+            self.server.standin.request_finished(self._endpoint, status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    standin: 'ScryfallStandIn'
+
+
+class ScryfallStandIn:
+    """
+    Stand-in for api.scryfall.com on 127.0.0.1 (a free port unless one is given).
+
+    latency:          seconds before every answer
+    error_rate:       fraction of requests answered with 500
+    rate_limit_rate:  fraction of requests answered with 429 and Retry-After: retry_after
+    """
+
+    def __init__(self, corpus: ScryfallCorpus = None, latency: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 0, page_size: int = SEARCH_PAGE_SIZE,
+                 seed: int = 0, port: int = 0):
+        self.corpus = corpus or ScryfallCorpus.load()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.port = port
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._images: Dict[Tuple[str, str, str], bytes] = {}
+        self._server: Optional[_StandInHTTPServer] = None
+        self.reset_stats()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}' if self._server else ''
+
+    def start(self) -> str:
+        """Start serving in a background thread; returns the base URL"""
+        self._server = _StandInHTTPServer(('127.0.0.1', self.port), _StandInHandler)
+        self._server.standin = self
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='scryfall-standin').start()
+        logger.info(f"Scryfall stand-in started | url={self.base_url} | cards={len(self.corpus.cards)} | "
+                    f"latency={self.latency} | error_rate={self.error_rate} | rate_limit_rate={self.rate_limit_rate}")
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'ScryfallStandIn':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Counters and fault injection
+    # ------------------------------------------------------------------
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'not_modified': 0,
+                           'in_flight': 0, 'max_in_flight': 0, 'endpoints': {}}
+
+    def get_stats(self) -> Dict:
+        """Request counters (per endpoint, injected faults, peak concurrency)"""
+        with self._lock:
+            return {**self._stats, 'endpoints': dict(self._stats['endpoints'])}
+
+    def request_started(self, endpoint: str):
+        with self._lock:
+            stats = self._stats
+            stats['requests'] += 1
+            stats['endpoints'][endpoint] = stats['endpoints'].get(endpoint, 0) + 1
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+
+    def request_finished(self, endpoint: str, status: Optional[int]):
+        with self._lock:
+            self._stats['in_flight'] -= 1
+            if status == 429:
+                self._stats['rate_limited'] += 1
+            elif status == 304:
+                self._stats['not_modified'] += 1
+            elif status is None or status >= 500:
+                self._stats['errors'] += 1
+
+    def draw_fault(self) -> Optional[int]:
+        """429, 500 or None (serve the request), drawn from the seeded generator"""
+        if not (self.rate_limit_rate or self.error_rate):
+            return None
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.rate_limit_rate:
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def endpoint_name(method: str, path: str) -> str:
+        """Counter name of a request ('named', 'card', 'search', 'collection', 'sets', 'image', ...)"""
+        parts = [part for part in path.split('/') if part]
+        if parts[:1] == ['images']:
+            return 'image'
+        if parts[:2] == ['cards', 'collection'] and method == 'POST':
+            return 'collection'
+        if parts[:2] in (['cards', 'named'], ['cards', 'search']):
+            return parts[1]
+        if parts[:1] == ['cards']:
+            return 'card'
+        return parts[0] if parts else 'root'
+
+    def route(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Tuple[int, Dict]:
+        """(status, JSON payload) of an API request"""
+        parts = [part for part in path.split('/') if part]
+
+        def arg(name: str) -> Optional[str]:
+            return (query.get(name) or [None])[0]
+
+        if method == 'POST':
+            if parts == ['cards', 'collection']:
+                return self._collection(json.loads(body or b'{}').get('identifiers', []))
+            return 405, _error(405, 'method_not_allowed', f'POST {path}')
+
+        if parts == ['cards', 'named']:
+            card = self.corpus.named(arg('exact') or arg('fuzzy') or '', fuzzy=arg('exact') is None)
+            return (200, card) if card else (404, _error(404, 'not_found', 'No cards found matching that name'))
+        if parts == ['cards', 'search']:
+            return self._search(arg('q') or '', int(arg('page') or 1))
+        if parts[:1] == ['cards'] and len(parts) in (3, 4):
+            card = self.corpus.by_print.get((parts[1].lower(), parts[2], parts[3] if len(parts) == 4 else 'en'))
+            return (200, card) if card else (404, _error(404, 'not_found', 'No card found with that set and number'))
+        if parts == ['sets']:
+            return 200, {'object': 'list', 'has_more': False, 'data': list(self.corpus.sets.values())}
+        if parts[:1] == ['sets'] and len(parts) == 2:
+            set_data = self.corpus.sets.get(parts[1].lower())
+            return (200, set_data) if set_data else (404, _error(404, 'not_found', 'No set found'))
+        if parts == ['bulk-data']:
+            return 200, {'object': 'list', 'has_more': False, 'data': [{
+                'object': 'bulk_data', 'type': 'default_cards', 'updated_at': '2024-01-01T00:00:00+00:00',
+                'download_uri': f'{self.base_url}/bulk/default-cards.json', 'content_type': 'application/json',
+            }]}
+        if parts == ['bulk', 'default-cards.json']:
+            return 200, self.corpus.cards
+        return 404, _error(404, 'not_found', f'No endpoint {path}')
+
+    def _search(self, query: str, page: int) -> Tuple[int, Dict]:
+        cards = self.corpus.search(query)
+        start = (page - 1) * self.page_size
+        if not cards or start >= len(cards) or page < 1:
+            return 404, _error(404, 'not_found', 'Your query didn’t match any cards')
+        has_more = start + self.page_size < len(cards)
+        return 200, {
+            'object': 'list', 'total_cards': len(cards), 'has_more': has_more,
+            'next_page': f"{self.base_url}/cards/search?{urlencode({'q': query, 'page': page + 1})}"
+                         if has_more else None,
+            'data': cards[start:start + self.page_size],
+        }
+
+    def _collection(self, identifiers: List[Dict]) -> Tuple[int, Dict]:
+        if len(identifiers) > COLLECTION_MAX_IDENTIFIERS:
+            return 422, _error(422, 'bad_request',
+                               f'Too many identifiers (at most {COLLECTION_MAX_IDENTIFIERS} per request)')
+        found, not_found = [], []
+        for identifier in identifiers:
+            card = self.corpus.find_identifier(identifier)
+            if card:
+                found.append(card)
+            else:
+                not_found.append(identifier)
+        return 200, {'object': 'list', 'not_found': not_found, 'data': found}
+
+    def image(self, card_id: str, size: str, face: str = 'front') -> bytes:
+        """JPEG of a card image, different per card and face, generated once"""
+        key = (card_id, size, face)
+        with self._lock:
+            data = self._images.get(key)
+        if data is None:
+            digest = hashlib.sha1(f'{card_id}/{face}'.encode()).digest()
+            width, height = IMAGE_SIZES.get(size, IMAGE_SIZES['normal'])
+            image = Image.new('RGB', (width, height), tuple(digest[:3]))
+            draw = ImageDraw.Draw(image)
+            for i in range(3, 18, 3):
+                x, y = digest[i] * width // 256, digest[i + 1] * height // 256
+                draw.rectangle([x, y, x + width // 4, y + height // 5], fill=tuple(digest[i - 3:i]))
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=85)
+            data = buffer.getvalue()
+            with self._lock:
+                self._images[key] = data
+        return data
@@ -19,6 +19,49 @@ from sqlalchemy.orm import sessionmaker
 TEST_DATABASE_URI = 'sqlite:///:memory:'
 
 
+@pytest.fixture(scope='session', autouse=True)
+def isolated_ocr_stats(tmp_path_factory):
+    """Keep OCR variant stats written during tests out of the data folder"""
+    import config
+    config.OCR_VARIANT_STATS_PATH = tmp_path_factory.mktemp('ocr') / 'ocr_variant_stats.json'
+    yield
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_image_store(tmp_path_factory):
+    """Keep card images downloaded during tests out of the data folder"""
+    import config
+    config.IMAGE_STORE_PATH = tmp_path_factory.mktemp('images')
+    yield
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_scryfall_cache():
+    """No persistent Scryfall response cache during tests (mocked responses must not be replayed)"""
+    import config
+    config.SCRYFALL_CACHE_PATH = None
+    yield
+
+
+@pytest.fixture
+def scryfall_standin(monkeypatch):
+    """
+    Local Scryfall stand-in serving tests/fixtures/scryfall_corpus.json.
+    ScryfallAPI clients created during the test talk to it, through a rate
+    limiter that doesn't slow the test down. Set latency / error_rate /
+    rate_limit_rate on the yielded server to inject faults.
+    """
+    import api_integrations
+    import config
+    from scryfall_standin import ScryfallStandIn
+
+    with ScryfallStandIn() as server:
+        monkeypatch.setattr(config, 'SCRYFALL_API_BASE', server.base_url)
+        monkeypatch.setattr(api_integrations, '_limiter_instance',
+                            api_integrations.RateLimiter(calls_per_second=1000, burst=100))
+        yield server
+
+
 @pytest.fixture(scope='function')
 def test_engine():
     """Create test database engine - new engine per test"""
@@ -44,6 +87,16 @@ def db_session(test_engine):
     session.close()
 
 
+@pytest.fixture
+def card_db(tmp_path):
+    """File-backed SQLite session factory, for code that opens its own sessions (pipeline stages, workers)"""
+    from database import Base
+    engine = create_engine(f'sqlite:///{tmp_path / "cards.db"}')
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
 @pytest.fixture(scope='function')
 def app():
     """Create test Flask application"""
@@ -105,12 +105,16 @@ class TestScanEndpoints:
             images.append((img_bytes, f'card_{i}.jpg'))
         
         with patch('app.recognition_engine') as mock_engine:
-            mock_engine.recognize_card.return_value = {
-                'success': False,
-                'card': None,
-                'confidence': 0.0,
-                'message': 'No match'
-            }
+            mock_engine.batch_recognize_parallel.side_effect = lambda paths: iter([
+                {
+                    'success': False,
+                    'card': None,
+                    'confidence': 0.0,
+                    'message': 'No match',
+                    'index': index
+                }
+                for index in reversed(range(len(paths)))
+            ])
             
             response = client.post(
                 '/api/scan/batch',
@@ -124,6 +128,8 @@ class TestScanEndpoints:
             assert response.status_code == 200
             data = json.loads(response.data)
             assert 'results' in data
+            assert data['total'] == 3
+            assert [r['filename'] for r in data['results']] == ['card_2.jpg', 'card_1.jpg', 'card_0.jpg']
 
 
 class TestCardDatabaseEndpoints:
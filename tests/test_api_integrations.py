@@ -40,6 +40,193 @@ class TestRateLimiter:
         
         # Should take at least 0.4 seconds for 3 calls
         assert end - start >= 0.35
+        
+    def test_rate_limiter_burst(self):
+        """Test burst calls go through at once, later ones at the configured rate"""
+        from api_integrations import RateLimiter
+        import time
+        
+        limiter = RateLimiter(calls_per_second=10, burst=3)
+        
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.wait()
+        burst_done = time.monotonic()
+        limiter.wait()
+        end = time.monotonic()
+        
+        assert burst_done - start < 0.05
+        assert end - start >= 0.09
+        
+    def test_rate_limiter_shared_between_threads(self):
+        """Test concurrent callers together stay within the limit"""
+        from api_integrations import RateLimiter
+        import threading
+        import time
+        
+        limiter = RateLimiter(calls_per_second=50, burst=1)
+        
+        def worker():
+            for _ in range(5):
+                limiter.wait()
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # 20 calls at 50/s: the first is free, 19 intervals of 20 ms
+        assert time.monotonic() - start >= 0.35
+        stats = limiter.get_stats()
+        assert stats['calls'] == 20
+        assert stats['waited_calls'] >= 18
+        
+    def test_interactive_calls_go_first(self):
+        """Test waiting background callers let an interactive caller through first"""
+        from api_integrations import RateLimiter, background_priority
+        import threading
+        import time
+        
+        limiter = RateLimiter(calls_per_second=20, burst=1)
+        limiter.wait()  # Empty the bucket
+        order = []
+        
+        def background():
+            with background_priority():
+                limiter.wait()
+            order.append('background')
+        
+        threads = [threading.Thread(target=background) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.01)
+        limiter.wait()
+        order.append('interactive')
+        for thread in threads:
+            thread.join()
+        
+        assert order[0] == 'interactive'
+        assert limiter.get_stats()['background_calls'] == 3
+        
+    def test_throttle_pauses_callers(self):
+        """Test throttle() holds every caller for the given delay"""
+        from api_integrations import RateLimiter
+        import time
+        
+        limiter = RateLimiter(calls_per_second=100, burst=10)
+        limiter.throttle(0.2)
+        
+        start = time.monotonic()
+        limiter.wait()
+        
+        assert time.monotonic() - start >= 0.19
+        assert limiter.get_stats()['throttled'] == 1
+        
+    def test_retry_after_seconds(self):
+        """Test Retry-After parsing for delays and HTTP dates"""
+        from api_integrations import retry_after_seconds
+        from email.utils import format_datetime
+        from datetime import datetime, timedelta, timezone
+        
+        assert retry_after_seconds('2') == 2.0
+        assert retry_after_seconds(None) is None
+        assert retry_after_seconds('soon') is None
+        when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert 25 <= retry_after_seconds(when) <= 30
+        
+    def test_scryfall_clients_share_limiter(self):
+        """Test every ScryfallAPI instance uses the process-wide limiter"""
+        from api_integrations import ScryfallAPI, CardAPIManager, get_scryfall_rate_limiter
+        
+        assert ScryfallAPI().rate_limiter is get_scryfall_rate_limiter()
+        assert CardAPIManager().scryfall.rate_limiter is ScryfallAPI().rate_limiter
+
+
+class TestSingleFlight:
+    """Tests for coalescing of identical concurrent Scryfall lookups"""
+    
+    def _slow_api(self, delay=0.1):
+        from api_integrations import ScryfallAPI, RateLimiter, SingleFlight
+        import time
+        
+        api = ScryfallAPI()
+        api.rate_limiter = RateLimiter(calls_per_second=1000, burst=100)
+        api.single_flight = SingleFlight()
+        mock_response = MagicMock(status_code=200, headers={})
+        mock_response.json.return_value = {'id': 'card1', 'name': 'Llanowar Elves', 'set': 'm19'}
+        
+        def slow_get(*args, **kwargs):
+            time.sleep(delay)
+            return mock_response
+        return api, slow_get
+    
+    def _concurrently(self, fn, count):
+        import threading
+        results = [None] * count
+        
+        def run(i):
+            results[i] = fn()
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_concurrent_lookups_share_one_request(self):
+        """Test identical concurrent lookups make one request and all get the card"""
+        api, slow_get = self._slow_api()
+        
+        with patch('http_client.get', side_effect=slow_get) as mock_get:
+            results = self._concurrently(lambda: api.search_card_by_name('Llanowar Elves'), 5)
+        
+        assert mock_get.call_count == 1
+        assert all(r['card_id'] == 'card1' for r in results)
+        assert results[0] is not results[1]  # Every caller gets its own parsed dict
+        stats = api.single_flight.get_stats()
+        assert (stats['calls'], stats['executed'], stats['coalesced'], stats['in_flight']) == (5, 1, 4, 0)
+        
+    def test_different_lookups_are_not_coalesced(self):
+        """Test lookups with other arguments run their own request"""
+        api, slow_get = self._slow_api(delay=0.05)
+        
+        with patch('http_client.get', side_effect=slow_get) as mock_get:
+            self._concurrently(lambda: api.get_card_by_set_and_number('m19', '314'), 2)
+            self._concurrently(lambda: api.get_card_by_set_and_number('m19', '315'), 1)
+            api.get_card_by_set_and_number('m19', '314', fresh_prices=True)
+        
+        assert mock_get.call_count == 3
+        
+    def test_error_reaches_every_caller(self):
+        """Test a failed shared request fails every coalesced call"""
+        from api_integrations import SingleFlight
+        import threading
+        import time
+        
+        flight = SingleFlight()
+        errors = []
+        
+        def failing():
+            time.sleep(0.05)
+            raise requests.ConnectionError('down')
+        
+        def call():
+            try:
+                flight.do('key', failing)
+            except requests.ConnectionError as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(errors) == 3
+        assert flight.get_stats()['coalesced'] == 2
+        assert flight.do('key', lambda: 'ok') == 'ok'  # The failed flight is not reused
 
 
 class TestScryfallAPI:
@@ -51,7 +238,7 @@ class TestScryfallAPI:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -85,7 +272,7 @@ class TestScryfallAPI:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 404
             mock_get.return_value = mock_response
@@ -100,7 +287,7 @@ class TestScryfallAPI:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_get.side_effect = requests.RequestException("Network error")
             
             result = api.search_card_by_name('Lightning Bolt')
@@ -113,7 +300,7 @@ class TestScryfallAPI:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -141,7 +328,7 @@ class TestScryfallAPI:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -170,6 +357,72 @@ class TestScryfallAPI:
         
         assert len(results) == 2
         
+    def test_retries_after_429(self):
+        """Test a 429 response pauses for Retry-After and the request is retried"""
+        from api_integrations import ScryfallAPI, RateLimiter
+        
+        api = ScryfallAPI()
+        api.rate_limiter = RateLimiter(calls_per_second=100, burst=10)
+        limited = MagicMock(status_code=429, headers={'Retry-After': '0.05'})
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {'id': 'card1', 'name': 'Card 1', 'set': 'm21'}
+        
+        with patch('http_client.get', side_effect=[limited, ok]) as mock_get:
+            result = api.search_card_by_name('Card 1')
+        
+        assert result['card_id'] == 'card1'
+        assert mock_get.call_count == 2
+        assert api.rate_limiter.get_stats()['throttled'] == 1
+        
+    def test_gives_up_after_max_retries(self):
+        """Test persistent 429s end the request after SCRYFALL_MAX_RETRIES retries"""
+        from api_integrations import ScryfallAPI, RateLimiter
+        
+        api = ScryfallAPI()
+        api.rate_limiter = RateLimiter(calls_per_second=1000, burst=10)
+        limited = MagicMock(status_code=429, headers={'Retry-After': '0'})
+        
+        with patch('http_client.get', return_value=limited) as mock_get, \
+                patch('api_integrations.config.SCRYFALL_MAX_RETRIES', 2):
+            result = api.search_card_by_name('Card 1')
+        
+        assert result is None
+        assert mock_get.call_count == 3
+        
+    def test_iter_search_cards_pages_and_resume(self):
+        """Test search results are yielded page by page and can resume from next_page"""
+        from api_integrations import ScryfallAPI
+        
+        api = ScryfallAPI()
+        next_url = 'https://api.scryfall.com/cards/search?q=set%3Am21&page=2'
+        pages = [
+            {'data': [{'id': 'card1', 'name': 'Card 1', 'set': 'm21'}], 'has_more': True, 'next_page': next_url},
+            {'data': [{'id': 'card2', 'name': 'Card 2', 'set': 'm21'}], 'has_more': False},
+        ]
+        
+        with patch('http_client.get') as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.json.side_effect = lambda: dict(pages[mock_get.call_count - 1])
+            
+            results = api.iter_search_cards('set:m21')
+            first = next(results)
+            assert mock_get.call_count == 1  # Later pages are fetched on demand
+            rest = list(results)
+        
+        assert first['page'] == 1 and first['has_more'] and first['next_page'] == next_url
+        assert [c['card_id'] for c in first['cards']] == ['card1']
+        assert [(r['page'], [c['card_id'] for c in r['cards']]) for r in rest] == [(2, ['card2'])]
+        assert mock_get.call_args_list[1].args == (next_url,)
+        
+        with patch('http_client.get') as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.json.return_value = dict(pages[1])
+            
+            resumed = list(api.iter_search_cards('set:m21', page=2))
+        
+        assert [r['page'] for r in resumed] == [2]
+        assert mock_get.call_args.kwargs['params'] == {'q': 'set:m21', 'page': 2}
+        
     def test_parse_double_faced_card(self):
         """Test parsing double-faced card data"""
         from api_integrations import ScryfallAPI
@@ -290,7 +543,7 @@ class TestAPIErrorHandling:
         
         api = ScryfallAPI()
         
-        with patch('api_integrations.requests.get') as mock_get:
+        with patch('http_client.get') as mock_get:
             mock_get.side_effect = requests.Timeout("Connection timed out")
             
             result = api.search_card_by_name('Test Card')
@@ -0,0 +1,185 @@
+"""
+TCG Scan - Bulk Import Tests
+Tests for the streaming Scryfall bulk data import
+"""
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _scryfall_card(i, set_code='tst', lang='en'):
+    """Minimal Scryfall card object as found in default_cards"""
+    return {
+        'object': 'card',
+        'id': f'0000-{set_code}-{i}-{lang}',
+        'name': f'Bulk Card {i}',
+        'lang': lang,
+        'set': set_code,
+        'set_name': f'Set {set_code.upper()}',
+        'collector_number': str(i),
+        'rarity': 'common',
+        'type_line': 'Creature — Elf',
+        'colors': ['G'],
+        'mana_cost': '{G}',
+        'oracle_text': 'Text with [brackets], commas and "quotes"',
+        'image_uris': {'normal': f'https://cards.scryfall.io/normal/front/{i}.jpg'},
+        'prices': {'usd': '0.10', 'eur': None},
+    }
+
+
+@pytest.fixture
+def bulk_file(tmp_path):
+    """Bulk data file with 25 cards over two sets, pretty-printed like the real file"""
+    cards = [_scryfall_card(i) for i in range(15)] + [_scryfall_card(i, 'abc') for i in range(10)]
+    path = tmp_path / 'default-cards.json'
+    path.write_text(json.dumps(cards, indent=1, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+class TestBulkImporter:
+    """Tests for BulkImporter.run"""
+
+    def test_imports_all_cards(self, bulk_file, card_db):
+        """Test cards are mapped like the API path and inserted in batches"""
+        from bulk_import import BulkImporter
+        from database import Card
+
+        reports = []
+        importer = BulkImporter(batch_size=10, session_factory=card_db, on_progress=reports.append,
+                                progress_interval=0)
+        stats = importer.run(bulk_file)
+
+        assert stats['records'] == 25
+        assert stats['inserted'] == 25
+        assert stats['skipped'] == 0
+        assert stats['percent'] == 100.0
+        assert len(reports) >= 3
+
+        db = card_db()
+        card = db.query(Card).filter(Card.card_id == '0000-tst-3-en').one()
+        assert db.query(Card).count() == 25
+        db.close()
+        assert card.name == 'Bulk Card 3'
+        assert card.set_code == 'tst'
+        assert card.collector_number == '3'
+        assert card.card_type == 'Creature — Elf'
+        assert card.colors == 'G'
+        assert card.image_url == 'https://cards.scryfall.io/normal/front/3.jpg'
+        assert card.created_at is not None
+
+    def test_rerun_skips_existing_cards(self, bulk_file, card_db):
+        """Test a second import writes nothing and a printing stored under another id is a conflict"""
+        from bulk_import import BulkImporter
+        from database import Card
+
+        db = card_db()
+        db.add(Card(tcg='mtg', card_id='other-id', name='Printing', set_code='abc', collector_number='4',
+                    language='en'))
+        db.commit()
+        db.close()
+
+        first = dict(BulkImporter(batch_size=7, session_factory=card_db).run(bulk_file))
+        second = BulkImporter(batch_size=7, session_factory=card_db).run(bulk_file)
+
+        assert first['inserted'] == 24
+        assert first['conflicts'] == 1
+        assert second['inserted'] == 0
+        assert second['updated'] == 0
+        assert second['unchanged'] == 24
+        assert second['conflicts'] == 1
+
+    def test_gzip_and_bad_records(self, tmp_path, card_db):
+        """Test .gz files are read and records without an id are counted as failed"""
+        from bulk_import import BulkImporter
+
+        path = tmp_path / 'cards.json.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump([_scryfall_card(1), {'object': 'card'}, _scryfall_card(2)], f)
+
+        stats = BulkImporter(session_factory=card_db).run(path)
+
+        assert stats['inserted'] == 2
+        assert stats['failed'] == 1
+
+    def test_stop_keeps_committed_batches(self, bulk_file, card_db):
+        """Test stopping ends the import after the current batch"""
+        from bulk_import import BulkImporter
+        from database import Card
+
+        importer = BulkImporter(batch_size=5, session_factory=card_db, progress_interval=0)
+        importer.on_progress = lambda stats: importer.stop()
+        stats = importer.run(bulk_file)
+
+        db = card_db()
+        count = db.query(Card).count()
+        db.close()
+        assert stats['inserted'] == 5
+        assert count == 5
+
+
+class TestDownloadBulkData:
+    """Tests for download_bulk_data"""
+
+    def test_download_to_path(self, tmp_path):
+        """Test the bulk file is resolved through the API and streamed to disk"""
+        from bulk_import import download_bulk_data
+
+        api = MagicMock()
+        api.get_bulk_data_uri.return_value = 'https://data.scryfall.io/default-cards.json'
+        response = MagicMock()
+        response.status_code = 200
+        response.iter_content.return_value = [b'[{"id": 1}', b']']
+        response.__enter__.return_value = response
+
+        with patch('http_client.get', return_value=response) as mock_get:
+            path = download_bulk_data(tmp_path / 'bulk' / 'cards.json', api=api)
+
+        assert path.read_bytes() == b'[{"id": 1}]'
+        assert mock_get.call_args.kwargs['stream'] is True
+        assert [p.name for p in path.parent.iterdir()] == ['cards.json']
+
+    def test_download_failure(self, tmp_path):
+        """Test a missing URI or HTTP error raises and leaves no file"""
+        from bulk_import import download_bulk_data
+
+        api = MagicMock()
+        api.get_bulk_data_uri.return_value = None
+        with pytest.raises(RuntimeError):
+            download_bulk_data(tmp_path / 'cards.json', api=api)
+
+        api.get_bulk_data_uri.return_value = 'https://data.scryfall.io/default-cards.json'
+        response = MagicMock()
+        response.status_code = 500
+        response.__enter__.return_value = response
+        with patch('http_client.get', return_value=response):
+            with pytest.raises(RuntimeError):
+                download_bulk_data(tmp_path / 'cards.json', api=api)
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestFullImportEndpoint:
+    """Tests for POST /api/cards/import-all"""
+
+    def test_unknown_mode(self, client):
+        """Test unknown import modes are rejected"""
+        response = client.post('/api/cards/import-all', json={'mode': 'magic'})
+
+        assert response.status_code == 400
+
+    def test_missing_bulk_file(self, client, tmp_path):
+        """Test a bulk import from a missing file is rejected"""
+        response = client.post('/api/cards/import-all', json={'mode': 'bulk', 'path': str(tmp_path / 'none.json')})
+
+        assert response.status_code == 400
+
+    def test_starts_bulk_import(self, client, bulk_file):
+        """Test a bulk import from a local file is handed to the worker"""
+        with patch('app.full_import_worker') as worker:
+            worker.running = False
+            worker.get_status.return_value = {'running': True}
+            response = client.post('/api/cards/import-all', json={'mode': 'bulk', 'path': str(bulk_file)})
+
+        assert response.status_code == 200
+        worker.start.assert_called_once_with('bulk', str(bulk_file))
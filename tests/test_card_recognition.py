@@ -3,6 +3,7 @@ TCG Scan - Card Recognition Tests
 Tests for image processing and card recognition functionality
 """
 import pytest
+import cv2
 import numpy as np
 from PIL import Image
 from unittest.mock import patch, MagicMock
@@ -64,6 +65,135 @@ class TestImagePreprocessing:
             assert processed is not None
 
 
+class TestCardDetection:
+    """Tests for downscaled card detection"""
+    
+    @staticmethod
+    def _photo_with_card():
+        """1600x2400 photo with a dark card at a known position"""
+        img = np.full((2400, 1600, 3), 170, dtype=np.uint8)
+        cv2.rectangle(img, (300, 500), (1300, 1897), (25, 25, 25), -1)
+        return img
+    
+    def test_detect_downscaled_maps_to_full_resolution(self):
+        """Test the contour found on the pyramid level is in full-res coordinates"""
+        from card_recognition import CardRecognitionEngine
+        
+        engine = CardRecognitionEngine()
+        contour = engine.detect_card_contour(self._photo_with_card(), max_dim=512)
+        
+        assert contour is not None
+        # Edge dilation at the small scale widens the box by a few full-res pixels
+        x, y, w, h = cv2.boundingRect(contour)
+        assert abs(x - 300) <= 15 and abs(y - 500) <= 15
+        assert abs(w - 1000) <= 30 and abs(h - 1397) <= 30
+        
+    def test_detect_matches_full_resolution(self):
+        """Test downscaled detection agrees with full-resolution detection"""
+        from card_recognition import CardRecognitionEngine
+        
+        engine = CardRecognitionEngine()
+        img = self._photo_with_card()
+        full = cv2.boundingRect(engine.detect_card_contour(img, max_dim=0))
+        small = cv2.boundingRect(engine.detect_card_contour(img, max_dim=1024))
+        
+        assert all(abs(a - b) <= 1000 * 0.015 for a, b in zip(full, small))
+        
+    def test_detect_no_card(self):
+        """Test a uniform photo has no card"""
+        from card_recognition import CardRecognitionEngine
+        
+        engine = CardRecognitionEngine()
+        
+        assert engine.detect_card_contour(np.full((800, 600, 3), 128, dtype=np.uint8)) is None
+        
+    def test_order_card_corners(self):
+        """Test corners are ordered TL, TR, BR, BL whatever the input order"""
+        from card_recognition import order_card_corners
+        
+        corners = order_card_corners(np.array([[100, 900], [700, 100], [100, 100], [700, 900]]))
+        
+        assert corners.tolist() == [[100, 100], [700, 100], [700, 900], [100, 900]]
+        
+    def test_order_landscape_card_corners(self):
+        """Test a card lying sideways is ordered to come out portrait"""
+        from card_recognition import order_card_corners
+        
+        corners = order_card_corners(np.array([[100, 100], [900, 100], [900, 700], [100, 700]]))
+        
+        assert corners.tolist() == [[900, 100], [900, 700], [100, 700], [100, 100]]
+        
+    def test_warp_tilted_card_to_canonical_raster(self):
+        """Test a rotated card is warped to the canonical size with its content upright"""
+        import config
+        from card_recognition import CardRecognitionEngine, warp_card
+        
+        img = np.full((2000, 1500, 3), 170, dtype=np.uint8)
+        card = np.array([[400, 420], [1100, 500], [1000, 1480], [300, 1400]], dtype=np.int32)
+        cv2.fillConvexPoly(img, card, (25, 25, 25))
+        # Bright marker near the card's top-left corner
+        cv2.circle(img, (480, 520), 25, (255, 255, 255), -1)
+        
+        contour = CardRecognitionEngine().detect_card_contour(img)
+        warped = warp_card(img, contour)
+        
+        width, height = config.CARD_WARP_SIZE
+        assert warped.shape == (height, width, 3)
+        assert warped[:height // 4, :width // 4].max() > 200
+        assert np.median(warped[height // 4:, width // 4:]) < 50
+        
+    def test_enhance_contrast_keeps_shape(self):
+        """Test CLAHE on OCR regions keeps size and channels"""
+        from card_recognition import enhance_contrast
+        
+        color = np.random.randint(0, 255, (40, 300, 3), dtype=np.uint8)
+        gray = color[:, :, 0].copy()
+        
+        assert enhance_contrast(color, card_width=630).shape == color.shape
+        assert enhance_contrast(gray, card_width=630).shape == gray.shape
+
+
+class TestCropMethodReporting:
+    """Tests for crop method selection and reporting"""
+    
+    def test_preprocess_reports_warp(self, temp_upload_dir):
+        """Test a detected card goes through the warp path"""
+        import config
+        from card_recognition import CardRecognitionEngine, get_crop_method_stats
+        
+        img = np.full((1200, 900, 3), 170, dtype=np.uint8)
+        cv2.rectangle(img, (150, 200), (750, 1037), (25, 25, 25), -1)
+        path = temp_upload_dir / 'card.png'
+        cv2.imwrite(str(path), img)
+        
+        before = get_crop_method_stats()['warp']
+        processed, pil_img, original, method = CardRecognitionEngine()._preprocess(str(path))
+        
+        assert method == 'warp'
+        assert processed.shape[:2] == (config.CARD_WARP_SIZE[1], config.CARD_WARP_SIZE[0])
+        assert get_crop_method_stats()['warp'] == before + 1
+        
+    def test_preprocess_reports_center_crop(self, temp_upload_dir):
+        """Test a photo without a card falls back to the center crop"""
+        from card_recognition import CardRecognitionEngine
+        
+        path = temp_upload_dir / 'blank.png'
+        cv2.imwrite(str(path), np.full((1200, 900, 3), 128, dtype=np.uint8))
+        
+        assert CardRecognitionEngine()._preprocess(str(path))[3] == 'center_crop'
+        
+    def test_recognize_card_reports_crop_method(self, mock_image_file):
+        """Test the recognition result includes crop method and counts"""
+        from card_recognition import CardRecognitionEngine
+        
+        engine = CardRecognitionEngine()
+        with patch.object(engine, 'find_matching_card', return_value=None):
+            result = engine.recognize_card(str(mock_image_file))
+        
+        assert result['crop_method'] in ('warp', 'bounding_rect', 'center_crop')
+        assert result['crop_stats'][result['crop_method']] >= 1
+
+
 class TestImageHashing:
     """Tests for perceptual hashing"""
     
@@ -219,8 +349,8 @@ class TestDownloadAndHash:
         # download_and_hash_card_image is in card_recognition module
         from card_recognition import download_and_hash_card_image
         
-        # Mock requests
-        with patch('card_recognition.requests') as mock_requests:
+        # Mock the HTTP client (downloads go through the image store)
+        with patch('http_client.get') as mock_get:
             # Create a fake image response
             img = Image.new('RGB', (100, 100), color='red')
             import io
@@ -231,7 +361,7 @@ class TestDownloadAndHash:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.content = img_bytes.read()
-            mock_requests.get.return_value = mock_response
+            mock_get.return_value = mock_response
             
             result = download_and_hash_card_image({'image_url': 'https://example.com/card.png'})
             
@@ -249,10 +379,10 @@ class TestDownloadAndHash:
         """Test with failed HTTP request"""
         from card_recognition import download_and_hash_card_image
         
-        with patch('card_recognition.requests') as mock_requests:
+        with patch('http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 404
-            mock_requests.get.return_value = mock_response
+            mock_get.return_value = mock_response
             
             result = download_and_hash_card_image({'image_url': 'https://example.com/notfound.png'})
             
@@ -263,8 +393,8 @@ class TestDownloadAndHash:
         from card_recognition import download_and_hash_card_image
         import requests
         
-        with patch('card_recognition.requests') as mock_requests:
-            mock_requests.get.side_effect = requests.RequestException("Network error")
+        with patch('http_client.get') as mock_get:
+            mock_get.side_effect = requests.RequestException("Network error")
             
             result = download_and_hash_card_image({'image_url': 'https://example.com/card.png'})
             
@@ -325,3 +455,249 @@ class TestEdgeCases:
         except Exception:
             # Acceptable if raises specific error
             pass
+
+
+class TestSetCodeMatcher:
+    """Tests for the precompiled set code matcher"""
+    
+    def test_find_all_with_offsets(self):
+        """Test every hit is returned with its offsets, leftmost first"""
+        from card_recognition import SetCodeMatcher
+        
+        matcher = SetCodeMatcher({'WOE', 'MH3', 'MH3C', 'EN'})
+        hits = matcher.find_all('U 0168 WOE · EN MH3C')
+        
+        assert [(h.code, h.start, h.end) for h in hits] == [
+            ('WOE', 7, 10), ('EN', 13, 15), ('MH3C', 16, 20), ('MH3', 16, 19)
+        ]
+        assert hits[0].bounded and hits[0].separated
+        assert not hits[3].bounded
+        
+    def test_find_all_no_hits(self):
+        """Test text without known codes"""
+        from card_recognition import SetCodeMatcher
+        
+        assert SetCodeMatcher({'WOE'}).find_all('LIGHTNING BOLT') == []
+        assert SetCodeMatcher(set()).find_all('WOE') == []
+        
+    def test_context_uses_hit_offsets(self):
+        """Test ambiguous codes are validated at the hit position"""
+        from card_recognition import SetCodeMatcher, is_valid_set_code_in_context
+        
+        matcher = SetCodeMatcher({'ONE'})
+        
+        text = 'ONE RING 123 ONE'
+        first, second = matcher.find_all(text)
+        assert not is_valid_set_code_in_context('ONE', text, hit=first)
+        assert is_valid_set_code_in_context('ONE', text, hit=second)
+        
+        text = 'ONE · EN'
+        assert is_valid_set_code_in_context('ONE', text, hit=matcher.find_all(text)[0])
+        
+    def test_matches_legacy_context_check(self):
+        """Test hit-based validation agrees with the rescanning check"""
+        from card_recognition import SetCodeMatcher, is_valid_set_code_in_context
+        
+        matcher = SetCodeMatcher({'WAR', 'ONE', 'WOE'})
+        for text in ['WAR · EN', '25 WAR', 'WAR OF THE SPARK', 'WOE', 'ONE-EN', '12ONE']:
+            for hit in matcher.find_all(text):
+                assert is_valid_set_code_in_context(hit.code, text, hit=hit) == \
+                    is_valid_set_code_in_context(hit.code, text)
+        
+    def test_matcher_rebuilt_with_known_sets(self):
+        """Test the shared matcher follows the known sets"""
+        from card_recognition import get_set_code_matcher
+        
+        matcher = get_set_code_matcher({'WOE'})
+        assert get_set_code_matcher({'WOE'}) is matcher
+        assert get_set_code_matcher({'WOE', 'FIN'}).codes == {'WOE', 'FIN'}
+
+
+class TestOCRBackends:
+    """Tests for the pluggable OCR backend layer"""
+    
+    def test_pytesseract_backend_builds_config(self):
+        """Test PSM and whitelist are passed to pytesseract"""
+        from card_recognition import PytesseractBackend
+        
+        with patch('card_recognition.pytesseract') as mock_tess:
+            mock_tess.image_to_string.return_value = 'WOE'
+            text = PytesseractBackend().image_to_string('img', psm=7, whitelist='ABC')
+        
+        assert text == 'WOE'
+        ocr_config = mock_tess.image_to_string.call_args.kwargs['config']
+        assert '--psm 7' in ocr_config
+        assert 'tessedit_char_whitelist=ABC' in ocr_config
+        
+    def test_tesserocr_backend_reuses_handles(self):
+        """Test handles are created once per thread and PSM"""
+        import threading
+        from card_recognition import TesserocrBackend
+        
+        with patch('card_recognition.tesserocr', create=True) as mock_tesserocr:
+            mock_tesserocr.PyTessBaseAPI.return_value.GetUTF8Text.return_value = 'FIN'
+            backend = TesserocrBackend()
+            image = np.zeros((20, 20), dtype=np.uint8)
+            
+            backend.image_to_string(image, psm=6)
+            backend.image_to_string(image, psm=6, whitelist='0123456789')
+            backend.image_to_string(image, psm=7)
+            assert mock_tesserocr.PyTessBaseAPI.call_count == 2
+            
+            thread = threading.Thread(target=backend.image_to_string, args=(image,))
+            thread.start()
+            thread.join()
+            assert mock_tesserocr.PyTessBaseAPI.call_count == 3
+            
+            api = mock_tesserocr.PyTessBaseAPI.return_value
+            whitelists = [c.args[1] for c in api.SetVariable.call_args_list]
+            assert whitelists == ['', '0123456789', '', '']
+            
+    def test_create_backend_falls_back_to_pytesseract(self):
+        """Test 'auto' uses pytesseract when tesserocr is missing"""
+        from card_recognition import create_ocr_backend
+        
+        with patch('card_recognition.TESSEROCR_AVAILABLE', False), \
+             patch('card_recognition.PYTESSERACT_AVAILABLE', True):
+            assert create_ocr_backend('auto').name == 'pytesseract'
+            assert create_ocr_backend('tesserocr').name == 'pytesseract'
+        
+        with patch('card_recognition.TESSEROCR_AVAILABLE', False), \
+             patch('card_recognition.PYTESSERACT_AVAILABLE', False):
+            assert create_ocr_backend('auto') is None
+            
+    def test_create_backend_falls_back_to_tesserocr(self):
+        """Test 'pytesseract' uses tesserocr when only tesserocr is installed"""
+        from card_recognition import create_ocr_backend
+        
+        with patch('card_recognition.tesserocr', create=True), \
+             patch('card_recognition.TESSEROCR_AVAILABLE', True), \
+             patch('card_recognition.PYTESSERACT_AVAILABLE', False):
+            assert create_ocr_backend('pytesseract').name == 'tesserocr'
+            
+    def test_ocr_backend_is_abstract(self):
+        """Test a backend without image_to_string can't be instantiated"""
+        from card_recognition import OCRBackend
+        
+        with pytest.raises(TypeError):
+            OCRBackend()
+            
+    def test_engine_uses_injected_backend(self):
+        """Test OCR methods go through the engine's backend"""
+        from card_recognition import CardRecognitionEngine
+        
+        backend = MagicMock()
+        backend.image_to_string.return_value = 'Lightning Bolt'
+        engine = CardRecognitionEngine(ocr_backend=backend)
+        
+        with patch('card_recognition.TESSERACT_AVAILABLE', True):
+            text = engine.extract_text_ocr(np.zeros((40, 200), dtype=np.uint8))
+        
+        assert text == 'Lightning Bolt'
+        assert [c.kwargs['psm'] for c in backend.image_to_string.call_args_list] == [6, 7]
+
+
+def _fake_init_worker():
+    """Stand-in pool initializer (skips the real engine setup)"""
+
+
+def _fake_recognize_in_worker(image_path):
+    """Stand-in pool task: crashes or hangs depending on the path"""
+    import time
+    if 'crash' in image_path:
+        os._exit(1)
+    if 'hang' in image_path:
+        if image_path.endswith('.pid'):
+            with open(image_path, 'w') as f:
+                f.write(str(os.getpid()))
+        time.sleep(10)
+    if 'slow' in image_path:
+        time.sleep(1)
+    return {'success': True, 'card': {'name': image_path}, 'confidence': 1.0, 'pid': os.getpid()}
+
+
+class TestParallelBatchRecognition:
+    """Tests for the process-pool batch mode"""
+    
+    @pytest.fixture(autouse=True)
+    def fake_worker(self):
+        from card_recognition import shutdown_batch_pools
+        
+        with patch('card_recognition._init_batch_worker', _fake_init_worker), \
+             patch('card_recognition._recognize_in_worker', _fake_recognize_in_worker):
+            yield
+            shutdown_batch_pools(wait=False)
+    
+    def test_results_carry_input_index(self):
+        """Test every input yields exactly one result tagged with its index"""
+        from card_recognition import iter_batch_recognize
+        
+        paths = [f'card_{i}.jpg' for i in range(6)]
+        results = list(iter_batch_recognize(paths, workers=2, timeout=30))
+        
+        assert sorted(r['index'] for r in results) == list(range(6))
+        assert all(r['success'] for r in results)
+        assert all(r['card']['name'] == paths[r['index']] for r in results)
+        
+    def test_pool_reused_across_batches(self):
+        """Test a second batch runs on the same worker processes"""
+        from card_recognition import iter_batch_recognize
+        
+        first = {r['pid'] for r in iter_batch_recognize(['a.jpg', 'b.jpg'], workers=2, timeout=30)}
+        second = {r['pid'] for r in iter_batch_recognize(['c.jpg', 'd.jpg'], workers=2, timeout=30)}
+        
+        assert len(first | second) <= 2
+        
+    def test_crashed_worker_fails_only_its_item(self):
+        """Test a worker crash is isolated to the item that caused it"""
+        from card_recognition import iter_batch_recognize
+        
+        paths = ['a.jpg', 'crash.jpg', 'b.jpg', 'c.jpg']
+        results = {r['index']: r for r in iter_batch_recognize(paths, workers=2, timeout=30)}
+        
+        assert len(results) == 4
+        assert results[1]['success'] is False
+        assert 'crashed' in results[1]['error']
+        assert all(results[i]['success'] for i in (0, 2, 3))
+        
+    def test_item_timeout(self):
+        """Test a hung item times out without failing the others"""
+        from card_recognition import iter_batch_recognize
+        
+        paths = ['hang.jpg', 'a.jpg', 'b.jpg']
+        results = {r['index']: r for r in iter_batch_recognize(paths, workers=2, timeout=2)}
+        
+        assert results[0]['success'] is False
+        assert 'Timed out' in results[0]['error']
+        assert results[1]['success'] and results[2]['success']
+        
+    def test_timeout_terminates_stuck_worker(self, tmp_path):
+        """Test the worker stuck on a timed-out item is killed, not left running"""
+        import time
+        from card_recognition import iter_batch_recognize
+        
+        pid_file = tmp_path / 'hang.pid'
+        results = list(iter_batch_recognize([str(pid_file), 'a.jpg'], workers=1, timeout=2))
+        assert [r['success'] for r in sorted(results, key=lambda r: r['index'])] == [False, True]
+        
+        pid = int(pid_file.read_text())
+        for _ in range(50):
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    if f.read().rsplit(')', 1)[1].split()[0] in ('Z', 'X'):
+                        break
+            except FileNotFoundError:
+                break
+            time.sleep(0.1)
+        else:
+            pytest.fail(f'Worker {pid} still running after its item timed out')
+        
+    def test_queued_items_do_not_time_out(self):
+        """Test the timeout runs from when an item starts, not from when it was queued"""
+        from card_recognition import iter_batch_recognize
+        
+        paths = ['slow_a.jpg', 'slow_b.jpg', 'slow_c.jpg']
+        results = list(iter_batch_recognize(paths, workers=1, timeout=1.8, max_in_flight=3))
+        
+        assert all(r['success'] for r in results)
+        assert sorted(r['index'] for r in results) == [0, 1, 2]
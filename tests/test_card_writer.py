@@ -0,0 +1,180 @@
+"""
+TCG Scan - Card Writer Tests
+Tests for the set-level card insert/upsert used by the import paths
+"""
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+
+def _card_data(i, set_code='tst', **changes):
+    """Parsed card data as returned by ScryfallAPI._parse_card_data"""
+    data = {
+        'tcg': 'mtg', 'id': f'id-{set_code}-{i}', 'card_id': f'id-{set_code}-{i}', 'scryfall_id': f'id-{set_code}-{i}',
+        'name': f'Card {i}', 'set_code': set_code, 'set_name': 'Test Set', 'collector_number': str(i),
+        'rarity': 'common', 'card_type': 'Creature — Elf', 'colors': 'G', 'mana_cost': '{G}',
+        'image_url': f'https://cards.scryfall.io/normal/front/{i}.jpg', 'oracle_text': '', 'flavor_text': '',
+        'artist': 'Artist', 'is_foil': False, 'language': 'en',
+        'price_usd': '0.10', 'price_usd_foil': None, 'price_eur': None, 'price_eur_foil': None,
+    }
+    data.update(changes)
+    return data
+
+
+def _count_selects(engine):
+    """List collecting the SELECT statements run on engine"""
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    return statements
+
+
+class TestCardWriter:
+    """Tests for CardWriter.write"""
+
+    def test_insert_update_unchanged(self, db_session):
+        """Test new cards are inserted, changed ones updated and the rest left alone"""
+        from card_writer import CardWriter
+        from database import Card
+
+        first = CardWriter(db_session).write([_card_data(i) for i in range(5)])
+        db_session.commit()
+        card = db_session.query(Card).filter(Card.card_id == 'id-tst-1').one()
+        card.image_hash = 'f' * 64
+        db_session.commit()
+
+        cards = [_card_data(i) for i in range(6)]
+        cards[1] = _card_data(1, name='Card 1 (errata)')
+        second = CardWriter(db_session).write(cards)
+        db_session.commit()
+        db_session.expire_all()
+
+        assert first == {'inserted': 5, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'conflicts': 0}
+        assert second == {'inserted': 1, 'updated': 1, 'unchanged': 4, 'skipped': 0, 'conflicts': 0}
+        card = db_session.query(Card).filter(Card.card_id == 'id-tst-1').one()
+        assert card.name == 'Card 1 (errata)'
+        assert card.image_hash == 'f' * 64
+        assert card.updated_at >= card.created_at
+        assert db_session.query(Card).count() == 6
+
+    def test_one_existence_query_per_chunk(self, db_session, test_engine):
+        """Test existence is checked with one SELECT per chunk instead of one per card"""
+        from card_writer import CardWriter
+
+        selects = _count_selects(test_engine)
+        counts = CardWriter(db_session, chunk_size=100).write([_card_data(i) for i in range(250)])
+        db_session.commit()
+
+        assert counts['inserted'] == 250
+        assert len(selects) == 3
+
+    def test_skips_conflicting_and_invalid_rows(self, db_session):
+        """Test printings stored under another id are reported and rows without id/name are skipped"""
+        from card_writer import CardWriter
+        from database import Card
+
+        db_session.add(Card(tcg='mtg', card_id='older-id', name='Card 2', set_code='tst', collector_number='2',
+                            language='en'))
+        db_session.commit()
+
+        writer = CardWriter(db_session)
+        counts = writer.write([_card_data(i) for i in range(4)] + [_card_data(9, id=None, card_id=None),
+                                                                  _card_data(8, name=None)])
+
+        assert counts == {'inserted': 3, 'updated': 0, 'unchanged': 0, 'skipped': 2, 'conflicts': 1}
+        assert writer.inserted_ids == ['id-tst-0', 'id-tst-1', 'id-tst-3']
+        assert writer.conflicts == [('id-tst-2', 'older-id')]
+
+    def test_rows_dropped_on_conflict_are_not_reported_inserted(self, db_session):
+        """Test a card_id stored after the existence check is neither counted nor listed as inserted"""
+        from unittest.mock import patch
+        from card_writer import CardWriter
+
+        CardWriter(db_session).write([_card_data(1)])
+        db_session.commit()
+
+        writer = CardWriter(db_session)
+        with patch.object(writer, '_load_stored', return_value=({}, {})):  # id-tst-1 looks new
+            counts = writer.write([_card_data(i) for i in range(3)])
+
+        assert counts['inserted'] == 2
+        assert counts['skipped'] == 1
+        assert writer.inserted_ids == ['id-tst-0', 'id-tst-2']
+
+    def test_changed_row_conflict_keeps_chunk(self, db_session):
+        """Test a changed card moving onto another card's printing doesn't fail the chunk"""
+        from card_writer import CardWriter
+        from database import Card
+
+        CardWriter(db_session).write([_card_data(i) for i in range(3)])
+        db_session.commit()
+
+        counts = CardWriter(db_session).write([_card_data(0, collector_number='1'),
+                                               _card_data(2, name='Card 2 (errata)')])
+        db_session.commit()
+
+        assert counts == {'inserted': 0, 'updated': 1, 'unchanged': 0, 'skipped': 0, 'conflicts': 1}
+        assert db_session.query(Card.collector_number).filter(Card.card_id == 'id-tst-0').scalar() == '0'
+
+    def test_stored_content_hash(self, db_session):
+        """Test rows are compared against the persisted content hash"""
+        from card_writer import CardWriter, card_row, content_hash
+        from database import Card
+
+        CardWriter(db_session).write([_card_data(1)])
+        db_session.commit()
+        card = db_session.query(Card).one()
+        assert card.content_hash == content_hash(card_row(_card_data(1)))
+
+        # A stored row without a hash (written before the column existed) is rewritten once
+        card.content_hash = None
+        db_session.commit()
+        assert CardWriter(db_session).write([_card_data(1)])['updated'] == 1
+        db_session.commit()
+        assert CardWriter(db_session).write([_card_data(1)])['unchanged'] == 1
+
+    def test_duplicates_in_input(self, db_session):
+        """Test a card listed twice is written once"""
+        from card_writer import CardWriter
+
+        counts = CardWriter(db_session).write([_card_data(1), _card_data(1, rarity='rare')])
+
+        assert counts['inserted'] == 1
+        assert counts['skipped'] == 0
+
+    def test_content_hash(self):
+        """Test the hash ignores price fields and detects content changes"""
+        from card_writer import card_row, content_hash
+
+        row = card_row(_card_data(1))
+
+        assert content_hash(row) == content_hash(card_row(_card_data(1, price_usd='99.00')))
+        assert content_hash(row) != content_hash(card_row(_card_data(1, image_url='https://other/1.jpg')))
+        assert 'price_usd' not in row and row['card_id'] == 'id-tst-1'
+
+
+class TestSetBulkImportEndpoint:
+    """Tests for POST /api/cards/bulk-import"""
+
+    def test_import_and_reimport(self, client, db_session):
+        """Test a set import reports imported, then unchanged cards on a second run"""
+        from database import Card
+
+        cards = [_card_data(i, set_code='woe') for i in range(3)]
+        with patch('app.get_db', return_value=db_session), \
+                patch('app.api_manager.scryfall.get_set_card_count', return_value=3), \
+                patch('app.api_manager.scryfall.iter_search_cards',
+                      side_effect=lambda q: iter([{'page': 1, 'cards': [dict(c) for c in cards]}])), \
+                patch('app.hash_worker') as hash_worker:
+            first = client.post('/api/cards/bulk-import', json={'set_code': 'woe'}).get_json()
+            cards[0] = _card_data(0, set_code='woe', rarity='mythic')
+            second = client.post('/api/cards/bulk-import', json={'set_code': 'woe'}).get_json()
+
+        assert (first['imported'], first['updated'], first['skipped']) == (3, 0, 0)
+        assert (second['imported'], second['updated'], second['skipped']) == (0, 1, 2)
+        assert hash_worker.start.call_count == 1
+        assert db_session.query(Card).filter(Card.set_code == 'woe').count() == 3
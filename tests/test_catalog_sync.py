@@ -0,0 +1,144 @@
+"""
+TCG Scan - Collection Lookup Tests
+Tests for batched /cards/collection lookups, the bulk price update and the
+catalog re-sync, against the Scryfall stand-in (see conftest.py)
+"""
+import uuid
+
+import pytest
+
+
+def _synthetic(count: int):
+    """Scryfall card objects of one synthetic set (code s00)"""
+    from scryfall_standin import ScryfallCorpus
+    return ScryfallCorpus.synthetic(sets=1, cards_per_set=count).cards
+
+
+def _serve(standin, cards):
+    from scryfall_standin import ScryfallCorpus
+    standin.corpus = ScryfallCorpus(cards)
+
+
+@pytest.fixture
+def api_manager(scryfall_standin):
+    from api_integrations import CardAPIManager
+    return CardAPIManager()
+
+
+def _store(session_factory, scryfall_cards):
+    """Store cards as a set import would (Scryfall id as card_id)"""
+    from database import Card
+    db = session_factory()
+    for card in scryfall_cards:
+        db.add(Card(tcg='mtg', card_id=card['id'], name=card['name'], set_code=card['set'],
+                    collector_number=card['collector_number'], language='en'))
+    db.commit()
+    db.close()
+
+
+class TestCardCollection:
+    """Tests for ScryfallAPI.iter_card_collection"""
+
+    def test_batches_of_75(self, api_manager, scryfall_standin):
+        """Test 160 identifiers take three requests and every card is matched back"""
+        from api_integrations import collection_identifier
+
+        cards = _synthetic(160)
+        _serve(scryfall_standin, cards)
+        identifiers = [collection_identifier(card['id']) for card in cards]
+
+        batches = list(api_manager.scryfall.iter_card_collection(identifiers))
+
+        assert [len(batch['found']) for batch in batches] == [75, 75, 10]
+        assert scryfall_standin.get_stats()['endpoints'] == {'collection': 3}
+        found = [pair for batch in batches for pair in batch['found']]
+        assert all(identifier['id'] == card['card_id'] for identifier, card in found)
+
+    def test_not_found_and_set_identifiers(self, api_manager):
+        """Test set + collector number lookups and identifiers Scryfall doesn't know"""
+        from api_integrations import collection_identifier
+
+        known = collection_identifier('test-card-1', 'WOE', '137')
+        unknown = collection_identifier(str(uuid.uuid4()))
+
+        [batch] = api_manager.scryfall.iter_card_collection([known, unknown])
+
+        [(identifier, card)] = batch['found']
+        assert identifier == {'set': 'woe', 'collector_number': '137'}
+        assert card['name'] == 'Lord Skitter, Sewer King'
+        assert batch['not_found'] == [unknown]
+        assert batch['failed'] == []
+
+    def test_failed_batch(self, api_manager, monkeypatch):
+        """Test a rejected request reports its whole batch as failed"""
+        import config
+        from api_integrations import collection_identifier
+
+        monkeypatch.setattr(config, 'SCRYFALL_COLLECTION_BATCH_SIZE', 80)  # Scryfall accepts 75
+        identifiers = [collection_identifier(str(uuid.uuid4())) for _ in range(80)]
+
+        [batch] = api_manager.scryfall.iter_card_collection(identifiers)
+
+        assert len(batch['failed']) == 80
+        assert batch['found'] == []
+
+
+class TestBatchedPriceUpdate:
+    """Tests for PriceTracker.update_all_prices over /cards/collection"""
+
+    def test_writes_price_history_in_bulk(self, api_manager, scryfall_standin, card_db, monkeypatch):
+        """Test prices of 100 cards take two requests and land in PriceHistory"""
+        from database import PriceHistory
+        from price_tracker import PriceTracker
+
+        cards = _synthetic(100)
+        _serve(scryfall_standin, cards)
+        _store(card_db, cards)
+        monkeypatch.setattr('price_tracker.get_db', card_db)
+        tracker = PriceTracker()
+        tracker.api_manager = api_manager
+
+        stats = tracker.update_all_prices('mtg')
+        assert stats == {'total': 100, 'updated': 100, 'failed': 0, 'skipped': 0, 'requests': 2}
+
+        db = card_db()
+        assert sorted(p.price for p in db.query(PriceHistory)) == sorted(float(c['prices']['usd']) for c in cards)
+        db.close()
+
+        # Prices just recorded are not due again
+        again = tracker.update_all_prices('mtg')
+        assert again['skipped'] == 100 and again['requests'] == 0
+        assert scryfall_standin.get_stats()['endpoints'] == {'collection': 2}
+
+
+class TestCatalogResync:
+    """Tests for catalog_sync.resync_catalog"""
+
+    def test_rewrites_changed_cards(self, api_manager, scryfall_standin, card_db):
+        """Test changed metadata is written back, unknown cards are counted and prices recorded"""
+        from catalog_sync import resync_catalog
+        from database import Card, PriceHistory
+
+        cards = _synthetic(4)
+        _store(card_db, cards)
+        cards[0]['name'] = 'Renamed Card'
+        _serve(scryfall_standin, cards[:3])  # The last card is gone from Scryfall
+
+        stats = resync_catalog(api_manager=api_manager, session_factory=card_db)
+
+        assert stats['total'] == 4
+        assert stats['requests'] == 1
+        assert stats['updated'] == 3  # Stored rows had no rarity / type / image yet
+        assert stats['not_found'] == 1
+        assert stats['prices'] == 3
+
+        db = card_db()
+        renamed = db.query(Card).filter(Card.card_id == cards[0]['id']).one()
+        assert renamed.name == 'Renamed Card'
+        assert renamed.image_url.startswith(f'{scryfall_standin.base_url}/images/scryfall/normal/')
+        assert db.query(PriceHistory).count() == 3
+        db.close()
+
+        # Nothing changed since: no rows rewritten
+        again = resync_catalog(set_code='S00', max_cards=3, api_manager=api_manager, session_factory=card_db)
+        assert (again['total'], again['updated'], again['unchanged']) == (3, 0, 3)
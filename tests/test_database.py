@@ -369,6 +369,23 @@ class TestDatabaseOperations:
         # Should not raise any errors
         init_db()
         
+    def test_create_missing_columns(self, tmp_path):
+        """Test columns added to a model are added to an existing table"""
+        from unittest.mock import patch
+        from sqlalchemy import create_engine, inspect, text
+        from database import create_missing_columns
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE cards (id INTEGER PRIMARY KEY, tcg VARCHAR(20) NOT NULL)'))
+        
+        with patch('database.engine', engine):
+            create_missing_columns()
+        
+        columns = {column['name'] for column in inspect(engine).get_columns('cards')}
+        assert {'content_hash', 'image_hash', 'set_code'} <= columns
+        assert 'name' not in columns  # NOT NULL columns can't be added to existing rows
+        
     def test_get_db(self):
         """Test getting database session"""
         from database import get_db
@@ -396,6 +413,7 @@ class TestDatabaseOperations:
         
         # Session should still be usable
         sample_card_data['card_id'] = 'different-id'
+        sample_card_data['collector_number'] = '200'
         card3 = Card(**sample_card_data)
         db_session.add(card3)
         db_session.commit()
@@ -0,0 +1,317 @@
+"""
+TCG Scan - Hash Index Tests
+Tests for the vectorized perceptual-hash index
+"""
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+
+def _flip_bits(image_hash, count):
+    """Return a copy of a hex hash with the lowest `count` bits flipped"""
+    value = int(image_hash, 16) ^ ((1 << count) - 1)
+    return f'{value:064x}'
+
+
+class TestHashPacking:
+    """Tests for hex hash packing and popcount"""
+
+    def test_hash_to_words_valid(self):
+        """Test packing a valid 256-bit hash"""
+        from hash_index import hash_to_words
+
+        words = hash_to_words('f' * 16 + '0' * 48)
+
+        assert words.dtype == np.uint64
+        assert words.tolist() == [0xFFFFFFFFFFFFFFFF, 0, 0, 0]
+
+    def test_hash_to_words_invalid(self):
+        """Test invalid hashes are rejected"""
+        from hash_index import hash_to_words
+
+        assert hash_to_words(None) is None
+        assert hash_to_words('abc') is None
+        assert hash_to_words('z' * 64) is None
+
+    def test_popcount_matches_imagehash(self):
+        """Test vectorized distance equals imagehash Hamming distance"""
+        import imagehash
+        from hash_index import hash_to_words, popcount_rows
+
+        rng = np.random.default_rng(7)
+        a = ''.join(rng.choice(list('0123456789abcdef'), 64))
+        b = ''.join(rng.choice(list('0123456789abcdef'), 64))
+
+        expected = imagehash.hex_to_hash(a) - imagehash.hex_to_hash(b)
+        xor = (hash_to_words(a) ^ hash_to_words(b)).reshape(1, -1)
+
+        assert popcount_rows(xor)[0] == expected
+
+
+class TestHashIndex:
+    """Tests for HashIndex queries and updates"""
+
+    def test_query_empty_index(self):
+        """Test querying an empty index"""
+        from hash_index import HashIndex
+
+        assert HashIndex().query('0' * 64) == []
+
+    def test_query_orders_by_distance(self):
+        """Test top-K candidates are returned closest first"""
+        from hash_index import HashIndex
+
+        base = '0' * 64
+        index = HashIndex()
+        index.add(1, _flip_bits(base, 8))
+        index.add(2, base)
+        index.add(3, _flip_bits(base, 3))
+
+        result = index.query(base, top_k=2)
+
+        assert result == [(2, 0), (3, 3)]
+
+    def test_query_max_distance(self):
+        """Test candidates beyond max_distance are excluded"""
+        from hash_index import HashIndex
+
+        base = '0' * 64
+        index = HashIndex()
+        index.add(1, _flip_bits(base, 20))
+
+        assert index.query(base, max_distance=10) == []
+
+    def test_add_replaces_existing_card(self):
+        """Test re-adding a card updates its hash in place"""
+        from hash_index import HashIndex
+
+        index = HashIndex()
+        index.add(1, 'f' * 64)
+        index.add(1, '0' * 64)
+
+        assert len(index) == 1
+        assert index.query('0' * 64) == [(1, 0)]
+
+    def test_add_skips_non_mtg_cards(self):
+        """Test add() applies the same tcg filter as load()"""
+        from hash_index import HashIndex
+
+        index = HashIndex()
+
+        assert index.add(1, '0' * 64, tcg='pokemon') is False
+        assert len(index) == 0
+
+    def test_add_grows_capacity(self):
+        """Test the index grows past its initial capacity"""
+        from hash_index import HashIndex
+
+        index = HashIndex()
+        count = HashIndex.INITIAL_CAPACITY + 10
+        for card_id in range(count):
+            index.add(card_id, f'{card_id:064x}')
+
+        assert len(index) == count
+        assert index.query(f'{count - 1:064x}', top_k=1) == [(count - 1, 0)]
+
+    def test_load_from_database(self, db_session, sample_card_data):
+        """Test loading hashes from the cards table"""
+        from hash_index import HashIndex
+        from database import Card
+
+        sample_card_data['image_hash'] = '0' * 64
+        card = Card(**sample_card_data)
+        db_session.add(card)
+        db_session.add(Card(tcg='mtg', card_id='no-hash', name='No Hash'))
+        db_session.add(Card(tcg='mtg', card_id='bad-hash', name='Bad', image_hash='xyz'))
+        db_session.commit()
+
+        index = HashIndex()
+        count = index.load(db_session)
+
+        assert count == 1
+        assert index.loaded
+        assert index.query('0' * 64) == [(card.id, 0)]
+
+
+class TestFindMatchingCardWithIndex:
+    """Tests for CardRecognitionEngine.find_matching_card backed by the index"""
+
+    def test_find_matching_card_exact(self, db_session, sample_card_data):
+        """Test exact hash match returns the card with full confidence"""
+        from card_recognition import CardRecognitionEngine
+        from hash_index import HashIndex
+        from database import Card
+
+        sample_card_data['image_hash'] = '0' * 64
+        card = Card(**sample_card_data)
+        db_session.add(card)
+        db_session.commit()
+
+        engine = CardRecognitionEngine()
+
+        with patch('card_recognition.get_db', return_value=db_session), \
+             patch('card_recognition.get_hash_index', return_value=HashIndex()):
+            result = engine.find_matching_card('0' * 64)
+
+        assert result is not None
+        matched_card, confidence = result
+        assert matched_card.name == 'Lightning Bolt'
+        assert confidence == 1.0
+
+    def test_find_matching_card_too_far(self, db_session, sample_card_data):
+        """Test distant hashes are not matched"""
+        from card_recognition import CardRecognitionEngine
+        from hash_index import HashIndex
+        from database import Card
+
+        sample_card_data['image_hash'] = 'f' * 64
+        db_session.add(Card(**sample_card_data))
+        db_session.commit()
+
+        engine = CardRecognitionEngine()
+
+        with patch('card_recognition.get_db', return_value=db_session), \
+             patch('card_recognition.get_hash_index', return_value=HashIndex()):
+            result = engine.find_matching_card('0' * 64)
+
+        assert result is None
+
+
+    def test_find_matching_card_skips_deleted_card(self, db_session, sample_card_data):
+        """Test a stale index entry falls through to the next closest card"""
+        from card_recognition import CardRecognitionEngine
+        from hash_index import HashIndex
+        from database import Card
+
+        sample_card_data['image_hash'] = _flip_bits('0' * 64, 1)
+        card = Card(**sample_card_data)
+        db_session.add(card)
+        db_session.commit()
+
+        index = HashIndex()
+        index.add(card.id + 100, '0' * 64)  # Deleted since the index was loaded
+        index.add(card.id, card.image_hash)
+        index.loaded = True
+        engine = CardRecognitionEngine()
+
+        with patch('card_recognition.get_db', return_value=db_session), \
+             patch('card_recognition.get_hash_index', return_value=index):
+            result = engine.find_matching_card('0' * 64)
+
+        assert result is not None
+        assert result[0].name == 'Lightning Bolt'
+        assert result[1] == 0.9
+
+
+class TestMultiIndexHashing:
+    """Tests for the banded (multi-index hashing) lookup in SQLite"""
+
+    def test_split_hash_bands(self):
+        """Test splitting a hash into 16-bit bands"""
+        from hash_index import split_hash_bands
+
+        bands = split_hash_bands('0001' + '0' * 56 + 'ffff', bands=16)
+
+        assert len(bands) == 16
+        assert bands[0] == 1
+        assert bands[-1] == 0xFFFF
+
+    def test_split_hash_bands_invalid(self):
+        """Test invalid hashes and band counts"""
+        from hash_index import split_hash_bands
+
+        assert split_hash_bands('abc') is None
+        with pytest.raises(ValueError):
+            split_hash_bands('0' * 64, bands=7)
+
+    def test_record_card_hash_syncs_bands(self, db_session, sample_card_data):
+        """Test storing a hash writes bands and replaces old ones"""
+        from hash_index import HashIndex, record_card_hash
+        from database import Card, CardHashBand
+
+        sample_card_data.pop('image_hash')
+        card = Card(**sample_card_data)
+        db_session.add(card)
+
+        with patch('hash_index.get_hash_index', return_value=HashIndex()) as mock_index:
+            record_card_hash(db_session, card, 'f' * 64)
+            record_card_hash(db_session, card, '0' * 64)
+            assert len(mock_index.return_value) == 0  # Not published before the commit
+            db_session.commit()
+
+        bands = db_session.query(CardHashBand).filter(CardHashBand.card_id == card.id).all()
+        assert card.image_hash == '0' * 64
+        assert len(bands) == 16
+        assert all(band.value == 0 for band in bands)
+        assert mock_index.return_value.query('0' * 64) == [(card.id, 0)]
+
+    def test_record_card_hash_rollback_skips_index(self, db_session, sample_card_data):
+        """Test a rolled back hash never reaches the in-memory index"""
+        from hash_index import HashIndex, record_card_hash
+        from database import Card
+
+        sample_card_data.pop('image_hash')
+        card = Card(**sample_card_data)
+        db_session.add(card)
+
+        with patch('hash_index.get_hash_index', return_value=HashIndex()) as mock_index:
+            record_card_hash(db_session, card, '0' * 64)
+            db_session.rollback()
+            db_session.commit()
+
+        assert len(mock_index.return_value) == 0
+
+    def test_mih_query_finds_near_duplicate(self, db_session, sample_card_data):
+        """Test banded lookup finds a card within the threshold"""
+        from hash_index import mih_query, sync_card_bands
+        from database import Card
+
+        card = Card(**sample_card_data)
+        card.image_hash = '0' * 64
+        other = Card(tcg='mtg', card_id='other', name='Other', image_hash='f' * 64)
+        db_session.add_all([card, other])
+        db_session.flush()
+        sync_card_bands(db_session, card.id, card.image_hash)
+        sync_card_bands(db_session, other.id, other.image_hash)
+        db_session.commit()
+
+        result = mih_query(db_session, _flip_bits('0' * 64, 5), top_k=1, max_distance=10)
+
+        assert result == [(card.id, 5)]
+
+    def test_backfill_hash_bands(self, db_session, sample_card_data):
+        """Test backfill only processes cards with a hash and no bands"""
+        from hash_index import backfill_hash_bands
+        from database import Card, CardHashBand
+
+        sample_card_data['image_hash'] = '0' * 64
+        db_session.add(Card(**sample_card_data))
+        db_session.add(Card(tcg='mtg', card_id='no-hash', name='No Hash'))
+        db_session.commit()
+
+        assert backfill_hash_bands(db_session) == 1
+        assert backfill_hash_bands(db_session) == 0
+        assert db_session.query(CardHashBand).count() == 16
+        assert backfill_hash_bands(db_session, rebuild=True) == 1
+        assert db_session.query(CardHashBand).count() == 16
+
+    def test_find_matching_card_mih_mode(self, db_session, sample_card_data, monkeypatch):
+        """Test find_matching_card uses the banded lookup in 'mih' mode"""
+        import config
+        from card_recognition import CardRecognitionEngine
+        from hash_index import backfill_hash_bands
+        from database import Card
+
+        sample_card_data['image_hash'] = '0' * 64
+        db_session.add(Card(**sample_card_data))
+        db_session.commit()
+        backfill_hash_bands(db_session)
+        monkeypatch.setattr(config, 'HASH_LOOKUP_MODE', 'mih')
+
+        engine = CardRecognitionEngine()
+
+        with patch('card_recognition.get_db', return_value=db_session):
+            result = engine.find_matching_card('0' * 64)
+
+        assert result is not None
+        assert result[0].name == 'Lightning Bolt'
@@ -0,0 +1,189 @@
+"""
+TCG Scan - Hash Pipeline Tests
+Tests for the concurrent image-hash backfill, against a local HTTP server
+"""
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def _jpeg(seed):
+    """Fixture card image: random blocks, so every image hashes differently"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, (8, 6, 3), dtype=np.uint8)
+    img = Image.fromarray(blocks).resize((146, 204), Image.NEAREST)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    images = {}
+    requested = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        body = self.images.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    """Local stand-in for the Scryfall image CDN"""
+    _ImageHandler.images = {f'/small/front/{i}.jpg': _jpeg(i) for i in range(40)}
+    _ImageHandler.images['/small/front/broken.jpg'] = b'not an image'
+    _ImageHandler.requested = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Empty image store for one test"""
+    from image_store import ImageStore
+    return ImageStore(root=tmp_path / 'images')
+
+
+def _add_cards(Session, base_url, count=12, extra=()):
+    from database import Card
+    db = Session()
+    for i in range(count):
+        db.add(Card(tcg='mtg', card_id=f'card-{i}', name=f'Card {i}', set_code='tst',
+                    collector_number=str(i), image_url=f'{base_url}/small/front/{i}.jpg'))
+    for card_id, url in extra:
+        db.add(Card(tcg='mtg', card_id=card_id, name=card_id, set_code='tst',
+                    collector_number=card_id, image_url=f'{base_url}{url}'))
+    db.commit()
+    db.close()
+
+
+class TestHelpers:
+    """Tests for URL and image helpers"""
+
+    def test_image_variant_url(self):
+        """Test Scryfall URLs are pointed at the requested size"""
+        from hash_pipeline import image_variant_url
+
+        url = 'https://cards.scryfall.io/normal/front/a/b/abc.jpg?123'
+
+        assert image_variant_url(url, 'small') == 'https://cards.scryfall.io/small/front/a/b/abc.jpg?123'
+        assert image_variant_url('http://localhost/normal/x.jpg', 'small') == 'http://localhost/normal/x.jpg'
+        assert image_variant_url(None, 'small') is None
+
+    def test_hash_image_bytes(self):
+        """Test hashing matches the recognition engine's average hash"""
+        import imagehash
+        from hash_pipeline import hash_image_bytes
+
+        data = _jpeg(1)
+
+        assert hash_image_bytes(data) == str(imagehash.average_hash(Image.open(io.BytesIO(data)), hash_size=16))
+        assert hash_image_bytes(b'garbage') is None
+
+
+class TestHashPipeline:
+    """Tests for HashPipeline.run"""
+
+    def test_backfill_all_cards(self, image_server, card_db, store):
+        """Test every card gets a hash, in batches, with progress reports"""
+        from hash_pipeline import HashPipeline
+        from hash_index import HashIndex
+        from database import Card
+
+        _add_cards(card_db, image_server,
+                   extra=[('missing', '/small/front/404.jpg'), ('broken', '/small/front/broken.jpg')])
+        reports = []
+        pipeline = HashPipeline(workers=3, batch_size=5, session_factory=card_db, image_store=store,
+                                on_progress=reports.append, progress_interval=0)
+
+        with patch('hash_index.get_hash_index', return_value=HashIndex()) as mock_index:
+            stats = pipeline.run()
+
+        assert stats['total'] == 14
+        assert stats['processed'] == 14
+        assert stats['hashed'] == 12
+        assert stats['failed'] == 2
+        assert stats['eta_seconds'] == 0
+        assert reports and reports[-1]['percent'] == 100.0
+        assert len(mock_index.return_value) == 12
+
+        db = card_db()
+        hashes = [card.image_hash for card in db.query(Card).order_by(Card.id)]
+        db.close()
+        assert all(len(h) == 64 for h in hashes[:12])
+        assert len(set(hashes[:12])) == 12
+        assert hashes[12:] == [None, None]
+
+    def test_resume_skips_hashed_cards(self, image_server, card_db, store):
+        """Test a second run only downloads the cards still missing a hash"""
+        from hash_pipeline import HashPipeline
+        from hash_index import HashIndex
+        from database import Card
+
+        _add_cards(card_db, image_server, count=6)
+        db = card_db()
+        for card in db.query(Card).filter(Card.id <= 4):
+            card.image_hash = '0' * 64
+        db.commit()
+        db.close()
+
+        with patch('hash_index.get_hash_index', return_value=HashIndex()):
+            stats = HashPipeline(workers=2, batch_size=10, session_factory=card_db, image_store=store).run()
+
+        assert stats['hashed'] == 2
+        assert sorted(_ImageHandler.requested) == ['/small/front/4.jpg', '/small/front/5.jpg']
+
+    def test_stop_commits_partial_progress(self, image_server, card_db, store):
+        """Test stopping mid-run keeps the hashes written so far"""
+        from hash_pipeline import HashPipeline
+        from hash_index import HashIndex
+        from database import Card
+
+        _add_cards(card_db, image_server, count=40)
+        pipeline = HashPipeline(workers=1, batch_size=1, session_factory=card_db, image_store=store,
+                                progress_interval=0)
+        pipeline.on_progress = lambda stats: pipeline.stop() if stats['processed'] >= 3 else None
+
+        with patch('hash_index.get_hash_index', return_value=HashIndex()):
+            stats = pipeline.run()
+
+        db = card_db()
+        hashed = db.query(Card).filter(Card.image_hash != None).count()
+        db.close()
+        assert 3 <= stats['hashed'] < 40
+        assert hashed == stats['hashed']
+
+    def test_rehash_reads_image_store(self, image_server, card_db, store):
+        """Test re-hashing the catalog doesn't download cached images again"""
+        from hash_pipeline import HashPipeline
+        from hash_index import HashIndex
+
+        _add_cards(card_db, image_server, count=5)
+        with patch('hash_index.get_hash_index', return_value=HashIndex()):
+            HashPipeline(workers=2, session_factory=card_db, image_store=store).run()
+            _ImageHandler.requested.clear()
+            stats = HashPipeline(workers=2, session_factory=card_db, image_store=store).run(rehash=True)
+
+        assert stats['hashed'] == 5
+        assert _ImageHandler.requested == []
+        assert store.get_stats()['files'] == 5
@@ -0,0 +1,97 @@
+"""
+TCG Scan - HTTP Client Tests
+Tests for the shared keep-alive session, against a local HTTP server
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+    headers_seen = []
+
+    def do_GET(self):
+        self.connections.add(self.client_address)
+        self.headers_seen.append(dict(self.headers))
+        body = b'{"object": "card"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_server():
+    """Local keep-alive stand-in for api.scryfall.com"""
+    _Handler.connections = set()
+    _Handler.headers_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fresh_session():
+    """Start from a new shared session and restore the previous one afterwards"""
+    import http_client
+    previous = http_client.set_http_session(None)
+    yield
+    http_client.get_http_session().close()
+    http_client.set_http_session(previous)
+
+
+class TestHttpClient:
+    """Tests for http_client.get and the shared session"""
+
+    def test_reuses_connections(self, api_server, fresh_session):
+        """Test consecutive calls share one keep-alive connection"""
+        import http_client
+
+        for _ in range(5):
+            assert http_client.get(f'{api_server}/cards/m19/314').json() == {'object': 'card'}
+
+        assert len(_Handler.connections) == 1
+        headers = _Handler.headers_seen[0]
+        assert 'gzip' in headers['Accept-Encoding']
+        assert headers['User-Agent'].startswith('TCGScan')
+
+    def test_endpoint_timeouts(self):
+        """Test each endpoint kind gets its own read timeout unless one is given"""
+        import config
+        import http_client
+
+        session = MagicMock()
+        http_client.get('https://example.com/a', endpoint='search', session=session)
+        http_client.get('https://example.com/b', endpoint='image', session=session, timeout=3)
+
+        assert session.get.call_args_list[0].kwargs['timeout'] == (config.HTTP_CONNECT_TIMEOUT,
+                                                                  config.HTTP_TIMEOUTS['search'])
+        assert session.get.call_args_list[1].kwargs['timeout'] == 3
+
+    def test_swap_session(self, fresh_session):
+        """Test set_http_session routes every caller through a stand-in session"""
+        import http_client
+        from api_integrations import ScryfallAPI, RateLimiter
+
+        stand_in = MagicMock()
+        stand_in.get.return_value.status_code = 200
+        stand_in.get.return_value.json.return_value = {'id': 'card1', 'name': 'Card 1', 'set': 'm21'}
+        http_client.set_http_session(stand_in)
+
+        api = ScryfallAPI()
+        api.rate_limiter = RateLimiter(calls_per_second=100, burst=10)
+        result = api.search_card_by_name('Card 1')
+
+        assert result['card_id'] == 'card1'
+        assert stand_in.get.call_args.args[0].endswith('/cards/named')
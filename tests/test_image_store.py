@@ -0,0 +1,145 @@
+"""
+TCG Scan - Image Store Tests
+Tests for the on-disk card image cache and /api/images
+"""
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _response(content=b'jpeg-bytes', status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = content
+    return response
+
+
+class TestImageStore:
+    """Tests for ImageStore storage, lookups and eviction"""
+
+    def test_sharded_path(self, tmp_path):
+        """Test images are stored under two levels of id-prefix directories"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path)
+
+        assert store.path_for('abcdef-12', 'small') == tmp_path / 'ab' / 'cd' / 'abcdef-12-small.jpg'
+        assert store.path_for('abcdef-12', 'png').suffix == '.png'
+        with pytest.raises(ValueError):
+            store.path_for('../etc', 'small')
+        with pytest.raises(ValueError):
+            store.path_for('abcdef', 'huge')
+
+    def test_put_and_get(self, tmp_path):
+        """Test stored bytes are returned and no temp files are left behind"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path)
+        store.put('abcdef', 'small', b'image')
+
+        assert store.get('abcdef', 'small') == b'image'
+        assert store.get('abcdef', 'normal') is None
+        assert not list(tmp_path.rglob('*.tmp'))
+        stats = store.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['bytes'] == 5
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        """Test least recently used files are deleted above max_bytes"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path, max_bytes=25)
+        store.put('aaaa01', 'small', b'x' * 10)
+        store.put('bbbb02', 'small', b'x' * 10)
+        store.get('aaaa01', 'small')
+        store.put('cccc03', 'small', b'x' * 10)
+
+        assert store.get('bbbb02', 'small') is None
+        assert not store.path_for('bbbb02', 'small').exists()
+        assert store.get('aaaa01', 'small') is not None
+        assert store.get('cccc03', 'small') is not None
+        assert store.get_stats()['evictions'] == 1
+
+    def test_existing_files_indexed_by_mtime(self, tmp_path):
+        """Test a new instance picks up files on disk, oldest first"""
+        from image_store import ImageStore
+
+        first = ImageStore(root=tmp_path)
+        old_path = first.put('aaaa01', 'small', b'x' * 10)
+        first.put('bbbb02', 'small', b'x' * 10)
+        os.utime(old_path, (1, 1))
+
+        store = ImageStore(root=tmp_path, max_bytes=25)
+        store.put('cccc03', 'small', b'x' * 10)
+
+        assert not old_path.exists()
+        assert store.get('bbbb02', 'small') is not None
+
+    def test_fetch_reads_through(self, tmp_path):
+        """Test a miss downloads once and later fetches hit the disk"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path)
+        session = MagicMock()
+        session.get.return_value = _response(b'downloaded')
+
+        assert store.fetch('abcdef', 'small', 'https://img/abcdef.jpg', session=session) == b'downloaded'
+        assert store.fetch('abcdef', 'small', 'https://img/abcdef.jpg', session=session) == b'downloaded'
+        assert session.get.call_count == 1
+
+    def test_fetch_failure_not_cached(self, tmp_path):
+        """Test failed downloads return None and store nothing"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path)
+        session = MagicMock()
+        session.get.return_value = _response(status_code=404)
+
+        assert store.fetch('abcdef', 'small', 'https://img/abcdef.jpg', session=session) is None
+        assert store.get_stats()['files'] == 0
+        assert store.get_stats()['download_errors'] == 1
+
+    def test_image_variant_url(self):
+        """Test Scryfall URLs are pointed at the requested size"""
+        from image_store import image_variant_url
+
+        url = 'https://cards.scryfall.io/normal/front/a/b/abc.jpg?123'
+
+        assert image_variant_url(url, 'small') == 'https://cards.scryfall.io/small/front/a/b/abc.jpg?123'
+        assert image_variant_url('http://localhost/normal/x.jpg', 'small') == 'http://localhost/normal/x.jpg'
+
+
+class TestImageEndpoint:
+    """Tests for GET /api/images/<card_id>"""
+
+    def test_serves_cached_image(self, client, tmp_path):
+        """Test cached images are served with long-lived cache headers"""
+        from image_store import ImageStore
+
+        store = ImageStore(root=tmp_path)
+        store.put('abcdef', 'normal', b'\xff\xd8cached')
+
+        with patch('app.get_image_store', return_value=store):
+            response = client.get('/api/images/abcdef')
+
+        assert response.status_code == 200
+        assert response.data == b'\xff\xd8cached'
+        assert response.mimetype == 'image/jpeg'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=' in response.headers['Cache-Control']
+
+    def test_invalid_key(self, client):
+        """Test malformed ids and unknown variants are rejected"""
+        response = client.get('/api/images/abcdef?variant=huge')
+
+        assert response.status_code == 400
+
+    def test_unknown_card(self, client, tmp_path):
+        """Test uncached images of unknown cards return 404"""
+        from image_store import ImageStore
+
+        with patch('app.get_image_store', return_value=ImageStore(root=tmp_path)):
+            response = client.get('/api/images/not-in-db-0000')
+
+        assert response.status_code == 404
@@ -0,0 +1,201 @@
+"""
+TCG Scan - Import Pipeline Tests
+Tests for the set-by-set import with overlapping fetch, parse and write stages
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from api_integrations import ScryfallAPI
+
+
+class FakeScryfall(ScryfallAPI):
+    """ScryfallAPI serving paginated set searches from memory with a fixed latency"""
+
+    def __init__(self, sets, page_size=3, latency=0.0):
+        super().__init__()
+        self.sets = sets  # code -> number of cards
+        self.page_size = page_size
+        self.latency = latency
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+
+    def get_all_sets(self):
+        return [{'code': code, 'name': f'Set {code}', 'card_count': count} for code, count in self.sets.items()]
+
+    def fetch_search_page(self, query, page=1, next_page=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.pages_fetched += 1
+        set_code = query.split(':', 1)[1]
+        count = self.sets.get(set_code, 0)
+        start = (page - 1) * self.page_size
+        if start >= count:
+            return None
+        numbers = range(start, min(start + self.page_size, count))
+        return {
+            'data': [{'id': f'{set_code}-{i}', 'name': f'{set_code} card {i}', 'set': set_code,
+                      'collector_number': str(i), 'lang': 'en'} for i in numbers],
+            'has_more': start + self.page_size < count,
+        }
+
+
+class TestImportPipeline:
+    """Tests for ImportPipeline.run"""
+
+    def test_imports_every_set(self, card_db):
+        """Test all pages of all sets are written and counted per stage"""
+        from import_pipeline import ImportPipeline
+        from database import Card
+
+        api = FakeScryfall({'aaa': 7, 'bbb': 3, 'ccc': 0, 'ddd': 1})
+        reports = []
+        pipeline = ImportPipeline(api=api, fetch_workers=2, batch_size=4, session_factory=card_db,
+                                  on_progress=reports.append, progress_interval=0)
+        stats = pipeline.run()
+
+        assert stats['total_sets'] == 3  # Sets without cards are not searched
+        assert stats['processed_sets'] == 3
+        assert stats['inserted'] == 11
+        assert stats['stages']['fetch']['items'] == 5
+        assert stats['stages']['fetch']['cards'] == 11
+        assert stats['stages']['parse']['items'] == 11
+        assert stats['stages']['write']['items'] == 11
+        assert stats['stages']['write']['batches'] >= 3
+        assert reports
+
+        db = card_db()
+        assert db.query(Card).count() == 11
+        db.close()
+
+        again = ImportPipeline(api=api, session_factory=card_db).run(['aaa'])
+        assert again['unchanged'] == 7
+        assert again['inserted'] == 0
+
+    def test_fetch_and_write_overlap(self, card_db):
+        """Test pages keep downloading while batches are being written"""
+        from import_pipeline import ImportPipeline
+        from card_writer import CardWriter
+
+        api = FakeScryfall({f's{i}': 6 for i in range(5)}, page_size=3, latency=0.05)
+        write = CardWriter.write
+
+        def slow_write(self, cards):
+            time.sleep(0.05)
+            return write(self, cards)
+
+        with patch.object(CardWriter, 'write', slow_write):
+            started = time.monotonic()
+            stats = ImportPipeline(api=api, fetch_workers=1, batch_size=3, session_factory=card_db).run()
+            elapsed = time.monotonic() - started
+
+        # 10 pages + 10 batches at 50 ms each: 1 s when run in turn, ~0.55 s overlapped
+        assert stats['inserted'] == 30
+        assert elapsed < 0.9
+
+    def test_backpressure_bounds_fetch_ahead(self, card_db):
+        """Test a slow writer holds back the fetch stage to the queue depth"""
+        from import_pipeline import ImportPipeline
+        from card_writer import CardWriter
+
+        api = FakeScryfall({f's{i}': 2 for i in range(30)}, page_size=2)
+        write = CardWriter.write
+        ahead = []
+
+        def slow_write(self, cards):
+            ahead.append(api.pages_fetched - (len(ahead) + 1))
+            time.sleep(0.01)
+            return write(self, cards)
+
+        with patch.object(CardWriter, 'write', slow_write):
+            ImportPipeline(api=api, fetch_workers=1, batch_size=2, queue_depth=2, session_factory=card_db).run()
+
+        # Two bounded queues of depth 2 + one page in each stage's hands
+        assert len(ahead) == 30
+        assert max(ahead) <= 2 * 2 + 3
+
+    def test_stop(self, card_db):
+        """Test stopping ends the import early and keeps written cards"""
+        from import_pipeline import ImportPipeline
+
+        api = FakeScryfall({f's{i}': 3 for i in range(50)}, latency=0.01)
+        pipeline = ImportPipeline(api=api, batch_size=3, session_factory=card_db, progress_interval=0)
+        pipeline.on_progress = lambda stats: pipeline.stop() if stats['processed_sets'] >= 2 else None
+        stats = pipeline.run()
+
+        assert 2 <= stats['processed_sets'] < 50
+        assert stats['inserted'] >= 6
+
+    def test_stop_skips_queued_sets(self, card_db):
+        """Test sets still queued when the pipeline stops are not requested"""
+        from import_pipeline import ImportPipeline
+
+        api = FakeScryfall({f's{i}': 3 for i in range(50)})
+        pipeline = ImportPipeline(api=api, fetch_workers=2, session_factory=card_db)
+        fetch_page = api.fetch_search_page
+
+        def fetch_and_stop(*args, **kwargs):
+            pipeline.stop()
+            return fetch_page(*args, **kwargs)
+
+        with patch.object(api, 'fetch_search_page', side_effect=fetch_and_stop):
+            pipeline.run()
+
+        # Only the pages already requested by each fetch worker
+        assert api.pages_fetched <= 2
+
+    def test_failed_batch_is_skipped(self, card_db):
+        """Test a batch that fails to write is rolled back and counted without ending the import"""
+        from import_pipeline import ImportPipeline
+        from card_writer import CardWriter
+
+        api = FakeScryfall({'aaa': 3, 'bbb': 3})
+        write = CardWriter.write
+        calls = []
+
+        def flaky_write(self, cards):
+            calls.append(len(cards))
+            if len(calls) == 1:
+                raise RuntimeError('database is locked')
+            return write(self, cards)
+
+        with patch.object(CardWriter, 'write', flaky_write):
+            stats = ImportPipeline(api=api, fetch_workers=1, batch_size=3, session_factory=card_db).run()
+
+        assert stats['inserted'] == 3
+        assert stats['stages']['write']['errors'] == 3
+
+
+    def test_failed_page_closes_set(self, card_db):
+        """Test a search ending on a failed page counts a fetch error and still completes the set"""
+        from import_pipeline import ImportPipeline
+
+        api = FakeScryfall({'aaa': 6, 'bbb': 3})
+        fetch = api.fetch_search_page
+        api.fetch_search_page = lambda q, page=1, next_page=None: None if (q, page) == ('set:aaa', 2) \
+            else fetch(q, page, next_page)
+
+        stats = ImportPipeline(api=api, fetch_workers=1, session_factory=card_db).run()
+
+        assert stats['processed_sets'] == 2
+        assert stats['inserted'] == 6
+        assert stats['stages']['fetch']['errors'] == 1
+
+
+class TestFullImportStatus:
+    """Tests for the set-by-set FullImportWorker status"""
+
+    def test_status_exposes_stage_counters(self, card_db):
+        """Test /api/cards/import-all/status data includes per-stage throughput"""
+        from app import FullImportWorker
+        from import_pipeline import ImportPipeline
+
+        worker = FullImportWorker()
+        worker.importer = ImportPipeline(api=FakeScryfall({'aaa': 4}), session_factory=card_db)
+        worker.importer.run()
+
+        status = worker.get_status()
+
+        assert set(status['stages']) == {'sets', 'fetch', 'parse', 'write'}
+        assert status['stages']['write']['items'] == 4
+        assert status['stages']['fetch']['unit'] == 'pages'
@@ -0,0 +1,166 @@
+"""
+TCG Scan - JSON Stream Tests
+Tests for the streaming JSON reader used by the bulk importers
+"""
+import gzip
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+
+MTGJSON_DUMP = {
+    'meta': {'date': '2024-01-01', 'version': '5.2.2'},
+    'data': {
+        'Fire // Ice': [{'name': 'Fire // Ice', 'faceName': 'Fire'}],
+        'Llanowar Elves': [{'name': 'Llanowar Elves', 'text': 'Add {G}.'}],
+        'Ærathi Berserker': [{'name': 'Ærathi Berserker', 'power': '2'}],
+    },
+}
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    body = b''
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def json_server():
+    """Local HTTP server returning _JsonHandler.body"""
+    _JsonHandler.body = json.dumps(MTGJSON_DUMP, indent=2).encode('utf-8')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _JsonHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/AtomicCards.json'
+    server.shutdown()
+    server.server_close()
+
+
+class TestJsonStreamReader:
+    """Tests for JsonStreamReader parsing"""
+
+    @pytest.mark.parametrize('buffer_size', [1, 3, 7, 64, 4096])
+    def test_array_matches_json_load(self, buffer_size):
+        """Test every element is decoded the same whatever the chunk boundaries"""
+        from json_stream import iter_array
+
+        values = [{'a': '[]{},"\\'}, 12345, -1.5e3, 'text', None, True, [1, [2, {'b': 'é'}]], {}]
+        data = json.dumps(values, ensure_ascii=False, indent=2).encode('utf-8')
+
+        assert list(iter_array(io.BytesIO(data), buffer_size=buffer_size)) == values
+
+    @pytest.mark.parametrize('buffer_size', [1, 5, 4096])
+    def test_mtgjson_items(self, buffer_size):
+        """Test (key, record) pairs are read from the object under "data", skipping "meta" """
+        from json_stream import iter_items
+
+        data = json.dumps(MTGJSON_DUMP, ensure_ascii=False).encode('utf-8')
+
+        items = list(iter_items(io.BytesIO(data), buffer_size=buffer_size))
+
+        assert items == list(MTGJSON_DUMP['data'].items())
+
+    def test_items_of_array_and_top_level(self):
+        """Test arrays under the key yield (index, element) and key=None reads the top level"""
+        from json_stream import iter_items
+
+        assert list(iter_items(io.StringIO('{"data": ["a", "b"]}'))) == [(0, 'a'), (1, 'b')]
+        assert list(iter_items(io.StringIO('{"x": 1, "y": {}}'), key=None)) == [('x', 1), ('y', {})]
+        assert list(iter_items(io.StringIO('{"meta": {}}'))) == []
+
+    def test_empty_array(self):
+        """Test an empty array yields nothing"""
+        from json_stream import iter_array
+
+        assert list(iter_array(io.StringIO(' [ ] '), buffer_size=2)) == []
+
+    def test_invalid_input(self):
+        """Test non-arrays, truncated and malformed documents raise"""
+        from json_stream import iter_array
+
+        with pytest.raises(ValueError):
+            list(iter_array(io.StringIO('{"data": []}')))
+        with pytest.raises(ValueError):
+            list(iter_array(io.StringIO('[{"a": 1}, {"b": '), buffer_size=4))
+        with pytest.raises(ValueError):
+            list(iter_array(io.StringIO('[1 2]')))
+
+    def test_file_progress_and_gzip(self, tmp_path):
+        """Test paths (plain and .gz) report bytes read against the file size"""
+        from json_stream import JsonStreamReader
+
+        records = [{'id': i, 'name': f'Card {i}'} for i in range(200)]
+        plain = tmp_path / 'cards.json'
+        plain.write_text(json.dumps(records), encoding='utf-8')
+        packed = tmp_path / 'cards.json.gz'
+        with gzip.open(packed, 'wt', encoding='utf-8') as f:
+            json.dump(records, f)
+
+        for path in (plain, packed):
+            with JsonStreamReader(path, buffer_size=256) as reader:
+                seen = []
+                for record in reader.iter_array():
+                    seen.append(reader.bytes_read)
+                assert reader.bytes_read == reader.total_bytes == path.stat().st_size
+            assert len(seen) == 200
+            assert seen[0] < seen[-1] or path is packed  # The small .gz file is read in one go
+
+    def test_buffer_stays_bounded(self):
+        """Test the buffer never holds more than one record plus one chunk"""
+        from json_stream import JsonStreamReader
+
+        record = {'name': 'x' * 100}
+        data = json.dumps([record] * 5000).encode('utf-8')
+        reader = JsonStreamReader(io.BytesIO(data), buffer_size=512)
+
+        peak = 0
+        for _ in reader.iter_array():
+            peak = max(peak, len(reader._buffer))
+
+        assert len(data) > 500000
+        assert peak < 512 + 2 * len(json.dumps(record))
+
+
+class TestHttpStream:
+    """Tests for streaming from HTTP responses"""
+
+    def test_streamed_response(self, json_server):
+        """Test a requests.Response(stream=True) is read incrementally"""
+        from json_stream import JsonStreamReader
+
+        response = requests.get(json_server, stream=True, timeout=5)
+        with JsonStreamReader(response, buffer_size=16) as reader:
+            names = [name for name, _ in reader.iter_items('data')]
+
+        assert names == list(MTGJSON_DUMP['data'])
+        assert reader.bytes_read == reader.total_bytes == len(_JsonHandler.body)
+
+    def test_fuzzy_matcher_dictionary(self, json_server, tmp_path):
+        """Test the card dictionary is built from the streamed MTGJSON download"""
+        from fuzzy_matcher import FuzzyCardMatcher
+
+        keywords = tmp_path / 'keywords.json'
+        keywords.write_text('{"data": {"abilityWords": ["Landfall"]}}', encoding='utf-8')
+        cards = tmp_path / 'all_cards.txt'
+
+        with patch('fuzzy_matcher.URL_ALL_CARDS', json_server), \
+                patch('fuzzy_matcher.requests.Response.json', side_effect=AssertionError('not streamed')):
+            FuzzyCardMatcher(file_all_cards=str(cards), file_keywords=str(keywords))
+
+        assert cards.read_text(encoding='utf-8').splitlines() == [
+            'Fire$1', 'Llanowar Elves$1', 'Ærathi Berserker$1'
+        ]
+        assert not (tmp_path / 'all_cards.tmp').exists()
@@ -0,0 +1,271 @@
+"""
+TCG Scan - Local Catalog Tests
+Tests for local-first card name resolution
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _add_cards(db_session):
+    from database import Card
+
+    db_session.add_all([
+        Card(tcg='mtg', card_id='bolt-lea', name='Lightning Bolt', set_code='lea',
+             collector_number='161', image_url='https://example.com/lea.jpg'),
+        Card(tcg='mtg', card_id='bolt-m10', name='Lightning Bolt', set_code='m10',
+             collector_number='146', image_url='https://example.com/m10.jpg'),
+        Card(tcg='mtg', card_id='bolt-jp', name='Lightning Bolt', set_code='sta',
+             collector_number='42', language='ja', image_url='https://example.com/sta.jpg'),
+        Card(tcg='mtg', card_id='fire-ice', name='Fire // Ice', set_code='apc', collector_number='128'),
+        Card(tcg='mtg', card_id='fire', name='Fire', set_code='tst', collector_number='1'),
+        Card(tcg='mtg', card_id='jotun', name='Jötun Grunt', set_code='csp', collector_number='8'),
+    ])
+    db_session.commit()
+
+
+class TestNameNormalization:
+    """Tests for normalized lookup keys"""
+
+    def test_normalize_card_name(self):
+        """Test accents, case, apostrophes and punctuation are removed"""
+        from local_catalog import normalize_card_name
+
+        assert normalize_card_name('Jötun Grunt') == 'jotun grunt'
+        assert normalize_card_name("Urza's Saga") == 'urzas saga'
+        assert normalize_card_name('  Jace, the Mind-Sculptor ') == 'jace the mind sculptor'
+        assert normalize_card_name(None) == ''
+
+    def test_card_name_aliases(self):
+        """Test split/DFC cards are aliased by face"""
+        from local_catalog import card_name_aliases
+
+        assert card_name_aliases('Fire // Ice') == ('fire', 'ice')
+        assert card_name_aliases('Lightning Bolt') == ()
+
+
+class TestLocalCatalog:
+    """Tests for LocalCatalog loading and lookups"""
+
+    def test_lookup_name(self, db_session):
+        """Test bare names resolve to the preferred (English, latest) printing"""
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        card = catalog.lookup_name('lightning  BOLT')
+
+        assert card['card_id'] == 'bolt-m10'
+        assert card['id'] == 'bolt-m10'
+        assert card['set_code'] == 'm10'
+        assert catalog.lookup_name('jotun grunt')['card_id'] == 'jotun'
+        assert catalog.lookup_name('Unknown Card') is None
+
+    def test_lookup_name_with_set_filter(self, db_session):
+        """Test "name set:xyz" queries pick the printing of that set"""
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        assert catalog.lookup_name('Lightning Bolt set:LEA')['card_id'] == 'bolt-lea'
+        assert catalog.lookup_name('Lightning Bolt set:xyz') is None
+        assert catalog.lookup_name('Ice set:apc')['card_id'] == 'fire-ice'
+
+    def test_exact_name_wins_over_alias(self, db_session):
+        """Test a face alias never shadows a card with that exact name"""
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        assert catalog.lookup_name('Fire')['card_id'] == 'fire'
+        assert catalog.lookup_name('Ice')['card_id'] == 'fire-ice'
+        assert catalog.lookup_name('Fire // Ice')['card_id'] == 'fire-ice'
+
+    def test_refresh_if_stale(self, db_session, monkeypatch):
+        """Test the index is rebuilt only when the cards table changed"""
+        import config
+        from local_catalog import LocalCatalog
+        from database import Card
+
+        monkeypatch.setattr(config, 'LOCAL_CATALOG_CHECK_INTERVAL', 0)
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        with patch('local_catalog.get_db', return_value=db_session), \
+             patch.object(db_session, 'close'), \
+             patch.object(catalog, 'load', wraps=catalog.load) as mock_load:
+            catalog.refresh_if_stale()
+            assert mock_load.call_count == 0
+
+            db_session.add(Card(tcg='mtg', card_id='new', name='Counterspell', set_code='lea'))
+            db_session.commit()
+            catalog.refresh_if_stale()
+            assert mock_load.call_count == 1
+
+        assert catalog.lookup_name('Counterspell')['card_id'] == 'new'
+
+
+class TestSetNumberLookup:
+    """Tests for the (set code, collector number) index"""
+
+    def test_normalize_collector_number(self):
+        """Test leading zeros and case are normalized"""
+        from local_catalog import normalize_collector_number
+
+        assert normalize_collector_number('0053') == '53'
+        assert normalize_collector_number(' 12A ') == '12a'
+        assert normalize_collector_number('000') == '0'
+        assert normalize_collector_number('★1') == '★1'
+
+    def test_lookup_set_number(self, db_session):
+        """Test exact lookups with zero-padded numbers and any set code case"""
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        assert catalog.lookup_set_number('LEA', '0161')['card_id'] == 'bolt-lea'
+        assert catalog.lookup_set_number('m10', '146')['card_id'] == 'bolt-m10'
+        assert catalog.lookup_set_number('m10', '999') is None
+        assert catalog.lookup_set_number(None, '146') is None
+
+    def test_lookup_set_number_letter_suffix(self, db_session):
+        """Test unknown suffixes fall back to the number, and bare numbers to a unique suffix"""
+        from local_catalog import LocalCatalog
+        from database import Card
+
+        db_session.add_all([
+            Card(tcg='mtg', card_id='plain', name='Plain', set_code='tst', collector_number='5'),
+            Card(tcg='mtg', card_id='only-a', name='Only A', set_code='tst', collector_number='7a'),
+            Card(tcg='mtg', card_id='two-a', name='Two A', set_code='tst', collector_number='9a'),
+            Card(tcg='mtg', card_id='two-b', name='Two B', set_code='tst', collector_number='9b'),
+        ])
+        db_session.commit()
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+
+        assert catalog.lookup_set_number('tst', '5a')['card_id'] == 'plain'
+        assert catalog.lookup_set_number('tst', '07A')['card_id'] == 'only-a'
+        assert catalog.lookup_set_number('tst', '7')['card_id'] == 'only-a'
+        assert catalog.lookup_set_number('tst', '9B')['card_id'] == 'two-b'
+        assert catalog.lookup_set_number('tst', '9') is None
+
+    def test_hits_carry_latest_stored_prices(self, db_session):
+        """Test local hits show the card's latest PriceHistory price per currency"""
+        from datetime import datetime
+        from database import Card, PriceHistory
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        bolt = db_session.query(Card).filter(Card.card_id == 'bolt-lea').one()
+        db_session.add_all([
+            PriceHistory(card_id=bolt.id, price=400.0, currency='USD', recorded_at=datetime(2026, 1, 1)),
+            PriceHistory(card_id=bolt.id, price=450.0, currency='USD', recorded_at=datetime(2026, 2, 1)),
+            PriceHistory(card_id=bolt.id, price=410.0, currency='EUR', recorded_at=datetime(2026, 1, 15)),
+        ])
+        db_session.commit()
+        catalog = LocalCatalog(session_factory=lambda: db_session)
+        catalog.load()
+
+        card = catalog.lookup_set_number('lea', '161')
+        assert (card['price_usd'], card['price_eur']) == (450.0, 410.0)
+        assert card['price_recorded_at'] == '2026-02-01T00:00:00'
+
+        unpriced = catalog.lookup_name('Jötun Grunt')
+        assert unpriced['price_usd'] is None and unpriced['price_eur'] is None
+        assert 'price_recorded_at' not in unpriced
+
+    def test_set_number_language_unique(self, db_session):
+        """Test the composite unique index rejects a duplicate printing"""
+        from sqlalchemy.exc import IntegrityError
+        from database import Card
+
+        db_session.add(Card(tcg='mtg', card_id='a', name='A', set_code='tst', collector_number='1'))
+        db_session.add(Card(tcg='mtg', card_id='a-ja', name='A', set_code='tst', collector_number='1',
+                            language='ja'))
+        db_session.commit()
+
+        db_session.add(Card(tcg='mtg', card_id='b', name='B', set_code='tst', collector_number='1'))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+
+
+class TestEngineNameResolution:
+    """Tests for CardRecognitionEngine.resolve_card_name"""
+
+    @pytest.fixture
+    def engine(self, db_session):
+        from card_recognition import CardRecognitionEngine
+        from local_catalog import LocalCatalog
+
+        _add_cards(db_session)
+        catalog = LocalCatalog()
+        catalog.load(db_session)
+        engine = CardRecognitionEngine(catalog=catalog)
+        engine.scryfall_api = MagicMock()
+        return engine
+
+    def test_local_hit_skips_scryfall(self, engine):
+        """Test names in the catalog never reach Scryfall"""
+        card = engine.search_card_by_name('Lightning Bolt', use_fuzzy=False)
+
+        assert card['name'] == 'Lightning Bolt'
+        assert card['_resolution'] == 'local'
+        engine.scryfall_api.search_card_by_name.assert_not_called()
+
+    def test_miss_falls_back_to_scryfall(self, engine):
+        """Test unknown names are resolved remotely"""
+        engine.scryfall_api.search_card_by_name.return_value = {'name': 'Counterspell'}
+
+        card = engine.resolve_card_name('Counterspell')
+
+        assert card['_resolution'] == 'remote'
+        engine.scryfall_api.search_card_by_name.assert_called_once_with('Counterspell')
+
+    def test_offline_mode_never_calls_scryfall(self, engine, monkeypatch):
+        """Test offline mode resolves locally only"""
+        import config
+        monkeypatch.setattr(config, 'OFFLINE_MODE', True)
+
+        assert engine.resolve_card_name('Counterspell') is None
+        assert engine.search_card_with_suggestions('Counterspell')['card'] is None
+        assert engine.resolve_card_name('Ice')['card_id'] == 'fire-ice'
+        engine.scryfall_api.search_card_by_name.assert_not_called()
+
+    def test_recognize_card_reports_resolution(self, engine, tmp_path):
+        """Test recognition results report local vs remote resolution"""
+        image_path = tmp_path / 'card.jpg'
+        image_path.write_bytes(b'')
+        card = engine.resolve_card_name('Lightning Bolt')
+
+        with patch.object(engine, '_recognize_card',
+                          return_value={'success': True, 'card': card, 'method': 'ocr_api'}):
+            result = engine.recognize_card(str(image_path))
+
+        assert result['resolution'] == 'local'
+
+    def test_set_number_resolved_locally(self, engine):
+        """Test exact set+number lookups skip Scryfall on a catalog hit"""
+        card = engine.resolve_set_number('lea', '0161')
+
+        assert card['card_id'] == 'bolt-lea'
+        assert card['_resolution'] == 'local'
+        engine.scryfall_api.get_card_by_set_and_number.assert_not_called()
+
+    def test_set_number_miss(self, engine, monkeypatch):
+        """Test set+number misses go to Scryfall, except in offline mode"""
+        import config
+        engine.scryfall_api.get_card_by_set_and_number.return_value = {'name': 'Counterspell'}
+
+        assert engine.resolve_set_number('lea', '54')['_resolution'] == 'remote'
+
+        monkeypatch.setattr(config, 'OFFLINE_MODE', True)
+        assert engine.resolve_set_number('lea', '55') is None
+        engine.scryfall_api.get_card_by_set_and_number.assert_called_once_with('lea', '54')
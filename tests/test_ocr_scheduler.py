@@ -0,0 +1,175 @@
+"""
+TCG Scan - OCR Scheduler Tests
+Tests for the OCR variant scheduler and per-scan OCR budget
+"""
+import json
+import pytest
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+
+class TestOCRBudget:
+    """Tests for the per-scan OCR call budget"""
+
+    def test_budget_limit(self):
+        """Test calls are refused past the limit"""
+        from ocr_scheduler import OCRBudget
+
+        budget = OCRBudget(limit=3)
+        budget.spend()
+        budget.spend()
+
+        assert budget.can_spend()
+        assert not budget.can_spend(reserve=1)
+        budget.spend()
+        assert not budget.can_spend()
+        assert budget.calls == 3
+
+    def test_budget_unlimited(self):
+        """Test a zero limit means unlimited"""
+        from ocr_scheduler import OCRBudget
+
+        budget = OCRBudget(limit=0)
+        for _ in range(100):
+            budget.spend()
+
+        assert budget.can_spend(reserve=10)
+
+
+class TestOCRVariantScheduler:
+    """Tests for variant ordering and stats persistence"""
+
+    def test_order_default(self, tmp_path):
+        """Test unseen variants keep their given order"""
+        from ocr_scheduler import OCRVariantScheduler
+
+        scheduler = OCRVariantScheduler(tmp_path / 'stats.json')
+
+        assert scheduler.order('full_image', ['a', 'b', 'c']) == ['a', 'b', 'c']
+
+    def test_order_by_success_rate(self, tmp_path):
+        """Test successful variants move to the front and failing ones back"""
+        from ocr_scheduler import OCRVariantScheduler
+
+        scheduler = OCRVariantScheduler(tmp_path / 'stats.json')
+        scheduler.record('full_image', ['a', 'b', 'c'], succeeded=['c'])
+        scheduler.record('full_image', ['a'])
+
+        assert scheduler.order('full_image', ['a', 'b', 'c']) == ['c', 'b', 'a']
+        assert scheduler.order('original', ['a', 'b', 'c']) == ['a', 'b', 'c']
+
+    def test_save_and_reload(self, tmp_path):
+        """Test stats survive a restart"""
+        from ocr_scheduler import OCRVariantScheduler
+
+        path = tmp_path / 'stats.json'
+        scheduler = OCRVariantScheduler(path)
+        scheduler.record('full_image', ['a', 'b'], succeeded=['b'])
+        scheduler.record_scan(ocr_calls=4)
+        scheduler.save()
+
+        reloaded = OCRVariantScheduler(path)
+        assert reloaded.order('full_image', ['a', 'b']) == ['b', 'a']
+        assert reloaded.average_ocr_calls == 4
+
+    def test_save_merges_other_writers(self, tmp_path):
+        """Test two schedulers sharing a file don't overwrite each other"""
+        from ocr_scheduler import OCRVariantScheduler
+
+        path = tmp_path / 'stats.json'
+        first = OCRVariantScheduler(path)
+        second = OCRVariantScheduler(path)
+        first.record('full_image', ['a'], succeeded=['a'])
+        second.record('full_image', ['a'])
+        first.save()
+        second.save()
+
+        data = json.loads(path.read_text())
+        assert data['variants']['full_image']['a'] == [1, 2]
+
+    def test_counts_decay(self, tmp_path):
+        """Test counts are halved past MAX_ATTEMPTS so the order keeps adapting"""
+        from ocr_scheduler import OCRVariantScheduler
+
+        scheduler = OCRVariantScheduler(tmp_path / 'stats.json')
+        for _ in range(OCRVariantScheduler.MAX_ATTEMPTS + 1):
+            scheduler.record('full_image', ['a'], succeeded=['a'])
+
+        successes, attempts = scheduler._stats['full_image']['a']
+        assert attempts <= OCRVariantScheduler.MAX_ATTEMPTS
+
+
+class TestSetInfoEarlyExit:
+    """Tests for scheduled set info extraction in the recognition engine"""
+
+    @pytest.fixture
+    def card_image(self):
+        return np.full((880, 630, 3), 200, dtype=np.uint8)
+
+    def _engine(self, tmp_path, texts):
+        from card_recognition import CardRecognitionEngine
+        from ocr_scheduler import OCRVariantScheduler
+
+        backend = MagicMock()
+        backend.image_to_string.side_effect = texts
+        scheduler = OCRVariantScheduler(tmp_path / 'stats.json')
+        return CardRecognitionEngine(ocr_backend=backend, variant_scheduler=scheduler), backend
+
+    def test_stops_at_first_valid_pair(self, tmp_path, card_image):
+        """Test no more OCR calls are made once a pair validates"""
+        from ocr_scheduler import OCRBudget
+
+        engine, backend = self._engine(tmp_path, ['NOISE', '0168 WOE'] + ['XXX'] * 50)
+        budget = OCRBudget(limit=0)
+
+        with patch('card_recognition.TESSERACT_AVAILABLE', True), \
+             patch('card_recognition.load_known_sets_from_db', return_value={'WOE'}), \
+             patch('card_recognition.load_set_collector_numbers', return_value={'168'}):
+            result = engine.extract_set_info_from_full_image(card_image, budget=budget)
+
+        assert result == {'set_code': 'woe', 'collector_number': '168'}
+        assert budget.calls == 2
+        first_two = engine.variant_scheduler.order('full_image', [
+            'strip:gray/psm7', 'strip:gray/psm6'])
+        assert first_two == ['strip:gray/psm6', 'strip:gray/psm7']
+
+    def test_rejects_pair_missing_from_catalog(self, tmp_path, card_image):
+        """Test a pair not in the catalog does not stop the scan"""
+        from ocr_scheduler import OCRBudget
+
+        engine, backend = self._engine(tmp_path, ['0999 WOE', '0168 WOE'] + ['XXX'] * 50)
+        budget = OCRBudget(limit=0)
+
+        with patch('card_recognition.TESSERACT_AVAILABLE', True), \
+             patch('card_recognition.load_known_sets_from_db', return_value={'WOE'}), \
+             patch('card_recognition.load_set_collector_numbers', return_value={'168'}):
+            result = engine.extract_set_info_from_full_image(card_image, budget=budget)
+
+        assert result['collector_number'] == '168'
+        assert budget.calls == 2
+
+    def test_budget_caps_ocr_calls(self, tmp_path, card_image):
+        """Test set info extraction stops at the budget, keeping the name OCR reserve"""
+        from card_recognition import NAME_OCR_CALLS
+        from ocr_scheduler import OCRBudget
+
+        engine, backend = self._engine(tmp_path, ['XXX'] * 50)
+        budget = OCRBudget(limit=8)
+
+        with patch('card_recognition.TESSERACT_AVAILABLE', True), \
+             patch('card_recognition.load_known_sets_from_db', return_value={'WOE'}):
+            engine.extract_set_info_from_full_image(card_image, budget=budget)
+
+        assert budget.calls == 8 - NAME_OCR_CALLS
+
+    def test_recognize_card_reports_ocr_calls(self, tmp_path, mock_image_file):
+        """Test the recognition result includes the OCR calls spent"""
+        engine, backend = self._engine(tmp_path, ['XXX'] * 50)
+
+        with patch.object(engine, 'find_matching_card', return_value=None), \
+             patch('card_recognition.TESSERACT_AVAILABLE', True), \
+             patch('card_recognition.load_known_sets_from_db', return_value={'WOE'}):
+            result = engine.recognize_card(str(mock_image_file))
+
+        assert result['ocr_calls'] == backend.image_to_string.call_count
+        assert 0 < result['ocr_calls'] <= 24
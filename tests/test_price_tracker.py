@@ -52,6 +52,19 @@ class TestPriceUpdate:
             
             assert result is None
             
+    def test_update_card_price_without_set_number(self, db_session, sample_card_data):
+        """Test cards without set/collector number don't call the API"""
+        from price_tracker import PriceTracker
+        from database import Card
+        
+        tracker = PriceTracker()
+        sample_card_data['collector_number'] = None
+        card = Card(**sample_card_data)
+        
+        with patch.object(tracker, 'api_manager') as mock_api:
+            assert tracker.update_card_price(card) is None
+            mock_api.scryfall.get_card_by_set_and_number.assert_not_called()
+            
     def test_update_pokemon_card_price(self, db_session, sample_pokemon_card_data):
         """Test price update for Pokemon card"""
         from price_tracker import PriceTracker
@@ -93,13 +106,21 @@ class TestPriceUpdate:
                 result = tracker.update_card_price(card)
 
 
+def _collection(price='1.50'):
+    """Stand-in for ScryfallAPI.iter_card_collection: every identifier is found at price"""
+    def iter_card_collection(identifiers):
+        yield {'found': [(identifier, {'price_usd': price}) for identifier in identifiers],
+               'not_found': [], 'failed': []}
+    return iter_card_collection
+
+
 class TestBulkPriceUpdate:
     """Tests for bulk price updates"""
     
     def test_update_all_prices(self, db_session, sample_card_data):
         """Test updating prices for all cards"""
         from price_tracker import PriceTracker
-        from database import Card
+        from database import Card, PriceHistory
         
         tracker = PriceTracker()
         
@@ -107,24 +128,26 @@ class TestBulkPriceUpdate:
         for i in range(5):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'bulk-price-{i}'
+            card_data['collector_number'] = str(i)
             card = Card(**card_data)
             db_session.add(card)
         
         db_session.commit()
         
-        with patch.object(tracker, 'update_card_price', return_value=5.99):
-            with patch.object(tracker, '_should_update_price', return_value=True):
-                with patch('price_tracker.get_db', return_value=db_session):
-                    stats = tracker.update_all_prices('mtg')
+        with patch.object(tracker.api_manager.scryfall, 'iter_card_collection', side_effect=_collection()):
+            with patch('price_tracker.get_db', return_value=db_session):
+                stats = tracker.update_all_prices('mtg')
         
-        assert 'total' in stats
-        assert 'updated' in stats
-        assert 'failed' in stats
+        assert stats['updated'] == 5
+        assert stats['failed'] == 0
+        assert db_session.query(PriceHistory).count() == 5
+        card = db_session.query(Card).filter(Card.card_id == 'bulk-price-3').one()
+        assert card.to_dict()['price_usd'] == 1.5
         
     def test_update_all_prices_with_limit(self, db_session, sample_card_data):
         """Test updating prices with max_cards limit"""
         from price_tracker import PriceTracker
-        from database import Card
+        from database import Card, PriceHistory
         
         tracker = PriceTracker()
         
@@ -132,22 +155,24 @@ class TestBulkPriceUpdate:
         for i in range(10):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'limit-price-{i}'
+            card_data['collector_number'] = str(i)
             card = Card(**card_data)
             db_session.add(card)
         
         db_session.commit()
         
-        with patch.object(tracker, 'update_card_price', return_value=5.99):
-            with patch.object(tracker, '_should_update_price', return_value=True):
-                with patch('price_tracker.get_db', return_value=db_session):
-                    stats = tracker.update_all_prices('mtg', max_cards=3)
+        with patch.object(tracker.api_manager.scryfall, 'iter_card_collection', side_effect=_collection()):
+            with patch('price_tracker.get_db', return_value=db_session):
+                stats = tracker.update_all_prices('mtg', max_cards=3)
         
         assert stats['total'] == 3
+        assert stats['updated'] == 3
+        assert db_session.query(PriceHistory).count() == 3
         
     def test_update_all_prices_tcg_filter(self, db_session, sample_card_data, sample_pokemon_card_data):
         """Test updating prices filtered by TCG"""
         from price_tracker import PriceTracker
-        from database import Card
+        from database import Card, PriceHistory
         
         tracker = PriceTracker()
         
@@ -160,14 +185,16 @@ class TestBulkPriceUpdate:
         db_session.add(pokemon_card)
         
         db_session.commit()
+        mtg_card_id = mtg_card.id
         
-        with patch.object(tracker, 'update_card_price', return_value=5.99):
-            with patch.object(tracker, '_should_update_price', return_value=True):
-                with patch('price_tracker.get_db', return_value=db_session):
-                    stats = tracker.update_all_prices('mtg')
+        with patch.object(tracker.api_manager.scryfall, 'iter_card_collection', side_effect=_collection()):
+            with patch('price_tracker.get_db', return_value=db_session):
+                stats = tracker.update_all_prices('mtg')
         
         # Should only update MTG cards
         assert stats['total'] == 1
+        assert stats['updated'] == 1
+        assert db_session.query(PriceHistory.card_id).scalar() == mtg_card_id
 
 
 class TestShouldUpdatePrice:
@@ -414,6 +441,7 @@ class TestCollectionValue:
         for i in range(3):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'value-test-{i}'
+            card_data['collector_number'] = str(199 + i)
             card = Card(**card_data)
             db_session.add(card)
             db_session.commit()
@@ -0,0 +1,248 @@
+"""
+TCG Scan - Recognition Cache Tests
+Tests for the content-addressed recognition result cache
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _flip_bits(image_hash, count):
+    """Return a copy of a hex hash with the lowest `count` bits flipped"""
+    value = int(image_hash, 16) ^ ((1 << count) - 1)
+    return f'{value:064x}'
+
+
+def _result(name='Lightning Bolt', success=True, set_code='m11', collector_number='149'):
+    return {
+        'success': success,
+        'card': {'name': name, 'set_code': set_code, 'collector_number': collector_number} if success else None,
+        'confidence': 0.95 if success else 0.0,
+        'method': 'set_number' if success else None,
+        'message': 'Card recognized'
+    }
+
+
+class TestRecognitionCache:
+    """Tests for RecognitionCache lookups, expiry and eviction"""
+
+    def test_sha256_hit(self):
+        """Test a stored result is returned by digest as a cache hit"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, sqlite_path='')
+        cache.put('abc', '0' * 64, _result())
+
+        hit = cache.get('abc')
+
+        assert hit['method'] == 'cache'
+        assert hit['cached_method'] == 'set_number'
+        assert hit['cache_match'] == 'sha256'
+        assert hit['card']['name'] == 'Lightning Bolt'
+        assert cache.get('other') is None
+        stats = cache.get_stats()
+        assert stats['hits_sha256'] == 1
+        assert stats['sha256_misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_hits_are_copies(self):
+        """Test callers can't mutate the cached entry"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, sqlite_path='')
+        cache.put('abc', None, _result())
+
+        cache.get('abc')['card']['name'] = 'Changed'
+
+        assert cache.get('abc')['card']['name'] == 'Lightning Bolt'
+
+    def test_phash_hit(self):
+        """Test near-identical images hit within the Hamming distance"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, phash_distance=6, sqlite_path='')
+        cache.put('abc', '0' * 64, _result(collector_number='0149'))
+        confirm = MagicMock(return_value=True)
+
+        hit = cache.get_similar(_flip_bits('0' * 64, 4), confirm)
+
+        assert hit['cache_match'] == 'phash'
+        confirm.assert_called_once_with('m11', '149')
+        assert cache.get_similar(_flip_bits('0' * 64, 20), confirm) is None
+        assert cache.get_similar(None, confirm) is None
+        assert confirm.call_count == 1
+
+    def test_phash_hit_requires_same_printing(self):
+        """Test a reprint with the same art doesn't hit another set's entry"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, phash_distance=6, sqlite_path='')
+        cache.put('m11', '0' * 64, _result(set_code='m11', collector_number='149'))
+        cache.put('2xm', _flip_bits('0' * 64, 2), _result(set_code='2xm', collector_number='117'))
+
+        hit = cache.get_similar('0' * 64, lambda set_code, number: (set_code, number) == ('2xm', '117'))
+        assert hit['card']['set_code'] == '2xm'
+        assert cache.get_similar('0' * 64, lambda set_code, number: False) is None
+        assert cache.get_stats()['phash_misses'] == 1
+
+    def test_printing_in_text(self):
+        """Test the set line check used to confirm perceptual-hash hits"""
+        from card_recognition import printing_in_text
+
+        assert printing_in_text('0149 R\nM11 - EN', 'm11', '149')
+        assert printing_in_text('117/332 M\n2XM EN', '2xm', '117')
+        assert not printing_in_text('1149 R\nM11 - EN', 'm11', '149')
+        assert not printing_in_text('0149 R\nAM11 EN', 'm11', '149')
+        assert not printing_in_text('', 'm11', '149')
+
+    def test_only_successful_results_stored(self):
+        """Test failed recognitions and cache hits are not stored"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, sqlite_path='')
+        cache.put('failed', '0' * 64, _result(success=False))
+        cache.put('hit', '0' * 64, {**_result(), 'method': 'cache'})
+
+        assert len(cache) == 0
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=10, ttl=60, sqlite_path='')
+        with patch('recognition_cache.time.time', return_value=1000.0):
+            cache.put('abc', '0' * 64, _result())
+        with patch('recognition_cache.time.time', return_value=1100.0):
+            assert cache.get('abc') is None
+            assert cache.get_similar('0' * 64, lambda set_code, number: True) is None
+
+        assert cache.get_stats()['expirations'] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted"""
+        from recognition_cache import RecognitionCache
+
+        cache = RecognitionCache(max_entries=2, ttl=60, sqlite_path='')
+        cache.put('a', None, _result('A'))
+        cache.put('b', None, _result('B'))
+        cache.get('a')
+        cache.put('c', None, _result('C'))
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_sqlite_spill(self, tmp_path):
+        """Test entries written through to SQLite survive a new instance"""
+        from recognition_cache import RecognitionCache
+
+        path = tmp_path / 'recognition_cache.db'
+        RecognitionCache(max_entries=10, ttl=60, sqlite_path=path).put('abc', '0' * 64, _result())
+
+        cache = RecognitionCache(max_entries=10, ttl=60, sqlite_path=path)
+        hit = cache.get('abc')
+
+        assert hit['card']['name'] == 'Lightning Bolt'
+        assert cache.get_stats()['hits_sqlite'] == 1
+        assert len(cache) == 1
+
+        cache.clear()
+        assert RecognitionCache(max_entries=10, ttl=60, sqlite_path=path).get('abc') is None
+
+    def test_sqlite_spill_is_trimmed(self, tmp_path):
+        """Test the SQLite file drops expired rows and keeps at most max_entries"""
+        import sqlite3
+        from recognition_cache import RecognitionCache
+
+        path = tmp_path / 'recognition_cache.db'
+        cache = RecognitionCache(max_entries=2, ttl=60, sqlite_path=path)
+        with patch('recognition_cache.time.time', return_value=1000.0):
+            cache.put('old', None, _result('Old'))
+        for digest in ('a', 'b', 'c'):
+            cache.put(digest, None, _result(digest))
+
+        rows = sqlite3.connect(str(path)).execute('SELECT digest FROM recognition_cache').fetchall()
+        assert sorted(digest for (digest,) in rows) == ['b', 'c']
+
+    def test_file_digest(self, tmp_path):
+        """Test digests depend only on the file bytes"""
+        from recognition_cache import file_digest
+
+        first = tmp_path / 'a.jpg'
+        second = tmp_path / 'b.jpg'
+        first.write_bytes(b'card')
+        second.write_bytes(b'card')
+
+        assert file_digest(str(first)) == file_digest(str(second))
+        assert len(file_digest(str(first))) == 64
+        assert file_digest(str(tmp_path / 'missing.jpg')) is None
+
+
+class TestEngineResultCache:
+    """Tests for recognize_card with a result cache"""
+
+    def test_repeated_upload_skips_pipeline(self, tmp_path):
+        """Test the second upload of the same bytes is served from the cache"""
+        from card_recognition import CardRecognitionEngine
+        from recognition_cache import RecognitionCache
+
+        image_path = tmp_path / 'card.jpg'
+        image_path.write_bytes(b'not really a jpeg')
+        engine = CardRecognitionEngine(result_cache=RecognitionCache(max_entries=10, ttl=60, sqlite_path=''))
+
+        def fake_pipeline(path, budget, scan_info):
+            scan_info['image_hash'] = '0' * 64
+            return _result()
+
+        with patch.object(engine, '_recognize_card', side_effect=fake_pipeline) as mock_pipeline:
+            first = engine.recognize_card(str(image_path))
+            second = engine.recognize_card(str(image_path))
+
+        assert mock_pipeline.call_count == 1
+        assert first['method'] == 'set_number'
+        assert second['method'] == 'cache'
+        assert second['ocr_calls'] == 0
+        assert second['card']['name'] == 'Lightning Bolt'
+
+    def test_engine_without_cache(self, tmp_path):
+        """Test engines without a cache always run the pipeline"""
+        from card_recognition import CardRecognitionEngine
+
+        image_path = tmp_path / 'card.jpg'
+        image_path.write_bytes(b'not really a jpeg')
+        engine = CardRecognitionEngine()
+
+        with patch.object(engine, '_recognize_card', return_value=_result()) as mock_pipeline:
+            engine.recognize_card(str(image_path))
+            engine.recognize_card(str(image_path))
+
+        assert mock_pipeline.call_count == 2
+
+    def test_near_identical_frame_skips_set_info_ocr(self, tmp_path):
+        """Test a perceptual-hash hit is confirmed with one set line OCR call"""
+        import numpy as np
+        from card_recognition import CardRecognitionEngine
+        from recognition_cache import RecognitionCache
+
+        image_path = tmp_path / 'frame.jpg'
+        image_path.write_bytes(b'another frame')
+        backend = MagicMock()
+        backend.image_to_string.return_value = '0149 R\nM11 - EN'
+        cache = RecognitionCache(max_entries=10, ttl=60, phash_distance=6, sqlite_path='')
+        cache.put('earlier frame', '0' * 64, _result())
+        engine = CardRecognitionEngine(ocr_backend=backend, result_cache=cache)
+        card = np.full((680, 488, 3), 255, dtype=np.uint8)
+
+        with patch('card_recognition.TESSERACT_AVAILABLE', True), \
+             patch('card_recognition.cv2.imwrite'), \
+             patch.object(engine, '_preprocess', return_value=(card, None, card, 'warp')), \
+             patch.object(engine, 'compute_image_hash', return_value=_flip_bits('0' * 64, 3)), \
+             patch.object(engine, 'extract_set_info_from_full_image') as mock_set_info:
+            result = engine.recognize_card(str(image_path))
+
+        assert result['method'] == 'cache'
+        assert result['cache_match'] == 'phash'
+        assert result['ocr_calls'] == 1
+        assert backend.image_to_string.call_count == 1
+        mock_set_info.assert_not_called()
+
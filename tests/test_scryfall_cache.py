@@ -0,0 +1,205 @@
+"""
+TCG Scan - Scryfall Response Cache Tests
+Tests for the read-through cache of Scryfall card lookups
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _response(status, data=None, headers=None):
+    response = MagicMock(status_code=status, headers=headers or {})
+    response.json.return_value = data
+    return response
+
+
+def _age(cache, seconds):
+    """Make every cached entry seconds older"""
+    cache._db.execute('UPDATE scryfall_responses SET fetched_at = fetched_at - ?', (seconds,))
+    cache._db.commit()
+
+
+CARD = {'id': 'card1', 'name': 'Llanowar Elves', 'set': 'm19', 'collector_number': '314',
+        'prices': {'usd': '0.25'}}
+
+
+@pytest.fixture
+def cache():
+    from scryfall_cache import ScryfallResponseCache
+    return ScryfallResponseCache(':memory:', metadata_ttl=3600, price_ttl=60, negative_ttl=600)
+
+
+@pytest.fixture
+def api(cache):
+    from api_integrations import ScryfallAPI, RateLimiter
+    api = ScryfallAPI(cache=cache)
+    api.rate_limiter = RateLimiter(calls_per_second=1000, burst=100)
+    return api
+
+
+class TestScryfallResponseCache:
+    """Tests for cached ScryfallAPI card lookups"""
+
+    def test_repeated_lookup_is_served_from_cache(self, api, cache):
+        """Test the second lookup of a card makes no request"""
+        with patch('http_client.get', return_value=_response(200, CARD)) as mock_get:
+            first = api.get_card_by_set_and_number('m19', '314')
+            second = api.get_card_by_set_and_number('m19', '314')
+
+        assert mock_get.call_count == 1
+        assert first == second
+        assert second['name'] == 'Llanowar Elves'
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+        assert stats['bytes_saved'] > 0
+        assert stats['hit_rate'] == 0.5
+
+    def test_price_lookups_use_price_ttl(self, api):
+        """Test an entry too old for prices still serves metadata-only lookups"""
+        with patch('http_client.get', return_value=_response(200, CARD)) as mock_get:
+            api.search_card_by_name('Llanowar Elves')
+            _age(api.cache, 120)
+            api.search_card_by_name('Llanowar Elves')
+            assert mock_get.call_count == 1
+            api.search_card_by_name('Llanowar Elves', fresh_prices=True)
+            assert mock_get.call_count == 2
+
+    def test_metadata_hits_drop_expired_prices(self, api, cache):
+        """Test a hit older than the price TTL is served without its prices"""
+        with patch('http_client.get', return_value=_response(200, CARD)):
+            assert api.get_card_by_set_and_number('m19', '314')['price_usd'] == '0.25'
+        _age(cache, 120)
+
+        with patch('http_client.get') as mock_get:
+            card = api.get_card_by_set_and_number('m19', '314')
+
+        assert mock_get.call_count == 0
+        assert card['name'] == 'Llanowar Elves'
+        assert card['price_usd'] is None
+
+    def test_revalidates_with_etag(self, api, cache):
+        """Test an expired entry is revalidated with If-None-Match and renewed on 304"""
+        with patch('http_client.get', return_value=_response(200, CARD, {'ETag': '"v1"'})):
+            api.get_card_by_set_and_number('m19', '314')
+        _age(cache, 7200)
+
+        with patch('http_client.get', return_value=_response(304)) as mock_get:
+            result = api.get_card_by_set_and_number('m19', '314')
+            again = api.get_card_by_set_and_number('m19', '314')
+
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+        assert result['card_id'] == again['card_id'] == 'card1'
+        assert cache.get_stats()['revalidated'] == 1
+
+    def test_negative_caching(self, api, cache):
+        """Test a name Scryfall doesn't know is not looked up again until the negative TTL passes"""
+        with patch('http_client.get', return_value=_response(404, {'object': 'error'})) as mock_get:
+            assert api.search_card_by_name('Llanowr Elvs') is None
+            assert api.search_card_by_name('Llanowr Elvs') is None
+            assert mock_get.call_count == 1
+            _age(cache, 601)
+            assert api.search_card_by_name('Llanowr Elvs') is None
+            assert mock_get.call_count == 2
+
+        assert cache.get_stats()['negative_hits'] == 1
+
+    def test_errors_are_not_cached(self, api, cache):
+        """Test server errors are retried on the next lookup"""
+        with patch('http_client.get', side_effect=[_response(500), _response(200, CARD)]) as mock_get:
+            assert api.get_card_by_set_and_number('m19', '314') is None
+            assert api.get_card_by_set_and_number('m19', '314')['card_id'] == 'card1'
+
+        assert mock_get.call_count == 2
+        assert cache.get_stats()['entries'] == 1
+
+    def test_persists_and_purges(self, tmp_path):
+        """Test entries survive a restart and can be listed and purged by prefix"""
+        from scryfall_cache import ScryfallResponseCache
+
+        path = tmp_path / 'scryfall_cache.db'
+        cache = ScryfallResponseCache(path)
+        cache.put('https://api.scryfall.com/cards/m19/314', 200, CARD)
+        cache.put('https://api.scryfall.com/cards/named?fuzzy=Nope', 404, None)
+
+        reopened = ScryfallResponseCache(path)
+        assert reopened.get('https://api.scryfall.com/cards/m19/314').data == CARD
+        assert [e['key'] for e in reopened.entries(prefix='https://api.scryfall.com/cards/named')] == \
+            ['https://api.scryfall.com/cards/named?fuzzy=Nope']
+
+        assert reopened.purge(expired_only=True) == 0
+        assert reopened.purge(prefix='https://api.scryfall.com/cards/named') == 1
+        assert reopened.get_stats()['entries'] == 1
+
+    def test_purge_expired_uses_entry_ttl(self, cache):
+        """Test entries stored by price lookups expire after the price TTL"""
+        cache.put('https://api.scryfall.com/cards/m19/314', 200, CARD, fresh_prices=True)
+        cache.put('https://api.scryfall.com/cards/m19/315', 200, CARD)
+        _age(cache, 120)
+
+        assert cache.purge(expired_only=True) == 1
+        assert [e['key'] for e in cache.entries()] == ['https://api.scryfall.com/cards/m19/315']
+
+    def test_put_purges_expired_entries(self, cache):
+        """Test expired entries are purged from the file on put once the purge interval passed"""
+        cache.put('https://api.scryfall.com/cards/named?fuzzy=Nope', 404, None)
+        _age(cache, 601)
+
+        with patch('scryfall_cache.config.SCRYFALL_CACHE_PURGE_INTERVAL', 3600):
+            cache.put('https://api.scryfall.com/cards/m19/314', 200, CARD)
+            assert cache.get_stats()['entries'] == 2
+            with patch('scryfall_cache.time.time', return_value=cache._last_purge + 3600):
+                cache.put('https://api.scryfall.com/cards/m19/315', 200, CARD)
+
+        assert [e['key'] for e in cache.entries()] == ['https://api.scryfall.com/cards/m19/315',
+                                                      'https://api.scryfall.com/cards/m19/314']
+
+    def test_hit_counters_written_in_batches(self, cache):
+        """Test hits don't write to SQLite on every lookup and are flushed with the stats"""
+        key = 'https://api.scryfall.com/cards/m19/314'
+        cache.put(key, 200, CARD)
+        entry = cache.get(key)
+
+        with patch('scryfall_cache.config.SCRYFALL_CACHE_HIT_FLUSH_SIZE', 2):
+            for _ in range(3):
+                cache.record_hit(entry)
+            assert cache._db.execute('SELECT hits FROM scryfall_responses').fetchone()[0] == 0
+
+            cache.put('https://api.scryfall.com/cards/m19/315', 200, CARD)
+            cache.record_hit(cache.get('https://api.scryfall.com/cards/m19/315'))
+            assert cache._db.execute('SELECT hits FROM scryfall_responses WHERE key = ?', (key,)).fetchone()[0] == 3
+
+        cache.record_hit(entry)
+        assert cache.get_stats()['hits'] == 5
+        assert {e['key']: e['hits'] for e in cache.entries()}[key] == 4
+
+    def test_disabled(self, api):
+        """Test without a cache path every lookup goes to Scryfall"""
+        from scryfall_cache import ScryfallResponseCache
+
+        api.cache = ScryfallResponseCache()  # SCRYFALL_CACHE_PATH is None in tests
+        with patch('http_client.get', return_value=_response(200, CARD)) as mock_get:
+            api.search_card_by_name('Llanowar Elves')
+            api.search_card_by_name('Llanowar Elves')
+
+        assert mock_get.call_count == 2
+        assert api.cache.get_stats()['enabled'] is False
+
+
+class TestScryfallCacheEndpoints:
+    """Tests for /api/scryfall/cache/*"""
+
+    def test_stats_entries_purge(self, client, cache):
+        """Test the cache can be inspected and purged over the API"""
+        cache.put('https://api.scryfall.com/cards/m19/314', 200, CARD)
+        cache.put('https://api.scryfall.com/cards/m19/315', 200, CARD)
+
+        with patch('app.get_scryfall_cache', return_value=cache):
+            stats = client.get('/api/scryfall/cache/stats').get_json()
+            entries = client.get('/api/scryfall/cache/entries?limit=1').get_json()
+            purged = client.post('/api/scryfall/cache/purge', json={'prefix': 'https://api.scryfall.com/cards/m19/315'})
+
+        assert stats['entries'] == 2 and stats['enabled']
+        assert len(entries['entries']) == 1
+        assert purged.get_json()['purged'] == 1
+        assert purged.get_json()['stats']['entries'] == 1
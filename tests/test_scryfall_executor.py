@@ -0,0 +1,84 @@
+"""
+TCG Scan - Scryfall Executor Client Tests
+Tests for ScryfallExecutorAPI against the Scryfall stand-in (see conftest.py),
+answering every request after a fixed delay
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+PAGE_SIZE = 175
+LATENCY = 0.1
+
+
+@pytest.fixture
+def slow_standin(scryfall_standin):
+    """Stand-in serving one synthetic set (code s00) of 4 full pages + 20 cards, LATENCY per request"""
+    from scryfall_standin import ScryfallCorpus
+    scryfall_standin.corpus = ScryfallCorpus.synthetic(sets=1, cards_per_set=4 * PAGE_SIZE + 20)
+    scryfall_standin.latency = LATENCY
+    return scryfall_standin
+
+
+@pytest.fixture
+def executor_api(slow_standin):
+    from scryfall_executor import ScryfallExecutorAPI
+    return ScryfallExecutorAPI()
+
+
+class TestScryfallExecutorAPI:
+    """Tests for ScryfallExecutorAPI"""
+
+    def test_search_fetches_pages_concurrently(self, executor_api, slow_standin):
+        """Test a 5-page search takes about two round trips instead of five"""
+        started = time.perf_counter()
+        cards = asyncio.run(executor_api.search_cards('set:s00'))
+        elapsed = time.perf_counter() - started
+
+        assert [card['card_id'] for card in cards] == [card['id'] for card in slow_standin.corpus.cards]
+        assert slow_standin.get_stats()['max_in_flight'] == 4
+        assert elapsed < 4 * LATENCY
+
+    def test_iter_search_pages_follows_next_page(self, executor_api):
+        """Test the async page iterator yields every page in order"""
+        async def collect():
+            return [page async for page in executor_api.iter_search_pages('set:s00')]
+
+        pages = asyncio.run(collect())
+
+        assert [page['page'] for page in pages] == [1, 2, 3, 4, 5]
+        assert pages[-1]['has_more'] is False
+
+    def test_collection_batches_in_flight_together(self, executor_api, slow_standin):
+        """Test collection batches are requested at once and yielded in order"""
+        from api_integrations import collection_identifier
+
+        identifiers = [collection_identifier(card['id']) for card in slow_standin.corpus.cards[:200]]
+
+        async def collect():
+            return [batch async for batch in executor_api.iter_card_collection(identifiers)]
+
+        batches = asyncio.run(collect())
+
+        found = [identifier for batch in batches for identifier, _ in batch['found']]
+        assert found == identifiers
+        assert slow_standin.get_stats()['max_in_flight'] == 3
+
+    def test_worker_loop_keeps_background_priority(self, executor_api):
+        """Test a worker thread running its own loop under background_priority makes background calls"""
+        from api_integrations import background_priority
+
+        results = []
+
+        def worker():
+            with background_priority():
+                results.append(asyncio.run(executor_api.get_card_by_set_and_number('s00', '1')))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(timeout=10)
+
+        assert results and results[0]['collector_number'] == '1'
+        assert executor_api.api.rate_limiter.get_stats()['background_calls'] == 1
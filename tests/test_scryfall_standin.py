@@ -0,0 +1,121 @@
+"""
+TCG Scan - Scryfall Stand-in Tests
+Tests for the offline Scryfall stand-in server, through the real ScryfallAPI
+client (see the scryfall_standin fixture in conftest.py)
+"""
+import json
+
+import pytest
+
+
+@pytest.fixture
+def api(scryfall_standin):
+    from api_integrations import ScryfallAPI
+    return ScryfallAPI()
+
+
+class TestScryfallStandIn:
+    """Tests for the endpoints ScryfallAPI uses"""
+
+    def test_card_lookups(self, api, scryfall_standin):
+        """Test named (exact and fuzzy) and set/number lookups, and unknown cards"""
+        elves = api.search_card_by_name('llanowar elves')
+        assert elves['set_code'] == 'm19' and elves['price_usd'] == '0.25'
+        assert elves['image_url'].startswith(f'{scryfall_standin.base_url}/images/scryfall/normal/')
+
+        assert api.search_card_by_name('Wandering Emp')['collector_number'] == '226'
+        assert api.search_card_by_name('Shivan') is None  # Ambiguous
+        assert api.get_card_by_set_and_number('neo', '141')['name'].startswith('Fable of the Mirror-Breaker')
+        assert api.get_card_by_set_and_number('neo', '999') is None
+        assert scryfall_standin.get_stats()['endpoints'] == {'named': 3, 'card': 2}
+
+    def test_search_pagination(self, api, scryfall_standin):
+        """Test search pages follow next_page up to the last page"""
+        scryfall_standin.page_size = 2
+
+        pages = list(api.iter_search_cards('set:m19'))
+
+        assert [page['page'] for page in pages] == [1, 2, 3]
+        assert [len(page['cards']) for page in pages] == [2, 2, 1]
+        assert pages[0]['total_cards'] == 5
+        assert api.search_cards('set:nope') == []
+
+    def test_sets_and_collection(self, api):
+        """Test set listing and batched collection lookups"""
+        from api_integrations import collection_identifier
+
+        sets = {s['code']: s['card_count'] for s in api.get_all_sets()}
+        assert sets == {'m19': 6, 'woe': 5, 'neo': 3}
+        assert api.get_set_card_count('woe') == 5
+
+        [batch] = api.iter_card_collection([collection_identifier(None, 'WOE', '137'),
+                                            collection_identifier(None, 'woe', '999')])
+        assert batch['found'][0][1]['name'] == 'Lord Skitter, Sewer King'
+        assert batch['not_found'] == [{'set': 'woe', 'collector_number': '999'}]
+
+    def test_images_and_bulk_data(self, api, scryfall_standin, tmp_path):
+        """Test generated card images and the bulk data download"""
+        import http_client
+        from bulk_import import download_bulk_data
+        from hash_pipeline import hash_image_bytes
+
+        card = api.get_card_by_set_and_number('m19', '314')
+        response = http_client.get(card['image_url'], endpoint='image')
+        assert response.headers['Content-Type'] == 'image/jpeg'
+        assert hash_image_bytes(response.content)
+
+        path = download_bulk_data(tmp_path / 'default-cards.json', api=api)
+        assert len(json.loads(path.read_text(encoding='utf-8'))) == len(scryfall_standin.corpus.cards) == 14
+
+    def test_etag_revalidation(self, scryfall_standin):
+        """Test an expired cached card is renewed with a 304"""
+        from api_integrations import ScryfallAPI
+        from scryfall_cache import ScryfallResponseCache
+
+        cache = ScryfallResponseCache(':memory:', metadata_ttl=0)
+        api = ScryfallAPI(cache=cache)
+        assert api.get_card_by_set_and_number('m19', '76')['name'] == 'Opt'
+        assert api.get_card_by_set_and_number('m19', '76')['name'] == 'Opt'
+
+        assert scryfall_standin.get_stats()['not_modified'] == 1
+        assert cache.get_stats()['revalidated'] == 1
+
+
+class TestFaultInjection:
+    """Tests for injected latency, errors and 429s"""
+
+    def test_rate_limited_requests_are_retried(self, api, scryfall_standin):
+        """Test every 429 is retried by the client until it gets the card"""
+        scryfall_standin.rate_limit_rate = 0.5
+
+        names = [api.get_card_by_set_and_number('m19', number)['name'] for number in ('314', '154', '76', '2')]
+
+        assert names == ['Llanowar Elves', 'Shivan Dragon', 'Opt', 'Ajani, Adversary of Tyrants']
+        stats = scryfall_standin.get_stats()
+        assert stats['rate_limited'] > 0
+        assert stats['requests'] == 4 + stats['rate_limited']
+
+    def test_errors_and_latency(self, api, scryfall_standin):
+        """Test injected errors fail the lookup and latency delays every answer"""
+        import time
+
+        scryfall_standin.error_rate = 1.0
+        assert api.get_all_sets() == []
+        assert scryfall_standin.get_stats()['errors'] == 1
+
+        scryfall_standin.error_rate = 0.0
+        scryfall_standin.latency = 0.2
+        started = time.perf_counter()
+        assert api.get_set_card_count('m19') == 6
+        assert time.perf_counter() - started >= 0.2
+
+    def test_same_seed_same_faults(self):
+        """Test injected faults repeat for the same seed"""
+        from scryfall_standin import ScryfallCorpus, ScryfallStandIn
+
+        corpus = ScryfallCorpus.synthetic(sets=1, cards_per_set=3)
+        first, second = (ScryfallStandIn(corpus, error_rate=0.3, rate_limit_rate=0.3, seed=7) for _ in range(2))
+
+        faults = [first.draw_fault() for _ in range(50)]
+        assert faults == [second.draw_fault() for _ in range(50)]
+        assert {429, 500, None} == set(faults)
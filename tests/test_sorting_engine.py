@@ -28,6 +28,7 @@ class TestSortAlphabetic:
         for i, (name, _) in enumerate(cards_data):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['name'] = name
             
             card = Card(**card_data)
@@ -61,6 +62,7 @@ class TestSortAlphabetic:
         for i, name in enumerate(cards_data):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'test-2nd-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['name'] = name
             
             card = Card(**card_data)
@@ -124,6 +126,7 @@ class TestSortBySet:
         for i, set_code in enumerate(sets):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'set-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['set_code'] = set_code
             
             card = Card(**card_data)
@@ -153,6 +156,7 @@ class TestSortBySet:
         for i in range(12):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'dist-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['set_code'] = f'SET{i % 4}'
             
             card = Card(**card_data)
@@ -188,6 +192,7 @@ class TestSortByColor:
         for i, color in enumerate(colors):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'color-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['colors'] = color
             
             card = Card(**card_data)
@@ -248,6 +253,7 @@ class TestSortByType:
         for i, card_type in enumerate(types):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'type-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['card_type'] = card_type
             
             card = Card(**card_data)
@@ -306,6 +312,7 @@ class TestSortByRarity:
         for i, rarity in enumerate(rarities):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'rarity-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             card_data['rarity'] = rarity
             
             card = Card(**card_data)
@@ -364,6 +371,7 @@ class TestSortByPrice:
         for i, price in enumerate(prices):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'price-test-{i}'
+            card_data['collector_number'] = str(i + 1)
             
             card = Card(**card_data)
             db_session.add(card)
@@ -538,6 +546,7 @@ class TestEdgeCases:
         for i in range(2):
             card_data = sample_card_data.copy()
             card_data['card_id'] = f'few-cards-{i}'
+            card_data['collector_number'] = str(i + 1)
             
             card = Card(**card_data)
             db_session.add(card)
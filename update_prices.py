@@ -1,7 +1,6 @@
 """Script per aggiornare i prezzi delle carte esistenti"""
 from database import get_db, Card, PriceHistory
 from api_integrations import ScryfallAPI
-import time
 
 def update_mtg_prices():
     api = ScryfallAPI()
@@ -20,8 +19,7 @@ def update_mtg_prices():
         
         # Fetch from API
         try:
-            result = api.search_card_by_name(card.name)
-            time.sleep(0.1)  # Rate limit
+            result = api.search_card_by_name(card.name, fresh_prices=True)  # Rate limited by ScryfallAPI
             
             if result and result.get('price_eur'):
                 price_record = PriceHistory(